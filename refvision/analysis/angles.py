@@ -0,0 +1,113 @@
+# refvision/analysis/angles.py
+"""
+Module for computing joint angles for every frame of a keypoint track at once.
+"""
+from typing import Dict, Optional, Tuple
+import numpy as np
+from refvision.common.config import get_config
+
+cfg = get_config()
+
+
+def _joint_triplets() -> Dict[str, Tuple[int, int, int]]:
+    """
+    Keypoint index triplets (segment end, joint, segment end) per joint angle.
+    :returns: (Dict[str, Tuple[int, int, int]]) Mapping of joint name to the
+    keypoint indexes that define it.
+    """
+    return {
+        "left_hip": (
+            cfg["LEFT_SHOULDER_IDX"],
+            cfg["LEFT_HIP_IDX"],
+            cfg["LEFT_KNEE_IDX"],
+        ),
+        "right_hip": (
+            cfg["RIGHT_SHOULDER_IDX"],
+            cfg["RIGHT_HIP_IDX"],
+            cfg["RIGHT_KNEE_IDX"],
+        ),
+        "left_knee": (
+            cfg["LEFT_HIP_IDX"],
+            cfg["LEFT_KNEE_IDX"],
+            cfg["LEFT_ANKLE_IDX"],
+        ),
+        "right_knee": (
+            cfg["RIGHT_HIP_IDX"],
+            cfg["RIGHT_KNEE_IDX"],
+            cfg["RIGHT_ANKLE_IDX"],
+        ),
+        "left_elbow": (
+            cfg["LEFT_SHOULDER_IDX"],
+            cfg["LEFT_ELBOW_IDX"],
+            cfg["LEFT_WRIST_IDX"],
+        ),
+        "right_elbow": (
+            cfg["RIGHT_SHOULDER_IDX"],
+            cfg["RIGHT_ELBOW_IDX"],
+            cfg["RIGHT_WRIST_IDX"],
+        ),
+    }
+
+
+def joint_angle(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """
+    Computes the angle at joint b in degrees, element-wise over leading axes.
+    :param a: (np.ndarray) (..., 2) coordinates of the first segment end.
+    :param b: (np.ndarray) (..., 2) coordinates of the joint.
+    :param c: (np.ndarray) (..., 2) coordinates of the second segment end.
+    :returns: (np.ndarray) Joint angles in [0, 180], NaN where undefined.
+    """
+    ba = a - b
+    bc = c - b
+    norms = np.linalg.norm(ba, axis=-1) * np.linalg.norm(bc, axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cos = np.sum(ba * bc, axis=-1) / norms
+    return np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+
+
+def compute_joint_angles(
+    xy: np.ndarray,
+    conf: Optional[np.ndarray] = None,
+    min_conf: float = cfg["MIN_KEYPOINT_CONF"],
+) -> Dict[str, np.ndarray]:
+    """
+    Computes hip, knee, ankle and elbow angles for all frames.
+    The ankle angle is the shin's inclination from vertical, since COCO
+    keypoints have no foot point.
+    :param xy: (np.ndarray) Keypoint track of shape (frames, 17, 2).
+    :param conf: (Optional[np.ndarray]) Keypoint confidence (frames, 17); any
+    angle that uses a keypoint below min_conf is NaN.
+    :param min_conf: (float) Minimum keypoint confidence.
+    :returns: (Dict[str, np.ndarray]) Mapping of joint name to (frames,)
+    angles in degrees.
+    """
+    xy = np.asarray(xy, dtype=float)
+    if conf is not None:
+        xy = np.where((np.asarray(conf) >= min_conf)[..., None], xy, np.nan)
+
+    angles: Dict[str, np.ndarray] = {}
+    for name, (a_idx, b_idx, c_idx) in _joint_triplets().items():
+        angles[name] = joint_angle(xy[:, a_idx], xy[:, b_idx], xy[:, c_idx])
+
+    for side in ("left", "right"):
+        knee = xy[:, cfg[f"{side.upper()}_KNEE_IDX"]]
+        ankle = xy[:, cfg[f"{side.upper()}_ANKLE_IDX"]]
+        # a point straight above the ankle gives the vertical reference
+        above = ankle - np.array([0.0, 1.0])
+        angles[f"{side}_ankle"] = joint_angle(knee, ankle, above)
+
+    return angles
+
+
+def mean_of_sides(angles: Dict[str, np.ndarray], joint: str) -> np.ndarray:
+    """
+    Averages the left and right angle of a joint, ignoring a missing side.
+    :param angles: (Dict[str, np.ndarray]) Output of compute_joint_angles.
+    :param joint: (str) Joint name without side, e.g. "knee".
+    :returns: (np.ndarray) (frames,) mean angle, NaN where both are missing.
+    """
+    both = np.stack([angles[f"left_{joint}"], angles[f"right_{joint}"]])
+    counts = np.sum(~np.isnan(both), axis=0)
+    mean = np.full(counts.shape, np.nan)
+    np.divide(np.nansum(both, axis=0), counts, out=mean, where=counts > 0)
+    return mean
@@ -0,0 +1,86 @@
+# refvision/analysis/bench_features.py
+"""
+Module for deriving the apl_rules.BenchPress lifter state from a keypoint
+track. The wrists stand in for the bar.
+"""
+import logging
+from typing import Any, Dict
+import numpy as np
+from refvision.analysis.angles import mean_of_sides
+from refvision.analysis.context import AnalysisContext, window_median
+from refvision.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# rule inputs that cannot be observed from body keypoints alone; they are
+# assumed compliant unless the caller supplies them.
+UNOBSERVED_DEFAULTS: Dict[str, Any] = {
+    "shoulders_on_bench": True,
+    "grip_width": 81,
+    "thumbs_not_wrapped": False,
+    "bar_touches_belt": False,
+    "did_not_wait_for_start_command": False,
+    "bar_contact_rack": False,
+}
+
+
+@traced()
+def extract_bench_features(context: AnalysisContext) -> Dict[str, Any]:
+    """
+    Derives the pose-observable bench press rule inputs from a keypoint track.
+    :param context: (AnalysisContext) The attempt's keypoint track and cached
+    features.
+    :returns: (Dict[str, Any]) Lifter state accepted by BenchPress.evaluate,
+    plus the frame where the bar touched the chest.
+    """
+    params = context.params
+    lockout_angle = params.get("elbow_lockout_angle", 160.0)
+    lockout_window = params.get("lockout_window", 5)
+    bounce_band = params.get("bounce_band", 0.15)
+    hip_lift_tolerance = params.get("bench_hip_lift_tolerance", 0.1)
+
+    features: Dict[str, Any] = {
+        "buttocks_on_bench": True,
+        "downward_movement_during_press": False,
+        "lockout_complete": False,
+        "turnaround_frame": None,
+    }
+
+    wrist_s = context.joint_y("wrist")
+    valid_idxs = context.valid_frames("wrist")
+    # the chest touch is the lowest bar position in the image
+    touch = context.phases("wrist")["bottom"]
+    if touch is None:
+        logger.info("No valid wrist frames in keypoint track; no bench features.")
+        return features
+
+    features["turnaround_frame"] = touch
+    start_idxs = valid_idxs[:lockout_window]
+    finish_idxs = valid_idxs[-lockout_window:]
+
+    elbow_angle = mean_of_sides(context.angles, "elbow")
+    features["lockout_complete"] = bool(
+        window_median(elbow_angle, finish_idxs) >= lockout_angle
+    )
+
+    # any downward bar movement once the press has left the chest
+    direction = context.direction("wrist")
+    frames = np.arange(direction.size)
+    top = window_median(wrist_s, start_idxs)
+    near_chest = wrist_s[:-1] >= wrist_s[touch] - bounce_band * (wrist_s[touch] - top)
+    features["downward_movement_during_press"] = bool(
+        np.any((frames >= touch) & (direction == 1) & ~near_chest)
+    )
+
+    # hips rising off the bench during the press
+    hip_s = context.joint_y("hip")
+    hip_start = window_median(hip_s, start_idxs)
+    press_hips = hip_s[touch:]
+    if press_hips.size and not np.all(np.isnan(press_hips)):
+        hip_lift = hip_start - float(np.nanmin(press_hips))
+        features["buttocks_on_bench"] = bool(
+            np.isnan(hip_lift) or hip_lift <= hip_lift_tolerance
+        )
+
+    logger.debug("Bench features => %s", features)
+    return features
@@ -0,0 +1,179 @@
+# refvision/analysis/context.py
+"""
+Per-attempt analysis context. Holds the lifter's keypoint track and caches
+derived series (joint angles, joint heights, velocities, phases) so every
+consumer and every lift analyser reads the same arrays instead of
+recomputing them.
+"""
+from functools import cached_property
+from typing import Any, Dict, List, Optional
+import numpy as np
+from refvision.analysis.angles import compute_joint_angles
+from refvision.analysis.keypoint_track import (
+    NUM_KEYPOINTS,
+    estimate_femur_length,
+    extract_keypoint_track,
+    gate_keypoints,
+    joint_indexes,
+    keypoint_quality,
+)
+from refvision.common.config import get_config
+from refvision.utils.series_utils import smooth_array
+from refvision.utils.tracing import traced
+
+cfg = get_config()
+
+
+def window_median(values: np.ndarray, idxs: np.ndarray) -> float:
+    """
+    NaN-aware median of values at the given indexes.
+    :param values: (np.ndarray) The series.
+    :param idxs: (np.ndarray) Indexes of the window.
+    :returns: (float) The median, or NaN if the window has no valid samples.
+    """
+    window = values[idxs]
+    if window.size == 0 or np.all(np.isnan(window)):
+        return float("nan")
+    return float(np.nanmedian(window))
+
+
+class AnalysisContext:
+    """
+    Keypoint track of one attempt plus lazily computed, cached features.
+    """
+
+    def __init__(self, xy: np.ndarray, conf: Optional[np.ndarray] = None) -> None:
+        """
+        :param xy: (np.ndarray) Keypoint track of shape (frames, 17, 2).
+        :param conf: (Optional[np.ndarray]) Keypoint confidence of shape
+        (frames, 17); defaults to full confidence where xy is present.
+        """
+        self.xy = np.asarray(xy, dtype=float)
+        if conf is None:
+            conf = (~np.isnan(self.xy[..., 0])).astype(float)
+        self.conf = np.asarray(conf, dtype=float)
+        self.params = cfg["LIFT_FEATURES"] or {}
+        self._series: Dict[Any, Any] = {}
+
+    @classmethod
+    @traced()
+    def from_results(cls, results: List[Any]) -> "AnalysisContext":
+        """
+        Builds the context from YOLO results.
+        :param results: (List[Any]) List of frame results from YOLO inference.
+        :returns: (AnalysisContext) The analysis context.
+        """
+        xy, conf = extract_keypoint_track(results)
+        return cls(xy, conf)
+
+    @property
+    def num_frames(self) -> int:
+        return self.xy.shape[0]
+
+    @cached_property
+    def angles(self) -> Dict[str, np.ndarray]:
+        """
+        Joint angles for every frame, computed once per attempt.
+        :returns: (Dict[str, np.ndarray]) Mapping of joint name to angles.
+        """
+        return compute_joint_angles(self.xy, self.conf)
+
+    @cached_property
+    def gated_xy(self) -> np.ndarray:
+        """
+        Keypoint track with low-confidence keypoints interpolated from the
+        neighbouring frames; the depth decision reads this instead of xy.
+        :returns: (np.ndarray) Gated keypoint track (frames, 17, 2).
+        """
+        return gate_keypoints(self.xy, self.conf, joints=range(NUM_KEYPOINTS))
+
+    @cached_property
+    def femur_length(self) -> float:
+        """
+        Body-scale unit (pixels) used to make depth margins independent of
+        the video resolution.
+        :returns: (float) Femur length in pixels, NaN if unknown.
+        """
+        return estimate_femur_length(self.gated_xy)
+
+    def joint_y(self, joint: str, smoothed: bool = True) -> np.ndarray:
+        """
+        Mean left/right height of a joint per frame, in femur lengths.
+        :param joint: (str) Joint name without side, e.g. "hip".
+        :param smoothed: (bool) Whether to apply the moving average.
+        :returns: (np.ndarray) (frames,) series, NaN where missing.
+        """
+        key = ("joint_y", joint, smoothed)
+        if key not in self._series:
+            ys = self.gated_xy[:, joint_indexes(joint), 1].mean(axis=1)
+            ys = ys / self.femur_length
+            if smoothed:
+                ys = smooth_array(ys, self.params.get("smoothing_window", 5))
+            self._series[key] = ys
+        return self._series[key]
+
+    def direction(self, joint: str) -> np.ndarray:
+        """
+        Vertical direction of a joint between consecutive frames: +1 moving
+        down (image y grows downwards), -1 moving up, 0 still or unknown.
+        :param joint: (str) Joint name without side.
+        :returns: (np.ndarray) (frames - 1,) int array.
+        """
+        key = ("direction", joint)
+        if key not in self._series:
+            velocity = np.diff(self.joint_y(joint))
+            tolerance = self.params.get("velocity_tolerance", 0.01)
+            self._series[key] = np.where(
+                velocity > tolerance, 1, np.where(velocity < -tolerance, -1, 0)
+            )
+        return self._series[key]
+
+    def phases(self, joint: str) -> Dict[str, Optional[int]]:
+        """
+        Phase boundaries of a joint's vertical motion: first and last valid
+        frame, and the frames where it is lowest ("bottom") and highest
+        ("top") in the image.
+        :param joint: (str) Joint name without side.
+        :returns: (Dict[str, Optional[int]]) Frame index per boundary, None if
+        the joint is never seen.
+        """
+        key = ("phases", joint)
+        if key not in self._series:
+            ys = self.joint_y(joint)
+            valid = np.flatnonzero(~np.isnan(ys))
+            if valid.size == 0:
+                phases: Dict[str, Optional[int]] = dict.fromkeys(
+                    ("start", "bottom", "top", "end")
+                )
+            else:
+                phases = {
+                    "start": int(valid[0]),
+                    "bottom": int(np.nanargmax(ys)),
+                    "top": int(np.nanargmin(ys)),
+                    "end": int(valid[-1]),
+                }
+            self._series[key] = phases
+        return self._series[key]
+
+    def valid_frames(self, joint: str) -> np.ndarray:
+        """
+        Indexes of frames where the joint's smoothed height is known.
+        :param joint: (str) Joint name without side.
+        :returns: (np.ndarray) Frame indexes.
+        """
+        return np.flatnonzero(~np.isnan(self.joint_y(joint)))
+
+    def quality(
+        self, frame_idx: Optional[int] = None, joints: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Keypoint quality of the attempt, see keypoint_quality.
+        :param frame_idx: (Optional[int]) The decision frame.
+        :param joints: (Optional[List[str]]) Joint names the decision depends
+        on; defaults to the hips and knees.
+        :returns: (Dict[str, Any]) The quality record.
+        """
+        idxs = None
+        if joints is not None:
+            idxs = [idx for joint in joints for idx in joint_indexes(joint)]
+        return keypoint_quality(self.conf, joints=idxs, frame_idx=frame_idx)
@@ -0,0 +1,77 @@
+# refvision/analysis/deadlift_features.py
+"""
+Module for deriving the apl_rules.Deadlift lifter state from a keypoint
+track. The wrists stand in for the bar.
+"""
+import logging
+from typing import Any, Dict
+import numpy as np
+from refvision.analysis.angles import mean_of_sides
+from refvision.analysis.context import AnalysisContext, window_median
+from refvision.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# rule inputs that cannot be observed from body keypoints alone; they are
+# assumed compliant unless the caller supplies them.
+UNOBSERVED_DEFAULTS: Dict[str, Any] = {
+    "bar_support_on_thighs": False,
+    "waited_for_down_command": True,
+    "released_bar": False,
+}
+
+
+@traced()
+def extract_deadlift_features(context: AnalysisContext) -> Dict[str, Any]:
+    """
+    Derives the pose-observable deadlift rule inputs from a keypoint track.
+    :param context: (AnalysisContext) The attempt's keypoint track and cached
+    features.
+    :returns: (Dict[str, Any]) Lifter state accepted by Deadlift.evaluate,
+    plus the lockout frame.
+    """
+    params = context.params
+    knee_lockout_angle = params.get("lockout_angle", 160.0)
+    hip_lockout_angle = params.get("hip_lockout_angle", 160.0)
+    lockout_window = params.get("lockout_window", 5)
+    bounce_band = params.get("bounce_band", 0.15)
+
+    features: Dict[str, Any] = {
+        "downward_movement": False,
+        "knees_locked": False,
+        "shoulders_back": False,
+        "turnaround_frame": None,
+    }
+
+    wrist_s = context.joint_y("wrist")
+    valid_idxs = context.valid_frames("wrist")
+    # lockout is the highest bar position in the image
+    lockout = context.phases("wrist")["top"]
+    if lockout is None:
+        logger.info("No valid wrist frames in keypoint track; no deadlift features.")
+        return features
+
+    features["turnaround_frame"] = lockout
+    half_w = lockout_window // 2
+    lockout_idxs = valid_idxs[np.abs(valid_idxs - lockout) <= half_w]
+
+    knee_angle = mean_of_sides(context.angles, "knee")
+    hip_angle = mean_of_sides(context.angles, "hip")
+    features["knees_locked"] = bool(
+        window_median(knee_angle, lockout_idxs) >= knee_lockout_angle
+    )
+    features["shoulders_back"] = bool(
+        window_median(hip_angle, lockout_idxs) >= hip_lockout_angle
+    )
+
+    # any downward bar movement between lift-off and lockout
+    direction = context.direction("wrist")
+    frames = np.arange(direction.size)
+    floor = window_median(wrist_s, valid_idxs[:lockout_window])
+    off_floor = wrist_s[:-1] < floor - bounce_band * (floor - wrist_s[lockout])
+    features["downward_movement"] = bool(
+        np.any((frames < lockout) & (direction == 1) & off_floor)
+    )
+
+    logger.debug("Deadlift features => %s", features)
+    return features
@@ -4,31 +4,30 @@ Module for checking squat depth at a given frame or by using the turnaround
 frame.
 """
 import logging
-from typing import List, Optional, Any
+import math
+from typing import Dict, List, Optional, Any, Tuple
+import numpy as np
+from refvision.analysis.context import AnalysisContext
+from refvision.analysis.keypoint_track import depth_keypoints
 from refvision.analysis.lifter_selector import select_lifter_index
 from refvision.common.config import get_config
-from refvision.utils.timer import measure_time
+from refvision.utils.tracing import traced
 
 cfg = get_config()
 
 
-@measure_time
-def check_squat_depth_at_frame(
-    results: List[Any], frame_idx: int, threshold: float = cfg["THRESHOLD"]
-) -> Optional[dict]:
+def _hip_knee_y_from_results(
+    results: List[Any], frame_idx: int
+) -> Optional[Tuple[float, float, float, float]]:
     """
-    Evaluates squat depth at a given frame by comparing the average hip and
-    knee positions.
+    Reads the lifter's hip and knee y-coordinates for one frame from the raw
+    YOLO results.
     :param results: (List[Any]) List of frame results from YOLO inference.
-    :param frame_idx: (int) Index of the frame to evaluate
-    :param threshold: (float) Depth THRESHOLD for a “Good Lift!”
-    :returns: (Optional[str]) "Good Lift!" if the squat meets the THRESHOLD;
-    "No Lift" otherwise, or None if invalid.
+    :param frame_idx: (int) Index of the frame to read.
+    :returns: (Optional[Tuple[float, float, float, float]]) Left hip, right
+    hip, left knee and right knee y, or None if unavailable.
     """
     logger = logging.getLogger(__name__)
-    logger.debug(
-        f"=== check_squat_depth_at_frame(frame_idx={frame_idx}, THRESHOLD={threshold}) ==="
-    )
     if frame_idx is None or frame_idx < 0 or frame_idx >= len(results):
         logger.debug("Invalid frame_idx. Returning None.")
         return None
@@ -58,74 +57,164 @@ def check_squat_depth_at_frame(
         logger.debug("Not enough keypoints to retrieve hips/knees.")
         return None
 
-    left_hip_y = kpts_xy[cfg["LEFT_HIP_IDX"], 1].item()
-    right_hip_y = kpts_xy[cfg["RIGHT_HIP_IDX"], 1].item()
-    left_knee_y = kpts_xy[cfg["LEFT_KNEE_IDX"], 1].item()
-    right_knee_y = kpts_xy[cfg["RIGHT_KNEE_IDX"], 1].item()
+    return (
+        kpts_xy[cfg["LEFT_HIP_IDX"], 1].item(),
+        kpts_xy[cfg["RIGHT_HIP_IDX"], 1].item(),
+        kpts_xy[cfg["LEFT_KNEE_IDX"], 1].item(),
+        kpts_xy[cfg["RIGHT_KNEE_IDX"], 1].item(),
+    )
+
+
+def _hip_knee_y_from_context(
+    context: AnalysisContext, frame_idx: int
+) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Reads the hip and knee y-coordinates for one frame from the
+    confidence-gated keypoint track.
+    :param context: (AnalysisContext) Shared analysis context.
+    :param frame_idx: (int) Index of the frame to read.
+    :returns: (Optional[Tuple[float, float, float, float]]) Left hip, right
+    hip, left knee and right knee y, or None if unavailable.
+    """
+    if frame_idx is None or frame_idx < 0 or frame_idx >= context.num_frames:
+        return None
+    ys = context.gated_xy[frame_idx, depth_keypoints(), 1]
+    if np.isnan(ys).any():
+        logging.getLogger(__name__).debug("Gated hips/knees missing. Returning None.")
+        return None
+    left_hip_y, right_hip_y, left_knee_y, right_knee_y = (float(y) for y in ys)
+    return left_hip_y, right_hip_y, left_knee_y, right_knee_y
+
+
+@traced()
+def check_squat_depth_at_frame(
+    results: List[Any],
+    frame_idx: int,
+    threshold: float = cfg["THRESHOLD"],
+    context: Optional[AnalysisContext] = None,
+    normalised_threshold: float = cfg["NORMALISED_THRESHOLD"],
+) -> Optional[dict]:
+    """
+    Evaluates squat depth at a given frame by comparing the average hip and
+    knee positions.
+    :param results: (List[Any]) List of frame results from YOLO inference.
+    :param frame_idx: (int) Index of the frame to evaluate
+    :param threshold: (float) Depth THRESHOLD (pixels) for a “Good Lift!”
+    :param context: (Optional[AnalysisContext]) Shared analysis context; if
+    given, the confidence-gated track is used, the decision compares the
+    femur-normalised margin, and the cached knee angles at frame_idx are
+    added to the keypoints.
+    :param normalised_threshold: (float) Depth THRESHOLD in femur lengths,
+    used when the body scale is known.
+    :returns: (Optional[str]) "Good Lift!" if the squat meets the THRESHOLD;
+    "No Lift" otherwise, or None if invalid.
+    """
+    logger = logging.getLogger(__name__)
+    logger.debug(
+        "=== check_squat_depth_at_frame(frame_idx=%s, THRESHOLD=%s) ===",
+        frame_idx,
+        threshold,
+    )
+    if context is not None:
+        hip_knee_y = _hip_knee_y_from_context(context, frame_idx)
+    else:
+        hip_knee_y = _hip_knee_y_from_results(results, frame_idx)
+    if hip_knee_y is None:
+        return None
+    left_hip_y, right_hip_y, left_knee_y, right_knee_y = hip_knee_y
 
     avg_hip_y = (left_hip_y + right_hip_y) / 2.0
     avg_knee_y = (left_knee_y + right_knee_y) / 2.0
     best_delta = avg_hip_y - avg_knee_y
 
     logger.debug(
-        f"Frame {frame_idx}: left_hip_y={left_hip_y}, right_hip_y={right_hip_y}, "
-        f"left_knee_y={left_knee_y}, right_knee_y={right_knee_y}, "
-        f"avg_hip_y={avg_hip_y}, avg_knee_y={avg_knee_y}, best_delta={best_delta}, THRESHOLD={threshold}"
+        "Frame %s: left_hip_y=%s, right_hip_y=%s, left_knee_y=%s, "
+        "right_knee_y=%s, avg_hip_y=%s, avg_knee_y=%s, best_delta=%s, "
+        "THRESHOLD=%s",
+        frame_idx,
+        left_hip_y,
+        right_hip_y,
+        left_knee_y,
+        right_knee_y,
+        avg_hip_y,
+        avg_knee_y,
+        best_delta,
+        threshold,
     )
-    decision = "Good Lift!" if best_delta > threshold else "No Lift"
+    depth_margin = {"raw_px": best_delta, "normalised": None, "femur_length_px": None}
+    if context is not None and math.isfinite(context.femur_length):
+        # femur-normalised margin means the same thing at any resolution
+        normalised = best_delta / context.femur_length
+        depth_margin["normalised"] = normalised
+        depth_margin["femur_length_px"] = context.femur_length
+        decision = "Good Lift!" if normalised > normalised_threshold else "No Lift"
+    else:
+        decision = "Good Lift!" if best_delta > threshold else "No Lift"
+    keypoints: Dict[str, Optional[float]] = {
+        "left hip y": left_hip_y,
+        "right hip y": right_hip_y,
+        "left knee y": left_knee_y,
+        "right knee y": right_knee_y,
+        "average hip y": avg_hip_y,
+        "average knee y": avg_knee_y,
+        "best delta": best_delta,
+    }
+    if context is not None:
+        for side in ("left", "right"):
+            angle = float(context.angles[f"{side}_knee"][frame_idx])
+            keypoints[f"{side} knee angle"] = None if math.isnan(angle) else angle
     return {
         "decision": decision,
         "turnaround_frame": frame_idx,
-        "keypoints": {
-            "left hip y": left_hip_y,
-            "right hip y": right_hip_y,
-            "left knee y": left_knee_y,
-            "right knee y": right_knee_y,
-            "average hip y": avg_hip_y,
-            "average knee y": avg_knee_y,
-            "best delta": best_delta,
-        },
+        "keypoints": keypoints,
+        "depth_margin": depth_margin,
     }
 
 
-@measure_time
+@traced()
 def check_squat_depth_by_turnaround(
-    results: List[Any], threshold: float = cfg["THRESHOLD"]
+    results: List[Any],
+    threshold: float = cfg["THRESHOLD"],
+    context: Optional[AnalysisContext] = None,
 ) -> dict:
     """
     uses find_turnaround_frame to select the squat’s bottom frame and then
     evaluates the squat depth.
     :param results: (List[Any]) List of frame results from YOLO inference
     :param threshold: (float): Depth THRESHOLD for a “Good Lift!”
+    :param context: (Optional[AnalysisContext]) Shared analysis context; if
+    given, the decision uses the confidence-gated track and reports its
+    keypoint quality.
     :returns: (str) "Good Lift!" if the squat is deep enough; else "No Lift".
     """
     import refvision.analysis.find_turnaround_frame as td  # import here to avoid circular dependency.
 
     logger = logging.getLogger(__name__)
     logger.debug(f"=== check_squat_depth_by_turnaround(THRESHOLD={threshold}) ===")
-    turnaround_idx = td.find_turnaround_frame(results)
+    turnaround_idx = td.find_turnaround_frame(results, context=context)
 
     logger.debug(f"Turnaround frame => {turnaround_idx}")
 
+    result: Dict[str, Any]
     if turnaround_idx is None:
         logger.info("No valid turnaround frame found, returning No Lift.")
-        return {"decision": "No Lift", "turnaround_frame": None, "keypoints": {}}
-
-    result = check_squat_depth_at_frame(results, turnaround_idx, threshold)
-
-    if not result:
-        return {
+        result = {"decision": "No Lift", "turnaround_frame": None, "keypoints": {}}
+    else:
+        result = check_squat_depth_at_frame(
+            results, turnaround_idx, threshold, context
+        ) or {
             "decision": "No Lift",
             "turnaround_frame": turnaround_idx,
             "keypoints": {},
         }
 
+    if context is not None:
+        result["quality"] = context.quality(turnaround_idx)
+        if result["quality"]["escalate"]:
+            logger.warning(f"Low keypoint quality => {result['quality']}")
+
     logger.debug(f"Decision from turnaround frame => {result['decision']}")
     final = result["decision"] if result["decision"] == "Good Lift!" else "No Lift"
     logger.info(f"check_squat_depth_by_turnaround => {final}")
 
     return result
-
-
-# todo: I'd like to improve the annotation for the skeleton that is created.
-#  For example, to calculate the joint angles at the knee. How can i do that?
@@ -4,31 +4,65 @@ Module for detecting the turnaround (bottom) frame in a squat video
 """
 import logging
 from typing import List, Optional, Any, cast
+import numpy as np
+from refvision.analysis.context import AnalysisContext
 from refvision.analysis.lifter_selector import select_lifter_index
-from refvision.utils.series_utils import smooth_series
+from refvision.utils.series_utils import smooth_array, smooth_series
 from refvision.common.config import get_config
+from refvision.utils.tracing import traced
 
 cfg = get_config()
 
 
+def find_turnaround_in_track(
+    hip_y: np.ndarray, smoothing_window: int = 1
+) -> Optional[int]:
+    """
+    Vectorised turnaround search over a hip height series.
+    :param hip_y: (np.ndarray) Average hip y per frame, NaN where missing.
+    :param smoothing_window: (int) Size of the moving average window for smoothing.
+    :returns: (Optional[int]) The index of the turnaround frame or None if not
+    found.
+    """
+    smoothed = smooth_array(hip_y, window_size=smoothing_window)
+    if smoothed.size == 0 or np.all(np.isnan(smoothed)):
+        return None
+    return int(np.nanargmax(smoothed))
+
+
+@traced()
 def find_turnaround_frame(
-    results: List[Any], smoothing_window: int = 1
+    results: List[Any],
+    smoothing_window: int = 1,
+    context: Optional[AnalysisContext] = None,
 ) -> Optional[int]:
     """
     Identifies the frame where the lifter reaches their lowest hip position
     (i.e. the highest y value) in the video.
     :param results: (List[Any]) List of frame results from YOLO inference.
     :param smoothing_window: (int) Size of the moving average window for smoothing.
+    :param context: (Optional[AnalysisContext]) Shared analysis context; if
+    given, the confidence-gated keypoint track is used instead of results.
     :returns: (Optional[int]) The index of the turnaround frame or None if not
     found.
     """
     logger = logging.getLogger(__name__)
-    logger.debug("=== find_turnaround_frame called ===")
+    # the per-frame loop below only formats debug messages when they are on
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("=== find_turnaround_frame called ===")
+    if context is not None:
+        hips = context.gated_xy[:, [cfg["LEFT_HIP_IDX"], cfg["RIGHT_HIP_IDX"]], 1]
+        best = find_turnaround_in_track(hips.mean(axis=1), smoothing_window)
+        logger.info("Turnaround frame index (gated track) => %s", best)
+        return best
+
     hip_positions: List[Optional[float]] = []
 
     for f_idx, frame_result in enumerate(results):
         if not frame_result.keypoints or not frame_result.boxes:
-            logger.debug(f"Frame {f_idx}: No keypoints or boxes. Marking as None.")
+            if debug:
+                logger.debug("Frame %d: No keypoints or boxes. Marking as None.", f_idx)
             hip_positions.append(None)
             continue
 
@@ -39,7 +73,8 @@ def find_turnaround_frame(
 
         lifter_idx = select_lifter_index(frame_result.boxes, orig_w, orig_h)
         if lifter_idx is None:
-            logger.debug(f"Frame {f_idx}: No lifter selected. Marking as None.")
+            if debug:
+                logger.debug("Frame %d: No lifter selected. Marking as None.", f_idx)
             hip_positions.append(None)
             continue
 
@@ -50,7 +85,8 @@ def find_turnaround_frame(
             kpts_xy = kpts.xy
 
         if kpts_xy.shape[0] <= cfg["RIGHT_HIP_IDX"]:
-            logger.debug(f"Frame {f_idx}: Not enough keypoints. Marking as None.")
+            if debug:
+                logger.debug("Frame %d: Not enough keypoints. Marking as None.", f_idx)
             hip_positions.append(None)
             continue
 
@@ -58,18 +94,24 @@ def find_turnaround_frame(
         right_hip_y = kpts_xy[cfg["RIGHT_HIP_IDX"], 1].item()
         avg_hip_y = (left_hip_y + right_hip_y) / 2.0
 
-        logger.debug(
-            f"Frame {f_idx}: lifter_idx={lifter_idx}, left_hip_y={left_hip_y}, "
-            f"right_hip_y={right_hip_y}, avg_hip_y={avg_hip_y}"
-        )
+        if debug:
+            logger.debug(
+                "Frame %d: lifter_idx=%s, left_hip_y=%s, right_hip_y=%s, "
+                "avg_hip_y=%s",
+                f_idx,
+                lifter_idx,
+                left_hip_y,
+                right_hip_y,
+                avg_hip_y,
+            )
         hip_positions.append(avg_hip_y)
 
     smoothed_hips = smooth_series(hip_positions, window_size=smoothing_window)
-    logger.debug(f"Hip positions (raw): {hip_positions}")
-    logger.debug(f"Hip positions (smoothed): {smoothed_hips}")
-
     valid_idxs = [i for i, v in enumerate(smoothed_hips) if v is not None]
-    logger.debug(f"Valid indexes: {valid_idxs}")
+    if debug:
+        logger.debug("Hip positions (raw): %s", hip_positions)
+        logger.debug("Hip positions (smoothed): %s", smoothed_hips)
+        logger.debug("Valid indexes: %s", valid_idxs)
     if not valid_idxs:
         logger.info("No valid frames to determine a turnaround. Returning None.")
         return None
@@ -83,5 +125,5 @@ def find_turnaround_frame(
         ),
     )
 
-    logger.info(f"Turnaround frame index (global max) => {best_idx}")
+    logger.info("Turnaround frame index (global max) => %s", best_idx)
     return best_idx
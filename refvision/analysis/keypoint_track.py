@@ -0,0 +1,195 @@
+# refvision/analysis/keypoint_track.py
+"""
+Module for turning per-frame YOLO results into a dense keypoint track, so
+that downstream analysis can work on numpy arrays instead of result objects.
+"""
+
+import logging
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+import numpy as np
+from refvision.analysis.lifter_selector import select_lifter_index
+from refvision.common.config import get_config
+from refvision.utils.series_utils import interpolate_gaps
+
+cfg = get_config()
+
+NUM_KEYPOINTS = 17
+
+logger = logging.getLogger(__name__)
+
+
+def _to_numpy(value: Any) -> np.ndarray:
+    """
+    Converts a tensor-like value (torch tensor, numpy array, list) to numpy.
+    :param value: (Any) The value to convert.
+    :returns: (np.ndarray) The value as a float numpy array.
+    """
+    if hasattr(value, "cpu"):
+        value = value.cpu()
+    if hasattr(value, "numpy"):
+        value = value.numpy()
+    return np.asarray(value, dtype=float)
+
+
+def extract_keypoint_track(results: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Collects the lifter's keypoints from every frame into dense arrays.
+    Frames without a lifter are filled with NaN coordinates and zero
+    confidence.
+    :param results: (List[Any]) List of frame results from YOLO inference.
+    :returns: (Tuple[np.ndarray, np.ndarray]) Keypoint coordinates of shape
+    (frames, 17, 2) and per-keypoint confidence of shape (frames, 17).
+    """
+    n_frames = len(results)
+    xy = np.full((n_frames, NUM_KEYPOINTS, 2), np.nan)
+    conf = np.zeros((n_frames, NUM_KEYPOINTS))
+
+    for f_idx, frame_result in enumerate(results):
+        if not frame_result.keypoints or not frame_result.boxes:
+            continue
+
+        if hasattr(frame_result, "orig_shape") and frame_result.orig_shape:
+            orig_h, orig_w = frame_result.orig_shape
+        else:
+            orig_h, orig_w = 640, 640
+
+        lifter_idx = select_lifter_index(frame_result.boxes, orig_w, orig_h)
+        if lifter_idx is None:
+            continue
+
+        kpts = frame_result.keypoints[lifter_idx]
+        kpts_xy = _to_numpy(kpts.xy).reshape(-1, 2)[:NUM_KEYPOINTS]
+        n_kpts = kpts_xy.shape[0]
+        xy[f_idx, :n_kpts] = kpts_xy
+
+        kpts_conf = getattr(kpts, "conf", None)
+        if kpts_conf is None:
+            conf[f_idx, :n_kpts] = 1.0
+        else:
+            conf[f_idx, :n_kpts] = _to_numpy(kpts_conf).reshape(-1)[:n_kpts]
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Extracted keypoint track: %d frames, %d with a lifter.",
+            n_frames,
+            int(np.sum(np.any(conf > 0, axis=1))),
+        )
+    return xy, conf
+
+
+def joint_indexes(joint: str) -> List[int]:
+    """
+    Left and right keypoint indexes of a joint.
+    :param joint: (str) Joint name without side, e.g. "knee".
+    :returns: (List[int]) The left and right keypoint indexes.
+    """
+    return [cfg[f"LEFT_{joint.upper()}_IDX"], cfg[f"RIGHT_{joint.upper()}_IDX"]]
+
+
+def depth_keypoints() -> List[int]:
+    """
+    Indexes of the keypoints the depth decision depends on (hips and knees).
+    :returns: (List[int]) Keypoint indexes.
+    """
+    return [
+        cfg["LEFT_HIP_IDX"],
+        cfg["RIGHT_HIP_IDX"],
+        cfg["LEFT_KNEE_IDX"],
+        cfg["RIGHT_KNEE_IDX"],
+    ]
+
+
+def gate_keypoints(
+    xy: np.ndarray,
+    conf: np.ndarray,
+    joints: Optional[Sequence[int]] = None,
+    min_conf: float = cfg["MIN_KEYPOINT_CONF"],
+    max_gap: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Masks low-confidence keypoints and refills them by interpolating between
+    the neighbouring confident frames, so occluded joints don't inject
+    garbage coordinates into smoothing and the depth decision.
+    :param xy: (np.ndarray) Keypoint track of shape (frames, 17, 2).
+    :param conf: (np.ndarray) Keypoint confidence of shape (frames, 17).
+    :param joints: (Optional[Sequence[int]]) Keypoints to gate; defaults to
+    the hips and knees.
+    :param min_conf: (float) Minimum keypoint confidence.
+    :param max_gap: (Optional[int]) Longest run of frames to interpolate;
+    defaults to KEYPOINT_GATING.max_gap.
+    :returns: (np.ndarray) Gated copy of xy.
+    """
+    if joints is None:
+        joints = depth_keypoints()
+    if max_gap is None:
+        max_gap = (cfg["KEYPOINT_GATING"] or {}).get("max_gap", 15)
+
+    gated = np.array(xy, dtype=float)
+    joints = list(joints)
+    low = conf[:, joints] < min_conf
+    gated[:, joints] = np.where(low[..., None], np.nan, gated[:, joints])
+    for j in joints:
+        for axis in (0, 1):
+            gated[:, j, axis] = interpolate_gaps(gated[:, j, axis], max_gap)
+    return gated
+
+
+def keypoint_quality(
+    conf: np.ndarray,
+    joints: Optional[Sequence[int]] = None,
+    min_conf: float = cfg["MIN_KEYPOINT_CONF"],
+    frame_idx: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Summarises how trustworthy the keypoints behind a decision are.
+    :param conf: (np.ndarray) Keypoint confidence of shape (frames, 17).
+    :param joints: (Optional[Sequence[int]]) Keypoints to score; defaults to
+    the hips and knees.
+    :param min_conf: (float) Minimum keypoint confidence.
+    :param frame_idx: (Optional[int]) Decision frame (e.g. the turnaround);
+    its weakest keypoint confidence is reported separately.
+    :returns: (Dict[str, Any]) The quality score in [0, 1], its components,
+    and whether the attempt should be escalated for re-processing.
+    """
+    if joints is None:
+        joints = depth_keypoints()
+    min_quality = (cfg["KEYPOINT_GATING"] or {}).get("min_quality", 0.6)
+
+    joint_conf = conf[:, list(joints)]
+    detected = np.any(joint_conf > 0, axis=1)
+    detected_ratio = float(detected.mean()) if detected.size else 0.0
+    confident_ratio = (
+        float((joint_conf[detected] >= min_conf).mean()) if detected.any() else 0.0
+    )
+    decision_conf = None
+    if frame_idx is not None and 0 <= frame_idx < conf.shape[0]:
+        decision_conf = float(joint_conf[frame_idx].min())
+
+    score = detected_ratio * confident_ratio
+    if decision_conf is not None and decision_conf < min_conf:
+        score *= decision_conf / min_conf
+
+    return {
+        "score": score,
+        "detected_frames": detected_ratio,
+        "confident_keypoints": confident_ratio,
+        "decision_frame_confidence": decision_conf,
+        "escalate": bool(score < min_quality),
+    }
+
+
+def estimate_femur_length(xy: np.ndarray) -> float:
+    """
+    Estimates the lifter's femur length in pixels from the hip-knee distance
+    over the whole track, as a body-scale unit for resolution-invariant
+    metrics. The median over frames is robust to a few bad detections.
+    :param xy: (np.ndarray) Keypoint track of shape (frames, 17, 2).
+    :returns: (float) Femur length in pixels, NaN if it cannot be estimated.
+    """
+    hips = xy[:, [cfg["LEFT_HIP_IDX"], cfg["RIGHT_HIP_IDX"]]]
+    knees = xy[:, [cfg["LEFT_KNEE_IDX"], cfg["RIGHT_KNEE_IDX"]]]
+    lengths = np.linalg.norm(hips - knees, axis=-1).ravel()
+    lengths = lengths[np.isfinite(lengths) & (lengths > 0)]
+    if lengths.size == 0:
+        return float("nan")
+    return float(np.median(lengths))
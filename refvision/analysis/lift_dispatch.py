@@ -0,0 +1,164 @@
+# refvision/analysis/lift_dispatch.py
+"""
+Dispatches an attempt to the analyser for its lift type. Every analyser reads
+the same AnalysisContext, so features shared between lifts (gated track,
+joint angles, smoothed joint heights, velocities) are computed once.
+"""
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from refvision.analysis import bench_features, deadlift_features, squat_features
+from refvision.analysis.context import AnalysisContext
+from refvision.apl_rules import (
+    BenchPress,
+    Deadlift,
+    LiftEvaluationResult,
+    LiftRules,
+    Squat,
+)
+from refvision.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+class LiftAnalyser:
+    """
+    Feature extractor and rule set for one lift type.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        extract: Callable[[AnalysisContext], Dict[str, Any]],
+        rules: LiftRules,
+        unobserved_defaults: Dict[str, Any],
+        joints: List[str],
+    ) -> None:
+        """
+        :param name: (str) Canonical lift name.
+        :param extract: (Callable) Derives the pose-observable rule inputs.
+        :param rules: (LiftRules) The lift's rule set.
+        :param unobserved_defaults: (Dict[str, Any]) Rule inputs that cannot be
+        observed from keypoints.
+        :param joints: (List[str]) Joints the decision depends on, used to
+        score keypoint quality.
+        """
+        self.name = name
+        self.extract = extract
+        self.rules = rules
+        self.unobserved_defaults = unobserved_defaults
+        self.joints = joints
+
+
+ANALYSERS: Dict[str, LiftAnalyser] = {
+    "squat": LiftAnalyser(
+        "squat",
+        squat_features.extract_squat_features,
+        Squat(),
+        squat_features.UNOBSERVED_DEFAULTS,
+        ["hip", "knee"],
+    ),
+    "bench": LiftAnalyser(
+        "bench",
+        bench_features.extract_bench_features,
+        BenchPress(),
+        bench_features.UNOBSERVED_DEFAULTS,
+        ["wrist", "elbow", "hip"],
+    ),
+    "deadlift": LiftAnalyser(
+        "deadlift",
+        deadlift_features.extract_deadlift_features,
+        Deadlift(),
+        deadlift_features.UNOBSERVED_DEFAULTS,
+        ["wrist", "hip", "knee"],
+    ),
+}
+
+LIFT_ALIASES: Dict[str, str] = {
+    "squat": "squat",
+    "bench": "bench",
+    "bench press": "bench",
+    "benchpress": "bench",
+    "bench_press": "bench",
+    "deadlift": "deadlift",
+    "dead lift": "deadlift",
+}
+
+
+def normalise_lift_type(lift: str) -> str:
+    """
+    Maps a lift name as entered in the lifter metadata to its analyser key.
+    :param lift: (str) Lift name, e.g. "Squat" or "Bench Press".
+    :returns: (str) One of the ANALYSERS keys.
+    :raises ValueError: If the lift type is unknown.
+    """
+    key = " ".join(str(lift).strip().lower().split())
+    if key not in LIFT_ALIASES:
+        raise ValueError(f"Unknown lift type: {lift!r}")
+    return LIFT_ALIASES[key]
+
+
+@traced()
+def evaluate_lift(
+    lift: str,
+    context: AnalysisContext,
+    extra_state: Optional[Dict[str, Any]] = None,
+) -> Tuple[LiftEvaluationResult, Dict[str, Any]]:
+    """
+    Extracts the lift's rule features from the context and evaluates them.
+    :param lift: (str) Lift type.
+    :param context: (AnalysisContext) The attempt's analysis context.
+    :param extra_state: (Optional[Dict[str, Any]]) Rule inputs that cannot be
+    observed from keypoints (e.g. referee commands); overrides the defaults.
+    :returns: (Tuple[LiftEvaluationResult, Dict[str, Any]]) The evaluation
+    result and the features it was derived from.
+    """
+    analyser = ANALYSERS[normalise_lift_type(lift)]
+    features = analyser.extract(context)
+    state = {**analyser.unobserved_defaults, **features, **(extra_state or {})}
+    result = analyser.rules.evaluate(state)
+    logger.info(f"{analyser.name} rule evaluation => {result}")
+    return result, features
+
+
+@traced()
+def analyse_attempt(
+    lift: str,
+    results: List[Any],
+    context: Optional[AnalysisContext] = None,
+    extra_state: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Builds the decision record for an attempt of any lift type.
+    Squats keep the depth check at the turnaround frame as the decision;
+    bench presses and deadlifts are decided by their pose-derived rules.
+    :param lift: (str) Lift type.
+    :param results: (List[Any]) List of frame results from YOLO inference.
+    :param context: (Optional[AnalysisContext]) Shared analysis context; built
+    from results if not given.
+    :param extra_state: (Optional[Dict[str, Any]]) Non-observable rule inputs.
+    :returns: (Dict[str, Any]) The decision record.
+    """
+    from refvision.analysis.depth_checker import check_squat_depth_by_turnaround
+
+    name = normalise_lift_type(lift)
+    if context is None:
+        context = AnalysisContext.from_results(results)
+
+    rules, features = evaluate_lift(name, context, extra_state)
+    if name == "squat":
+        decision = check_squat_depth_by_turnaround(results, context=context)
+    else:
+        frame_idx = features["turnaround_frame"]
+        decision = {
+            "decision": "Good Lift!" if rules.is_successful else "No Lift",
+            "turnaround_frame": frame_idx,
+            "keypoints": {},
+            "quality": context.quality(frame_idx, ANALYSERS[name].joints),
+        }
+
+    decision["lift"] = name
+    decision["rule_evaluation"] = {
+        "is_successful": rules.is_successful,
+        "reasons": rules.reasons,
+    }
+    return decision
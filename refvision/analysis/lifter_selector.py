@@ -44,7 +44,9 @@ def select_lifter_index(boxes: List[Any], orig_w: int, orig_h: int) -> Optional[
         # if a lifter_id is specified, select that detection immediately
         if lifter_id is not None and hasattr(box, "stack_id"):
             if box.id == lifter_id:
-                logger.debug(f"Selecting detection {i} based on lifter_id {lifter_id}.")
+                logger.debug(
+                    "Selecting detection %d based on lifter_id %s.", i, lifter_id
+                )
                 return i
 
         xyxy = box.xyxy[0]
@@ -67,5 +69,5 @@ def select_lifter_index(boxes: List[Any], orig_w: int, orig_h: int) -> Optional[
             best_score = score
             best_idx = i
 
-    logger.debug(f"Selected detection index {best_idx} with score {best_score}.")
+    logger.debug("Selected detection index %s with score %s.", best_idx, best_score)
     return best_idx
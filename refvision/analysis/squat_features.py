@@ -0,0 +1,115 @@
+# refvision/analysis/squat_features.py
+"""
+Module for deriving the apl_rules.Squat lifter state from a keypoint track.
+All rule features are computed from one set of per-frame arrays (hip height,
+knee angle, hip velocity) so the whole rule set costs a single sweep.
+"""
+import logging
+from typing import Any, Dict
+import numpy as np
+from refvision.analysis.angles import mean_of_sides
+from refvision.analysis.context import AnalysisContext, window_median
+from refvision.common.config import get_config
+from refvision.utils.tracing import traced
+
+cfg = get_config()
+
+logger = logging.getLogger(__name__)
+
+# rule inputs that cannot be observed from body keypoints alone; they are
+# assumed compliant unless the caller supplies them.
+UNOBSERVED_DEFAULTS: Dict[str, Any] = {
+    "bar_position": 0,
+    "waited_for_rack_command": True,
+    "spotter_contact": False,
+    "elbows_touch_legs": False,
+}
+
+
+@traced()
+def extract_squat_features(
+    context: AnalysisContext, threshold: float = cfg["NORMALISED_THRESHOLD"]
+) -> Dict[str, Any]:
+    """
+    Derives the pose-observable squat rule inputs from a keypoint track.
+    :param context: (AnalysisContext) The attempt's keypoint track and cached
+    joint angles.
+    :param threshold: (float) Hip-minus-knee depth THRESHOLD for parallel,
+    in femur lengths.
+    :returns: (Dict[str, Any]) Lifter state accepted by Squat.evaluate, plus
+    the turnaround frame and depth margin used to derive it. Positions and
+    velocities are measured in femur lengths, so the result does not depend
+    on the video resolution.
+    """
+    params = context.params
+    lockout_angle = params.get("lockout_angle", 160.0)
+    lockout_window = params.get("lockout_window", 5)
+    bounce_band = params.get("bounce_band", 0.15)
+
+    features: Dict[str, Any] = {
+        "knees_locked": False,
+        "descent_below_parallel": False,
+        "double_bounce": False,
+        "downward_movement_during_ascent": False,
+        "knees_locked_at_finish": False,
+        "turnaround_frame": None,
+        "depth_margin": None,
+        "depth_margin_px": None,
+    }
+
+    hip_s = context.joint_y("hip")
+    valid_idxs = context.valid_frames("hip")
+    # the global max of smoothed hip y; None when there are no valid frames
+    turnaround = context.phases("hip")["bottom"]
+    if turnaround is None:
+        logger.info("No valid frames in keypoint track; no squat features.")
+        return features
+
+    hip_y = context.joint_y("hip", smoothed=False)
+    knee_y = context.joint_y("knee", smoothed=False)
+    knee_angle = mean_of_sides(context.angles, "knee")
+
+    # depth at the turnaround
+    delta = float(hip_y[turnaround] - knee_y[turnaround])
+    features["turnaround_frame"] = turnaround
+    if not np.isnan(delta):
+        features["depth_margin"] = delta
+        features["depth_margin_px"] = delta * context.femur_length
+    features["descent_below_parallel"] = bool(delta > threshold)
+
+    # lockout windows at the start and the end of the track
+    start_idxs = valid_idxs[:lockout_window]
+    finish_idxs = valid_idxs[-lockout_window:]
+    features["knees_locked"] = bool(
+        window_median(knee_angle, start_idxs) >= lockout_angle
+    )
+    features["knees_locked_at_finish"] = bool(
+        window_median(knee_angle, finish_idxs) >= lockout_angle
+    )
+
+    # hip direction (+1 = descending) from the shared velocity cache
+    direction = context.direction("hip")
+
+    # the ascent runs from the turnaround until the knees first lock out
+    frames = np.arange(direction.size)
+    locked_after = np.flatnonzero(
+        (np.arange(knee_angle.size) > turnaround) & (knee_angle >= lockout_angle)
+    )
+    ascent_end = int(locked_after[0]) if locked_after.size else int(valid_idxs[-1])
+    in_ascent = (frames >= turnaround) & (frames < ascent_end)
+
+    top = window_median(hip_s, start_idxs)
+    depth_range = hip_s[turnaround] - top
+    near_bottom = hip_s[:-1] >= hip_s[turnaround] - bounce_band * depth_range
+
+    # reversals from descending to ascending are "bottoms"
+    moving = np.flatnonzero(direction != 0)
+    moving_dirs = direction[moving]
+    bottom_idxs = moving[1:][(moving_dirs[:-1] == 1) & (moving_dirs[1:] == -1)]
+    features["double_bounce"] = bool(np.count_nonzero(near_bottom[bottom_idxs]) > 1)
+    features["downward_movement_during_ascent"] = bool(
+        np.any(in_ascent & (direction == 1) & ~near_bottom)
+    )
+
+    logger.debug("Squat features => %s", features)
+    return features
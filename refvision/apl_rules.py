@@ -1,9 +1,13 @@
 # refvision/apl_rules.py
 """
 Rules for failing lifts.
+Each lift declares its rules as vectorised failure masks over columns of rule
+features, so a whole season of attempts can be evaluated in one call with
+evaluate_batch(); evaluate() keeps the per-attempt dict API on top of it.
 """
 
-from typing import Dict, Any, List
+from typing import Any, Callable, Dict, List, Mapping, Sequence, Tuple
+import numpy as np
 
 
 class LiftEvaluationResult:
@@ -38,352 +42,317 @@ class LiftEvaluationResult:
         )
 
 
-class Squat:
+class RuleColumns:
     """
-    Evaluates a squat lift attempt based on defined rules.
+    Columnar view of rule features for a batch of attempts. Missing columns
+    fall back to a per-rule default, mirroring dict.get on a single state.
     """
 
-    def evaluate(self, lifter_state: Dict[str, Any]) -> LiftEvaluationResult:
-        """
-        Evaluates a lifter's squat performance against the rules.
-
-        :param lifter_state: The state of the lifter during the squat attempt.
-        :returns: The result of the squat evaluation.
-        """
-        result: LiftEvaluationResult = LiftEvaluationResult()
-        self.rule_bar_position(lifter_state, result)
-        self.rule_knees_locked_at_start(lifter_state, result)
-        self.rule_descent_below_parallel(lifter_state, result)
-        self.rule_no_double_bounce(lifter_state, result)
-        self.rule_no_downward_movement_during_ascent(lifter_state, result)
-        self.rule_knees_locked_at_completion(lifter_state, result)
-        self.rule_wait_for_commands(lifter_state, result)
-        self.rule_no_spotter_contact(lifter_state, result)
-        self.rule_no_elbow_leg_contact(lifter_state, result)
-        return result
-
-    def rule_bar_position(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
-    ) -> None:
-        """
-        Validates the bar position.
-
-        :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
-        """
-        if state.get("bar_position", 4) > 3:
-            result.add_failure("Bar held more than 3cm below posterior deltoids.")
-
-    def rule_knees_locked_at_start(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
-    ) -> None:
-        """
-        Validates that the knees are locked at the start.
-
-        :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
-        """
-        if not state.get("knees_locked", False):
-            result.add_failure("Knees not locked at the start.")
-
-    def rule_descent_below_parallel(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
-    ) -> None:
-        """
-        Validates the depth of the squat.
-
-        :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
-        """
-        if not state.get("descent_below_parallel", False):
-            result.add_failure("Top of legs at hip joint not below top of knees.")
-
-    def rule_no_double_bounce(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
-    ) -> None:
-        """
-        Ensures no double bouncing during the lift.
-
-        :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
-        """
-        if state.get("double_bounce", False):
-            result.add_failure("Double bounce during ascent.")
+    def __init__(self, columns: Mapping[str, Sequence[Any]], size: int) -> None:
+        self.columns = columns
+        self.size = size
 
-    def rule_no_downward_movement_during_ascent(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
-    ) -> None:
+    @classmethod
+    def from_columns(cls, columns: Mapping[str, Sequence[Any]]) -> "RuleColumns":
         """
-        Validates that there is no downward movement during the ascent.
+        Builds a view from equal-length feature columns.
 
-        :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
+        :param columns: Mapping of feature name to one value per attempt.
+        :return: The columnar view.
+        :raises ValueError: If the columns have different lengths.
         """
-        if state.get("downward_movement_during_ascent", False):
-            result.add_failure("Downward movement of the bar during ascent.")
+        sizes = {len(col) for col in columns.values()}
+        if len(sizes) > 1:
+            raise ValueError(f"Rule feature columns differ in length: {sizes}")
+        return cls(columns, sizes.pop() if sizes else 0)
 
-    def rule_knees_locked_at_completion(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
-    ) -> None:
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "RuleColumns":
         """
-        Validates that the knees are locked at the end.
+        Builds a single-attempt view from a lifter state dict.
 
         :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
+        :return: The columnar view with one row.
         """
-        if not state.get("knees_locked_at_finish", False):
-            result.add_failure("Knees not locked at completion.")
+        return cls({key: [value] for key, value in state.items()}, 1)
 
-    def rule_wait_for_commands(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
-    ) -> None:
+    def flag(self, name: str, default: bool) -> np.ndarray:
         """
-        Ensures the lifter waits for the referee's commands.
+        Returns a feature column as a boolean mask.
 
-        :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
+        :param name: The feature name.
+        :param default: Value used when the column is missing.
+        :return: Boolean array with one entry per attempt.
         """
-        if not state.get("waited_for_rack_command", False):
-            result.add_failure("Did not wait for 'RACK' command.")
+        if name not in self.columns:
+            return np.full(self.size, default, dtype=bool)
+        return np.asarray(self.columns[name]).astype(bool)
 
-    def rule_no_spotter_contact(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
-    ) -> None:
+    def value(self, name: str, default: float) -> np.ndarray:
         """
-        Ensures no contact with spotters.
+        Returns a feature column as floats.
 
-        :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
+        :param name: The feature name.
+        :param default: Value used when the column is missing.
+        :return: Float array with one entry per attempt.
         """
-        if state.get("spotter_contact", False):
-            result.add_failure("Spotter made contact with the bar.")
+        if name not in self.columns:
+            return np.full(self.size, default, dtype=float)
+        return np.asarray(self.columns[name], dtype=float)
 
-    def rule_no_elbow_leg_contact(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
-    ) -> None:
-        """
-        Ensures elbows or upper arms do not contact the legs.
 
-        :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
-        """
-        if state.get("elbows_touch_legs", False):
-            result.add_failure("Elbows or upper arms contacted the legs.")
-
-
-class BenchPress:
+class Rule:
     """
-    Evaluates a bench press attempt based on defined rules.
+    A single rule: a failure mask over rule features and the reason reported
+    when it fails.
     """
 
-    def evaluate(self, lifter_state: Dict[str, Any]) -> LiftEvaluationResult:
-        """
-        Evaluates a lifter's bench press performance.
-
-        :param lifter_state: The state of the lifter during the bench press attempt.
-        :returns: The result of the bench press evaluation.
-        """
-        result: LiftEvaluationResult = LiftEvaluationResult()
-        self.rule_position_on_bench(lifter_state, result)
-        self.rule_grip_validity(lifter_state, result)
-        self.rule_no_belt_contact(lifter_state, result)
-        self.rule_no_downward_movement(lifter_state, result)
-        self.rule_wait_for_start_command(lifter_state, result)
-        self.rule_no_rack_contact(lifter_state, result)
-        self.rule_complete_lockout(lifter_state, result)
-        return result
-
-    def rule_position_on_bench(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
+    def __init__(
+        self, name: str, reason: str, fails: Callable[[RuleColumns], np.ndarray]
     ) -> None:
-        """
-        Validates that the lifter is properly positioned on the bench.
+        self.name = name
+        self.reason = reason
+        self.fails = fails
 
-        :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
-        """
-        if not state.get("shoulders_on_bench", True) or not state.get(
-            "buttocks_on_bench", True
-        ):
-            result.add_failure("Shoulders or buttocks not in contact with the bench.")
 
-    def rule_grip_validity(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
-    ) -> None:
-        """
-        Validates the lifter's grip during the bench press.
+class BatchEvaluationResult:
+    """
+    Compact result of evaluating many attempts: one failure bitmask per
+    attempt, with bit i set when rule i failed. Reasons are decoded on demand.
+    """
 
-        :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
-        """
-        if state.get("grip_width", 82) > 81:
-            result.add_failure("Grip width exceeds 81cm.")
-        if state.get("thumbs_not_wrapped", False):
-            result.add_failure("Thumbless grip is not permitted.")
+    def __init__(self, failures: np.ndarray, rules: Tuple[Rule, ...]) -> None:
+        self.failures = failures
+        self.rules = rules
 
-    def rule_no_belt_contact(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
-    ) -> None:
-        """
-        Validates that the bar does not contact the lifter's belt.
+    def __len__(self) -> int:
+        return len(self.failures)
 
-        :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
+    @property
+    def is_successful(self) -> np.ndarray:
         """
-        if state.get("bar_touches_belt", False):
-            result.add_failure("Bar touched the lifter's belt.")
+        Returns a boolean mask of attempts that passed every rule.
 
-    def rule_no_downward_movement(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
-    ) -> None:
+        :return: Boolean array with one entry per attempt.
         """
-        Validates that there is no downward movement during the bench press.
+        return self.failures == 0
 
-        :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
+    def failed(self, rule_name: str) -> np.ndarray:
         """
-        if state.get("downward_movement_during_press", False):
-            result.add_failure("Downward movement during the press.")
+        Returns a boolean mask of attempts that failed the named rule.
 
-    def rule_wait_for_start_command(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
-    ) -> None:
+        :param rule_name: Name of the rule.
+        :return: Boolean array with one entry per attempt.
         """
-        Ensures the lifter waits for the 'START' command.
+        bit = [rule.name for rule in self.rules].index(rule_name)
+        return (self.failures >> np.uint32(bit)) & np.uint32(1) == 1
 
-        :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
+    def reasons(self, idx: int) -> List[str]:
         """
-        if state.get("did_not_wait_for_start_command", False):
-            result.add_failure("Did not wait for 'START' command.")
+        Decodes the failure reasons for one attempt.
 
-    def rule_no_rack_contact(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
-    ) -> None:
+        :param idx: Index of the attempt in the batch.
+        :return: The failure reasons in rule order.
         """
-        Validates that the bar does not contact the rack.
+        mask = int(self.failures[idx])
+        return [rule.reason for i, rule in enumerate(self.rules) if mask >> i & 1]
 
-        :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
+    def result(self, idx: int) -> LiftEvaluationResult:
         """
-        if state.get("bar_contact_rack", False):
-            result.add_failure("Bar contacted the rack during the lift.")
+        Expands one attempt into a LiftEvaluationResult.
 
-    def rule_complete_lockout(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
-    ) -> None:
+        :param idx: Index of the attempt in the batch.
+        :return: The evaluation result for that attempt.
         """
-        Validates that the lift achieves a complete lockout.
-
-        :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
-        """
-        if not state.get("lockout_complete", True):
-            result.add_failure("Failed to achieve a complete lockout.")
+        result = LiftEvaluationResult()
+        for reason in self.reasons(idx):
+            result.add_failure(reason)
+        return result
 
 
-class Deadlift:
+class LiftRules:
     """
-    Evaluates a deadlift attempt based on defined rules.
+    Base class for a lift's rule set.
     """
 
+    RULES: Tuple[Rule, ...] = ()
+
     def evaluate(self, lifter_state: Dict[str, Any]) -> LiftEvaluationResult:
         """
-        Evaluates a lifter's deadlift performance.
+        Evaluates a single attempt against the rules.
 
-        :param lifter_state: The state of the lifter during the deadlift attempt.
-        :returns: The result of the deadlift evaluation.
+        :param lifter_state: The state of the lifter during the attempt.
+        :returns: The result of the evaluation.
         """
-        result: LiftEvaluationResult = LiftEvaluationResult()
-        self.rule_no_downward_movement(lifter_state, result)
-        self.rule_knees_and_shoulders_locked(lifter_state, result)
-        self.rule_no_thigh_support(lifter_state, result)
-        self.rule_wait_for_down_command(lifter_state, result)
-        self.rule_controlled_lowering(lifter_state, result)
-        return result
+        view = RuleColumns.from_state(lifter_state)
+        return BatchEvaluationResult(self._failure_mask(view), self.RULES).result(0)
 
-    def rule_no_downward_movement(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
-    ) -> None:
+    def evaluate_batch(
+        self, columns: Mapping[str, Sequence[Any]]
+    ) -> BatchEvaluationResult:
         """
-        Validates that there is no premature downward movement in the deadlift.
+        Evaluates columnar rule features for many attempts at once.
 
-        :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
+        :param columns: Mapping of feature name to one value per attempt.
+        :returns: The batch evaluation result.
         """
-        if state.get("downward_movement", False):
-            result.add_failure("Downward movement of the bar before completion.")
+        view = RuleColumns.from_columns(columns)
+        return BatchEvaluationResult(self._failure_mask(view), self.RULES)
 
-    def rule_knees_and_shoulders_locked(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
-    ) -> None:
+    def _failure_mask(self, view: RuleColumns) -> np.ndarray:
         """
-        Validates that the knees and shoulders are locked in proper position.
+        Evaluates every rule as a vectorised mask and packs them into bits.
 
-        :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
+        :param view: The columnar rule features.
+        :returns: uint32 failure bitmask per attempt.
         """
-        if not state.get("knees_locked", True):
-            result.add_failure("Knees not locked.")
-        if not state.get("shoulders_back", True):
-            result.add_failure("Shoulders not in final position.")
+        failures = np.zeros(view.size, dtype=np.uint32)
+        for bit, rule in enumerate(self.RULES):
+            failures |= rule.fails(view).astype(np.uint32) << np.uint32(bit)
+        return failures
 
-    def rule_no_thigh_support(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
-    ) -> None:
-        """
-        Ensures the bar is not supported on the thighs.
 
-        :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
-        """
-        if state.get("bar_support_on_thighs", False):
-            result.add_failure("Bar supported on thighs.")
-
-    def rule_wait_for_down_command(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
-    ) -> None:
-        """
-        Validates that the lifter waits for the 'DOWN' command.
+class Squat(LiftRules):
+    """
+    Evaluates a squat lift attempt based on defined rules.
+    """
 
-        :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
-        """
-        if not state.get("waited_for_down_command", True):
-            result.add_failure("Did not wait for 'DOWN' command.")
+    RULES = (
+        Rule(
+            "bar_position",
+            "Bar held more than 3cm below posterior deltoids.",
+            lambda s: s.value("bar_position", 4) > 3,
+        ),
+        Rule(
+            "knees_locked_at_start",
+            "Knees not locked at the start.",
+            lambda s: ~s.flag("knees_locked", False),
+        ),
+        Rule(
+            "descent_below_parallel",
+            "Top of legs at hip joint not below top of knees.",
+            lambda s: ~s.flag("descent_below_parallel", False),
+        ),
+        Rule(
+            "no_double_bounce",
+            "Double bounce during ascent.",
+            lambda s: s.flag("double_bounce", False),
+        ),
+        Rule(
+            "no_downward_movement_during_ascent",
+            "Downward movement of the bar during ascent.",
+            lambda s: s.flag("downward_movement_during_ascent", False),
+        ),
+        Rule(
+            "knees_locked_at_completion",
+            "Knees not locked at completion.",
+            lambda s: ~s.flag("knees_locked_at_finish", False),
+        ),
+        Rule(
+            "wait_for_commands",
+            "Did not wait for 'RACK' command.",
+            lambda s: ~s.flag("waited_for_rack_command", False),
+        ),
+        Rule(
+            "no_spotter_contact",
+            "Spotter made contact with the bar.",
+            lambda s: s.flag("spotter_contact", False),
+        ),
+        Rule(
+            "no_elbow_leg_contact",
+            "Elbows or upper arms contacted the legs.",
+            lambda s: s.flag("elbows_touch_legs", False),
+        ),
+    )
+
+
+class BenchPress(LiftRules):
+    """
+    Evaluates a bench press attempt based on defined rules.
+    """
 
-    def rule_controlled_lowering(
-        self, state: Dict[str, Any], result: LiftEvaluationResult
-    ) -> None:
-        """
-        Ensures the lowering phase is controlled.
+    RULES = (
+        Rule(
+            "position_on_bench",
+            "Shoulders or buttocks not in contact with the bench.",
+            lambda s: ~s.flag("shoulders_on_bench", True)
+            | ~s.flag("buttocks_on_bench", True),
+        ),
+        Rule(
+            "grip_width",
+            "Grip width exceeds 81cm.",
+            lambda s: s.value("grip_width", 82) > 81,
+        ),
+        Rule(
+            "thumbs_wrapped",
+            "Thumbless grip is not permitted.",
+            lambda s: s.flag("thumbs_not_wrapped", False),
+        ),
+        Rule(
+            "no_belt_contact",
+            "Bar touched the lifter's belt.",
+            lambda s: s.flag("bar_touches_belt", False),
+        ),
+        Rule(
+            "no_downward_movement",
+            "Downward movement during the press.",
+            lambda s: s.flag("downward_movement_during_press", False),
+        ),
+        Rule(
+            "wait_for_start_command",
+            "Did not wait for 'START' command.",
+            lambda s: s.flag("did_not_wait_for_start_command", False),
+        ),
+        Rule(
+            "no_rack_contact",
+            "Bar contacted the rack during the lift.",
+            lambda s: s.flag("bar_contact_rack", False),
+        ),
+        Rule(
+            "complete_lockout",
+            "Failed to achieve a complete lockout.",
+            lambda s: ~s.flag("lockout_complete", True),
+        ),
+    )
+
+
+class Deadlift(LiftRules):
+    """
+    Evaluates a deadlift attempt based on defined rules.
+    """
 
-        :param state: The lifter's state.
-        :param result: The evaluation result to update.
-        :return: None
-        """
-        if state.get("released_bar", False):
-            result.add_failure("Bar released before full lowering.")
+    RULES = (
+        Rule(
+            "no_downward_movement",
+            "Downward movement of the bar before completion.",
+            lambda s: s.flag("downward_movement", False),
+        ),
+        Rule(
+            "knees_locked",
+            "Knees not locked.",
+            lambda s: ~s.flag("knees_locked", True),
+        ),
+        Rule(
+            "shoulders_back",
+            "Shoulders not in final position.",
+            lambda s: ~s.flag("shoulders_back", True),
+        ),
+        Rule(
+            "no_thigh_support",
+            "Bar supported on thighs.",
+            lambda s: s.flag("bar_support_on_thighs", False),
+        ),
+        Rule(
+            "wait_for_down_command",
+            "Did not wait for 'DOWN' command.",
+            lambda s: ~s.flag("waited_for_down_command", True),
+        ),
+        Rule(
+            "controlled_lowering",
+            "Bar released before full lowering.",
+            lambda s: s.flag("released_bar", False),
+        ),
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,183 @@
+# refvision/benchmarks/bench_analysis.py
+"""
+Micro-benchmarks of the analysis hot paths on synthetic squat tracks, run
+offline without YOLO weights. Reports time per frame and peak Python memory
+(tracemalloc) for each function, track length, detection count and dropout.
+usage: python -m refvision.benchmarks.bench_analysis --frames 100 1000 10000
+"""
+import argparse
+import json
+import logging
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+from refvision.analysis.context import AnalysisContext
+from refvision.analysis.depth_checker import check_squat_depth_by_turnaround
+from refvision.analysis.find_turnaround_frame import find_turnaround_frame
+from refvision.analysis.lifter_selector import select_lifter_index
+from refvision.benchmarks.results_store import save_results
+from refvision.benchmarks.synthetic import synthetic_results, synthetic_track
+from refvision.utils.series_utils import smooth_array, smooth_series
+
+
+def _select_all(results: List[Any]) -> None:
+    for frame in results:
+        if frame.boxes:
+            h, w = frame.orig_shape
+            select_lifter_index(frame.boxes, w, h)
+
+
+def _with_context(results: List[Any]) -> None:
+    context = AnalysisContext.from_results(results)
+    check_squat_depth_by_turnaround(results, context=context)
+
+
+def benchmark_cases(results: List[Any], hip_y: List[Any]) -> Dict[str, Callable]:
+    """
+    The functions under test, bound to one synthetic attempt.
+    :param results: (List[Any]) YOLO-like per-frame results.
+    :param hip_y: (List[Any]) Hip height per frame, None where missing.
+    :returns: (Dict[str, Callable]) Benchmark name => zero-argument callable.
+    """
+    import numpy as np
+
+    hip_arr = np.array([np.nan if y is None else y for y in hip_y])
+    return {
+        "select_lifter_index": lambda: _select_all(results),
+        "smooth_series": lambda: smooth_series(hip_y, window_size=5),
+        "smooth_array": lambda: smooth_array(hip_arr, window_size=5),
+        "find_turnaround_frame": lambda: find_turnaround_frame(results),
+        "check_squat_depth_by_turnaround": lambda: check_squat_depth_by_turnaround(
+            results
+        ),
+        "check_squat_depth_by_turnaround[context]": lambda: _with_context(results),
+    }
+
+
+def measure(fn: Callable, repeats: int) -> Dict[str, Any]:
+    """
+    Times a callable and measures its peak traced memory.
+    :param fn: (Callable) Zero-argument callable.
+    :param repeats: (int) Timed runs; the fastest is reported.
+    :returns: (Dict[str, Any]) Best wall time (ns), every timed run (ns) and
+    peak memory (bytes).
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        fn()
+        times.append(time.perf_counter_ns() - start)
+
+    # separate run: tracemalloc slows allocation-heavy code down
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "best_ns": float(min(times)),
+        "samples_ns": [float(t) for t in times],
+        "peak_bytes": float(peak),
+    }
+
+
+def run_suite(
+    frames: List[int],
+    detections: List[int],
+    dropouts: List[float],
+    repeats: int = 5,
+    only: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Runs every benchmark over the grid of synthetic attempts.
+    :param frames: (List[int]) Track lengths.
+    :param detections: (List[int]) Detections per frame.
+    :param dropouts: (List[float]) Fraction of dropped keypoints, which is
+    also used as the fraction of frames with no detection.
+    :param repeats: (int) Timed runs per measurement.
+    :param only: (Optional[List[str]]) Benchmark names to run; all if None.
+    :returns: (List[Dict[str, Any]]) One record per measurement.
+    """
+    records = []
+    for n_frames in frames:
+        for n_det in detections:
+            for dropout in dropouts:
+                xy, conf = synthetic_track("squat", n_frames, dropout=dropout)
+                results = synthetic_results(xy, conf, n_det, missed=dropout)
+                hip_y = [
+                    float(xy[i, 11:13, 1].mean()) if r.boxes else None
+                    for i, r in enumerate(results)
+                ]
+                for name, fn in benchmark_cases(results, hip_y).items():
+                    if only and name not in only:
+                        continue
+                    stats = measure(fn, repeats)
+                    records.append(
+                        {
+                            "name": f"{name}[frames={n_frames},"
+                            f"detections={n_det},dropout={dropout}]",
+                            "unit": "ns/frame",
+                            "samples": [t / n_frames for t in stats["samples_ns"]],
+                            "benchmark": name,
+                            "frames": n_frames,
+                            "detections": n_det,
+                            "dropout": dropout,
+                            "ns_per_frame": stats["best_ns"] / n_frames,
+                            "total_ms": stats["best_ns"] / 1e6,
+                            "peak_kib": stats["peak_bytes"] / 1024,
+                        }
+                    )
+    return records
+
+
+def format_table(records: List[Dict[str, Any]]) -> str:
+    """
+    Formats benchmark records as a fixed-width table.
+    :param records: (List[Dict[str, Any]]) Output of run_suite.
+    :returns: (str) The table.
+    """
+    lines = [
+        f"{'benchmark':<42}{'frames':>8}{'det':>5}{'drop':>6}"
+        f"{'ns/frame':>12}{'total ms':>11}{'peak KiB':>11}"
+    ]
+    for r in records:
+        lines.append(
+            f"{r['benchmark']:<42}{r['frames']:>8}{r['detections']:>5}"
+            f"{r['dropout']:>6.2f}{r['ns_per_frame']:>12.0f}"
+            f"{r['total_ms']:>11.2f}{r['peak_kib']:>11.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """
+    Parses arguments, runs the suite and prints (and optionally saves) it.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the analysis code")
+    parser.add_argument(
+        "--frames", type=int, nargs="+", default=[100, 1000, 10000, 100000]
+    )
+    parser.add_argument("--detections", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--dropout", type=float, nargs="+", default=[0.0, 0.1])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--only", nargs="+", default=None, help="Benchmark names")
+    parser.add_argument("--json", default=None, help="Write records to this file")
+    parser.add_argument(
+        "--save", action="store_true", help="Add the run to the results store"
+    )
+    args = parser.parse_args()
+
+    # the functions under test log at INFO on every call
+    logging.disable(logging.INFO)
+    records = run_suite(
+        args.frames, args.detections, args.dropout, args.repeats, args.only
+    )
+    print(format_table(records))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(records, f, indent=2)
+    if args.save:
+        print(f"Saved => {save_results(records, 'analysis')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# refvision/benchmarks/bench_chunked_encoding.py
+"""
+Benchmark of GOP-parallel chunked encoding against a single ffmpeg process:
+wall time, speedup, output size and whether the chunked output matches the
+single-process one in frame count, codec profile, pixel format and size.
+Without --clips, synthetic squat clips are generated. Needs ffmpeg and
+ffprobe. The chunks are ffmpeg scheduler jobs, so worker counts above
+FFMPEG_JOBS.max_concurrent are capped to it; raise it to try more.
+usage: python -m refvision.benchmarks.bench_chunked_encoding --workers 2 4 8
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+from refvision.benchmarks.bench_encoding import _video_info, reference_clips
+from refvision.benchmarks.results_store import save_results
+from refvision.postprocess.chunked_encode import chunk_plan, chunked_encode
+from refvision.postprocess.probe import probe_video
+
+
+def _stream(path: str) -> Dict[str, Any]:
+    """
+    The properties browsers care about, of a video's first video stream.
+    """
+    stream = next(
+        s for s in probe_video(path)["streams"] if s.get("codec_type") == "video"
+    )
+    return {
+        key: stream.get(key)
+        for key in ("codec_name", "profile", "pix_fmt", "width", "height")
+    }
+
+
+def _timed(fn: Callable[[], Any], repeats: int) -> List[float]:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def compare_clip(
+    clip: str, profile: str, workers: List[int], out_dir: str, repeats: int = 5
+) -> List[Dict[str, Any]]:
+    """
+    Encodes one clip in one process and chunked with each worker count.
+    :param clip: (str) Input video.
+    :param profile: (str) Encoding profile name.
+    :param workers: (List[int]) Worker counts to try.
+    :param out_dir: (str) Directory for the outputs.
+    :param repeats: (int) Timed encodes; the fastest is reported.
+    :returns: (List[Dict[str, Any]]) One record per worker count, the
+    single-process baseline first (workers 1); "workers" is the count used
+    after the scheduler's cap, "requested" the one asked for.
+    """
+    stem = os.path.splitext(os.path.basename(clip))[0]
+    source = _video_info(clip)
+    records = []
+    baseline: Optional[Dict[str, Any]] = None
+    for count in [1, *workers]:
+        output = os.path.join(out_dir, f"{stem}.{profile}.w{count}.mp4")
+        # one worker never splits: the single-process baseline
+        plan = chunk_plan(clip, count)
+        samples = _timed(
+            lambda: chunked_encode(clip, output, profile, plan=plan), repeats
+        )
+        best = min(samples)
+        stream = {**_stream(output), "frames": _video_info(output)["frames"]}
+        if baseline is None:
+            baseline = {"seconds": best, "stream": stream}
+        records.append(
+            {
+                "name": f"chunked_encode.{profile}[clip={stem},workers={count}]",
+                "unit": "s",
+                "samples": samples,
+                "clip": stem,
+                "profile": profile,
+                "workers": plan["workers"],
+                "requested": count,
+                "chunks": len(plan["splits"]) + 1,
+                "seconds": best,
+                "fps": source["frames"] / best if best > 0 else None,
+                "speedup": baseline["seconds"] / best if best > 0 else None,
+                "output_kib": os.path.getsize(output) / 1024,
+                "matches_single": stream == baseline["stream"],
+            }
+        )
+    return records
+
+
+def run_suite(
+    clips: List[str],
+    profile: str,
+    workers: List[int],
+    repeats: int = 5,
+    work_dir: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Compares chunked and single-process encoding on every clip.
+    :param clips: (List[str]) Input videos.
+    :param profile: (str) Encoding profile name.
+    :param workers: (List[int]) Worker counts to try.
+    :param repeats: (int) Timed encodes per measurement.
+    :param work_dir: (Optional[str]) Output directory; temporary if None.
+    :returns: (List[Dict[str, Any]]) Records of compare_clip, for all clips.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = work_dir or tmp
+        return [
+            record
+            for clip in clips
+            for record in compare_clip(clip, profile, workers, out_dir, repeats)
+        ]
+
+
+def format_table(records: List[Dict[str, Any]]) -> str:
+    """
+    Formats comparison records as a fixed-width table.
+    :param records: (List[Dict[str, Any]]) Output of run_suite.
+    :returns: (str) The table.
+    """
+    lines = [
+        f"{'clip':<16}{'workers':>8}{'chunks':>8}{'seconds':>9}{'fps':>8}"
+        f"{'speedup':>9}{'KiB':>10}{'matches':>9}"
+    ]
+    for r in records:
+        lines.append(
+            f"{r['clip']:<16}{r['workers']:>8}{r['chunks']:>8}{r['seconds']:>9.2f}"
+            f"{r['fps'] or 0:>8.1f}{r['speedup'] or 0:>9.2f}"
+            f"{r['output_kib']:>10.0f}{'yes' if r['matches_single'] else 'NO':>9}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """
+    Parses arguments, runs the suite and prints (and optionally saves) it.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark chunked against single-process encoding"
+    )
+    parser.add_argument("--profile", default="review")
+    parser.add_argument("--workers", nargs="+", type=int, default=[2, 4])
+    parser.add_argument("--clips", nargs="+", default=None, help="Reference videos")
+    parser.add_argument("--seconds", type=float, default=12.0)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", default=None, help="Write records to this file")
+    parser.add_argument(
+        "--save", action="store_true", help="Add the run to the results store"
+    )
+    args = parser.parse_args()
+
+    if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+        raise SystemExit("ffmpeg/ffprobe not found; the benchmark needs them")
+    with tempfile.TemporaryDirectory() as clip_dir:
+        clips = args.clips or reference_clips(clip_dir, args.seconds)
+        records = run_suite(clips, args.profile, args.workers, args.repeats)
+    print(format_table(records))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(records, f, indent=2)
+    if args.save:
+        print(f"Saved => {save_results(records, 'chunked_encoding')}")
+
+
+if __name__ == "__main__":
+    main()
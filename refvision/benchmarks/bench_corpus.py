@@ -0,0 +1,343 @@
+# refvision/benchmarks/bench_corpus.py
+"""
+Throughput and accuracy benchmark on a generated corpus of synthetic squat
+videos (see video_generator). For every video it measures decode, inference
+and encode frames/sec, runs check_squat_depth_by_turnaround on the inferred
+keypoints and scores the decision, turnaround frame and depth margin against
+the ground truth. The "stub" model replays the true keypoint track with
+optional pixel noise, so the analysis accuracy can be checked without YOLO
+weights.
+usage: python -m refvision.benchmarks.bench_corpus --corpus data/synthetic
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+import numpy as np
+from refvision.analysis.context import AnalysisContext
+from refvision.analysis.depth_checker import check_squat_depth_by_turnaround
+from refvision.benchmarks.results_store import save_results
+from refvision.benchmarks.synthetic import (
+    SyntheticBox,
+    SyntheticFrameResult,
+    SyntheticKeypoints,
+)
+from refvision.benchmarks.video_generator import load_manifest
+from refvision.inference.perf_stats import (
+    InferenceStats,
+    format_summary,
+    summarise_records,
+)
+
+
+def decode_frames(video: str) -> Dict[str, Any]:
+    """
+    Decodes every frame of a video with OpenCV.
+    :param video: (str) Path to the video.
+    :returns: (Dict[str, Any]) "frames" (list of BGR arrays), "fps" and the
+    decode wall time in "seconds".
+    """
+    import cv2
+
+    start = time.perf_counter()
+    cap = cv2.VideoCapture(video)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frames = []
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    return {"frames": frames, "fps": fps, "seconds": time.perf_counter() - start}
+
+
+def encode_frames(frames: List[np.ndarray], fps: float, path: str) -> float:
+    """
+    Encodes frames to an mp4v video with OpenCV.
+    :param frames: (List[np.ndarray]) BGR frames.
+    :param fps: (float) Frame rate.
+    :param path: (str) Output path.
+    :returns: (float) Encode wall time in seconds.
+    """
+    import cv2
+
+    h, w = frames[0].shape[:2]
+    start = time.perf_counter()
+    fourcc = cv2.VideoWriter_fourcc(*"mp4v")  # type: ignore[attr-defined]
+    writer = cv2.VideoWriter(path, fourcc, fps, (w, h))
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+    return time.perf_counter() - start
+
+
+def replay_results(
+    track: str, size: List[int], noise_px: float = 0.0, seed: int = 0
+) -> List[Any]:
+    """
+    YOLO-like results from a video's true keypoint track: the lifter plus
+    one detection per distractor, with optional Gaussian pixel noise.
+    :param track: (str) Path of the .npz track written by video_generator.
+    :param size: (List[int]) Frame width and height.
+    :param noise_px: (float) Standard deviation of the keypoint noise.
+    :param seed: (int) Random seed for the noise.
+    :returns: (List[Any]) One result object per frame.
+    """
+    data = np.load(track)
+    people = np.concatenate([data["xy"][None], data["distractors"]])
+    if noise_px > 0:
+        rng = np.random.default_rng(seed)
+        people = people + rng.normal(0.0, noise_px, size=people.shape)
+    w, h = size
+    conf = np.full(people.shape[2], 0.95)
+    results = []
+    for f_idx in range(people.shape[1]):
+        keypoints, boxes = [], []
+        for p_idx, person in enumerate(people[:, f_idx]):
+            keypoints.append(SyntheticKeypoints(person, conf))
+            box = np.concatenate([person.min(axis=0), person.max(axis=0)])
+            boxes.append(SyntheticBox(box, 0.9 if p_idx == 0 else 0.8))
+        results.append(SyntheticFrameResult(keypoints, boxes, (h, w)))
+    return results
+
+
+def infer(
+    model: Any, device: Any, video: str, stats: Optional[InferenceStats] = None
+) -> List[Any]:
+    """
+    Runs a YOLO pose model over a video without saving the annotated copy.
+    :param model: The loaded YOLO model.
+    :param device: The device the model runs on.
+    :param video: (str) Path to the video.
+    :param stats: (Optional[InferenceStats]) Collects per-frame stage timings.
+    :returns: (List[Any]) Per-frame results.
+    """
+    frames = model.track(
+        source=video, device=device, show=False, save=False, stream=True
+    )
+    return list(stats.timed(frames) if stats is not None else frames)
+
+
+def score(result: Dict[str, Any], truth: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compares a depth decision with the ground truth.
+    :param result: (Dict[str, Any]) Output of check_squat_depth_by_turnaround.
+    :param truth: (Dict[str, Any]) Ground truth from the video's sidecar.
+    :returns: (Dict[str, Any]) Whether the decision is correct, the absolute
+    turnaround error (frames, 0 anywhere at the bottom) and the signed margin
+    errors (pixels and femur lengths), None where unavailable.
+    """
+    turnaround = result.get("turnaround_frame")
+    frame_error = None
+    if turnaround is not None:
+        lo, hi = truth["bottom_frames"]
+        frame_error = int(max(lo - turnaround, turnaround - hi, 0))
+    margin = result.get("depth_margin") or {}
+    true_margin = truth["depth_margin"]
+    px_error = norm_error = None
+    if margin.get("raw_px") is not None:
+        px_error = float(margin["raw_px"] - true_margin["raw_px"])
+    if margin.get("normalised") is not None:
+        norm_error = float(margin["normalised"] - true_margin["normalised"])
+    return {
+        "correct": result["decision"] == truth["expected_decision"],
+        "turnaround_error": frame_error,
+        "margin_error_px": px_error,
+        "margin_error": norm_error,
+    }
+
+
+def run_corpus(
+    entries: List[Dict[str, Any]],
+    model_spec: str = "stub",
+    noise_px: float = 0.0,
+    encode: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Benchmarks and scores every video of a corpus.
+    :param entries: (List[Dict[str, Any]]) Manifest entries.
+    :param model_spec: (str) "stub" or a path to YOLO pose weights.
+    :param noise_px: (float) Keypoint noise of the stub model, in pixels.
+    :param encode: (bool) Whether to measure re-encoding.
+    :returns: (List[Dict[str, Any]]) One report per video.
+    """
+    model = device = None
+    if model_spec != "stub":
+        from refvision.inference.model_loader import load_model
+
+        model, device = load_model(model_spec)
+
+    reports = []
+    for i, entry in enumerate(entries):
+        spec, truth = entry["spec"], entry["ground_truth"]
+        decoded = decode_frames(entry["video"])
+        n_frames = len(decoded["frames"])
+
+        stats = InferenceStats()
+        start = time.perf_counter()
+        if model is None:
+            results = replay_results(
+                entry["track"], [spec["width"], spec["height"]], noise_px, seed=i
+            )
+        else:
+            results = infer(model, device, entry["video"], stats)
+        infer_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        context = AnalysisContext.from_results(results)
+        decision = check_squat_depth_by_turnaround(results, context=context)
+        analyse_s = time.perf_counter() - start
+        stats.finish(analysis_ms=analyse_s * 1e3)
+
+        encode_s = None
+        if encode and decoded["frames"]:
+            with tempfile.TemporaryDirectory() as tmp:
+                encode_s = encode_frames(
+                    decoded["frames"], decoded["fps"], os.path.join(tmp, "out.mp4")
+                )
+
+        reports.append(
+            {
+                "name": entry["name"],
+                "spec": spec,
+                "frames": n_frames,
+                "decision": decision["decision"],
+                "expected": truth["expected_decision"],
+                **score(decision, truth),
+                "decode_fps": n_frames / decoded["seconds"],
+                "infer_fps": len(results) / infer_s,
+                "analyse_ms": analyse_s * 1e3,
+                "encode_fps": n_frames / encode_s if encode_s else None,
+                "performance": stats.to_record(),
+            }
+        )
+    return reports
+
+
+def summarise(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Aggregates per-video reports into corpus accuracy and throughput.
+    :param reports: (List[Dict[str, Any]]) Output of run_corpus.
+    :returns: (Dict[str, Any]) Accuracy, mean absolute errors and median
+    frames/sec per stage.
+    """
+
+    def _values(key: str) -> np.ndarray:
+        return np.array([r[key] for r in reports if r[key] is not None], dtype=float)
+
+    def _mean_abs(key: str) -> Optional[float]:
+        values = _values(key)
+        return float(np.mean(np.abs(values))) if values.size else None
+
+    def _median(key: str) -> Optional[float]:
+        values = _values(key)
+        return float(np.median(values)) if values.size else None
+
+    return {
+        "videos": len(reports),
+        "accuracy": float(np.mean([r["correct"] for r in reports])),
+        "turnaround_mae_frames": _mean_abs("turnaround_error"),
+        "margin_mae_px": _mean_abs("margin_error_px"),
+        "margin_mae": _mean_abs("margin_error"),
+        "decode_fps": _median("decode_fps"),
+        "infer_fps": _median("infer_fps"),
+        "encode_fps": _median("encode_fps"),
+    }
+
+
+def corpus_records(
+    reports: List[Dict[str, Any]], model_spec: str
+) -> List[Dict[str, Any]]:
+    """
+    Turns per-video reports into results-store records, one per stage with a
+    sample per video, in seconds per frame so that lower is better.
+    :param reports: (List[Dict[str, Any]]) Output of run_corpus.
+    :param model_spec: (str) The model the reports were produced with.
+    :returns: (List[Dict[str, Any]]) Records with "name", "unit", "samples".
+    """
+    model = "stub" if model_spec == "stub" else os.path.basename(model_spec)
+    records = []
+    for stage in ("decode", "infer", "encode"):
+        samples = [1.0 / r[f"{stage}_fps"] for r in reports if r[f"{stage}_fps"]]
+        if samples:
+            records.append(
+                {
+                    "name": f"corpus.{stage}[model={model}]",
+                    "unit": "s/frame",
+                    "samples": samples,
+                }
+            )
+    return records
+
+
+def format_reports(reports: List[Dict[str, Any]], summary: Dict[str, Any]) -> str:
+    """
+    Formats per-video reports and the corpus summary as a table.
+    :param reports: (List[Dict[str, Any]]) Output of run_corpus.
+    :param summary: (Dict[str, Any]) Output of summarise.
+    :returns: (str) The table.
+    """
+
+    def _fmt(value: Any, spec: str) -> str:
+        return "-" if value is None else format(value, spec)
+
+    lines = [
+        f"{'video':<14}{'depth':>7}{'angle':>7}{'decision':>12}{'ok':>4}"
+        f"{'frame err':>11}{'margin err':>12}{'decode fps':>12}{'infer fps':>11}"
+    ]
+    for r in reports:
+        lines.append(
+            f"{r['name']:<14}{r['spec']['depth']:>7.2f}"
+            f"{r['spec']['camera_angle']:>7.0f}{r['decision']:>12}"
+            f"{'y' if r['correct'] else 'n':>4}"
+            f"{_fmt(r['turnaround_error'], 'd'):>11}"
+            f"{_fmt(r['margin_error'], '+.3f'):>12}"
+            f"{r['decode_fps']:>12.0f}{r['infer_fps']:>11.0f}"
+        )
+    lines.append(
+        f"accuracy {summary['accuracy']:.1%} over {summary['videos']} videos, "
+        f"turnaround MAE {_fmt(summary['turnaround_mae_frames'], '.2f')} frames, "
+        f"margin MAE {_fmt(summary['margin_mae'], '.3f')} femur lengths"
+    )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """
+    Parses arguments, runs the corpus benchmark and prints (and optionally
+    saves) it.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark on a synthetic corpus")
+    parser.add_argument("--corpus", required=True, help="Corpus dir or manifest")
+    parser.add_argument("--model", default="stub", help="'stub' or YOLO weights")
+    parser.add_argument("--noise_px", type=float, default=0.0)
+    parser.add_argument("--no_encode", action="store_true")
+    parser.add_argument("--json", default=None, help="Write reports to this file")
+    parser.add_argument(
+        "--save", action="store_true", help="Add the run to the results store"
+    )
+    args = parser.parse_args()
+
+    # the functions under test log at INFO on every call
+    logging.disable(logging.INFO)
+    reports = run_corpus(
+        load_manifest(args.corpus), args.model, args.noise_px, not args.no_encode
+    )
+    summary = summarise(reports)
+    print(format_reports(reports, summary))
+    performance = summarise_records([r["performance"] for r in reports])
+    print(format_summary(performance))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"summary": summary, "videos": reports}, f, indent=2)
+    if args.save:
+        records = corpus_records(reports, args.model)
+        print(f"Saved => {save_results(records, 'corpus')}")
+
+
+if __name__ == "__main__":
+    main()
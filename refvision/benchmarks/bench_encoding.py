@@ -0,0 +1,168 @@
+# refvision/benchmarks/bench_encoding.py
+"""
+Benchmark of the encoding profiles: encode wall time, frames/sec, output
+size and output resolution for each profile on reference clips. Without
+--clips, synthetic squat clips (720p, 1080p and portrait 1080p) are
+generated; pass real footage for representative sizes. Needs ffmpeg.
+usage: python -m refvision.benchmarks.bench_encoding --profiles archive review
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from refvision.benchmarks.results_store import save_results
+from refvision.benchmarks.video_generator import make_spec, write_sample
+from refvision.postprocess.convert import encode_command
+from refvision.postprocess.profiles import profile_names
+
+# name => (width, height) of the generated reference clips
+REFERENCE_SIZES: Dict[str, Tuple[int, int]] = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "portrait_1080p": (1080, 1920),
+}
+
+
+def reference_clips(out_dir: str, seconds: float = 4.0) -> List[str]:
+    """
+    Generates the synthetic reference clips.
+    :param out_dir: (str) Output directory.
+    :param seconds: (float) Approximate clip length.
+    :returns: (List[str]) Clip paths.
+    """
+    clips = []
+    for name, (w, h) in REFERENCE_SIZES.items():
+        hold = max(0.0, (seconds - 2.2) / 2)
+        spec = make_spec(width=w, height=h, distractors=2, hold_s=hold)
+        clips.append(write_sample(out_dir, name, spec)["video"])
+    return clips
+
+
+def _video_info(path: str) -> Dict[str, Any]:
+    import cv2
+
+    cap = cv2.VideoCapture(path)
+    info = {
+        "frames": int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        "fps": cap.get(cv2.CAP_PROP_FPS) or 30.0,
+    }
+    cap.release()
+    return info
+
+
+def encode_clip(
+    clip: str, profile: str, out_dir: str, repeats: int = 5
+) -> Dict[str, Any]:
+    """
+    Encodes one clip with one profile and measures it.
+    :param clip: (str) Input video.
+    :param profile: (str) Encoding profile name.
+    :param out_dir: (str) Directory for the output.
+    :param repeats: (int) Timed encodes; the fastest is reported.
+    :returns: (Dict[str, Any]) Wall times, fps, output size and resolution.
+    """
+    stem = os.path.splitext(os.path.basename(clip))[0]
+    output = os.path.join(out_dir, f"{stem}.{profile}.mp4")
+    cmd = encode_command(clip, output, profile)
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True, capture_output=True)
+        samples.append(time.perf_counter() - start)
+    source, encoded = _video_info(clip), _video_info(output)
+    best = min(samples)
+    duration = source["frames"] / source["fps"]
+    return {
+        "name": f"encode.{profile}[clip={stem}]",
+        "unit": "s",
+        "samples": samples,
+        "clip": stem,
+        "profile": profile,
+        "seconds": best,
+        "fps": source["frames"] / best if best > 0 else None,
+        "source_size": [source["width"], source["height"]],
+        "output_size": [encoded["width"], encoded["height"]],
+        "output_kib": os.path.getsize(output) / 1024,
+        "kbps": os.path.getsize(output) * 8 / 1000 / duration if duration else None,
+    }
+
+
+def run_suite(
+    clips: List[str],
+    profiles: List[str],
+    repeats: int = 5,
+    work_dir: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Encodes every clip with every profile.
+    :param clips: (List[str]) Input videos.
+    :param profiles: (List[str]) Profile names.
+    :param repeats: (int) Timed encodes per measurement.
+    :param work_dir: (Optional[str]) Output directory; temporary if None.
+    :returns: (List[Dict[str, Any]]) One record per clip and profile.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = work_dir or tmp
+        return [
+            encode_clip(clip, profile, out_dir, repeats)
+            for clip in clips
+            for profile in profiles
+        ]
+
+
+def format_table(records: List[Dict[str, Any]]) -> str:
+    """
+    Formats encoding records as a fixed-width table.
+    :param records: (List[Dict[str, Any]]) Output of run_suite.
+    :returns: (str) The table.
+    """
+    lines = [
+        f"{'clip':<16}{'profile':<14}{'seconds':>9}{'fps':>8}"
+        f"{'output':>12}{'KiB':>10}{'kbps':>9}"
+    ]
+    for r in records:
+        w, h = r["output_size"]
+        lines.append(
+            f"{r['clip']:<16}{r['profile']:<14}{r['seconds']:>9.2f}"
+            f"{r['fps'] or 0:>8.1f}{f'{w}x{h}':>12}{r['output_kib']:>10.0f}"
+            f"{r['kbps'] or 0:>9.0f}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """
+    Parses arguments, runs the suite and prints (and optionally saves) it.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark encoding profiles")
+    parser.add_argument("--profiles", nargs="+", default=None)
+    parser.add_argument("--clips", nargs="+", default=None, help="Reference videos")
+    parser.add_argument("--seconds", type=float, default=4.0)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", default=None, help="Write records to this file")
+    parser.add_argument(
+        "--save", action="store_true", help="Add the run to the results store"
+    )
+    args = parser.parse_args()
+
+    if shutil.which("ffmpeg") is None:
+        raise SystemExit("ffmpeg not found; the encoding benchmark needs it")
+    with tempfile.TemporaryDirectory() as clip_dir:
+        clips = args.clips or reference_clips(clip_dir, args.seconds)
+        records = run_suite(clips, args.profiles or profile_names(), args.repeats)
+    print(format_table(records))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(records, f, indent=2)
+    if args.save:
+        print(f"Saved => {save_results(records, 'encoding')}")
+
+
+if __name__ == "__main__":
+    main()
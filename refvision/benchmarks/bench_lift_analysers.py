@@ -0,0 +1,59 @@
+# refvision/benchmarks/bench_lift_analysers.py
+"""
+Benchmarks the lift analysers on synthetic keypoint tracks: cold time (fresh
+context, all shared features computed) and warm time (features already
+cached by a previous analyser).
+usage: python -m refvision.benchmarks.bench_lift_analysers --frames 300 3000
+"""
+import argparse
+import time
+from typing import Dict, List
+from refvision.analysis.context import AnalysisContext
+from refvision.analysis.lift_dispatch import ANALYSERS, evaluate_lift
+from refvision.benchmarks.synthetic import synthetic_track
+
+
+def time_analyser(lift: str, n_frames: int, repeats: int = 20) -> Dict[str, float]:
+    """
+    Times one analyser on a synthetic track.
+    :param lift: (str) Lift type.
+    :param n_frames: (int) Number of frames in the track.
+    :param repeats: (int) Number of timed runs; the best run is reported.
+    :returns: (Dict[str, float]) Best cold and warm time in microseconds.
+    """
+    xy, conf = synthetic_track(lift, n_frames, dropout=0.02)
+    cold, warm = [], []
+    for _ in range(repeats):
+        context = AnalysisContext(xy, conf)
+        start = time.perf_counter_ns()
+        evaluate_lift(lift, context)
+        cold.append(time.perf_counter_ns() - start)
+        start = time.perf_counter_ns()
+        evaluate_lift(lift, context)
+        warm.append(time.perf_counter_ns() - start)
+    return {"cold_us": min(cold) / 1e3, "warm_us": min(warm) / 1e3}
+
+
+def main(frames: List[int], repeats: int) -> None:
+    """
+    Prints a timing table for every analyser and track length.
+    :param frames: (List[int]) Track lengths to benchmark.
+    :param repeats: (int) Number of timed runs per measurement.
+    """
+    print(f"{'lift':<10}{'frames':>8}{'cold us':>12}{'warm us':>12}{'ns/frame':>10}")
+    for lift in ANALYSERS:
+        for n_frames in frames:
+            timing = time_analyser(lift, n_frames, repeats)
+            per_frame = timing["cold_us"] * 1e3 / n_frames
+            print(
+                f"{lift:<10}{n_frames:>8}{timing['cold_us']:>12.1f}"
+                f"{timing['warm_us']:>12.1f}{per_frame:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the lift analysers")
+    parser.add_argument("--frames", type=int, nargs="+", default=[300, 3000])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    main(args.frames, args.repeats)
@@ -0,0 +1,334 @@
+# refvision/benchmarks/bench_pipeline.py
+"""
+End-to-end pipeline benchmark on a synthetic attempt video. Runs the
+single-view pipeline (upload, normalise, trim, inference with the decision
+cache, overlay and evidence, convert, publish with HLS) against local
+stand-ins for S3 and DynamoDB and a pluggable pose model, and reports the
+wall time and frames/sec of each pipeline stage from its tracing span, and
+peak RSS. No AWS account or YOLO weights are needed with the stub model;
+ffmpeg is.
+usage: python -m refvision.benchmarks.bench_pipeline --frames 300 --model stub
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import resource
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from refvision.benchmarks.stand_ins import local_stand_ins
+from refvision.benchmarks.synthetic import (
+    SyntheticBox,
+    SyntheticFrameResult,
+    SyntheticKeypoints,
+    synthetic_track,
+    write_video,
+)
+
+
+class StubPoseModel:
+    """
+    Pose model stand-in with YOLO's track() API. Frames are decoded from the
+    video (so decode cost is included) and kept as orig_img, keypoints come
+    from a known track, and the annotated .avi is written like YOLO's
+    save=True.
+    """
+
+    def __init__(self, xy: np.ndarray, conf: np.ndarray) -> None:
+        self.xy = xy
+        self.conf = conf
+
+    def track(
+        self,
+        source: str,
+        project: str,
+        name: Optional[str] = None,
+        save: bool = True,
+        **kwargs,
+    ) -> Iterator[SyntheticFrameResult]:
+        import cv2
+
+        cap = cv2.VideoCapture(source)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        writer = None
+        f_idx = 0
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            h, w = frame.shape[:2]
+            if save and writer is None:
+                out_dir = os.path.join(project, name or "track")
+                os.makedirs(out_dir, exist_ok=True)
+                stem = os.path.splitext(os.path.basename(source))[0]
+                writer = cv2.VideoWriter(
+                    os.path.join(out_dir, f"{stem}.avi"),
+                    cv2.VideoWriter_fourcc(*"MJPG"),  # type: ignore[attr-defined]
+                    fps,
+                    (w, h),
+                )
+            if writer is not None:
+                writer.write(frame)
+            kpts = self.xy[f_idx % len(self.xy)] * (w / 640.0, h / 640.0)
+            conf = self.conf[f_idx % len(self.conf)]
+            box = SyntheticBox(
+                np.concatenate([np.nanmin(kpts, 0), np.nanmax(kpts, 0)]), 0.9
+            )
+            yield SyntheticFrameResult(
+                [SyntheticKeypoints(kpts, conf)], [box], (h, w), orig_img=frame
+            )
+            f_idx += 1
+        cap.release()
+        if writer is not None:
+            writer.release()
+
+
+def load_pose_model(spec: str, xy: np.ndarray, conf: np.ndarray) -> Tuple[Any, Any]:
+    """
+    Loads the pose model to benchmark.
+    :param spec: (str) "stub", or a path to YOLO pose weights (e.g. a small
+    yolo11n-pose.pt).
+    :param xy: (np.ndarray) Track the stub model replays.
+    :param conf: (np.ndarray) Confidence the stub model replays.
+    :returns: (Tuple[Any, Any]) The model and its device.
+    """
+    if spec == "stub":
+        return StubPoseModel(xy, conf), "cpu"
+    from refvision.inference.model_loader import load_model
+
+    return load_model(spec)
+
+
+def _peak_rss_mib() -> Dict[str, float]:
+    """
+    Peak resident set size of this process and of its finished children
+    (ffmpeg), in MiB. ru_maxrss is KiB on Linux.
+    """
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return {"self": own, "children": children}
+
+
+def run_benchmark(
+    n_frames: int = 300,
+    model_spec: str = "stub",
+    lift: str = "squat",
+    size: Tuple[int, int] = (640, 640),
+    work_dir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Runs the single-view pipeline on a synthetic video: run_pipeline's
+    process_single_view and publish_processed, with local_inference's
+    run_inference in this process instead of a subprocess. The stages are
+    timed by their tracing spans. Needs ffmpeg.
+    :param n_frames: (int) Length of the synthetic video.
+    :param model_spec: (str) "stub" or a path to pose weights.
+    :param lift: (str) Lift type.
+    :param size: (Tuple[int, int]) Video width and height.
+    :param work_dir: (Optional[str]) Scratch directory; a temporary one if None.
+    :returns: (Dict[str, Any]) Per-stage timings (the pipeline.* spans), the
+    summary of all spans, the decision and peak RSS.
+    :raises: RuntimeError If ffmpeg is not installed.
+    """
+    from refvision.dynamo_db.dynamodb_helpers import create_item, get_item
+    from refvision.inference import decision_cache, local_inference, tracking
+    from refvision.postprocess import evidence
+    from refvision.scripts import run_pipeline
+    from refvision.utils import tracing
+
+    if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+        raise RuntimeError("ffmpeg/ffprobe not found; the pipeline needs them")
+
+    with contextlib.ExitStack() as stack:
+        if work_dir is None:
+            work_dir = stack.enter_context(tempfile.TemporaryDirectory())
+        output_dir = os.path.join(work_dir, "runs")
+        stack.enter_context(local_stand_ins(os.path.join(work_dir, "s3")))
+        stack.enter_context(
+            _override(
+                run_pipeline.cfg,
+                TEMP_DIR=os.path.join(work_dir, "temp"),
+                OUTPUT_DIR=output_dir,
+                AVI_OUTPUT=os.path.join(output_dir, "track", "attempt.avi"),
+                MP4_OUTPUT=os.path.join(output_dir, "attempt.mp4"),
+                HLS_OUTPUT_DIR=os.path.join(output_dir, "hls", "attempt"),
+                NORMALIZED_KEY="normalized/attempt.mp4",
+                PROCESSED_KEY="processed/attempt.mp4",
+                PROCESSED_HLS_PREFIX="processed/attempt/hls",
+            )
+        )
+        for module in (local_inference, tracking, evidence):
+            stack.enter_context(_override(module.cfg, OUTPUT_DIR=output_dir))
+        stack.enter_context(
+            _override(
+                decision_cache.cfg,
+                DECISION_CACHE={
+                    **(decision_cache.cfg["DECISION_CACHE"] or {}),
+                    "local_dir": os.path.join(work_dir, "cache"),
+                },
+            )
+        )
+
+        xy, conf = synthetic_track(lift, n_frames)
+        raw_video = write_video(os.path.join(work_dir, "attempt.mp4"), xy, size=size)
+        model_path = model_spec
+        if model_spec == "stub":
+            # the decision cache hashes the weights file
+            model_path = os.path.join(work_dir, "stub-pose.pt")
+            with open(model_path, "wb") as f:
+                f.write(b"stub")
+            stub = load_pose_model(model_spec, xy, conf)
+            stack.enter_context(
+                _override(vars(local_inference), load_model=lambda path: stub)
+            )
+        meet_id, record_id = "BENCH_MEET", f"bench#{lift}#1"
+        create_item(meet_id, record_id, "bench", lift, 1, {})
+
+        was_enabled = tracing.is_enabled()
+        if not was_enabled:
+            tracing.enable(os.path.join(work_dir, "trace"))
+        first = len(tracing.collected_spans())
+        start = time.perf_counter()
+        try:
+            run_pipeline.process_single_view(
+                raw_video,
+                "raw",
+                "incoming/attempt.mp4",
+                model_path,
+                meet_id=meet_id,
+                record_id=record_id,
+                lift=lift,
+                inference=local_inference.run_inference,
+            )
+            run_pipeline.publish_processed()
+        finally:
+            total = time.perf_counter() - start
+            spans = tracing.collected_spans()[first:]
+            if not was_enabled:
+                tracing.disable()
+        stored = get_item(meet_id, record_id) or {}
+
+    summary = tracing.summarise(spans)
+    stages = []
+    for row in summary:
+        if row["name"].startswith("pipeline."):
+            seconds = row["total_ms"] / 1e3
+            stages.append(
+                {
+                    "stage": row["name"].removeprefix("pipeline."),
+                    "seconds": seconds,
+                    "fps": n_frames / seconds if seconds > 0 else float("inf"),
+                }
+            )
+    return {
+        "frames": n_frames,
+        "model": model_spec,
+        "lift": lift,
+        "size": list(size),
+        "stages": stages,
+        "spans": summary,
+        "total_seconds": total,
+        "end_to_end_fps": n_frames / total if total > 0 else None,
+        "decision": stored.get("InferenceResult", {}).get("decision"),
+        "peak_rss_mib": _peak_rss_mib(),
+    }
+
+
+@contextlib.contextmanager
+def _override(mapping: Dict[str, Any], **values: Any) -> Iterator[None]:
+    """
+    Temporarily sets keys of mapping (a config dict, or a module's vars()).
+    """
+    saved = {key: mapping[key] for key in values if key in mapping}
+    mapping.update(values)
+    try:
+        yield
+    finally:
+        for key in values:
+            if key in saved:
+                mapping[key] = saved[key]
+            else:
+                mapping.pop(key, None)
+
+
+def pipeline_records(reports: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Turns repeated benchmark reports into results-store records, one per
+    stage plus the total.
+    :param reports: (List[Dict[str, Any]]) Outputs of run_benchmark with the
+    same parameters.
+    :returns: (List[Dict[str, Any]]) Records with "name", "unit", "samples".
+    """
+    first = reports[0]
+    params = f"frames={first['frames']},model={first['model']},lift={first['lift']}"
+    samples: Dict[str, List[float]] = {}
+    for report in reports:
+        for s in report["stages"]:
+            samples.setdefault(s["stage"], []).append(s["seconds"])
+        samples.setdefault("total", []).append(report["total_seconds"])
+    return [
+        {"name": f"pipeline.{stage}[{params}]", "unit": "s", "samples": values}
+        for stage, values in samples.items()
+    ]
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """
+    Formats a benchmark report as a table.
+    :param report: (Dict[str, Any]) Output of run_benchmark.
+    :returns: (str) The table.
+    """
+    lines = [f"{'stage':<18}{'seconds':>10}{'frames/s':>12}"]
+    for s in report["stages"]:
+        lines.append(f"{s['stage']:<18}{s['seconds']:>10.3f}{s['fps']:>12.1f}")
+    lines.append(
+        f"{'total':<18}{report['total_seconds']:>10.3f}"
+        f"{report['end_to_end_fps'] or 0:>12.1f}"
+    )
+    rss = report["peak_rss_mib"]
+    lines.append(
+        f"peak RSS: {rss['self']:.1f} MiB (children {rss['children']:.1f} MiB); "
+        f"decision: {report['decision']}"
+    )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """
+    Parses arguments, runs the benchmark and prints (and optionally saves) it.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the local pipeline")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--model", default="stub", help="'stub' or a weights path")
+    parser.add_argument("--lift", default="squat")
+    parser.add_argument("--size", type=int, nargs=2, default=[640, 640])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", default=None, help="Write the report to this file")
+    parser.add_argument(
+        "--save", action="store_true", help="Add the run to the results store"
+    )
+    args = parser.parse_args()
+
+    if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+        raise SystemExit("ffmpeg/ffprobe not found; the benchmark needs them")
+    logging.disable(logging.INFO)
+    reports = [
+        run_benchmark(args.frames, args.model, args.lift, tuple(args.size))
+        for _ in range(args.repeats)
+    ]
+    print(format_report(reports[-1]))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+    if args.save:
+        from refvision.benchmarks.results_store import save_results
+
+        print(f"Saved => {save_results(pipeline_records(reports), 'pipeline')}")
+
+
+if __name__ == "__main__":
+    main()
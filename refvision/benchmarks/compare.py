@@ -0,0 +1,228 @@
+# refvision/benchmarks/compare.py
+"""
+Compares two stored benchmark runs and flags statistically significant
+slowdowns. A benchmark regresses when its median got slower by more than the
+tolerance and a one-sided permutation test on the samples rejects "no
+slowdown" at level alpha. Benchmarks with fewer than BENCHMARKS.min_samples
+samples on either side are not tested: with so few samples no test can
+reach a useful significance level, so they are reported as such instead.
+usage: python -m refvision.benchmarks.compare --suite analysis --baseline <commit>
+"""
+import argparse
+import itertools
+import math
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from refvision.benchmarks.results_store import (
+    current_commit,
+    list_results,
+    load_results,
+)
+from refvision.common.config import get_config
+
+cfg = get_config()
+
+
+def _ranks(values: np.ndarray) -> np.ndarray:
+    """
+    Ranks from 1, ties sharing their average rank.
+    """
+    order = np.argsort(values, kind="mergesort")
+    ranks = np.empty(values.size)
+    ranks[order] = np.arange(1, values.size + 1)
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    return (np.bincount(inverse, weights=ranks) / counts)[inverse]
+
+
+def slowdown_p_value(
+    baseline: Sequence[float],
+    current: Sequence[float],
+    permutations: int = 2000,
+    seed: int = 0,
+) -> float:
+    """
+    One-sided permutation test of "current is slower than baseline" on the
+    Mann-Whitney U statistic. Unlike a difference of medians, U uses every
+    sample's rank, so small samples still separate. All relabellings are
+    enumerated when there are no more than permutations of them; otherwise
+    they are sampled. Needs no SciPy and makes no normality assumption.
+    :param baseline: (Sequence[float]) Baseline samples.
+    :param current: (Sequence[float]) Current samples.
+    :param permutations: (int) Number of random relabellings.
+    :param seed: (int) Random seed, so reports are reproducible.
+    :returns: (float) The p-value; 1.0 if there are too few samples.
+    """
+    base = np.asarray(baseline, dtype=float)
+    cur = np.asarray(current, dtype=float)
+    if base.size < 2 or cur.size < 2:
+        return 1.0
+    # U of current up to a constant: the rank sum of its samples
+    ranks = _ranks(np.concatenate([base, cur]))
+    observed = ranks[base.size :].sum()
+    if math.comb(ranks.size, cur.size) <= permutations:
+        picks = np.array(list(itertools.combinations(range(ranks.size), cur.size)))
+        sums = ranks[picks].sum(axis=1)
+        return float(np.count_nonzero(sums >= observed - 1e-9) / len(sums))
+    rng = np.random.default_rng(seed)
+    perms = np.argsort(rng.random((permutations, ranks.size)), axis=1)
+    sums = ranks[perms[:, : cur.size]].sum(axis=1)
+    return float((np.count_nonzero(sums >= observed - 1e-9) + 1) / (permutations + 1))
+
+
+def compare_runs(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    tolerance: Optional[float] = None,
+    alpha: Optional[float] = None,
+    permutations: Optional[int] = None,
+    min_samples: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Compares every benchmark present in either run.
+    :param baseline: (Dict[str, Any]) Stored baseline run.
+    :param current: (Dict[str, Any]) Stored current run.
+    :param tolerance: (Optional[float]) Relative slowdown that is ignored,
+    e.g. 0.05; defaults to BENCHMARKS.tolerance.
+    :param alpha: (Optional[float]) Significance level; defaults to
+    BENCHMARKS.alpha.
+    :param permutations: (Optional[int]) Permutations per test; defaults to
+    BENCHMARKS.permutations.
+    :param min_samples: (Optional[int]) Fewest samples per run for a test;
+    defaults to BENCHMARKS.min_samples.
+    :returns: (List[Dict[str, Any]]) One row per benchmark with medians,
+    relative change, p-value and a status: "regression", "improvement",
+    "slower (n.s.)", "ok", "too few samples", "new" or "missing".
+    """
+    params = cfg["BENCHMARKS"] or {}
+    tolerance = params.get("tolerance", 0.05) if tolerance is None else tolerance
+    alpha = params.get("alpha", 0.05) if alpha is None else alpha
+    permutations = permutations or params.get("permutations", 2000)
+    min_samples = min_samples or params.get("min_samples", 5)
+
+    base_by_name = {r["name"]: r for r in baseline["records"]}
+    cur_by_name = {r["name"]: r for r in current["records"]}
+    rows = []
+    for name in sorted(set(base_by_name) | set(cur_by_name)):
+        base, cur = base_by_name.get(name), cur_by_name.get(name)
+        unit = (cur or base or {}).get("unit")
+        row: Dict[str, Any] = {
+            "name": name,
+            "unit": unit,
+            "baseline": float(np.median(base["samples"])) if base else None,
+            "current": float(np.median(cur["samples"])) if cur else None,
+            "change": None,
+            "p_value": None,
+            "samples": [len(r["samples"]) if r else 0 for r in (base, cur)],
+        }
+        if base is None:
+            row["status"] = "new"
+        elif cur is None:
+            row["status"] = "missing"
+        else:
+            row["change"] = row["current"] / row["baseline"] - 1.0
+            if min(row["samples"]) < min_samples:
+                row["status"] = "too few samples"
+                rows.append(row)
+                continue
+            slower = slowdown_p_value(base["samples"], cur["samples"], permutations)
+            faster = slowdown_p_value(cur["samples"], base["samples"], permutations)
+            if row["change"] > tolerance:
+                row["p_value"] = slower
+                row["status"] = "regression" if slower < alpha else "slower (n.s.)"
+            elif row["change"] < -tolerance and faster < alpha:
+                row["p_value"] = faster
+                row["status"] = "improvement"
+            else:
+                row["status"] = "ok"
+        rows.append(row)
+    return rows
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    """
+    Formats comparison rows as a regression table, regressions first.
+    :param rows: (List[Dict[str, Any]]) Output of compare_runs.
+    :returns: (str) The table.
+    """
+    order = {
+        "regression": 0,
+        "too few samples": 1,
+        "slower (n.s.)": 2,
+        "improvement": 3,
+    }
+    rows = sorted(rows, key=lambda r: (order.get(r["status"], 4), r["name"]))
+    width = max([len(r["name"]) for r in rows] + [9])
+    lines = [
+        f"{'benchmark':<{width}}{'unit':>10}{'baseline':>13}{'current':>13}"
+        f"{'change':>9}{'p':>8}  status"
+    ]
+
+    def num(value: Optional[float], fmt: str) -> str:
+        return format(value, fmt) if value is not None else "-"
+
+    for r in rows:
+        change = num(r["change"], "+.1%")
+        lines.append(
+            f"{r['name']:<{width}}{r['unit']:>10}{num(r['baseline'], '.4g'):>13}"
+            f"{num(r['current'], '.4g'):>13}{change:>9}"
+            f"{num(r['p_value'], '.3f'):>8}  {r['status']}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """
+    Compares two stored runs; exits with status 1 if anything regressed.
+    """
+    parser = argparse.ArgumentParser(description="Compare benchmark runs")
+    parser.add_argument("--suite", default="analysis")
+    parser.add_argument(
+        "--baseline",
+        default=None,
+        help="Commit or results file; defaults to the previous stored run",
+    )
+    parser.add_argument(
+        "--current",
+        default=None,
+        help="Commit or results file; defaults to the current commit",
+    )
+    parser.add_argument("--fingerprint", default=None, help="Host fingerprint")
+    parser.add_argument("--tolerance", type=float, default=None)
+    parser.add_argument("--alpha", type=float, default=None)
+    args = parser.parse_args()
+
+    current_ref = args.current or current_commit()
+    baseline_ref = args.baseline
+    if baseline_ref is None:
+        history = [
+            r["commit"]
+            for r in list_results(args.suite, args.fingerprint)
+            if r["commit"] != current_ref
+        ]
+        if not history:
+            sys.exit(f"No baseline '{args.suite}' run stored for this host.")
+        baseline_ref = history[-1]
+
+    baseline = load_results(baseline_ref, args.suite, args.fingerprint)
+    current = load_results(current_ref, args.suite, args.fingerprint)
+    if baseline.get("fingerprint") != current.get("fingerprint"):
+        print("warning: comparing runs from different hosts", file=sys.stderr)
+
+    rows = compare_runs(baseline, current, args.tolerance, args.alpha)
+    print(f"{args.suite}: {baseline['commit']} => {current['commit']}")
+    print(format_comparison(rows))
+    untested = [r["name"] for r in rows if r["status"] == "too few samples"]
+    if untested:
+        print(
+            f"WARNING: {len(untested)} benchmark(s) have too few samples to "
+            "detect a regression; rerun with more --repeats:\n  "
+            + "\n  ".join(untested),
+            file=sys.stderr,
+        )
+    if any(r["status"] == "regression" for r in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# refvision/benchmarks/results_store.py
+"""
+Local store of benchmark results, keyed by host fingerprint, commit and
+suite: <results_dir>/<fingerprint>/<commit>/<suite>.json. Everything is on
+disk so history and comparisons work without a network.
+"""
+import hashlib
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from refvision.common.config import get_config
+
+cfg = get_config()
+
+
+def results_dir() -> str:
+    """
+    Root directory of the results store.
+    :returns: (str) Absolute path, from BENCHMARKS.results_dir.
+    """
+    path = (cfg["BENCHMARKS"] or {}).get("results_dir", ".benchmarks")
+    if os.path.isabs(path):
+        return path
+    return os.path.join(cfg.get("PROJECT_ROOT") or os.getcwd(), path)
+
+
+def host_info() -> Dict[str, Any]:
+    """
+    Describes the machine, so results are only compared like with like.
+    :returns: (Dict[str, Any]) Host, CPU and interpreter details.
+    """
+    import numpy as np
+
+    return {
+        "node": platform.node(),
+        "system": platform.system(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+
+
+def host_fingerprint(info: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Short, stable hash of the host details that affect timings.
+    :param info: (Optional[Dict[str, Any]]) Output of host_info.
+    :returns: (str) 12-character hex fingerprint.
+    """
+    info = info or host_info()
+    keys = ("node", "system", "machine", "processor", "cpu_count", "python")
+    payload = json.dumps({k: info.get(k) for k in keys}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:12]
+
+
+def current_commit() -> str:
+    """
+    The commit being benchmarked, marked "+dirty" with uncommitted changes.
+    :returns: (str) Short commit hash, or "unknown" outside a git checkout.
+    """
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "--short=12", "HEAD"], text=True
+        ).strip()
+        dirty = subprocess.check_output(
+            ["git", "status", "--porcelain", "--untracked-files=no"], text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}+dirty" if dirty else commit
+
+
+def save_results(
+    records: List[Dict[str, Any]],
+    suite: str,
+    commit: Optional[str] = None,
+    root: Optional[str] = None,
+) -> str:
+    """
+    Writes one benchmark run to the store, replacing an earlier run of the
+    same suite at the same commit on this host.
+    :param records: (List[Dict[str, Any]]) Records with "name", "unit" and
+    "samples".
+    :param suite: (str) Suite name, e.g. "analysis" or "pipeline".
+    :param commit: (Optional[str]) Commit; defaults to current_commit().
+    :param root: (Optional[str]) Store directory; defaults to results_dir().
+    :returns: (str) Path of the written file.
+    """
+    info = host_info()
+    commit = commit or current_commit()
+    path = os.path.join(
+        root or results_dir(), host_fingerprint(info), commit, f"{suite}.json"
+    )
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    run = {
+        "suite": suite,
+        "commit": commit,
+        "fingerprint": host_fingerprint(info),
+        "host": info,
+        "created_at": datetime.utcnow().isoformat(),
+        "records": records,
+    }
+    with open(path, "w") as f:
+        json.dump(run, f, indent=2)
+    return path
+
+
+def load_results(
+    ref: str,
+    suite: str,
+    fingerprint: Optional[str] = None,
+    root: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Loads a stored run by commit, or from an explicit JSON file.
+    :param ref: (str) Commit (prefix allowed) or path to a results file.
+    :param suite: (str) Suite name.
+    :param fingerprint: (Optional[str]) Host; defaults to this machine.
+    :param root: (Optional[str]) Store directory; defaults to results_dir().
+    :returns: (Dict[str, Any]) The stored run.
+    :raises FileNotFoundError: If no run matches.
+    :raises ValueError: If a commit prefix is ambiguous.
+    """
+    if os.path.isfile(ref):
+        with open(ref) as f:
+            return json.load(f)
+
+    host_dir = os.path.join(root or results_dir(), fingerprint or host_fingerprint())
+    commits = [
+        c
+        for c in (os.listdir(host_dir) if os.path.isdir(host_dir) else [])
+        if c.startswith(ref)
+        and os.path.isfile(os.path.join(host_dir, c, f"{suite}.json"))
+    ]
+    exact = [c for c in commits if c == ref]
+    if exact:
+        commits = exact
+    if not commits:
+        raise FileNotFoundError(f"No '{suite}' results for {ref} in {host_dir}")
+    if len(commits) > 1:
+        raise ValueError(f"Ambiguous commit {ref}: {sorted(commits)}")
+    with open(os.path.join(host_dir, commits[0], f"{suite}.json")) as f:
+        return json.load(f)
+
+
+def list_results(
+    suite: str, fingerprint: Optional[str] = None, root: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    History of stored runs of a suite on one host, oldest first.
+    :param suite: (str) Suite name.
+    :param fingerprint: (Optional[str]) Host; defaults to this machine.
+    :param root: (Optional[str]) Store directory; defaults to results_dir().
+    :returns: (List[Dict[str, Any]]) Commit and creation time of each run.
+    """
+    host_dir = os.path.join(root or results_dir(), fingerprint or host_fingerprint())
+    runs = []
+    for commit in os.listdir(host_dir) if os.path.isdir(host_dir) else []:
+        path = os.path.join(host_dir, commit, f"{suite}.json")
+        if os.path.isfile(path):
+            with open(path) as f:
+                run = json.load(f)
+            runs.append({"commit": commit, "created_at": run.get("created_at")})
+    return sorted(runs, key=lambda r: r["created_at"] or "")
@@ -0,0 +1,171 @@
+# refvision/benchmarks/stand_ins.py
+"""
+Local stand-ins for the AWS services the pipeline talks to: an in-memory S3
+client and DynamoDB table, and a context manager that points the helpers at
+them. Used by the pipeline benchmark and the tests, so neither needs an AWS
+account.
+"""
+import contextlib
+import io
+import itertools
+import os
+import re
+from typing import Any, Dict, Iterator, Optional, Tuple
+from botocore.exceptions import ClientError
+
+
+class LocalS3:
+    """
+    Stand-in for the boto3 S3 client calls used by the pipeline:
+    upload_file, download_file, put_object, head_object, get_object (with
+    Range), multipart uploads and presigned URLs. Objects are kept in memory
+    as {"Body": bytes, **put arguments}; with a root directory, a presigned
+    URL is a copy of the object under it, so ffmpeg can read it.
+    """
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        """
+        :param root: (Optional[str]) Directory for presigned copies; the
+        URLs are placeholders if None.
+        """
+        self.root = root
+        self.objects: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.uploads: Dict[str, Dict[str, Any]] = {}
+        self._ids = itertools.count(1)
+
+    @staticmethod
+    def _error(code: str, operation: str) -> ClientError:
+        return ClientError({"Error": {"Code": code, "Message": code}}, operation)
+
+    def _body(self, bucket: str, key: str, operation: str) -> bytes:
+        if (bucket, key) not in self.objects:
+            raise self._error(
+                "404" if operation == "HeadObject" else "NoSuchKey", operation
+            )
+        return self.objects[(bucket, key)]["Body"]
+
+    def upload_file(self, local_path: str, bucket: str, key: str, **kwargs) -> None:
+        with open(local_path, "rb") as f:
+            self.put_object(Bucket=bucket, Key=key, Body=f.read())
+
+    def download_file(self, bucket: str, key: str, local_path: str, **kwargs) -> None:
+        body = self._body(bucket, key, "GetObject")
+        os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+        with open(local_path, "wb") as f:
+            f.write(body)
+
+    def put_object(self, Bucket: str, Key: str, Body: Any = b"", **kwargs) -> Dict:
+        self.objects[(Bucket, Key)] = {"Body": bytes(Body), **kwargs}
+        return {"ETag": f'"{len(self.objects)}"'}
+
+    def head_object(self, Bucket: str, Key: str) -> Dict[str, Any]:
+        return {"ContentLength": len(self._body(Bucket, Key, "HeadObject"))}
+
+    def get_object(
+        self, Bucket: str, Key: str, Range: Optional[str] = None
+    ) -> Dict[str, Any]:
+        data = self._body(Bucket, Key, "GetObject")
+        if Range:
+            start, end = Range.removeprefix("bytes=").split("-")
+            if int(start) >= len(data):
+                raise self._error("InvalidRange", "GetObject")
+            data = data[int(start) : int(end) + 1]
+        return {"Body": io.BytesIO(data), "ContentLength": len(data)}
+
+    def create_multipart_upload(self, Bucket: str, Key: str, **kwargs) -> Dict:
+        upload_id = str(next(self._ids))
+        self.uploads[upload_id] = {"key": (Bucket, Key), "parts": {}, "args": kwargs}
+        return {"UploadId": upload_id}
+
+    def upload_part(
+        self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: Any
+    ) -> Dict[str, Any]:
+        self.uploads[UploadId]["parts"][PartNumber] = bytes(Body)
+        return {"ETag": f'"{UploadId}-{PartNumber}"'}
+
+    def complete_multipart_upload(
+        self, Bucket: str, Key: str, UploadId: str, MultipartUpload: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        upload = self.uploads.pop(UploadId)
+        numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+        body = b"".join(upload["parts"][n] for n in numbers)
+        self.objects[(Bucket, Key)] = {"Body": body, **upload["args"]}
+        return {}
+
+    def abort_multipart_upload(
+        self, Bucket: str, Key: str, UploadId: str
+    ) -> Dict[str, Any]:
+        self.uploads.pop(UploadId)
+        return {}
+
+    def generate_presigned_url(
+        self, operation: str, Params: Dict[str, Any], ExpiresIn: int = 3600
+    ) -> str:
+        bucket, key = Params["Bucket"], Params["Key"]
+        if self.root is None:
+            return f"https://local-s3/{bucket}/{key}?sig"
+        path = os.path.join(self.root, bucket, key)
+        self.download_file(bucket, key, path)
+        return path
+
+
+class MemoryTable:
+    """
+    Stand-in for the boto3 DynamoDB Table used by dynamodb_helpers.
+    """
+
+    def __init__(self) -> None:
+        self.items: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    @staticmethod
+    def _key(key: Dict[str, Any]) -> Tuple[str, str]:
+        return key["MeetID"], key["RecordID"]
+
+    def put_item(self, Item: Dict[str, Any]) -> None:
+        self.items[self._key(Item)] = dict(Item)
+
+    def get_item(self, Key: Dict[str, Any]) -> Dict[str, Any]:
+        item = self.items.get(self._key(Key))
+        return {"Item": item} if item is not None else {}
+
+    def update_item(
+        self,
+        Key: Dict[str, Any],
+        UpdateExpression: str,
+        ExpressionAttributeNames: Dict[str, str],
+        ExpressionAttributeValues: Dict[str, Any],
+        **kwargs,
+    ) -> Dict[str, Any]:
+        item = self.items.setdefault(self._key(Key), dict(Key))
+        for name, value in re.findall(r"(#\w+) = (:\w+)", UpdateExpression):
+            item[ExpressionAttributeNames[name]] = ExpressionAttributeValues[value]
+        return {"Attributes": item}
+
+
+@contextlib.contextmanager
+def local_stand_ins(
+    root: Optional[str] = None,
+) -> Iterator[Tuple[LocalS3, MemoryTable]]:
+    """
+    Points the S3 and DynamoDB helpers at local stand-ins for the duration
+    of the block.
+    :param root: (Optional[str]) Directory for presigned copies, see LocalS3.
+    :returns: (Iterator[Tuple[LocalS3, MemoryTable]]) The stand-ins.
+    """
+    from refvision.dynamo_db import dynamodb_helpers
+    from refvision.io import s3_download, s3_stream, s3_upload
+    from refvision.postprocess import evidence, stream_normalize
+
+    s3, table = LocalS3(root), MemoryTable()
+    clients = (s3_upload, s3_download, s3_stream, stream_normalize, evidence)
+    saved = [getattr(module, "get_s3_client") for module in clients]
+    saved_table = dynamodb_helpers.table
+    for module in clients:
+        setattr(module, "get_s3_client", lambda: s3)
+    dynamodb_helpers.table = table
+    try:
+        yield s3, table
+    finally:
+        for module, client in zip(clients, saved):
+            setattr(module, "get_s3_client", client)
+        dynamodb_helpers.table = saved_table
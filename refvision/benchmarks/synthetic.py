@@ -0,0 +1,321 @@
+# refvision/benchmarks/synthetic.py
+"""
+Synthetic keypoint tracks for benchmarking and testing the lift analysers
+without a pose model. Each lift is a linear blend between a "top" and a
+"bottom" pose driven by a motion profile in [0, 1]. synthetic_results wraps
+a track in objects shaped like YOLO results, for code that reads those.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from refvision.analysis.keypoint_track import NUM_KEYPOINTS
+from refvision.common.config import get_config
+
+cfg = get_config()
+
+# (x, y) pixel positions per joint; left and right sides overlap, as seen
+# from the side camera.
+POSES: Dict[str, Dict[str, Dict[str, Tuple[float, float]]]] = {
+    "squat": {
+        "top": {
+            "shoulder": (320.0, 200.0),
+            "elbow": (300.0, 230.0),
+            "wrist": (320.0, 200.0),
+            "hip": (320.0, 300.0),
+            "knee": (320.0, 400.0),
+            "ankle": (320.0, 500.0),
+        },
+        "bottom": {
+            "shoulder": (330.0, 320.0),
+            "elbow": (310.0, 350.0),
+            "wrist": (330.0, 320.0),
+            "hip": (260.0, 420.0),
+            "knee": (380.0, 400.0),
+            "ankle": (320.0, 500.0),
+        },
+    },
+    "bench": {
+        "top": {
+            "shoulder": (300.0, 400.0),
+            "elbow": (300.0, 325.0),
+            "wrist": (300.0, 250.0),
+            "hip": (450.0, 400.0),
+            "knee": (550.0, 400.0),
+            "ankle": (600.0, 500.0),
+        },
+        "bottom": {
+            "shoulder": (300.0, 400.0),
+            "elbow": (340.0, 440.0),
+            "wrist": (320.0, 370.0),
+            "hip": (450.0, 400.0),
+            "knee": (550.0, 400.0),
+            "ankle": (600.0, 500.0),
+        },
+    },
+    "deadlift": {
+        "top": {
+            "shoulder": (320.0, 200.0),
+            "elbow": (320.0, 255.0),
+            "wrist": (320.0, 310.0),
+            "hip": (320.0, 300.0),
+            "knee": (320.0, 400.0),
+            "ankle": (320.0, 500.0),
+        },
+        "bottom": {
+            "shoulder": (360.0, 300.0),
+            "elbow": (350.0, 370.0),
+            "wrist": (340.0, 440.0),
+            "hip": (250.0, 360.0),
+            "knee": (360.0, 420.0),
+            "ankle": (320.0, 500.0),
+        },
+    },
+}
+
+
+def pose_array(pose: Dict[str, Tuple[float, float]]) -> np.ndarray:
+    """
+    Expands a joint-name pose into a (17, 2) keypoint array.
+    :param pose: (Dict[str, Tuple[float, float]]) Position per joint.
+    :returns: (np.ndarray) Keypoints, NaN for joints not in the pose.
+    """
+    kpts = np.full((NUM_KEYPOINTS, 2), np.nan)
+    for joint, position in pose.items():
+        kpts[cfg[f"LEFT_{joint.upper()}_IDX"]] = position
+        kpts[cfg[f"RIGHT_{joint.upper()}_IDX"]] = position
+    return kpts
+
+
+def motion_profile(n_frames: int, hold: float = 0.2) -> np.ndarray:
+    """
+    Profile of a clean rep: hold at 0, move to 1, return to 0, hold.
+    :param n_frames: (int) Number of frames.
+    :param hold: (float) Fraction of the frames spent still at each end.
+    :returns: (np.ndarray) (n_frames,) profile in [0, 1].
+    """
+    n_hold = int(n_frames * hold)
+    n_move = n_frames - 2 * n_hold
+    n_down = n_move // 2
+    return np.concatenate(
+        [
+            np.zeros(n_hold),
+            np.linspace(0.0, 1.0, n_down),
+            np.linspace(1.0, 0.0, n_move - n_down),
+            np.zeros(n_hold),
+        ]
+    )
+
+
+def synthetic_track(
+    lift: str,
+    n_frames: int = 300,
+    profile: Optional[np.ndarray] = None,
+    depth: float = 1.0,
+    dropout: float = 0.0,
+    seed: int = 0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Builds a synthetic keypoint track of one attempt.
+    :param lift: (str) "squat", "bench" or "deadlift".
+    :param n_frames: (int) Number of frames, ignored if profile is given.
+    :param profile: (Optional[np.ndarray]) Motion profile where 0 is the top
+    pose and 1 the bottom pose; defaults to motion_profile(n_frames). For the
+    deadlift the profile is inverted so the bar starts on the floor.
+    :param depth: (float) Scales how far the lifter travels towards the
+    bottom pose.
+    :param dropout: (float) Fraction of keypoints replaced with low-confidence
+    noise, as from occlusion.
+    :param seed: (int) Random seed for the dropout.
+    :returns: (Tuple[np.ndarray, np.ndarray]) Keypoints (frames, 17, 2) and
+    confidence (frames, 17).
+    """
+    if profile is None:
+        profile = motion_profile(n_frames)
+    profile = np.asarray(profile, dtype=float) * depth
+    if lift == "deadlift":
+        profile = depth - profile
+
+    top = pose_array(POSES[lift]["top"])
+    bottom = pose_array(POSES[lift]["bottom"])
+    xy = top + profile[:, None, None] * (bottom - top)
+    conf = np.where(np.isnan(xy[..., 0]), 0.0, 0.95)
+
+    if dropout > 0:
+        rng = np.random.default_rng(seed)
+        drop = rng.random(conf.shape) < dropout
+        xy[drop] = rng.uniform(0.0, 640.0, size=(int(drop.sum()), 2))
+        conf[drop] = 0.05
+    return xy, conf
+
+
+class SyntheticKeypoints:
+    """
+    Keypoints of one detection, shaped like ultralytics' Keypoints.
+    """
+
+    def __init__(self, xy: np.ndarray, conf: np.ndarray) -> None:
+        self.xy = xy[None]
+        self.conf = conf[None]
+
+
+class SyntheticBox:
+    """
+    One detection box, shaped like an ultralytics box.
+    """
+
+    def __init__(self, xyxy: np.ndarray, conf: float, id: Optional[int] = None):
+        self.xyxy = [xyxy]
+        self.conf = conf
+        self.id = id
+
+
+class SyntheticFrameResult:
+    """
+    Pose results of one frame, shaped like an ultralytics Results object.
+    """
+
+    def __init__(
+        self,
+        keypoints: List[SyntheticKeypoints],
+        boxes: List[SyntheticBox],
+        orig_shape: Tuple[int, int],
+        orig_img: Optional[np.ndarray] = None,
+    ) -> None:
+        self.keypoints = keypoints
+        self.boxes = boxes
+        self.orig_shape = orig_shape
+        self.orig_img = orig_img
+
+
+def synthetic_results(
+    xy: np.ndarray,
+    conf: np.ndarray,
+    detections: int = 1,
+    missed: float = 0.0,
+    orig_shape: Tuple[int, int] = (640, 640),
+    seed: int = 0,
+) -> List[Any]:
+    """
+    Wraps a keypoint track in YOLO-like per-frame results. The lifter is the
+    first detection; the others are bystanders placed at random, some of them
+    outside the lifter selector's region of interest.
+    :param xy: (np.ndarray) Lifter keypoints (frames, 17, 2).
+    :param conf: (np.ndarray) Lifter keypoint confidence (frames, 17).
+    :param detections: (int) Detections per frame, including the lifter.
+    :param missed: (float) Fraction of frames with no detections at all.
+    :param orig_shape: (Tuple[int, int]) Frame height and width.
+    :param seed: (int) Random seed for the bystanders.
+    :returns: (List[Any]) One result object per frame.
+    """
+    rng = np.random.default_rng(seed)
+    h, w = orig_shape
+    extra = detections - 1
+    signs = rng.choice([-1.0, 1.0], size=(extra, 2))
+    offsets = signs * rng.uniform(0.15, 0.45, size=(extra, 2)) * (w, h)
+    dropped = np.asarray(rng.random(xy.shape[0]) < missed)
+    results = []
+    for f_idx in range(xy.shape[0]):
+        lifter = xy[f_idx]
+        if dropped[f_idx] or np.all(np.isnan(lifter)):
+            results.append(SyntheticFrameResult([], [], orig_shape))
+            continue
+        lo = np.nanmin(lifter, axis=0)
+        hi = np.nanmax(lifter, axis=0)
+        keypoints = [SyntheticKeypoints(lifter, conf[f_idx])]
+        boxes = [SyntheticBox(np.concatenate([lo, hi]), 0.9)]
+        for offset in offsets:
+            keypoints.append(SyntheticKeypoints(lifter + offset, conf[f_idx]))
+            boxes.append(SyntheticBox(np.concatenate([lo + offset, hi + offset]), 0.8))
+        results.append(SyntheticFrameResult(keypoints, boxes, orig_shape))
+    return results
+
+
+# joint pairs drawn as limbs of the stick figure
+LIMBS: List[Tuple[str, str]] = [
+    ("shoulder", "elbow"),
+    ("elbow", "wrist"),
+    ("shoulder", "hip"),
+    ("hip", "knee"),
+    ("knee", "ankle"),
+]
+
+
+def draw_skeleton(
+    frame: np.ndarray,
+    kpts: np.ndarray,
+    thickness: int,
+    head_radius: int,
+    color: Tuple[int, int, int] = (230, 230, 230),
+) -> None:
+    """
+    Draws a stick figure in place from pixel keypoints. The head sits above
+    the shoulder midpoint; missing (NaN) keypoints are skipped.
+    :param frame: (np.ndarray) BGR frame to draw on.
+    :param kpts: (np.ndarray) Keypoints (17, 2) in pixels.
+    :param thickness: (int) Limb thickness in pixels.
+    :param head_radius: (int) Head radius in pixels.
+    :param color: (Tuple[int, int, int]) BGR colour.
+    """
+    import cv2
+
+    for side in ("LEFT", "RIGHT"):
+        for a, b in LIMBS:
+            pa = kpts[cfg[f"{side}_{a.upper()}_IDX"]]
+            pb = kpts[cfg[f"{side}_{b.upper()}_IDX"]]
+            if np.isnan(pa).any() or np.isnan(pb).any():
+                continue
+            cv2.line(frame, tuple(map(int, pa)), tuple(map(int, pb)), color, thickness)
+    shoulders = kpts[[cfg["LEFT_SHOULDER_IDX"], cfg["RIGHT_SHOULDER_IDX"]]]
+    if not np.isnan(shoulders).any():
+        cx, cy = shoulders.mean(axis=0)
+        head = (int(cx), int(cy - 1.6 * head_radius))
+        cv2.circle(frame, head, head_radius, color, -1)
+
+
+def render_frame(
+    kpts: np.ndarray, size: Tuple[int, int] = (640, 640), thickness: int = 8
+) -> np.ndarray:
+    """
+    Draws one frame of a stick figure lifter on a plain background.
+    :param kpts: (np.ndarray) Keypoints (17, 2) in 640x640 track coordinates.
+    :param size: (Tuple[int, int]) Frame width and height.
+    :param thickness: (int) Limb thickness in pixels at 640 wide.
+    :returns: (np.ndarray) BGR frame of shape (height, width, 3).
+    """
+    import cv2
+
+    w, h = size
+    scale = np.array([w / 640.0, h / 640.0])
+    frame = np.full((h, w, 3), 40, dtype=np.uint8)
+    cv2.line(frame, (0, int(510 * scale[1])), (w, int(510 * scale[1])), (90, 90, 90), 2)
+    draw_skeleton(
+        frame, kpts * scale, max(1, int(thickness * scale[0])), int(22 * scale[0])
+    )
+    return frame
+
+
+def write_video(
+    path: str,
+    xy: np.ndarray,
+    fps: float = 30.0,
+    size: Tuple[int, int] = (640, 640),
+    fourcc: str = "mp4v",
+) -> str:
+    """
+    Renders a keypoint track to a video file with OpenCV.
+    :param path: (str) Output path.
+    :param xy: (np.ndarray) Keypoint track (frames, 17, 2).
+    :param fps: (float) Frame rate.
+    :param size: (Tuple[int, int]) Frame width and height.
+    :param fourcc: (str) OpenCV codec code, e.g. "mp4v" or "MJPG".
+    :returns: (str) The output path.
+    """
+    import cv2
+
+    fourcc_code = cv2.VideoWriter_fourcc(*fourcc)  # type: ignore[attr-defined]
+    writer = cv2.VideoWriter(path, fourcc_code, fps, size)
+    if not writer.isOpened():
+        raise RuntimeError(f"OpenCV could not open a {fourcc} writer for {path}")
+    for kpts in xy:
+        writer.write(render_frame(kpts, size))
+    writer.release()
+    return path
@@ -0,0 +1,366 @@
+# refvision/benchmarks/video_generator.py
+"""
+Generator of synthetic squat videos with ground truth. A stick-figure lifter
+squats with parametric depth, speed and pause; the camera angle, resolution,
+frame rate and number of distractor people vary. Each video is written as
+<name>.mp4 with a <name>.json sidecar holding the spec and ground truth (true
+turnaround frame, depth margin, expected decision) and a <name>.npz holding
+the true 2D keypoint track.
+usage: python -m refvision.benchmarks.video_generator --out data/synthetic
+"""
+import argparse
+import itertools
+import json
+import os
+from typing import Any, Dict, Iterable, List, Tuple
+import numpy as np
+from refvision.analysis.keypoint_track import NUM_KEYPOINTS, estimate_femur_length
+from refvision.benchmarks.synthetic import draw_skeleton
+from refvision.common.config import get_config
+
+cfg = get_config()
+
+# body segment lengths in metres
+SEGMENTS: Dict[str, float] = {
+    "tibia": 0.45,
+    "femur": 0.45,
+    "torso": 0.55,
+    "upper_arm": 0.30,
+    "forearm": 0.27,
+    "head": 0.11,
+    "hip_width": 0.22,
+    "shoulder_width": 0.40,
+    "grip_width": 0.80,
+}
+
+DEFAULT_SPEC: Dict[str, Any] = {
+    "depth": 0.2,  # hip below knee at the bottom, in femur lengths (< 0 is high)
+    "descent_s": 1.2,
+    "ascent_s": 1.0,
+    "pause_s": 0.0,  # pause at the bottom
+    "hold_s": 0.8,  # standing still before and after the rep
+    "max_shin_angle": 35.0,  # degrees forward at the bottom
+    "max_torso_lean": 40.0,
+    "camera_angle": 0.0,  # 0 = side view, 90 = front view
+    "width": 1280,
+    "height": 720,
+    "fps": 30.0,
+    "distractors": 0,
+}
+
+
+def make_spec(**overrides: Any) -> Dict[str, Any]:
+    """
+    Builds a generator spec from the defaults.
+    :param overrides: Spec fields to change.
+    :returns: (Dict[str, Any]) The spec.
+    :raises ValueError: If a field is unknown.
+    """
+    unknown = set(overrides) - set(DEFAULT_SPEC)
+    if unknown:
+        raise ValueError(f"Unknown spec fields: {sorted(unknown)}")
+    return {**DEFAULT_SPEC, **overrides}
+
+
+def squat_profile(spec: Dict[str, Any]) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """
+    Depth profile of the rep (0 standing, 1 bottom) with eased motion.
+    :param spec: (Dict[str, Any]) Generator spec.
+    :returns: (Tuple[np.ndarray, Tuple[int, int]]) Per-frame profile and the
+    first and last frame at the bottom.
+    """
+    fps = spec["fps"]
+    n_hold = int(round(spec["hold_s"] * fps))
+    n_down = max(2, int(round(spec["descent_s"] * fps)))
+    n_pause = int(round(spec["pause_s"] * fps))
+    n_up = max(2, int(round(spec["ascent_s"] * fps)))
+    ease = lambda n: 0.5 - 0.5 * np.cos(np.linspace(0.0, np.pi, n))  # noqa: E731
+    profile = np.concatenate(
+        [
+            np.zeros(n_hold),
+            ease(n_down),
+            np.ones(n_pause),
+            1.0 - ease(n_up),
+            np.zeros(n_hold),
+        ]
+    )
+    bottom_start = n_hold + n_down - 1
+    return profile, (bottom_start, bottom_start + n_pause)
+
+
+def lifter_pose_3d(p: float, spec: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    3D joint positions (forward x, height y, lateral z; metres, ankle at the
+    origin) of the lifter at depth profile p.
+    :param p: (float) Depth profile value in [0, 1].
+    :param spec: (Dict[str, Any]) Generator spec.
+    :returns: (Dict[str, np.ndarray]) Centre position of each joint.
+    """
+    tibia, femur, torso = SEGMENTS["tibia"], SEGMENTS["femur"], SEGMENTS["torso"]
+    shin = np.radians(p * spec["max_shin_angle"])
+    knee = np.array([tibia * np.sin(shin), tibia * np.cos(shin)])
+
+    # hip height eases from standing to depth below the bottom knee height
+    bottom_knee_y = tibia * np.cos(np.radians(spec["max_shin_angle"]))
+    bottom_hip_y = bottom_knee_y - spec["depth"] * femur
+    hip_y = (1 - p) * (tibia + femur) + p * bottom_hip_y
+    rise = np.clip(hip_y - knee[1], -femur, femur)
+    hip = np.array([knee[0] - np.sqrt(femur**2 - rise**2), knee[1] + rise])
+
+    lean = np.radians(p * spec["max_torso_lean"])
+    shoulder = hip + torso * np.array([np.sin(lean), np.cos(lean)])
+    # low-bar position: hands just behind the shoulders, elbows back and down
+    elbow = shoulder + np.array([-0.22, -0.18])
+    wrist = shoulder + np.array([-0.08, 0.02])
+    head = shoulder + (SEGMENTS["head"] + 0.1) * np.array([np.sin(lean), np.cos(lean)])
+    return {
+        "ankle": np.array([0.0, 0.0]),
+        "knee": knee,
+        "hip": hip,
+        "shoulder": shoulder,
+        "elbow": elbow,
+        "wrist": wrist,
+        "head": head,
+    }
+
+
+def _half_width(joint: str) -> float:
+    if joint in ("shoulder", "elbow"):
+        return SEGMENTS["shoulder_width"] / 2
+    if joint == "wrist":
+        return SEGMENTS["grip_width"] / 2
+    if joint == "head":
+        return 0.0
+    return SEGMENTS["hip_width"] / 2
+
+
+def project(
+    pose: Dict[str, np.ndarray],
+    camera_angle: float,
+    origin: Tuple[float, float],
+    scale: float,
+) -> np.ndarray:
+    """
+    Orthographic projection of a 3D pose into COCO keypoints. The camera
+    turns about the vertical axis, so heights (and the depth margin) do not
+    depend on the camera angle.
+    :param pose: (Dict[str, np.ndarray]) Output of lifter_pose_3d.
+    :param camera_angle: (float) Degrees; 0 is a side view, 90 a front view.
+    :param origin: (Tuple[float, float]) Pixel position of the ankles.
+    :param scale: (float) Pixels per metre.
+    :returns: (np.ndarray) Keypoints (17, 2) in pixels.
+    """
+    a = np.radians(camera_angle)
+    kpts = np.full((NUM_KEYPOINTS, 2), np.nan)
+    for joint, (x, y) in pose.items():
+        for side, sign in (("LEFT", 1.0), ("RIGHT", -1.0)):
+            z = sign * _half_width(joint)
+            u = origin[0] + scale * (x * np.cos(a) + z * np.sin(a))
+            v = origin[1] - scale * y
+            if joint == "head":
+                # nose, eyes and ears cluster on the head
+                kpts[0] = (u, v)
+                kpts[1:5] = (u, v - 0.02 * scale)
+            else:
+                kpts[cfg[f"{side}_{joint.upper()}_IDX"]] = (u, v)
+    return kpts
+
+
+def generate_squat(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Computes the keypoint track and ground truth of one synthetic squat.
+    :param spec: (Dict[str, Any]) Generator spec, see make_spec.
+    :returns: (Dict[str, Any]) "xy" (frames, 17, 2) lifter keypoints in
+    pixels, "distractors" (people, frames, 17, 2), "ground_truth" and the
+    drawing "scale" in pixels per metre.
+    """
+    w, h = spec["width"], spec["height"]
+    profile, (bottom_start, bottom_end) = squat_profile(spec)
+    scale = 0.55 * h / 1.8
+    origin = (w / 2.0, 0.85 * h)
+    xy = np.stack(
+        [
+            project(lifter_pose_3d(p, spec), spec["camera_angle"], origin, scale)
+            for p in profile
+        ]
+    )
+
+    # distractors stand near the frame edges, outside the lifter ROI, and sway
+    rng = np.random.default_rng(len(profile) + spec["distractors"])
+    distractors = []
+    standing = lifter_pose_3d(0.0, spec)
+    for i in range(spec["distractors"]):
+        x = (0.12 + 0.76 * (i % 2)) * w + rng.uniform(-0.04, 0.04) * w
+        d_scale = scale * rng.uniform(0.7, 0.9)
+        sway = (
+            0.03
+            * d_scale
+            * np.sin(np.arange(len(profile)) / spec["fps"] * rng.uniform(0.5, 1.5))
+        )
+        base = project(standing, rng.uniform(0, 90), (x, 0.8 * h), d_scale)
+        distractors.append(
+            base[None] + np.stack([sway, np.zeros_like(sway)], 1)[:, None]
+        )
+
+    bottom_hip = xy[bottom_start, [cfg["LEFT_HIP_IDX"], cfg["RIGHT_HIP_IDX"]], 1].mean()
+    bottom_knee = xy[
+        bottom_start, [cfg["LEFT_KNEE_IDX"], cfg["RIGHT_KNEE_IDX"]], 1
+    ].mean()
+    margin_px = float(bottom_hip - bottom_knee)
+    # the femur length the analysis would measure on perfect keypoints, so
+    # normalised margins compare like for like at any camera angle
+    femur_px = estimate_femur_length(xy)
+    ground_truth = {
+        "turnaround_frame": int((bottom_start + bottom_end) // 2),
+        "bottom_frames": [int(bottom_start), int(bottom_end)],
+        "depth_margin": {
+            "raw_px": margin_px,
+            "normalised": margin_px / femur_px,
+            "femur_length_px": femur_px,
+        },
+        "expected_decision": "Good Lift!" if margin_px > 0 else "No Lift",
+        "num_frames": int(len(profile)),
+    }
+    return {
+        "xy": xy,
+        "distractors": (
+            np.stack(distractors) if distractors else np.empty((0,) + xy.shape)
+        ),
+        "ground_truth": ground_truth,
+        "scale": scale,
+    }
+
+
+def render_video(path: str, squat: Dict[str, Any], spec: Dict[str, Any]) -> str:
+    """
+    Renders a generated squat to an MP4 with OpenCV.
+    :param path: (str) Output .mp4 path.
+    :param squat: (Dict[str, Any]) Output of generate_squat.
+    :param spec: (Dict[str, Any]) The spec it was generated from.
+    :returns: (str) The output path.
+    """
+    import cv2
+
+    w, h = spec["width"], spec["height"]
+    fourcc = cv2.VideoWriter_fourcc(*"mp4v")  # type: ignore[attr-defined]
+    writer = cv2.VideoWriter(path, fourcc, spec["fps"], (w, h))
+    if not writer.isOpened():
+        raise RuntimeError(f"OpenCV could not open an mp4v writer for {path}")
+    scale = squat["scale"]
+    thickness = max(2, int(0.05 * scale))
+    head = max(3, int(SEGMENTS["head"] * scale))
+    background = np.full((h, w, 3), 40, dtype=np.uint8)
+    cv2.line(background, (0, int(0.85 * h)), (w, int(0.85 * h)), (90, 90, 90), 2)
+    for f_idx, kpts in enumerate(squat["xy"]):
+        frame = background.copy()
+        for person in squat["distractors"]:
+            draw_skeleton(frame, person[f_idx], thickness, head, (150, 150, 150))
+        draw_skeleton(frame, kpts, thickness, head)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def write_sample(out_dir: str, name: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Generates one video with its ground-truth sidecars.
+    :param out_dir: (str) Output directory.
+    :param name: (str) Base file name.
+    :param spec: (Dict[str, Any]) Generator spec.
+    :returns: (Dict[str, Any]) Manifest entry (paths, spec, ground truth).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    squat = generate_squat(spec)
+    video = render_video(os.path.join(out_dir, f"{name}.mp4"), squat, spec)
+    track = os.path.join(out_dir, f"{name}.npz")
+    np.savez_compressed(track, xy=squat["xy"], distractors=squat["distractors"])
+    entry = {
+        "name": name,
+        "video": video,
+        "track": track,
+        "spec": spec,
+        "ground_truth": squat["ground_truth"],
+    }
+    with open(os.path.join(out_dir, f"{name}.json"), "w") as f:
+        json.dump(entry, f, indent=2)
+    return entry
+
+
+def spec_grid(**axes: Iterable[Any]) -> List[Dict[str, Any]]:
+    """
+    Cartesian product of spec values.
+    :param axes: Spec field => values to sweep.
+    :returns: (List[Dict[str, Any]]) One spec per combination.
+    """
+    names = list(axes)
+    return [
+        make_spec(**dict(zip(names, values)))
+        for values in itertools.product(*(axes[n] for n in names))
+    ]
+
+
+def generate_corpus(
+    out_dir: str, specs: List[Dict[str, Any]], prefix: str = "squat"
+) -> str:
+    """
+    Generates a corpus of videos and writes a manifest.json listing them.
+    :param out_dir: (str) Output directory.
+    :param specs: (List[Dict[str, Any]]) Specs to render.
+    :param prefix: (str) File name prefix.
+    :returns: (str) Path of the manifest.
+    """
+    entries = [
+        write_sample(out_dir, f"{prefix}_{i:04d}", spec) for i, spec in enumerate(specs)
+    ]
+    manifest = os.path.join(out_dir, "manifest.json")
+    with open(manifest, "w") as f:
+        json.dump({"videos": entries}, f, indent=2)
+    return manifest
+
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """
+    Loads the entries of a corpus manifest.
+    :param path: (str) manifest.json path, or the corpus directory.
+    :returns: (List[Dict[str, Any]]) Manifest entries.
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, "manifest.json")
+    with open(path) as f:
+        return json.load(f)["videos"]
+
+
+def main() -> None:
+    """
+    Generates a corpus over a grid of squat parameters.
+    """
+    parser = argparse.ArgumentParser(description="Generate synthetic squat videos")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--depth", type=float, nargs="+", default=[-0.2, 0.1, 0.3])
+    parser.add_argument("--descent_s", type=float, nargs="+", default=[1.2])
+    parser.add_argument("--pause_s", type=float, nargs="+", default=[0.0])
+    parser.add_argument("--camera_angle", type=float, nargs="+", default=[0, 45])
+    parser.add_argument("--resolution", nargs="+", default=["1280x720"])
+    parser.add_argument("--fps", type=float, nargs="+", default=[30.0])
+    parser.add_argument("--distractors", type=int, nargs="+", default=[0, 2])
+    args = parser.parse_args()
+
+    sizes = [tuple(int(v) for v in r.split("x")) for r in args.resolution]
+    specs = []
+    for w, h in sizes:
+        specs += spec_grid(
+            depth=args.depth,
+            descent_s=args.descent_s,
+            pause_s=args.pause_s,
+            camera_angle=args.camera_angle,
+            fps=args.fps,
+            distractors=args.distractors,
+            width=[w],
+            height=[h],
+        )
+    manifest = generate_corpus(args.out, specs)
+    print(f"Generated {len(specs)} videos => {manifest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -33,13 +33,26 @@ def get_config():
     config["APP_PASSWORD"] = os.getenv("APP_PASSWORD", "secret")
 
     # Keypoint indexes
+    config["LEFT_SHOULDER_IDX"] = 5
+    config["RIGHT_SHOULDER_IDX"] = 6
+    config["LEFT_ELBOW_IDX"] = 7
+    config["RIGHT_ELBOW_IDX"] = 8
+    config["LEFT_WRIST_IDX"] = 9
+    config["RIGHT_WRIST_IDX"] = 10
     config["LEFT_HIP_IDX"] = 11
     config["RIGHT_HIP_IDX"] = 12
     config["LEFT_KNEE_IDX"] = 13
     config["RIGHT_KNEE_IDX"] = 14
+    config["LEFT_ANKLE_IDX"] = 15
+    config["RIGHT_ANKLE_IDX"] = 16
 
     # threshold for squat depth
     config["THRESHOLD"] = 0.0
+    # same threshold in femur lengths, used when the body scale is known
+    config["NORMALISED_THRESHOLD"] = 0.0
+
+    # keypoints below this confidence are treated as missing
+    config["MIN_KEYPOINT_CONF"] = 0.3
 
     # port
     config["FLASK_PORT"] = int(os.getenv("FLASK_PORT", 5000))
@@ -51,6 +64,22 @@ def get_config():
 
     # read from config.yaml
     config["LIFTER_SELECTOR"] = config_data.get("LIFTER_SELECTOR")
+    config["LIFT_FEATURES"] = config_data.get("LIFT_FEATURES", {})
+    config["KEYPOINT_GATING"] = config_data.get("KEYPOINT_GATING", {})
+    config["MULTI_VIEW"] = config_data.get("MULTI_VIEW", {})
+    config["DECISION_CACHE"] = config_data.get("DECISION_CACHE", {})
+    config["BENCHMARKS"] = config_data.get("BENCHMARKS", {})
+    config["TRACING"] = config_data.get("TRACING", {})
+    config["LOGGING"] = config_data.get("LOGGING", {})
+    config["ENCODING"] = config_data.get("ENCODING", {})
+    config["HLS"] = config_data.get("HLS", {})
+    config["FFMPEG_JOBS"] = config_data.get("FFMPEG_JOBS", {})
+    config["STREAM_NORMALIZE"] = config_data.get("STREAM_NORMALIZE", {})
+    config["EVIDENCE"] = config_data.get("EVIDENCE", {})
+    config["TRIM"] = config_data.get("TRIM", {})
+    config["FRAME_INDEX"] = config_data.get("FRAME_INDEX", {})
+    config["CHUNKED_ENCODE"] = config_data.get("CHUNKED_ENCODE", {})
+    config["OVERLAY"] = config_data.get("OVERLAY", {})
     config["S3_BUCKET_RAW"] = config_data.get("s3_bucket_raw", "refvision-raw-videos")
     config["S3_BUCKET_ANNOTATED"] = config_data.get(
         "s3_bucket_annotated", "refvision-annotated-videos"
@@ -122,6 +151,8 @@ def get_config():
         config["RAW_KEY"] = f"incoming/{video_name}{video_ext}"
         config["NORMALIZED_KEY"] = f"normalized/{video_name}.mp4"
         config["PROCESSED_KEY"] = f"processed/{video_name}.mp4"
+        config["PROCESSED_HLS_PREFIX"] = f"processed/{video_name}/hls"
+        config["HLS_OUTPUT_DIR"] = os.path.join(output_dir, "hls", video_name)
 
         config["DYNAMODB_TABLE"] = os.getenv("DYNAMODB_TABLE", "StateStore")
 
@@ -0,0 +1,342 @@
+# refvision/inference/decision_cache.py
+"""
+Content-addressed cache of inference decisions. The key combines a hash of
+the normalised video, a hash of the analysis configuration and lift type,
+and a hash of the model weights, so a re-uploaded video (new key, retried
+step, demo clip) skips inference as long as nothing that affects the
+decision has changed.
+Two backends share one interface: a small local JSON index with artefacts
+on disk, and a DynamoDB index with artefacts in S3.
+"""
+import contextlib
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+from refvision.common.config import get_config
+
+cfg = get_config()
+
+logger = logging.getLogger(__name__)
+
+# bump when the analysis code changes in a way that alters decisions
+CACHE_VERSION = 1
+
+# partition key of cache entries in the DynamoDB table
+CACHE_MEET_ID = "DECISION_CACHE"
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    SHA-256 of a file's contents, read in chunks.
+    :param path: (str) Path to the file.
+    :param chunk_size: (int) Bytes read per chunk.
+    :returns: (str) Hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def config_digest(lift: str) -> str:
+    """
+    Hash of everything in the configuration that affects a decision or the
+    cached artefacts (the annotated video and the evidence images).
+    :param lift: (str) Lift type.
+    :returns: (str) Hex digest.
+    """
+    relevant = {
+        "version": CACHE_VERSION,
+        "lift": lift,
+        "threshold": cfg["THRESHOLD"],
+        "normalised_threshold": cfg["NORMALISED_THRESHOLD"],
+        "min_keypoint_conf": cfg["MIN_KEYPOINT_CONF"],
+        "lifter_selector": cfg["LIFTER_SELECTOR"],
+        "lift_features": cfg["LIFT_FEATURES"],
+        "keypoint_gating": cfg["KEYPOINT_GATING"],
+        "overlay": cfg["OVERLAY"],
+        "evidence": cfg["EVIDENCE"],
+    }
+    payload = json.dumps(relevant, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _read_json(path: str) -> Dict[str, Any]:
+    """
+    Reads a JSON object from disk, treating a missing or corrupt file as empty.
+    :param path: (str) Path to the file.
+    :returns: (Dict[str, Any]) The parsed object.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    """
+    Atomically writes a JSON object, so a crash never leaves a torn index.
+    :param path: (str) Path to the file.
+    :param data: (Dict[str, Any]) The object to write.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, default=str)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+@contextlib.contextmanager
+def _locked(path: str) -> Iterator[None]:
+    """
+    Holds an exclusive lock on <path>.lock, so read-modify-write updates of
+    a JSON file from several pipeline processes don't lose each other's
+    entries.
+    :param path: (str) Path to the file being updated.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def weights_digest(model_path: str, memo_path: Optional[str] = None) -> str:
+    """
+    Hash of the model weights. Weights files are large, so digests are
+    memoised by path, size and modification time.
+    :param model_path: (str) Path to the weights.
+    :param memo_path: (Optional[str]) JSON file holding the memo; defaults to
+    weights.json in the local cache directory.
+    :returns: (str) Hex digest.
+    """
+    if memo_path is None:
+        memo_path = os.path.join(_local_dir(), "weights.json")
+    stat = os.stat(model_path)
+    memo = _read_json(memo_path)
+    entry = memo.get(os.path.abspath(model_path))
+    if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+        return entry["digest"]
+
+    digest = file_digest(model_path)
+    with _locked(memo_path):
+        memo = _read_json(memo_path)
+        memo[os.path.abspath(model_path)] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "digest": digest,
+        }
+        _write_json(memo_path, memo)
+    return digest
+
+
+def cache_key(video_file: str, model_path: str, lift: str) -> str:
+    """
+    Cache key of one inference run.
+    :param video_file: (str) Path to the normalised video.
+    :param model_path: (str) Path to the model weights.
+    :param lift: (str) Lift type.
+    :returns: (str) Hex digest combining video, config and weights hashes.
+    """
+    parts = [file_digest(video_file), config_digest(lift), weights_digest(model_path)]
+    return hashlib.sha256(":".join(parts).encode()).hexdigest()
+
+
+def _local_dir() -> str:
+    """
+    Directory of the local cache backend.
+    :returns: (str) Absolute path.
+    """
+    local_dir = (cfg["DECISION_CACHE"] or {}).get("local_dir", ".cache/decisions")
+    if os.path.isabs(local_dir):
+        return local_dir
+    project_root = cfg.get("PROJECT_ROOT") or os.getcwd()
+    return os.path.join(project_root, local_dir)
+
+
+class LocalDecisionCache:
+    """
+    Decision cache backed by a JSON index and an artefact directory on disk.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None) -> None:
+        """
+        :param cache_dir: (Optional[str]) Cache directory; defaults to
+        DECISION_CACHE.local_dir.
+        """
+        self.cache_dir = cache_dir or _local_dir()
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+
+    def get(
+        self, key: str, artefacts: Optional[Dict[str, str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Looks up a decision and restores its artefacts.
+        :param key: (str) Cache key.
+        :param artefacts: (Optional[Dict[str, str]]) Artefact name => local
+        path to restore it to.
+        :returns: (Optional[Dict[str, Any]]) The cached decision, or None on a
+        miss (including when a requested artefact is missing).
+        """
+        entry = _read_json(self.index_path).get(key)
+        if entry is None:
+            return None
+        stored = entry.get("artefacts", {})
+        for name, dest in (artefacts or {}).items():
+            if name not in stored or not os.path.exists(stored[name]):
+                logger.warning(f"Cache entry {key} lacks artefact '{name}'; miss.")
+                return None
+        for name, dest in (artefacts or {}).items():
+            os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+            shutil.copyfile(stored[name], dest)
+        return entry["decision"]
+
+    def put(
+        self,
+        key: str,
+        decision: Dict[str, Any],
+        artefacts: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Stores a decision and copies of its artefacts.
+        :param key: (str) Cache key.
+        :param decision: (Dict[str, Any]) The decision record.
+        :param artefacts: (Optional[Dict[str, str]]) Artefact name => local
+        path to copy into the cache.
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+        stored: Dict[str, str] = {}
+        for name, src in (artefacts or {}).items():
+            if not os.path.exists(src):
+                logger.warning(f"Artefact '{name}' not found at {src}; not cached.")
+                continue
+            os.makedirs(entry_dir, exist_ok=True)
+            stored[name] = os.path.join(entry_dir, name + os.path.splitext(src)[1])
+            shutil.copyfile(src, stored[name])
+
+        with _locked(self.index_path):
+            index = _read_json(self.index_path)
+            index[key] = {
+                "decision": decision,
+                "artefacts": stored,
+                "created_at": datetime.utcnow().isoformat(),
+            }
+            _write_json(self.index_path, index)
+
+
+class DynamoDecisionCache:
+    """
+    Decision cache backed by the DynamoDB table (partition CACHE_MEET_ID,
+    sort key = cache key) with artefacts stored in S3.
+    """
+
+    def __init__(self, bucket: Optional[str] = None, prefix: Optional[str] = None):
+        """
+        :param bucket: (Optional[str]) S3 bucket for artefacts; defaults to
+        S3_BUCKET.
+        :param prefix: (Optional[str]) S3 key prefix; defaults to
+        DECISION_CACHE.s3_prefix.
+        """
+        params = cfg["DECISION_CACHE"] or {}
+        self.bucket = bucket or cfg["S3_BUCKET"]
+        self.prefix = prefix or params.get("s3_prefix", "decision-cache")
+
+    def get(
+        self, key: str, artefacts: Optional[Dict[str, str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Looks up a decision and downloads its artefacts.
+        :param key: (str) Cache key.
+        :param artefacts: (Optional[Dict[str, str]]) Artefact name => local
+        path to download it to.
+        :returns: (Optional[Dict[str, Any]]) The cached decision, or None.
+        """
+        from refvision.dynamo_db.dynamodb_helpers import (
+            convert_decimal_to_float,
+            get_item,
+        )
+        from refvision.io.s3_download import download_file_from_s3
+
+        item = get_item(CACHE_MEET_ID, key)
+        if not item:
+            return None
+        stored = item.get("Artefacts", {})
+        if any(name not in stored for name in artefacts or {}):
+            return None
+        for name, dest in (artefacts or {}).items():
+            os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+            download_file_from_s3(self.bucket, stored[name], dest, logger=logger)
+        return convert_decimal_to_float(item["InferenceResult"])
+
+    def put(
+        self,
+        key: str,
+        decision: Dict[str, Any],
+        artefacts: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Stores a decision in DynamoDB and uploads its artefacts to S3.
+        :param key: (str) Cache key.
+        :param decision: (Dict[str, Any]) The decision record.
+        :param artefacts: (Optional[Dict[str, str]]) Artefact name => local
+        path to upload.
+        """
+        from refvision.dynamo_db.dynamodb_helpers import decimalize, update_item
+        from refvision.io.s3_upload import upload_file_to_s3
+
+        stored: Dict[str, str] = {}
+        for name, src in (artefacts or {}).items():
+            if not os.path.exists(src):
+                logger.warning(f"Artefact '{name}' not found at {src}; not cached.")
+                continue
+            s3_key = f"{self.prefix}/{key}/{name}{os.path.splitext(src)[1]}"
+            upload_file_to_s3(
+                src,
+                self.bucket,
+                s3_key,
+                content_type="application/octet-stream",
+                logger=logger,
+            )
+            stored[name] = s3_key
+
+        update_item(
+            meet_id=CACHE_MEET_ID,
+            record_id=key,
+            updates={
+                "InferenceResult": decimalize(decision),
+                "Artefacts": stored,
+                "CreatedAt": datetime.utcnow().isoformat(),
+            },
+        )
+
+
+def get_decision_cache() -> Optional[Any]:
+    """
+    Builds the decision cache selected by DECISION_CACHE.backend.
+    :returns: (Optional[Any]) LocalDecisionCache, DynamoDecisionCache, or None
+    if caching is disabled.
+    :raises ValueError: If the backend is unknown.
+    """
+    backend = (cfg["DECISION_CACHE"] or {}).get("backend", "local")
+    if backend in (None, "none"):
+        return None
+    if backend == "local":
+        return LocalDecisionCache()
+    if backend == "dynamodb":
+        return DynamoDecisionCache()
+    raise ValueError(f"Unknown DECISION_CACHE backend: {backend!r}")
@@ -6,22 +6,33 @@ and assess whether they meet squat depth criteria. The lifter is selected
 using parameters from config/config.yaml.
 """
 
+import logging
 import os
 import sys
 import yaml
 import gc
 import argparse
+import time
+from typing import Any, Dict, Optional
 from refvision.inference.model_loader import load_model
-from refvision.analysis.depth_checker import check_squat_depth_by_turnaround
+from refvision.inference.perf_stats import InferenceStats
+from refvision.inference.tracking import track_video
+from refvision.inference.video_processor import annotate_video
+from refvision.analysis.context import AnalysisContext
+from refvision.analysis.lift_dispatch import analyse_attempt
+from refvision.inference.decision_cache import cache_key, get_decision_cache
+from refvision.postprocess.evidence import (
+    evidence_paths,
+    upload_evidence,
+    write_evidence,
+)
 from refvision.utils.logging_setup import setup_logging
 from refvision.common.config import CONFIG_YAML_PATH, get_config
-from refvision.utils.timer import measure_time
+from refvision.utils.tracing import span, traced
 from refvision.dynamo_db.dynamodb_helpers import update_item, decimalize
 
 cfg = get_config()
-logger = setup_logging(
-    os.path.join(os.path.dirname(__file__), "../../logs/yolo_logs.log")
-)
+logger = logging.getLogger(__name__)
 
 config_path = CONFIG_YAML_PATH
 with open(config_path) as f:
@@ -37,54 +48,149 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--model_path", default="./model_zoo/yolo11x-pose.pt")
     parser.add_argument("--meet_id", required=True, help="PK in DynamoDB")
     parser.add_argument("--record_id", required=True, help="SK in DynamoDB")
+    parser.add_argument("--lift", default="squat", help="squat, bench or deadlift")
+    parser.add_argument(
+        "--no_cache", action="store_true", help="Ignore the decision cache"
+    )
     return parser.parse_args()
 
 
-@measure_time
+def store_evidence(
+    stem: str, meta: Optional[Dict[str, Any]], meet_id: str, record_id: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Uploads the evidence images; failures are logged, not raised, since the
+    decision does not depend on them.
+    :param stem: Video file name without extension.
+    :param meta: Output of write_evidence (None if there is no evidence).
+    :param meet_id: PK in DynamoDB.
+    :param record_id: SK in DynamoDB.
+    :return: The item's Evidence attribute, or None.
+    """
+    if meta is None:
+        return None
+    try:
+        with span("inference.upload_evidence"):
+            return upload_evidence(stem, meta, meet_id, record_id)
+    except Exception as e:
+        logger.warning(f"Could not upload decision evidence: {e}")
+        return None
+
+
+@traced()
 def run_inference(
-    video_file: str, model_path: str, meet_id: str, record_id: str
+    video_file: str,
+    model_path: str,
+    meet_id: str,
+    record_id: str,
+    lift: str = "squat",
+    use_cache: bool = True,
 ) -> None:
     """
     Actually runs YOLO pose inference and updates DynamoDB with the final decision.
+    If the same video was already analysed with the same configuration and
+    weights, the cached decision and annotated video are used instead.
+    A thumbnail of the turnaround frame and a sprite strip around it are
+    uploaded as decision evidence and referenced from the item.
     :param video_file: Path to the input video file.
     :param model_path: Path to the YOLO model file.
     :param meet_id: PK in DynamoDB.
     :param record_id: SK in DynamoDB.
+    :param lift: Lift type, selects the analyser.
+    :param use_cache: Whether to look up and store the decision cache.
     :return: None
     """
     if not os.path.exists(video_file):
         logger.error(f"Error: Video file {video_file} does not exist.")
         sys.exit(1)
 
+    # 0) decision cache, keyed by video content, analysis config and weights
+    cache = get_decision_cache() if use_cache else None
+    stem = os.path.splitext(os.path.basename(video_file))[0]
+    artefacts = {
+        "annotated_avi": os.path.join(cfg["OUTPUT_DIR"], "track", f"{stem}.avi")
+    }
+    key = None
+    if cache is not None:
+        with span("inference.cache_lookup"):
+            key = cache_key(video_file, model_path, lift)
+            cached = cache.get(key, artefacts)
+        if cached is not None:
+            logger.info(f"Decision cache hit => {key}")
+            # the evidence paths are cache-only; the item references the uploads
+            meta = cached.pop("evidence", None)
+            cached["cache"] = {"hit": True, "key": key}
+            updates = {"InferenceResult": decimalize(cached), "Status": "COMPLETED"}
+            if meta is not None and cache.get(key, evidence_paths(stem)) is not None:
+                evidence = store_evidence(stem, meta, meet_id, record_id)
+                if evidence is not None:
+                    updates["Evidence"] = decimalize(evidence)
+            update_item(meet_id=meet_id, record_id=record_id, updates=updates)
+            return
+
     # 1) load YOLO
-    model, device = load_model(model_path)
+    with span("inference.load_model", model_path=model_path):
+        model, device = load_model(model_path)
     logger.info(f"Processing video: {video_file}")
 
-    # 2) pose tracking => writes .avi in runs/pose/track
-    frame_generator = model.track(
-        source=video_file,
-        device=device,
-        show=False,
-        save=True,
-        project=cfg["OUTPUT_DIR"],
-        exist_ok=True,
-        max_det=1,
-        batch=128,
-    )
-    all_frames = list(frame_generator)
-
-    # 3) evaluate squat depth
-    decision = check_squat_depth_by_turnaround(all_frames)
+    # 2) pose tracking (YOLO writes the .avi unless the overlay renderer does)
+    overlay = (cfg["OVERLAY"] or {}).get("enabled", False)
+    stats = InferenceStats()
+    all_frames = track_video(model, device, video_file, stats=stats, save=not overlay)
+
+    # 3) evaluate the attempt with the analyser for its lift type
+    analysis_start = time.perf_counter()
+    with span("inference.analyse", lift=lift, frames=len(all_frames)):
+        context = AnalysisContext.from_results(all_frames)
+        decision = analyse_attempt(lift, all_frames, context=context)
+    stats.finish(analysis_ms=(time.perf_counter() - analysis_start) * 1e3)
     logger.info(f"Final decision => {decision}")
 
-    # 4) update existing DynamoDB record
+    # evidence images from the frames already in memory
+    meta = None
+    if (cfg["EVIDENCE"] or {}).get("enabled", False):
+        with span("inference.evidence"):
+            meta = write_evidence(
+                all_frames, context.gated_xy, decision.get("turnaround_frame"), stem
+            )
+    # annotated .avi from the track; drawn on the in-memory frames, after
+    # the evidence has been cut from them
+    if overlay:
+        with span("inference.overlay"):
+            frames = [getattr(result, "orig_img", None) for result in all_frames]
+            annotate_video(
+                video_file,
+                context,
+                artefacts["annotated_avi"],
+                frames=None if any(frame is None for frame in frames) else frames,
+            )
+    if cache is not None:
+        stored = dict(artefacts)
+        if meta is not None:
+            stored.update(evidence_paths(stem))
+        cache.put(key, {**decision, "evidence": meta}, stored)
+        decision["cache"] = {"hit": False, "key": key}
+    evidence = store_evidence(stem, meta, meet_id, record_id)
+
+    # 4) update existing DynamoDB record, with the stage timings alongside
     decision = decimalize(decision)
-
-    update_item(
-        meet_id=meet_id,
-        record_id=record_id,
-        updates={"InferenceResult": decision, "Status": "COMPLETED"},
+    performance = stats.to_record()
+    logger.info(
+        f"Frame timings => {performance['frames']} frames, "
+        f"p95 frame {performance['stages'].get('frame', {}).get('p95_ms')} ms"
     )
+
+    with span("inference.store"):
+        update_item(
+            meet_id=meet_id,
+            record_id=record_id,
+            updates={
+                "InferenceResult": decision,
+                "Performance": decimalize(performance),
+                "Status": "COMPLETED",
+                **({"Evidence": decimalize(evidence)} if evidence else {}),
+            },
+        )
     logger.info(f"DynamoDB updated => meet_name={meet_id}, record_id={record_id}")
     gc.collect()
 
@@ -94,8 +200,16 @@ def main():
     main function to parse arguments and run inference.
     :return: None
     """
+    setup_logging(os.path.join(os.path.dirname(__file__), "../../logs/yolo_logs.log"))
     args = parse_args()
-    run_inference(args.video, args.model_path, args.meet_id, args.record_id)
+    run_inference(
+        args.video,
+        args.model_path,
+        args.meet_id,
+        args.record_id,
+        args.lift,
+        use_cache=not args.no_cache,
+    )
 
 
 if __name__ == "__main__":
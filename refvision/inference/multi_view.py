@@ -0,0 +1,442 @@
+# refvision/inference/multi_view.py
+"""
+Multi-view attempt evaluation. Runs pose inference on every camera video of
+one attempt concurrently (one worker process per view), aligns the views on
+time from the lifter's hip motion, and fuses the per-view decisions into a
+single confidence-weighted decision stored in DynamoDB. The depth margins
+are fused at the aligned turnaround instant, and the reference view's
+evidence images are uploaded as in the single-view path.
+
+Multi-view attempts are neither trimmed nor cached: trimming each view on
+its own motion would cut the views at different points, and the decision
+cache is keyed by a single video.
+"""
+import argparse
+import gc
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from refvision.common.config import get_config
+from refvision.utils.tracing import traced
+
+cfg = get_config()
+
+logger = logging.getLogger(__name__)
+
+
+def _video_fps(video_file: str, default: float = 30.0) -> float:
+    """
+    Reads the frame rate of a video.
+    :param video_file: (str) Path to the video.
+    :param default: (float) Frame rate used if the container doesn't report one.
+    :returns: (float) Frames per second.
+    """
+    import cv2
+
+    cap = cv2.VideoCapture(video_file)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+    return float(fps) if fps and fps > 0 else default
+
+
+def infer_view(
+    view: str, video_file: str, model_path: str, lift: str, evidence: bool = False
+) -> dict:
+    """
+    Worker: runs pose tracking and analysis on one camera view.
+    Runs in its own process, so the model is loaded here rather than shared.
+    :param view: (str) View name, e.g. "side" or "front".
+    :param video_file: (str) Path to the view's normalised video.
+    :param model_path: (str) Path to the YOLO weights.
+    :param lift: (str) Lift type.
+    :param evidence: (bool) Whether to write the evidence images, from the
+    frames in memory.
+    :returns: (dict) The view's decision, frame rate, hip height and depth
+    margin series, evidence metadata (None if not written) and stage timings.
+    """
+    # imported here so the parent process never loads torch
+    from refvision.analysis.context import AnalysisContext
+    from refvision.analysis.lift_dispatch import analyse_attempt
+    from refvision.inference.perf_stats import InferenceStats
+    from refvision.inference.tracking import track_video
+    from refvision.inference.model_loader import load_model
+    from refvision.inference.video_processor import annotate_video
+    from refvision.postprocess.evidence import write_evidence
+
+    model, device = load_model(model_path)
+    logger.info(f"[{view}] Processing video: {video_file}")
+    stats = InferenceStats()
+    overlay = (cfg["OVERLAY"] or {}).get("enabled", False)
+    all_frames = track_video(
+        model, device, video_file, name=view, stats=stats, save=not overlay
+    )
+    analysis_start = time.perf_counter()
+    context = AnalysisContext.from_results(all_frames)
+    decision = analyse_attempt(lift, all_frames, context=context)
+    stats.finish(analysis_ms=(time.perf_counter() - analysis_start) * 1e3)
+    stem = os.path.splitext(os.path.basename(video_file))[0]
+    meta = None
+    if evidence:
+        # before the overlay draws on the frames
+        meta = write_evidence(
+            all_frames, context.gated_xy, decision.get("turnaround_frame"), stem
+        )
+    if overlay:
+        frames = [getattr(result, "orig_img", None) for result in all_frames]
+        annotate_video(
+            video_file,
+            context,
+            os.path.join(cfg["OUTPUT_DIR"], view, f"{stem}.avi"),
+            frames=None if any(frame is None for frame in frames) else frames,
+        )
+    hip_y = np.asarray(context.joint_y("hip"), dtype=float)
+    # hips below the knees, in femur lengths, like depth_margin["normalised"]
+    margin_y = context.joint_y("hip", smoothed=False) - context.joint_y(
+        "knee", smoothed=False
+    )
+    del all_frames, model
+    gc.collect()
+    return {
+        "view": view,
+        "video": video_file,
+        "fps": _video_fps(video_file),
+        "hip_y": hip_y,
+        "margin_y": np.asarray(margin_y, dtype=float),
+        "decision": decision,
+        "evidence": meta,
+        "performance": stats.to_record(),
+    }
+
+
+def _fill_nan(values: np.ndarray) -> np.ndarray:
+    """
+    Linearly fills NaNs (including the edges) so a series can be correlated.
+    :param values: (np.ndarray) The series.
+    :returns: (np.ndarray) Filled copy, all zeros if nothing is valid.
+    """
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return np.zeros_like(values)
+    idx = np.arange(values.size)
+    return np.interp(idx, idx[valid], values[valid])
+
+
+def estimate_offset(
+    reference: np.ndarray,
+    reference_fps: float,
+    other: np.ndarray,
+    other_fps: float,
+    max_offset: float = 2.0,
+) -> float:
+    """
+    Estimates the time offset between two views of the same attempt by
+    cross-correlating the lifter's vertical hip velocity.
+    :param reference: (np.ndarray) Hip height series of the reference view.
+    :param reference_fps: (float) Frame rate of the reference view.
+    :param other: (np.ndarray) Hip height series of the other view.
+    :param other_fps: (float) Frame rate of the other view.
+    :param max_offset: (float) Largest offset to search, in seconds.
+    :returns: (float) Offset in seconds: an event at reference time t appears
+    at time t + offset in the other view.
+    """
+    if reference.size < 3 or other.size < 3:
+        return 0.0
+    # resample the other view onto the reference frame grid
+    other_t = np.arange(other.size) / other_fps
+    grid = np.arange(0.0, other_t[-1], 1.0 / reference_fps)
+    other_r = np.interp(grid, other_t, _fill_nan(other))
+
+    v_ref = np.diff(_fill_nan(reference))
+    v_oth = np.diff(other_r)
+    if v_ref.std() == 0 or v_oth.size == 0 or v_oth.std() == 0:
+        return 0.0
+    v_ref = (v_ref - v_ref.mean()) / v_ref.std()
+    v_oth = (v_oth - v_oth.mean()) / v_oth.std()
+
+    corr = np.correlate(v_oth, v_ref, mode="full")
+    lags = np.arange(corr.size) - (v_ref.size - 1)
+    max_lag = int(round(max_offset * reference_fps))
+    in_range = np.abs(lags) <= max_lag
+    best = lags[in_range][np.argmax(corr[in_range])]
+    return float(best / reference_fps)
+
+
+def fuse_views(
+    views: List[dict],
+    reference_view: Optional[str] = None,
+    view_weights: Optional[Dict[str, float]] = None,
+    max_offset: float = 2.0,
+) -> dict:
+    """
+    Fuses per-view decisions. Each view is weighted by keypoint quality
+    score x view weight, and the depth margins (femur lengths) are averaged
+    with those weights. A view with a margin series ("margin_y") contributes
+    its margin at the fused turnaround instant, shifted by its time offset,
+    so all views are judged at the same moment; otherwise its own decision's
+    margin is used.
+    Like the single-view squat decision, the fused margin is compared with
+    NORMALISED_THRESHOLD. Without any margin (bench and deadlift, or no body
+    scale) each view votes for its decision with its weight instead. A tie
+    (vote 0) is a "No Lift": a lift only passes when it is shown to be good.
+    :param views: (List[dict]) Outputs of infer_view.
+    :param reference_view: (Optional[str]) View whose timeline is used for
+    the fused turnaround frame; defaults to the first view.
+    :param view_weights: (Optional[Dict[str, float]]) Per-view trust, e.g. a
+    side camera judges depth better than a front camera. Defaults to 1.0.
+    :param max_offset: (float) Largest time offset between views, in seconds.
+    :returns: (dict) The fused decision record with a per-view breakdown.
+    """
+    if not views:
+        raise ValueError("fuse_views needs at least one view.")
+    view_weights = view_weights or {}
+    by_name = {v["view"]: v for v in views}
+    ref = by_name.get(reference_view) or views[0]
+
+    summaries: Dict[str, dict] = {}
+    votes: List[float] = []
+    weights: List[float] = []
+    scores: List[float] = []
+    times: List[Tuple[float, float]] = []
+    rule_votes: List[float] = []
+    rule_weights: List[float] = []
+    failed_reasons: List[str] = []
+    # (view, offset, weight, the decision's own margin)
+    margin_inputs: List[Tuple[dict, float, float, Optional[float]]] = []
+    for view in views:
+        decision = view["decision"]
+        quality = decision.get("quality") or {}
+        score = float(quality.get("score", 1.0))
+        weight = score * view_weights.get(view["view"], 1.0)
+        offset = 0.0
+        if view is not ref:
+            offset = estimate_offset(
+                ref["hip_y"], ref["fps"], view["hip_y"], view["fps"], max_offset
+            )
+        frame = decision.get("turnaround_frame")
+        margin = (decision.get("depth_margin") or {}).get("normalised")
+        rules = decision.get("rule_evaluation") or {}
+
+        vote = 1.0 if decision["decision"] == "Good Lift!" else -1.0
+        votes.append(vote)
+        weights.append(weight)
+        scores.append(score)
+        margin_inputs.append((view, offset, weight, margin))
+        if frame is not None and weight > 0:
+            times.append(((frame / view["fps"]) - offset, weight))
+        if rules:
+            rule_votes.append(1.0 if rules.get("is_successful") else -1.0)
+            rule_weights.append(weight)
+            if not rules.get("is_successful"):
+                failed_reasons.extend(
+                    r for r in rules.get("reasons", []) if r not in failed_reasons
+                )
+
+        summaries[view["view"]] = {
+            "decision": decision["decision"],
+            "turnaround_frame": frame,
+            "offset_seconds": offset,
+            "weight": weight,
+            "depth_margin": decision.get("depth_margin"),
+            "quality": quality or None,
+            "rule_evaluation": rules or None,
+        }
+
+    w = np.asarray(weights)
+    total = float(w.sum())
+    vote = float(np.dot(w, votes) / total) if total > 0 else -1.0
+
+    turnaround = None
+    turnaround_s = None
+    if times:
+        turnaround_s = float(
+            np.average([t for t, _ in times], weights=[wt for _, wt in times])
+        )
+        turnaround = int(round(turnaround_s * ref["fps"]))
+
+    margins, margin_weights = [], []
+    for view, offset, weight, margin in margin_inputs:
+        series = view.get("margin_y")
+        if turnaround_s is not None and series is not None:
+            idx = int(round((turnaround_s + offset) * view["fps"]))
+            if 0 <= idx < len(series) and np.isfinite(series[idx]):
+                margin = float(series[idx])
+                summaries[view["view"]]["aligned_margin"] = margin
+        if margin is not None:
+            margins.append(margin)
+            margin_weights.append(weight)
+    fused_margin = None
+    if margins and sum(margin_weights) > 0:
+        fused_margin = float(np.average(margins, weights=margin_weights))
+
+    threshold = cfg["NORMALISED_THRESHOLD"]
+    if fused_margin is not None:
+        method = "aligned_depth_margin"
+        good = fused_margin > threshold
+    else:
+        method = "confidence_weighted_vote"
+        good = vote > 0
+
+    rule_evaluation = None
+    if rule_votes:
+        rule_total = sum(rule_weights)
+        rule_vote = (
+            float(np.dot(rule_weights, rule_votes) / rule_total) if rule_total else -1.0
+        )
+        rule_evaluation = {
+            "is_successful": rule_vote > 0,
+            "reasons": [] if rule_vote > 0 else failed_reasons,
+        }
+
+    fused = {
+        "decision": "Good Lift!" if good else "No Lift",
+        "turnaround_frame": turnaround,
+        "reference_view": ref["view"],
+        "lift": ref["decision"].get("lift"),
+        "keypoints": {},
+        "depth_margin": {
+            "raw_px": None,
+            "normalised": fused_margin,
+            "femur_length_px": None,
+        },
+        "fusion": {
+            "method": method,
+            "threshold": threshold if fused_margin is not None else None,
+            "vote": vote,
+            "total_weight": total,
+        },
+        "views": summaries,
+    }
+    if rule_evaluation is not None:
+        fused["rule_evaluation"] = rule_evaluation
+    min_quality = (cfg["KEYPOINT_GATING"] or {}).get("min_quality", 0.6)
+    fused["quality"] = {
+        "score": max(scores),
+        "escalate": bool(max(scores) < min_quality),
+    }
+    logger.info(f"Fused decision over {len(views)} views => {fused['decision']}")
+    return fused
+
+
+@traced()
+def run_multi_view_inference(
+    videos: Dict[str, str],
+    model_path: str,
+    meet_id: str,
+    record_id: str,
+    lift: str = "squat",
+    max_workers: Optional[int] = None,
+) -> dict:
+    """
+    Runs inference on all camera views of one attempt concurrently, fuses the
+    decisions and updates DynamoDB. Wall time is roughly that of the slowest
+    view rather than the sum of all views.
+    :param videos: (Dict[str, str]) Mapping of view name to video path.
+    :param model_path: (str) Path to the YOLO model file.
+    :param meet_id: (str) PK in DynamoDB.
+    :param record_id: (str) SK in DynamoDB.
+    :param lift: (str) Lift type.
+    :param max_workers: (Optional[int]) Worker processes; defaults to
+    MULTI_VIEW.max_workers, capped at the number of views.
+    :returns: (dict) The fused decision.
+    """
+    from refvision.dynamo_db.dynamodb_helpers import decimalize, update_item
+    from refvision.postprocess.evidence import upload_evidence
+
+    params = cfg["MULTI_VIEW"] or {}
+    ref_view = params.get("reference_view")
+    ref_view = ref_view if ref_view in videos else next(iter(videos))
+    with_evidence = (cfg["EVIDENCE"] or {}).get("enabled", False)
+    for path in videos.values():
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Video file {path} does not exist.")
+
+    workers = min(max_workers or params.get("max_workers", 2), len(videos))
+    # spawn, so each worker gets a clean CUDA context
+    mp_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as pool:
+        futures = [
+            pool.submit(
+                infer_view,
+                view,
+                path,
+                model_path,
+                lift,
+                evidence=with_evidence and view == ref_view,
+            )
+            for view, path in videos.items()
+        ]
+        views = [future.result() for future in futures]
+
+    decision = fuse_views(
+        views,
+        reference_view=ref_view,
+        view_weights=params.get("view_weights"),
+        max_offset=params.get("max_offset_seconds", 2.0),
+    )
+    updates = {
+        "InferenceResult": decimalize(decision),
+        "Performance": decimalize(
+            {"views": {v["view"]: v["performance"] for v in views}}
+        ),
+        "Status": "COMPLETED",
+    }
+    # evidence of the reference view; the decision does not depend on it
+    meta = next((v["evidence"] for v in views if v.get("evidence")), None)
+    if meta is not None:
+        stem = os.path.splitext(os.path.basename(videos[ref_view]))[0]
+        try:
+            updates["Evidence"] = decimalize(
+                upload_evidence(stem, meta, meet_id, record_id)
+            )
+        except Exception as e:
+            logger.warning(f"Could not upload decision evidence: {e}")
+    update_item(meet_id=meet_id, record_id=record_id, updates=updates)
+    logger.info(f"DynamoDB updated => meet_name={meet_id}, record_id={record_id}")
+    return decision
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Run multi-view YOLO inference")
+    parser.add_argument(
+        "--view",
+        action="append",
+        required=True,
+        help="name=path, e.g. side=side.mp4 (repeat for each camera)",
+    )
+    parser.add_argument("--model_path", default="./model_zoo/yolo11x-pose.pt")
+    parser.add_argument("--meet_id", required=True, help="PK in DynamoDB")
+    parser.add_argument("--record_id", required=True, help="SK in DynamoDB")
+    parser.add_argument("--lift", default="squat", help="squat, bench or deadlift")
+    parser.add_argument("--max_workers", type=int, default=None)
+    return parser.parse_args()
+
+
+def main():
+    """
+    main function to parse arguments and run multi-view inference.
+    :return: None
+    """
+    from refvision.utils.logging_setup import setup_logging
+
+    setup_logging(os.path.join(os.path.dirname(__file__), "../../logs/yolo_logs.log"))
+    args = parse_args()
+    videos = dict(item.split("=", 1) for item in args.view)
+    run_multi_view_inference(
+        videos,
+        args.model_path,
+        args.meet_id,
+        args.record_id,
+        args.lift,
+        args.max_workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+# refvision/inference/perf_stats.py
+"""
+Per-frame inference stage timings. Ultralytics reports preprocess, inference
+and postprocess milliseconds on every Results object; we add the time spent
+waiting on the frame generator beyond those (decode, tracker update and the
+annotated-video write) and the attempt's analysis time. Timings go into
+log-bucketed histograms that merge across attempts, so a batch can be
+summarised from the per-attempt Performance records stored in DynamoDB.
+usage: python -m refvision.inference.perf_stats --meet_id <meet>
+"""
+import argparse
+import math
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import numpy as np
+
+# stages reported by ultralytics in Results.speed, in milliseconds
+MODEL_STAGES = ("preprocess", "inference", "postprocess")
+FRAME_STAGES = ("decode_wait",) + MODEL_STAGES + ("frame",)
+PERCENTILES = (50, 95, 99)
+
+
+class LatencyHistogram:
+    """
+    Histogram of latencies with geometric buckets (4 per doubling, so a
+    percentile is within about 10% of the exact value). Counts are kept
+    sparse and two histograms merge by adding counts.
+    """
+
+    MIN_MS = 0.01
+    BUCKETS_PER_DOUBLING = 4
+
+    def __init__(self) -> None:
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = math.inf
+        self.max_ms = 0.0
+
+    def _bucket(self, values: np.ndarray) -> np.ndarray:
+        ratio = np.maximum(values, self.MIN_MS) / self.MIN_MS
+        return np.floor(np.log2(ratio) * self.BUCKETS_PER_DOUBLING).astype(int)
+
+    def _bucket_value(self, idx: int) -> float:
+        """
+        Geometric midpoint of a bucket, in ms.
+        """
+        return self.MIN_MS * 2 ** ((idx + 0.5) / self.BUCKETS_PER_DOUBLING)
+
+    def add(self, values: Any) -> None:
+        """
+        Adds one latency or an array of latencies.
+        :param values: (Any) Latency in ms, or an array of them; NaNs are
+        ignored.
+        """
+        values = np.atleast_1d(np.asarray(values, dtype=float))
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        idxs, counts = np.unique(self._bucket(values), return_counts=True)
+        for idx, count in zip(idxs.tolist(), counts.tolist()):
+            self.counts[idx] = self.counts.get(idx, 0) + count
+        self.count += int(values.size)
+        self.total_ms += float(values.sum())
+        self.min_ms = min(self.min_ms, float(values.min()))
+        self.max_ms = max(self.max_ms, float(values.max()))
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """
+        Adds another histogram's counts to this one.
+        :param other: (LatencyHistogram) The histogram to merge.
+        """
+        for idx, count in other.counts.items():
+            self.counts[idx] = self.counts.get(idx, 0) + count
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.min_ms = min(self.min_ms, other.min_ms)
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Estimates a percentile from the buckets, clamped to the exact min and
+        max.
+        :param q: (float) Percentile in [0, 100].
+        :returns: (Optional[float]) Latency in ms, None if empty.
+        """
+        if self.count == 0:
+            return None
+        rank = max(1, math.ceil(q / 100.0 * self.count))
+        seen = 0
+        for idx in sorted(self.counts):
+            seen += self.counts[idx]
+            if seen >= rank:
+                value = self._bucket_value(idx)
+                return min(max(value, self.min_ms), self.max_ms)
+        return self.max_ms
+
+    def to_record(self) -> Dict[str, Any]:
+        """
+        Summary plus sparse bucket counts, for DynamoDB or JSON.
+        :returns: (Dict[str, Any]) The record; from_record reverses it.
+        """
+        record: Dict[str, Any] = {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else None,
+            "min_ms": self.min_ms if self.count else None,
+            "max_ms": self.max_ms if self.count else None,
+        }
+        for q in PERCENTILES:
+            record[f"p{q}_ms"] = self.percentile(q)
+        record["buckets"] = {str(idx): n for idx, n in sorted(self.counts.items())}
+        return record
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "LatencyHistogram":
+        """
+        Rebuilds a histogram from to_record's output (DynamoDB Decimals are
+        accepted).
+        :param record: (Dict[str, Any]) The record.
+        :returns: (LatencyHistogram) The histogram.
+        """
+        hist = cls()
+        hist.counts = {int(k): int(v) for k, v in record.get("buckets", {}).items()}
+        hist.count = int(record.get("count", 0))
+        if hist.count:
+            hist.total_ms = float(record["mean_ms"]) * hist.count
+            hist.min_ms = float(record["min_ms"])
+            hist.max_ms = float(record["max_ms"])
+        return hist
+
+
+class InferenceStats:
+    """
+    Stage timings of one attempt: a histogram per frame stage and the
+    analysis time.
+    """
+
+    def __init__(self) -> None:
+        self.stages = {stage: LatencyHistogram() for stage in FRAME_STAGES}
+        self.analysis_ms: Optional[float] = None
+        self.started = time.perf_counter()
+        self.wall_s: Optional[float] = None
+
+    def add_frame(self, wall_ms: float, speed: Optional[Dict[str, Any]]) -> None:
+        """
+        Records one frame.
+        :param wall_ms: (float) Time the generator took to produce the frame
+        (its share of the batch's time with batched inference).
+        :param speed: (Optional[Dict[str, Any]]) Results.speed, if reported.
+        """
+        self.stages["frame"].add(wall_ms)
+        model_ms = 0.0
+        for stage in MODEL_STAGES:
+            value = (speed or {}).get(stage)
+            if value is not None:
+                self.stages[stage].add(float(value))
+                model_ms += float(value)
+        # Results.speed is already per frame (ultralytics divides the batch's
+        # times by its size); clamp the jitter of the two clocks
+        self.stages["decode_wait"].add(max(wall_ms - model_ms, 0.0))
+
+    def timed(self, frames: Iterable[Any], batch: int = 1) -> Iterator[Any]:
+        """
+        Yields the results of a frame generator, timing each one. Time the
+        consumer spends between frames is not counted. A batched generator
+        spends the whole batch's time before its first result and yields
+        the rest at once, so the time of each batch is split evenly across
+        its frames.
+        :param frames: (Iterable[Any]) Per-frame results.
+        :param batch: (int) Frames per inference batch; the last batch may
+        be shorter.
+        :returns: (Iterator[Any]) The same results.
+        """
+        pending: List[Any] = []
+        batch_ns = 0
+        start = time.perf_counter_ns()
+        try:
+            for result in frames:
+                batch_ns += time.perf_counter_ns() - start
+                pending.append(getattr(result, "speed", None))
+                if len(pending) >= batch:
+                    self._add_batch(batch_ns, pending)
+                    pending, batch_ns = [], 0
+                yield result
+                start = time.perf_counter_ns()
+        finally:
+            if pending:
+                self._add_batch(batch_ns, pending)
+
+    def _add_batch(self, batch_ns: int, speeds: List[Any]) -> None:
+        wall_ms = batch_ns / 1e6 / len(speeds)
+        for speed in speeds:
+            self.add_frame(wall_ms, speed)
+
+    def finish(self, analysis_ms: Optional[float] = None) -> None:
+        """
+        Stops the attempt's wall clock.
+        :param analysis_ms: (Optional[float]) Time spent analysing the track.
+        """
+        self.analysis_ms = analysis_ms
+        self.wall_s = time.perf_counter() - self.started
+
+    def to_record(self) -> Dict[str, Any]:
+        """
+        Per-attempt performance record stored next to the decision.
+        :returns: (Dict[str, Any]) Frames, fps, analysis time and a histogram
+        record per stage.
+        """
+        frames = self.stages["frame"].count
+        frame_s = self.stages["frame"].total_ms / 1e3
+        return {
+            "frames": frames,
+            "fps": frames / frame_s if frame_s > 0 else None,
+            "analysis_ms": self.analysis_ms,
+            "wall_s": self.wall_s,
+            "stages": {
+                stage: hist.to_record()
+                for stage, hist in self.stages.items()
+                if hist.count
+            },
+        }
+
+
+def summarise_records(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merges per-attempt performance records into a batch summary.
+    :param records: (List[Dict[str, Any]]) Outputs of to_record (possibly
+    read back from DynamoDB).
+    :returns: (Dict[str, Any]) Attempt and frame counts, a merged histogram
+    record per stage (including per-attempt "analysis") and mean fps.
+    """
+    merged: Dict[str, LatencyHistogram] = {}
+    analysis = LatencyHistogram()
+    fps = []
+    for record in records:
+        for stage, hist_record in (record.get("stages") or {}).items():
+            hist = merged.setdefault(stage, LatencyHistogram())
+            hist.merge(LatencyHistogram.from_record(hist_record))
+        if record.get("analysis_ms") is not None:
+            analysis.add(float(record["analysis_ms"]))
+        if record.get("fps") is not None:
+            fps.append(float(record["fps"]))
+    stages = {
+        stage: merged[stage].to_record() for stage in FRAME_STAGES if stage in merged
+    }
+    if analysis.count:
+        stages["analysis"] = analysis.to_record()
+    return {
+        "attempts": len(records),
+        "frames": sum(int(r.get("frames") or 0) for r in records),
+        "mean_fps": float(np.mean(fps)) if fps else None,
+        "stages": stages,
+    }
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """
+    Formats a batch summary as a table of per-stage percentiles.
+    :param summary: (Dict[str, Any]) Output of summarise_records.
+    :returns: (str) The table.
+    """
+
+    def _ms(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value:.2f}"
+
+    lines = [
+        f"{summary['attempts']} attempts, {summary['frames']} frames, "
+        f"mean {_ms(summary['mean_fps'])} fps",
+        f"{'stage':<14}{'count':>9}{'mean ms':>10}{'p50 ms':>10}"
+        f"{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}",
+    ]
+    for stage, r in summary["stages"].items():
+        lines.append(
+            f"{stage:<14}{r['count']:>9}{_ms(r['mean_ms']):>10}"
+            f"{_ms(r['p50_ms']):>10}{_ms(r['p95_ms']):>10}"
+            f"{_ms(r['p99_ms']):>10}{_ms(r['max_ms']):>10}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """
+    Summarises the Performance records of every attempt of a meet.
+    """
+    parser = argparse.ArgumentParser(description="Summarise inference timings")
+    parser.add_argument("--meet_id", required=True, help="PK in DynamoDB")
+    args = parser.parse_args()
+
+    from refvision.dynamo_db.dynamodb_helpers import (
+        convert_decimal_to_float,
+        query_items,
+    )
+
+    items = convert_decimal_to_float(query_items(args.meet_id))
+    records = []
+    for item in items:
+        performance = item.get("Performance") or {}
+        # multi-view attempts store one record per camera view
+        records += list((performance.get("views") or {}).values()) or (
+            [performance] if performance else []
+        )
+    print(format_summary(summarise_records(records)))
+
+
+if __name__ == "__main__":
+    main()
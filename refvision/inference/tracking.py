@@ -0,0 +1,51 @@
+# refvision/inference/tracking.py
+"""
+Module for running pose tracking over a video with a loaded model.
+"""
+from typing import Any, List, Optional
+from refvision.inference.perf_stats import InferenceStats
+from refvision.common.config import get_config
+from refvision.utils.tracing import traced, traced_iter
+
+cfg = get_config()
+
+
+@traced()
+def track_video(
+    model: Any,
+    device: Any,
+    video_file: str,
+    name: Optional[str] = None,
+    stats: Optional[InferenceStats] = None,
+    save: bool = True,
+) -> List[Any]:
+    """
+    Runs YOLO pose tracking over a video and collects the per-frame results.
+    The annotated .avi is written to OUTPUT_DIR/<name>, unless save is False
+    (the overlay renderer draws it from the track instead).
+    :param model: The loaded YOLO model (or anything with the same track API).
+    :param device: The device the model runs on.
+    :param video_file: Path to the input video file.
+    :param name: Output sub-directory; YOLO's default ("track") if None.
+    :param stats: Collects the per-frame stage timings, if given.
+    :param save: Whether YOLO writes its own annotated video.
+    :return: List of frame results. With tracing enabled, decoding and
+    inferring each frame is recorded as a "tracking.frame" span.
+    """
+    batch = 128
+    frame_generator = model.track(
+        source=video_file,
+        device=device,
+        show=False,
+        save=save,
+        project=cfg["OUTPUT_DIR"],
+        name=name,
+        exist_ok=True,
+        max_det=1,
+        batch=batch,
+        # a generator, so frames are timed as they are inferred
+        stream=True,
+    )
+    if stats is not None:
+        frame_generator = stats.timed(frame_generator, batch=batch)
+    return list(traced_iter(frame_generator, "tracking.frame"))
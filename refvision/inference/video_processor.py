@@ -1,73 +1,268 @@
-# refvision/inference/model_loader.py
+# refvision/inference/video_processor.py
 """
-Module for processing video and annotating frames with skeleton overlays.
+Module for annotating videos with skeleton overlays drawn from the lifter's
+precomputed keypoint track: limbs, joints, knee and hip angles, and the
+depth line at the top of the knees. Everything that can be derived from the
+track is computed once for all frames with numpy; each frame then needs only
+a handful of OpenCV calls. Chunks of frames are drawn by a thread pool
+(OpenCV releases the GIL while drawing) and handed to the encoder in order.
 """
+import logging
 import os
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import cv2
 import numpy as np
-from typing import Any, List
-import logging
-from refvision.analysis.lifter_selector import select_lifter_index
+from refvision.analysis.context import AnalysisContext
+from refvision.common.config import get_config
+from refvision.utils.tracing import traced
 
+cfg = get_config()
 
 logger = logging.getLogger(__name__)
 
+# BGR
+LIMB_COLOUR = (255, 255, 255)
+JOINT_COLOUR = (0, 255, 0)
+ANGLE_COLOUR = (0, 255, 255)
+DEPTH_OK_COLOUR = (0, 200, 0)  # hip crease below the top of the knee
+DEPTH_HIGH_COLOUR = (0, 0, 255)
+
+ANGLE_JOINTS = ("left_knee", "right_knee", "left_hip", "right_hip")
+
+
+def limb_pairs() -> np.ndarray:
+    """
+    Keypoint index pairs of the skeleton's limbs (the face is not drawn).
+    :returns: (np.ndarray) (limbs, 2) keypoint indexes.
+    """
+    pairs = [
+        ("LEFT_SHOULDER", "RIGHT_SHOULDER"),
+        ("LEFT_HIP", "RIGHT_HIP"),
+    ]
+    for side in ("LEFT", "RIGHT"):
+        pairs += [
+            (f"{side}_SHOULDER", f"{side}_ELBOW"),
+            (f"{side}_ELBOW", f"{side}_WRIST"),
+            (f"{side}_SHOULDER", f"{side}_HIP"),
+            (f"{side}_HIP", f"{side}_KNEE"),
+            (f"{side}_KNEE", f"{side}_ANKLE"),
+        ]
+    return np.array([[cfg[f"{a}_IDX"], cfg[f"{b}_IDX"]] for a, b in pairs])
+
+
+def _side_mean(values: np.ndarray, idxs: List[int]) -> np.ndarray:
+    """
+    Per-frame mean of the visible values at the given keypoints, NaN if
+    none is visible.
+    """
+    selected = values[:, idxs]
+    count = np.sum(np.isfinite(selected), axis=1)
+    total = np.nansum(selected, axis=1)
+    return np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+
+def overlay_track(context: AnalysisContext) -> Dict[str, np.ndarray]:
+    """
+    Everything the overlay draws, for all frames at once.
+    :param context: (AnalysisContext) The attempt's analysis context; its
+    gated track is drawn.
+    :returns: (Dict[str, np.ndarray]) "points" (frames, 17, 2) int32 pixel
+    positions, "visible" (frames, 17), "limbs" (limbs, 2) and "limb_visible"
+    (frames, limbs), "knee_top" and "hip" (frames,) heights in pixels (-1
+    where unknown), "below" (frames,) whether the hips are below the knee
+    line, and "angles" (frames, len(ANGLE_JOINTS)) in degrees.
+    """
+    xy = context.gated_xy
+    visible = np.all(np.isfinite(xy), axis=2)
+    points = np.where(visible[..., None], xy, 0).round().astype(np.int32)
+    limbs = limb_pairs()
+    limb_visible = visible[:, limbs[:, 0]] & visible[:, limbs[:, 1]]
+
+    y = xy[..., 1]
+    knees = y[:, [cfg["LEFT_KNEE_IDX"], cfg["RIGHT_KNEE_IDX"]]]
+    # the higher knee in the image, i.e. the smaller y
+    knee_top = np.where(np.isfinite(knees), knees, np.inf).min(axis=1)
+    knee_top[np.isinf(knee_top)] = np.nan
+    hip = _side_mean(y, [cfg["LEFT_HIP_IDX"], cfg["RIGHT_HIP_IDX"]])
+    angles = np.stack([context.angles[name] for name in ANGLE_JOINTS], axis=1)
+    return {
+        "points": points,
+        "visible": visible,
+        "limbs": limbs,
+        "limb_visible": limb_visible,
+        "knee_top": np.nan_to_num(knee_top, nan=-1).round().astype(np.int32),
+        "hip": np.nan_to_num(hip, nan=-1).round().astype(np.int32),
+        "below": np.isfinite(knee_top) & np.isfinite(hip) & (hip > knee_top),
+        "angles": angles,
+    }
+
+
+def draw_overlay(frame: np.ndarray, overlay: Dict[str, np.ndarray], idx: int) -> None:
+    """
+    Draws one frame's overlay in place.
+    :param frame: (np.ndarray) BGR frame.
+    :param overlay: (Dict[str, np.ndarray]) Output of overlay_track.
+    :param idx: (int) Frame index in the track.
+    """
+    points = overlay["points"][idx]
+    width = frame.shape[1]
+    thickness = max(2, width // 400)
+
+    segments = points[overlay["limbs"][overlay["limb_visible"][idx]]]
+    if len(segments):
+        cv2.polylines(frame, list(segments), False, LIMB_COLOUR, thickness, cv2.LINE_AA)
+    radius = max(3, width // 240)
+    for x, y in points[overlay["visible"][idx]]:
+        cv2.circle(frame, (int(x), int(y)), radius, JOINT_COLOUR, -1, cv2.LINE_AA)
 
-def annotate_video(video_file: str, results: List[Any], config: dict) -> str:
+    knee_top, hip = int(overlay["knee_top"][idx]), int(overlay["hip"][idx])
+    if knee_top >= 0:
+        colour = DEPTH_OK_COLOUR if overlay["below"][idx] else DEPTH_HIGH_COLOUR
+        cv2.line(frame, (0, knee_top), (width - 1, knee_top), colour, 1, cv2.LINE_AA)
+        if hip >= 0:
+            cv2.line(
+                frame, (0, hip), (width // 20, hip), colour, thickness, cv2.LINE_AA
+            )
+
+    scale = max(0.5, width / 2000)
+    for j, name in enumerate(ANGLE_JOINTS):
+        angle = overlay["angles"][idx, j]
+        kpt = cfg[f"{name.upper()}_IDX"]
+        if np.isnan(angle) or not overlay["visible"][idx, kpt]:
+            continue
+        x, y = points[kpt]
+        cv2.putText(
+            frame,
+            f"{angle:.0f}",
+            (int(x) + radius + 3, int(y) - radius - 3),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            scale,
+            ANGLE_COLOUR,
+            1,
+            cv2.LINE_AA,
+        )
+
+
+def _render_chunk(
+    frames: List[np.ndarray], start: int, overlay: Dict[str, np.ndarray]
+) -> List[np.ndarray]:
     """
-    Annotates the given video with skeleton overlays from inference results.
-    :param video_file: (str) Path to the input video.
-    :param results: (List[Any]) Inference results for each frame.
-    :param config: (dict) Configuration dictionary.
+    Draws the overlay on consecutive frames, starting at frame start.
+    Frames beyond the track are left as they are.
+    """
+    for offset, frame in enumerate(frames):
+        idx = start + offset
+        if idx < len(overlay["points"]):
+            draw_overlay(frame, overlay, idx)
+    return frames
+
+
+def _chunks(
+    frames: Iterable[np.ndarray], size: int
+) -> Iterator[Tuple[int, List[np.ndarray]]]:
+    chunk: List[np.ndarray] = []
+    start = 0
+    for frame in frames:
+        chunk.append(frame)
+        if len(chunk) == size:
+            yield start, chunk
+            start += size
+            chunk = []
+    if chunk:
+        yield start, chunk
+
+
+def _decode(cap: cv2.VideoCapture) -> Iterator[np.ndarray]:
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            return
+        yield frame
+
+
+def _encode(
+    writer: cv2.VideoWriter, chunks: "queue.Queue[Optional[Future]]", errors: list
+) -> None:
+    """
+    Encoder thread: writes rendered chunks in submission order. After an
+    error it keeps draining the queue so the producer never blocks.
+    """
+    while True:
+        future = chunks.get()
+        if future is None:
+            return
+        if errors:
+            continue
+        try:
+            for frame in future.result():
+                writer.write(frame)
+        except BaseException as e:
+            errors.append(e)
+
+
+@traced()
+def annotate_video(
+    video_file: str,
+    context: AnalysisContext,
+    out_path: str,
+    frames: Optional[Iterable[np.ndarray]] = None,
+) -> str:
+    """
+    Writes the video with the skeleton overlay of a precomputed track.
+    :param video_file: (str) Path to the source video (frame rate and size,
+    and the frames if none are given).
+    :param context: (AnalysisContext) Analysis context of the attempt.
+    :param out_path: (str) Path of the annotated video.
+    :param frames: (Optional[Iterable[np.ndarray]]) Already decoded BGR
+    frames, e.g. the orig_img of the inference results; they are drawn on
+    in place. Decoded from video_file if None.
     :returns: (str) Path to the annotated video.
     :raises: RuntimeError If the video file cannot be opened.
     """
+    settings = cfg["OVERLAY"] or {}
+    workers = int(settings.get("workers", 0)) or os.cpu_count() or 1
+    chunk_frames = max(1, int(settings.get("chunk_frames", 16)))
+
     cap = cv2.VideoCapture(video_file)
     if not cap.isOpened():
         logger.error("Could not open video file.")
         raise RuntimeError("Could not open video file.")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    size = (
+        int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+    )
+    if frames is None:
+        frames = _decode(cap)
 
-    fourcc = cv2.VideoWriter_fourcc(*"mp4v")  # type: ignore[attr-defined]
-    out_path = os.path.join("tmp", "annotated_output.mp4")
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    os.makedirs("tmp", exist_ok=True)
-    writer = cv2.VideoWriter(out_path, fourcc, fps, (width, height))
-
-    excluded_ids = config.get("lifter_selector", {}).get("excluded_ids", [])
-
-    frame_idx = 0
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        if frame_idx < len(results):
-            frame_result = results[frame_idx]
-            if frame_result.keypoints and frame_result.boxes:
-                lifter_idx = select_lifter_index(frame_result.boxes, width, height)
-                if lifter_idx is not None:
-                    box = frame_result.boxes[lifter_idx]
-                    box_id = getattr(box, "stack_id", None)
-                    if box_id is not None and box_id in excluded_ids:
-                        logger.debug(
-                            f"Skipping skeleton overlay for detection with stack_id {box_id}."
-                        )
-                    else:
-                        kpts = frame_result.keypoints[lifter_idx]
-                        if len(kpts.xy.shape) == 3 and kpts.xy.shape[0] == 1:
-                            kpts_xy = kpts.xy.squeeze(0)
-                        else:
-                            kpts_xy = kpts.xy
-                        keypoints = np.array(
-                            kpts_xy.cpu() if hasattr(kpts_xy, "cpu") else kpts_xy
-                        )
-                        for x, y in keypoints:
-                            cv2.circle(frame, (int(x), int(y)), 4, (0, 255, 0), -1)
-        writer.write(frame)
-        frame_idx += 1
-
-    cap.release()
-    writer.release()
+    overlay = overlay_track(context)
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    fourcc = cv2.VideoWriter_fourcc(  # type: ignore[attr-defined]
+        *settings.get("fourcc", "MJPG")
+    )
+    writer = cv2.VideoWriter(out_path, fourcc, fps, size)
+    # bounded, so decoding stays a few chunks ahead of the encoder at most
+    chunks: "queue.Queue[Optional[Future]]" = queue.Queue(maxsize=2 * workers)
+    errors: list = []
+    encoder = threading.Thread(
+        target=_encode, args=(writer, chunks, errors), name="overlay-encoder"
+    )
+    encoder.start()
+    try:
+        with ThreadPoolExecutor(workers, thread_name_prefix="overlay") as pool:
+            for start, chunk in _chunks(frames, chunk_frames):
+                if errors:
+                    break
+                chunks.put(pool.submit(_render_chunk, chunk, start, overlay))
+    finally:
+        chunks.put(None)
+        encoder.join()
+        cap.release()
+        writer.release()
+    if errors:
+        raise errors[0]
     logger.info(f"Annotated video saved to {out_path}")
     return out_path
@@ -0,0 +1,178 @@
+# refvision/io/s3_stream.py
+"""
+Module for streaming S3 objects without local files: chunked and ranged
+reads, and a writer that uploads data as a multipart upload while it is
+being produced.
+"""
+import logging
+from typing import Any, Dict, Iterator, List, Optional
+from refvision.io.s3_client import get_s3_client
+
+# S3 rejects parts smaller than 5 MiB, except the last one
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+
+
+def iter_object(
+    bucket: str, key: str, chunk_size: int = 1024 * 1024, s3_client: Any = None
+) -> Iterator[bytes]:
+    """
+    Streams an S3 object's body in chunks.
+    :param bucket: Name of the S3 bucket.
+    :param key: Key of the object.
+    :param chunk_size: Bytes per chunk.
+    :param s3_client: (Optional) S3 client; defaults to get_s3_client().
+    :return: Iterator over the body's chunks.
+    """
+    s3 = s3_client or get_s3_client()
+    body = s3.get_object(Bucket=bucket, Key=key)["Body"]
+    try:
+        while True:
+            chunk = body.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        body.close()
+
+
+def read_range(
+    bucket: str, key: str, start: int, length: int, s3_client: Any = None
+) -> bytes:
+    """
+    Reads length bytes of an S3 object from offset start (fewer at the end).
+    :param bucket: Name of the S3 bucket.
+    :param key: Key of the object.
+    :param start: First byte offset.
+    :param length: Number of bytes.
+    :param s3_client: (Optional) S3 client; defaults to get_s3_client().
+    :return: The bytes, b"" past the end of the object.
+    """
+    s3 = s3_client or get_s3_client()
+    try:
+        response = s3.get_object(
+            Bucket=bucket, Key=key, Range=f"bytes={start}-{start + length - 1}"
+        )
+    except Exception as e:
+        # InvalidRange: start is past the end of the object
+        if getattr(e, "response", {}).get("Error", {}).get("Code") == "InvalidRange":
+            return b""
+        raise
+    return response["Body"].read()
+
+
+class S3MultipartWriter:
+    """
+    Write-only file-like object that uploads to S3 in parts as data arrives,
+    so at most one part is held in memory. Used as a context manager, the
+    upload is completed on success and aborted if the block raises.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        key: str,
+        content_type: str = "video/mp4",
+        part_size: int = DEFAULT_PART_SIZE,
+        s3_client: Any = None,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        """
+        :param bucket: Name of the S3 bucket.
+        :param key: Key of the object to write.
+        :param content_type: Content-Type of the object.
+        :param part_size: Bytes per uploaded part (at least 5 MiB on S3).
+        :param s3_client: (Optional) S3 client; defaults to get_s3_client().
+        :param logger: (Optional) Logger for logging progress messages.
+        """
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.logger = logger
+        self.bytes_written = 0
+        self._s3 = s3_client or get_s3_client()
+        self._buffer = bytearray()
+        self._parts: List[Dict[str, Any]] = []
+        self._closed = False
+        self._upload_id = self._s3.create_multipart_upload(
+            Bucket=bucket, Key=key, ContentType=content_type
+        )["UploadId"]
+        if logger:
+            logger.info(f"Streaming upload => s3://{bucket}/{key}")
+
+    @property
+    def parts(self) -> int:
+        return len(self._parts)
+
+    def write(self, data: bytes) -> int:
+        """
+        Buffers data and uploads every full part.
+        :param data: Bytes to write.
+        :return: Number of bytes written.
+        """
+        if self._closed:
+            raise ValueError("write to a closed S3MultipartWriter")
+        self._buffer += data
+        self.bytes_written += len(data)
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[: self.part_size]))
+            del self._buffer[: self.part_size]
+        return len(data)
+
+    def _upload_part(self, data: bytes) -> None:
+        number = len(self._parts) + 1
+        response = self._s3.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=number,
+            Body=data,
+        )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": number})
+
+    def close(self) -> None:
+        """
+        Uploads the remaining data and completes the upload.
+        :return: None
+        """
+        if self._closed:
+            return
+        # an upload needs at least one part, even if it is empty
+        if self._buffer or not self._parts:
+            self._upload_part(bytes(self._buffer))
+            self._buffer.clear()
+        self._s3.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            MultipartUpload={"Parts": self._parts},
+        )
+        self._closed = True
+        if self.logger:
+            self.logger.info(
+                f"Uploaded {self.bytes_written} bytes in {self.parts} parts "
+                f"to s3://{self.bucket}/{self.key}"
+            )
+
+    def abort(self) -> None:
+        """
+        Aborts the upload, discarding the parts uploaded so far.
+        :return: None
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._s3.abort_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+        )
+        if self.logger:
+            self.logger.warning(f"Aborted upload to s3://{self.bucket}/{self.key}")
+
+    def __enter__(self) -> "S3MultipartWriter":
+        return self
+
+    def __exit__(self, exc_type: Any, *exc: Any) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,249 @@
+# refvision/postprocess/chunked_encode.py
+"""
+Module for GOP-parallel encoding: the source is split at keyframes with a
+stream copy, the chunks are encoded by parallel ffmpeg processes with the
+same encoding profile, and the encoded chunks are joined with the concat
+demuxer without re-encoding. A single libx264 process leaves cores idle on
+short clips; several smaller processes keep them busy.
+
+Every chunk is encoded with identical settings and starts on an IDR frame,
+so the chunks share one SPS/PPS and the joined stream plays like a
+single-process encode. Only the video stream is kept (the annotated video
+has no audio).
+"""
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import wait
+from typing import Any, Dict, List, Optional
+from refvision.common.config import get_config
+from refvision.postprocess.convert import encode_command, run_command
+from refvision.postprocess.ffmpeg_jobs import (
+    PRIORITY_INTERACTIVE,
+    FfmpegJob,
+    get_scheduler,
+)
+from refvision.postprocess.frame_index import build_frame_index
+from refvision.utils.tracing import traced
+
+cfg = get_config()
+
+
+def _settings() -> Dict[str, Any]:
+    return cfg["CHUNKED_ENCODE"] or {}
+
+
+def worker_count(threads_per_chunk: int, workers: Optional[int] = None) -> int:
+    """
+    Parallel chunk encodes; 0 or None fits as many thread budgets as there
+    are cores. The chunks are jobs of the process-wide ffmpeg scheduler, so
+    no more than its max_concurrent run at once.
+    :param threads_per_chunk: (int) Encoder threads per chunk.
+    :param workers: (Optional[int]) Requested workers; CHUNKED_ENCODE.workers
+    if None.
+    :returns: (int) At least 1, at most the scheduler's max_concurrent.
+    """
+    if workers is None:
+        workers = _settings().get("workers", 0)
+    if not workers:
+        workers = (os.cpu_count() or 1) // max(1, threads_per_chunk)
+    return max(1, min(int(workers), get_scheduler().max_concurrent))
+
+
+def split_points(
+    keyframes: List[float], duration: float, workers: int, min_chunk_s: float
+) -> List[float]:
+    """
+    Keyframes to split at: the keyframes nearest to an even split into one
+    chunk per worker, with no chunk shorter than min_chunk_s.
+    :param keyframes: (List[float]) Keyframe times of the source.
+    :param duration: (float) Source duration in seconds.
+    :param workers: (int) Parallel encodes.
+    :param min_chunk_s: (float) Shortest chunk worth its own process.
+    :returns: (List[float]) Split times, ascending, excluding 0.
+    """
+    count = min(workers, int(duration // max(min_chunk_s, 1e-3)))
+    splits = []
+    last = 0.0
+    for i in range(1, count if keyframes else 0):
+        goal = duration * i / count
+        t = min(keyframes, key=lambda k: abs(k - goal))
+        if t - last >= min_chunk_s and duration - t >= min_chunk_s:
+            splits.append(t)
+            last = t
+    return splits
+
+
+def split_command(input_video: str, splits: List[float], pattern: str) -> List[str]:
+    """
+    ffmpeg command that cuts the source's video at the split keyframes
+    without re-encoding.
+    :param input_video: Path to the source video.
+    :param splits: Split times from split_points.
+    :param pattern: Output pattern, e.g. "dir/src_%03d.mkv".
+    :return: The command.
+    """
+    # a cut lands on the first keyframe at or after its time
+    times = ",".join(f"{max(0.0, t - 0.001):.3f}" for t in splits)
+    return [
+        "ffmpeg",
+        "-y",
+        "-i",
+        input_video,
+        "-map",
+        "0:v:0",
+        "-c",
+        "copy",
+        "-f",
+        "segment",
+        "-segment_format",
+        "matroska",
+        "-segment_times",
+        times,
+        "-reset_timestamps",
+        "1",
+        pattern,
+    ]
+
+
+def concat_command(list_file: str, output_path: str, faststart: bool) -> List[str]:
+    """
+    ffmpeg command that joins encoded chunks with the concat demuxer.
+    :param list_file: Path to the concat list.
+    :param output_path: Path to the output .mp4.
+    :param faststart: Whether to add faststart for web playback
+    :return: The command.
+    """
+    cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_file]
+    cmd += ["-c", "copy"]
+    if faststart:
+        cmd += ["-movflags", "+faststart"]
+    return cmd + [output_path]
+
+
+def chunk_plan(
+    input_video: str, workers: Optional[int] = None, logger=None
+) -> Dict[str, Any]:
+    """
+    Decides where to split a video, from its keyframes.
+    :param input_video: Path to the input video file.
+    :param workers: Parallel encodes; CHUNKED_ENCODE.workers if None.
+    :param logger: (Optional) Logger for logging progress
+    :return: "workers", "duration" and "splits"; splits is empty when the
+    video is too short to split or its keyframes cannot be read.
+    """
+    settings = _settings()
+    workers = worker_count(int(settings.get("threads_per_chunk", 2)), workers)
+    try:
+        index = build_frame_index(input_video)
+    except (OSError, subprocess.CalledProcessError) as e:
+        if logger:
+            logger.warning(f"Could not read keyframes of {input_video} ({e})")
+        return {"workers": workers, "duration": 0.0, "splits": []}
+    pts = index["pts"]
+    step = pts[-1] - pts[-2] if len(pts) > 1 else 0.0
+    duration = pts[-1] + step if pts else 0.0
+    splits = []
+    if workers > 1:
+        splits = split_points(
+            [pts[i] for i in index["keyframes"]],
+            duration,
+            workers,
+            settings.get("min_chunk_s", 2.0),
+        )
+    return {"workers": workers, "duration": duration, "splits": splits}
+
+
+@traced()
+def chunked_encode(
+    input_video: str,
+    output_path: str,
+    profile: Optional[str] = None,
+    faststart: bool = True,
+    logger=None,
+    *,
+    plan: Optional[Dict[str, Any]] = None,
+    workers: Optional[int] = None,
+    priority: int = PRIORITY_INTERACTIVE,
+) -> Dict[str, Any]:
+    """
+    Encodes a video to .mp4 with an encoding profile, in parallel chunks.
+    Without split points the video is encoded in one process, as by
+    convert.encode_command.
+    :param input_video: Path to the input video file.
+    :param output_path: Path to the output .mp4 file.
+    :param profile: Encoding profile; ENCODING.review_profile if None.
+    :param faststart: Whether to add faststart for web playback
+    :param logger: (Optional) Logger for logging progress
+    :param plan: Output of chunk_plan; computed if None.
+    :param workers: Parallel encodes, if plan is None.
+    :param priority: Scheduler priority of the split, encodes and concat.
+    :return: "chunks", "workers" and the "splits" used.
+    """
+    log = logger or logging.getLogger(__name__)
+    plan = plan or chunk_plan(input_video, workers, log)
+    splits, workers = plan["splits"], plan["workers"]
+    if not splits:
+        run_command(
+            encode_command(input_video, output_path, profile, faststart),
+            logger=log,
+            priority=priority,
+        )
+        return {"chunks": 1, "workers": 1, "splits": []}
+
+    log.info(
+        f"Encoding {plan['duration']:.1f}s in {len(splits) + 1} chunks, "
+        f"{workers} at a time"
+    )
+    work_dir = tempfile.mkdtemp(
+        prefix="chunks-", dir=os.path.dirname(os.path.abspath(output_path))
+    )
+    scheduler = get_scheduler()
+    threads = int(_settings().get("threads_per_chunk", 2))
+    jobs: List[FfmpegJob] = []
+    try:
+        run_command(
+            split_command(input_video, splits, os.path.join(work_dir, "src_%03d.mkv")),
+            logger=log,
+            priority=priority,
+        )
+        sources = sorted(
+            name for name in os.listdir(work_dir) if name.startswith("src_")
+        )
+        encoded = [
+            os.path.join(work_dir, f"enc_{i:03d}.mp4") for i in range(len(sources))
+        ]
+        for i, (source, target) in enumerate(zip(sources, encoded)):
+            cmd = encode_command(
+                os.path.join(work_dir, source), target, profile, faststart=False
+            )
+            cmd[-1:-1] = ["-an"]
+            jobs.append(
+                scheduler.submit(
+                    cmd, name=f"chunk-{i}", priority=priority, threads=threads
+                )
+            )
+        for job in jobs:
+            job.result()
+
+        list_file = os.path.join(work_dir, "chunks.txt")
+        with open(list_file, "w") as f:
+            for path in encoded:
+                escaped = path.replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        run_command(
+            concat_command(list_file, output_path, faststart),
+            logger=log,
+            priority=priority,
+        )
+    except BaseException:
+        # the other chunks are no use now; let them exit before the cleanup
+        for job in jobs:
+            job.cancel()
+        wait([job.future for job in jobs])
+        raise
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return {"chunks": len(encoded), "workers": workers, "splits": splits}
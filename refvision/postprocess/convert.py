@@ -1,65 +1,218 @@
 # refvision/postprocess/convert.py
 """
 Module for normalizing or converting video formats (e.g., .mov -> .mp4, .avi -> .mp4).
+ffmpeg commands run through the shared job scheduler (ffmpeg_jobs), so
+encodes for several attempts can overlap within the configured limits.
 """
 import os
 import subprocess
-from typing import List
+from typing import Any, Dict, List, Optional
+from refvision.common.config import get_config
+from refvision.postprocess.ffmpeg_jobs import (
+    PRIORITY_INTERACTIVE,
+    PRIORITY_NORMAL,
+    get_scheduler,
+)
+from refvision.postprocess.probe import MP4_AUDIO_CODECS, classify, probe_video
+from refvision.postprocess.profiles import encode_args, get_profile
 
+cfg = get_config()
 
-def run_command(cmd_list: List[str], logger=None) -> None:
+
+def run_command(
+    cmd_list: List[str],
+    logger=None,
+    *,
+    priority: int = PRIORITY_NORMAL,
+    timeout: Optional[float] = None,
+) -> None:
     """
-    Runs a command in a subprocess, optionally logging it.
+    Runs a command in a subprocess, optionally logging it. ffmpeg commands
+    are queued on the job scheduler and this waits for them to finish.
     :param cmd_list: List of command arguments
     :param logger: (Optional) Logger for logging the command
+    :param priority: Scheduler priority for ffmpeg commands (lower first)
+    :param timeout: Seconds an ffmpeg command may run; defaults to
+    FFMPEG_JOBS.timeout_s
     :return: None
     """
     if logger:
         logger.info(f"Running command: {' '.join(cmd_list)}")
-    subprocess.check_call(cmd_list)
+    if cmd_list and os.path.basename(cmd_list[0]) == "ffmpeg":
+        kwargs = {} if timeout is None else {"timeout": timeout}
+        get_scheduler().run(cmd_list, priority=priority, **kwargs)
+    else:
+        subprocess.check_call(cmd_list)
 
 
-def normalize_video(input_video: str, output_dir: str, logger=None) -> str:
+def remux_command(
+    input_video: str, output_path: str, info: Dict[str, Any]
+) -> List[str]:
+    """
+    ffmpeg command that copies a compatible video stream into an .mp4,
+    stripping global and per-stream metadata. Audio is copied if the .mp4
+    container supports it, else transcoded to AAC.
+    :param input_video: Path to the input video file.
+    :param output_path: Path to the output .mp4 file.
+    :param info: Output of probe.classify for the input.
+    :return: The command.
+    """
+    audio = ["-c:a", "copy"]
+    if info.get("audio_codec") not in MP4_AUDIO_CODECS:
+        audio = ["-c:a", "aac"]
+    return [
+        "ffmpeg",
+        "-y",
+        "-i",
+        input_video,
+        "-map",
+        "0:v:0",
+        "-map",
+        "0:a:0?",
+        "-c:v",
+        "copy",
+        *audio,
+        "-map_metadata",
+        "-1",
+        "-map_metadata:s:v",
+        "-1",
+        "-map_metadata:s:a",
+        "-1",
+        "-map_chapters",
+        "-1",
+        "-movflags",
+        "+faststart",
+        output_path,
+    ]
+
+
+def transcode_command(
+    input_video: str, output_path: str, profile: Optional[str] = None
+) -> List[str]:
+    """
+    ffmpeg command that re-encodes a video to H.264 yuv420p, stripping
+    metadata. ffmpeg applies any display rotation while decoding.
+    :param input_video: Path to the input video file.
+    :param output_path: Path to the output .mp4 file.
+    :param profile: Encoding profile; ENCODING.normalize_profile if None.
+    :return: The command.
+    """
+    return [
+        "ffmpeg",
+        "-y",
+        "-i",
+        input_video,
+        *encode_args(get_profile(profile, usage="normalize")),
+        "-map_metadata",
+        "-1",
+        output_path,
+    ]
+
+
+def encode_command(
+    input_video: str,
+    output_path: str,
+    profile: Optional[str] = None,
+    faststart: bool = True,
+) -> List[str]:
+    """
+    ffmpeg command that encodes a video to .mp4 with an encoding profile.
+    :param input_video: Path to the input video file.
+    :param output_path: Path to the output .mp4 file.
+    :param profile: Encoding profile; ENCODING.review_profile if None.
+    :param faststart: Whether to add faststart for web playback
+    :return: The command.
+    """
+    cmd = ["ffmpeg", "-y", "-i", input_video, *encode_args(get_profile(profile))]
+    if faststart:
+        cmd += ["-movflags", "+faststart"]
+    return cmd + [output_path]
+
+
+def probe_for_normalize(input_video: str, logger=None) -> Optional[Dict[str, Any]]:
+    """
+    Probes and classifies a video, returning None if ffprobe is unavailable
+    or fails so the caller falls back to a full transcode.
+    :param input_video: Path to the input video file.
+    :param logger: (Optional) Logger for logging progress
+    :return: Output of probe.classify, or None.
+    """
+    try:
+        return classify(probe_video(input_video))
+    except (OSError, subprocess.CalledProcessError, ValueError) as e:
+        if logger:
+            logger.warning(f"ffprobe failed for {input_video} ({e}); transcoding")
+        return None
+
+
+def normalize_video(
+    input_video: str,
+    output_dir: str,
+    logger=None,
+    *,
+    force_transcode: bool = False,
+    profile: Optional[str] = None,
+) -> str:
     """
     Converts input_video (any format) to a normalized .mp4 in output_dir,
-    stripping metadata.
+    stripping metadata. Inputs that are already H.264 yuv420p in MP4/MOV
+    without rotation are stream-copied (remuxed); anything else is
+    re-encoded with libx264.
     :param input_video: Path to the input video file (mov, avi, etc.)
     :param output_dir: Directory to save the normalized .mp4 file
     :param logger: (Optional) Logger for logging progress
+    :param force_transcode: Re-encode even if a remux would do.
+    :param profile: Encoding profile for re-encodes; defaults to
+    ENCODING.normalize_profile.
     :return: Path to the normalized .mp4 file
     """
     if logger:
         logger.info("=== Pre-step: Normalize input to MP4 ===")
     base_name = os.path.splitext(os.path.basename(input_video))[0]
     normalized_path = os.path.join(output_dir, f"{base_name}.mp4")
+    # ffmpeg cannot write over its input
+    in_place = os.path.abspath(normalized_path) == os.path.abspath(input_video)
+    output_path = (
+        os.path.join(output_dir, f"{base_name}.normalized.mp4")
+        if in_place
+        else normalized_path
+    )
 
-    cmd: List[str] = [
-        "ffmpeg",
-        "-y",
-        "-i",
-        input_video,
-        "-c:v",
-        "libx264",
-        "-pix_fmt",
-        "yuv420p",
-        "-map_metadata",
-        "-1",
-        normalized_path,
-    ]
+    info = None if force_transcode else probe_for_normalize(input_video, logger)
+    if info is not None and info["compatible"]:
+        if logger:
+            logger.info(f"Remuxing {info['container']}/h264 input (stream copy)")
+        cmd = remux_command(input_video, output_path, info)
+    else:
+        if logger and info is not None:
+            logger.info(f"Transcoding: {', '.join(info['reasons'])}")
+        cmd = transcode_command(input_video, output_path, profile)
     run_command(cmd, logger=logger)
+
+    if in_place:
+        os.replace(output_path, normalized_path)
     return normalized_path
 
 
 def convert_avi_to_mp4(
-    avi_output: str, mp4_output: str, logger=None, *, faststart: bool = True
+    avi_output: str,
+    mp4_output: str,
+    logger=None,
+    *,
+    faststart: bool = True,
+    profile: Optional[str] = None,
 ) -> None:
     """
     Converts a .avi file to .mp4 (H.264) and removes the .avi file.
     Optionally inserts '-movflags +faststart' for better browser playback.
+    With CHUNKED_ENCODE enabled, videos long enough to split are encoded in
+    parallel chunks (see chunked_encode).
     :param avi_output: Path to the input .avi file
     :param mp4_output: Path to the output .mp4 file
     :param logger: Logger for logging progress
     :param faststart: Whether to add faststart for web playback
+    :param profile: Encoding profile (archive, review, fast-preview); defaults
+    to ENCODING.review_profile
     :return: None
     """
     if logger:
@@ -70,29 +223,15 @@ def convert_avi_to_mp4(
             logger.error(msg)
         raise FileNotFoundError(msg)
 
-    cmd = [
-        "ffmpeg",
-        "-y",
-        "-i",
-        avi_output,
-        "-c:v",
-        "libx264",
-        "-profile:v",
-        "high",
-        "-level",
-        "4.1",
-        "-pix_fmt",
-        "yuv420p",
-        "-b:v",
-        "5000k",
-        "-vf",
-        "scale=1920:1080",
-    ]
+    plan = None
+    if (cfg["CHUNKED_ENCODE"] or {}).get("enabled", False):
+        from refvision.postprocess.chunked_encode import chunk_plan, chunked_encode
 
-    if faststart:
-        cmd += ["-movflags", "+faststart"]
-
-    cmd += [mp4_output]
-
-    run_command(cmd, logger=logger)
+        plan = chunk_plan(avi_output, logger=logger)
+    if plan and plan["splits"]:
+        chunked_encode(avi_output, mp4_output, profile, faststart, logger, plan=plan)
+    else:
+        cmd = encode_command(avi_output, mp4_output, profile, faststart)
+        # the referee is waiting for this one
+        run_command(cmd, logger=logger, priority=PRIORITY_INTERACTIVE)
     os.remove(avi_output)
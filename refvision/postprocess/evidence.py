@@ -0,0 +1,261 @@
+# refvision/postprocess/evidence.py
+"""
+Module for the decision evidence images: a JPEG of the turnaround frame with
+hip and knee markers, and a sprite strip of frames around it. They are cut
+from the frames already decoded for inference, right after the analysis,
+and stored as small S3 objects referenced from the DynamoDB item, so the
+decision page can show the key evidence before any video has loaded.
+"""
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence
+import cv2
+import numpy as np
+from refvision.analysis.keypoint_track import joint_indexes
+from refvision.common.config import get_config
+from refvision.io.s3_client import get_s3_client
+
+cfg = get_config()
+
+logger = logging.getLogger(__name__)
+
+# BGR
+HIP_COLOUR = (0, 0, 255)
+KNEE_COLOUR = (255, 128, 0)
+TURNAROUND_BORDER = (0, 215, 255)
+
+
+def evidence_paths(stem: str) -> Dict[str, str]:
+    """
+    Local paths of a video's evidence images (also its decision cache
+    artefact names).
+    :param stem: (str) Video file name without extension.
+    :returns: (Dict[str, str]) Artefact name => path under OUTPUT_DIR/evidence.
+    """
+    directory = os.path.join(cfg["OUTPUT_DIR"], "evidence")
+    return {
+        "turnaround_jpg": os.path.join(directory, f"{stem}_turnaround.jpg"),
+        "sprite_jpg": os.path.join(directory, f"{stem}_sprite.jpg"),
+    }
+
+
+def _resize(image: np.ndarray, width: int) -> np.ndarray:
+    """
+    Downscales an image to a width, keeping the aspect ratio; never upscales.
+    """
+    h, w = image.shape[:2]
+    if w <= width:
+        return image
+    height = max(1, round(h * width / w))
+    return cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def _encode(image: np.ndarray, quality: int) -> bytes:
+    ok, buf = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return buf.tobytes()
+
+
+def draw_markers(image: np.ndarray, keypoints: np.ndarray, scale: float) -> None:
+    """
+    Draws the hips, knees and hip-knee segments in place, plus a horizontal
+    line at knee height as the parallel reference.
+    :param image: (np.ndarray) BGR image.
+    :param keypoints: (np.ndarray) (17, 2) keypoints of the frame, NaN where
+    missing, in source pixels.
+    :param scale: (float) Image width over source width.
+    """
+    radius = max(3, image.shape[1] // 120)
+    hips = keypoints[joint_indexes("hip")] * scale
+    knees = keypoints[joint_indexes("knee")] * scale
+    for hip, knee in zip(hips, knees):
+        if np.all(np.isfinite([hip, knee])):
+            cv2.line(image, _pt(hip), _pt(knee), (255, 255, 255), 2, cv2.LINE_AA)
+    knee_ys = knees[np.isfinite(knees[:, 1]), 1]
+    if knee_ys.size:
+        y = int(round(float(knee_ys.min())))
+        cv2.line(image, (0, y), (image.shape[1] - 1, y), KNEE_COLOUR, 1, cv2.LINE_AA)
+    for points, colour in ((hips, HIP_COLOUR), (knees, KNEE_COLOUR)):
+        for point in points:
+            if np.all(np.isfinite(point)):
+                cv2.circle(image, _pt(point), radius, colour, -1, cv2.LINE_AA)
+
+
+def _pt(point: np.ndarray) -> tuple:
+    return int(round(float(point[0]))), int(round(float(point[1])))
+
+
+def turnaround_thumbnail(
+    frame: np.ndarray, keypoints: np.ndarray, width: int = 640, quality: int = 80
+) -> bytes:
+    """
+    JPEG of the turnaround frame with hip/knee markers.
+    :param frame: (np.ndarray) BGR source frame.
+    :param keypoints: (np.ndarray) (17, 2) keypoints of the frame.
+    :param width: (int) Maximum output width.
+    :param quality: (int) JPEG quality.
+    :returns: (bytes) The JPEG.
+    """
+    image = _resize(frame, width).copy()
+    draw_markers(image, keypoints, image.shape[1] / frame.shape[1])
+    return _encode(image, quality)
+
+
+def sprite_frames(num_frames: int, center: int, count: int, step: int) -> List[int]:
+    """
+    Frame indexes for the sprite: count frames, step apart, centred on the
+    turnaround and shifted to stay inside the video.
+    :param num_frames: (int) Frames in the video.
+    :param center: (int) The turnaround frame.
+    :param count: (int) Frames in the strip.
+    :param step: (int) Frames between tiles.
+    :returns: (List[int]) Increasing frame indexes.
+    """
+    step = max(1, step)
+    length = (count - 1) * step
+    start = center - (count // 2) * step
+    # shift whole steps so the turnaround stays on a tile
+    if start < 0:
+        start -= start // step * step
+    overrun = start + length - (num_frames - 1)
+    if overrun > 0:
+        start = max(0, start + overrun // -step * step)
+    return sorted({min(num_frames - 1, start + i * step) for i in range(count)})
+
+
+def sprite_strip(
+    frames: Sequence[np.ndarray],
+    idxs: Sequence[int],
+    highlight: Optional[int] = None,
+    tile_width: int = 160,
+    quality: int = 75,
+) -> Dict[str, Any]:
+    """
+    JPEG strip of frames side by side, left to right in frame order.
+    :param frames: (Sequence[np.ndarray]) BGR frames of the video.
+    :param idxs: (Sequence[int]) Frames to include.
+    :param highlight: (Optional[int]) Frame to outline (the turnaround).
+    :param tile_width: (int) Width of each tile.
+    :param quality: (int) JPEG quality.
+    :returns: (Dict[str, Any]) "jpeg" bytes, and "frames", "tile_width" and
+    "tile_height" for locating tiles.
+    """
+    tiles = []
+    for idx in idxs:
+        tile = cv2.resize(
+            frames[idx],
+            (
+                tile_width,
+                max(1, round(frames[idx].shape[0] * tile_width / frames[idx].shape[1])),
+            ),
+            interpolation=cv2.INTER_AREA,
+        )
+        if idx == highlight:
+            h, w = tile.shape[:2]
+            cv2.rectangle(tile, (0, 0), (w - 1, h - 1), TURNAROUND_BORDER, 3)
+        tiles.append(tile)
+    height = min(tile.shape[0] for tile in tiles)
+    strip = np.hstack([tile[:height] for tile in tiles])
+    return {
+        "jpeg": _encode(strip, quality),
+        "frames": [int(i) for i in idxs],
+        "tile_width": tile_width,
+        "tile_height": int(height),
+    }
+
+
+def write_evidence(
+    results: List[Any], xy: np.ndarray, frame_idx: Optional[int], stem: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Writes the evidence images of an attempt to OUTPUT_DIR/evidence.
+    :param results: (List[Any]) Frame results from YOLO inference, holding
+    the decoded frames (orig_img).
+    :param xy: (np.ndarray) Keypoint track (frames, 17, 2) to mark, e.g.
+    AnalysisContext.gated_xy.
+    :param frame_idx: (Optional[int]) The turnaround frame.
+    :param stem: (str) Video file name without extension.
+    :returns: (Optional[Dict[str, Any]]) Evidence metadata (frame,
+    sprite_frames, tile_width, tile_height), None if there is no turnaround
+    or no decoded frames.
+    """
+    images = [getattr(result, "orig_img", None) for result in results]
+    if frame_idx is None or not 0 <= frame_idx < len(images):
+        return None
+    frames = [image for image in images if image is not None]
+    if len(frames) < len(images):
+        logger.info("Frame results carry no images; skipping evidence.")
+        return None
+
+    settings = cfg["EVIDENCE"] or {}
+    quality = settings.get("jpeg_quality", 80)
+    idxs = sprite_frames(
+        len(frames),
+        frame_idx,
+        settings.get("sprite_frames", 9),
+        settings.get("sprite_step", 3),
+    )
+    strip = sprite_strip(
+        frames, idxs, frame_idx, settings.get("tile_width", 160), quality
+    )
+    thumbnail = turnaround_thumbnail(
+        frames[frame_idx], xy[frame_idx], settings.get("thumbnail_width", 640), quality
+    )
+
+    paths = evidence_paths(stem)
+    os.makedirs(os.path.dirname(paths["turnaround_jpg"]), exist_ok=True)
+    with open(paths["turnaround_jpg"], "wb") as f:
+        f.write(thumbnail)
+    with open(paths["sprite_jpg"], "wb") as f:
+        f.write(strip["jpeg"])
+    return {
+        "frame": int(frame_idx),
+        "sprite_frames": strip["frames"],
+        "tile_width": strip["tile_width"],
+        "tile_height": strip["tile_height"],
+    }
+
+
+def evidence_prefix(meet_id: str, record_id: str) -> str:
+    """
+    S3 prefix for an attempt's evidence; record IDs contain "#".
+    """
+    safe = [re.sub(r"[^A-Za-z0-9._-]+", "_", part) for part in (meet_id, record_id)]
+    return f"evidence/{safe[0]}/{safe[1]}"
+
+
+def upload_evidence(
+    stem: str, meta: Dict[str, Any], meet_id: str, record_id: str
+) -> Dict[str, Any]:
+    """
+    Uploads the evidence images written by write_evidence.
+    :param stem: (str) Video file name without extension.
+    :param meta: (Dict[str, Any]) Output of write_evidence.
+    :param meet_id: (str) PK in DynamoDB.
+    :param record_id: (str) SK in DynamoDB.
+    :returns: (Dict[str, Any]) The item's Evidence attribute: bucket,
+    turnaround_key and sprite_key plus the metadata.
+    """
+    bucket = (cfg["EVIDENCE"] or {}).get("bucket") or cfg.get("PROCESSED_BUCKET")
+    prefix = evidence_prefix(meet_id, record_id)
+    keys = {
+        "turnaround_key": f"{prefix}/turnaround.jpg",
+        "sprite_key": f"{prefix}/sprite.jpg",
+    }
+    s3 = get_s3_client()
+    paths = evidence_paths(stem)
+    for name, key in (
+        ("turnaround_jpg", keys["turnaround_key"]),
+        ("sprite_jpg", keys["sprite_key"]),
+    ):
+        with open(paths[name], "rb") as f:
+            s3.put_object(
+                Bucket=bucket,
+                Key=key,
+                Body=f.read(),
+                ContentType="image/jpeg",
+                CacheControl="private, max-age=86400",
+            )
+    return {"bucket": bucket, **keys, **meta}
@@ -0,0 +1,462 @@
+# refvision/postprocess/ffmpeg_jobs.py
+"""
+Bounded-concurrency scheduler for ffmpeg jobs, so normalise, convert and HLS
+encodes from many attempts can overlap without oversubscribing a machine
+that is also running inference. At most FFMPEG_JOBS.max_concurrent jobs run
+at once, each capped at threads_per_job encoder threads; queued jobs start
+in priority order (lower first, FIFO within a priority). Running jobs
+report progress parsed from `-progress pipe:1`, are killed after their
+timeout, and can be cancelled. Jobs that stream through ffmpeg's stdin and
+stdout pass an io callback and report progress on a separate pipe.
+"""
+import atexit
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import CancelledError, Future
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional
+from refvision.common.config import get_config
+from refvision.utils.tracing import span
+
+cfg = get_config()
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0  # a referee is waiting for the output
+PRIORITY_NORMAL = 10
+PRIORITY_BACKGROUND = 20
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMED_OUT = "timed_out"
+
+# bytes of ffmpeg's stderr kept for error messages
+STDERR_TAIL = 4000
+
+
+def _number(value: Optional[str], cast: Callable[[str], Any] = float) -> Any:
+    """
+    Parses a progress value, which ffmpeg reports as "N/A" when unknown.
+    :param value: (Optional[str]) The raw value.
+    :param cast: (Callable) int or float.
+    :returns: (Any) The number, None if unknown.
+    """
+    try:
+        return cast(value.rstrip("x")) if value is not None else None
+    except ValueError:
+        return None
+
+
+def parse_progress(
+    lines: Iterable[Any], duration_s: Optional[float] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Parses ffmpeg's `-progress` output: blocks of key=value lines, each
+    closed by progress=continue or progress=end.
+    :param lines: (Iterable[Any]) Output lines, bytes or str.
+    :param duration_s: (Optional[float]) Input duration, to report a percentage.
+    :returns: (Iterator[Dict[str, Any]]) One record per block with frame, fps,
+    out_time_s, speed, percent (None without a duration) and done.
+    """
+    block: Dict[str, str] = {}
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="replace")
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            continue
+        block[key.strip()] = value.strip()
+        if key.strip() != "progress":
+            continue
+
+        # out_time_ms is microseconds too (a long-standing ffmpeg quirk)
+        out_us = _number(block.get("out_time_us", block.get("out_time_ms")), int)
+        out_time_s = out_us / 1e6 if out_us is not None else None
+        percent = None
+        if duration_s and out_time_s is not None:
+            percent = min(100.0, max(0.0, 100.0 * out_time_s / duration_s))
+        done = block["progress"] == "end"
+        yield {
+            "frame": _number(block.get("frame"), int),
+            "fps": _number(block.get("fps")),
+            "out_time_s": out_time_s,
+            "speed": _number(block.get("speed")),
+            "percent": 100.0 if done and duration_s else percent,
+            "done": done,
+        }
+        block = {}
+
+
+def with_progress(
+    cmd: List[str], threads: Optional[int] = None, progress_url: str = "pipe:1"
+) -> List[str]:
+    """
+    Adds progress reporting and the thread budget to an ffmpeg command.
+    An explicit "-threads N" is kept, but "-threads 0" (all cores) is
+    replaced by the budget.
+    :param cmd: (List[str]) The ffmpeg command, output path last.
+    :param threads: (Optional[int]) Encoder threads per job; None or 0 for
+    no limit.
+    :param progress_url: (str) Where ffmpeg writes progress, e.g. "pipe:3".
+    :returns: (List[str]) The new command.
+    """
+    cmd = [cmd[0], "-nostats", "-progress", progress_url, *cmd[1:]]
+    if not threads:
+        return cmd
+    idxs = [i for i, arg in enumerate(cmd[:-1]) if arg == "-threads"]
+    for i in idxs:
+        if cmd[i + 1] == "0":
+            cmd[i + 1] = str(threads)
+    if not idxs:
+        cmd[-1:-1] = ["-threads", str(threads)]
+    return cmd
+
+
+class FfmpegJob:
+    """
+    One ffmpeg invocation and its state. result() blocks until it finishes
+    and raises subprocess.CalledProcessError if ffmpeg failed,
+    subprocess.TimeoutExpired if it was killed after its timeout, or
+    concurrent.futures.CancelledError if it was cancelled.
+    """
+
+    def __init__(
+        self,
+        cmd: List[str],
+        *,
+        name: Optional[str] = None,
+        priority: int = PRIORITY_NORMAL,
+        timeout: Optional[float] = None,
+        threads: Optional[int] = None,
+        duration_s: Optional[float] = None,
+        on_progress: Optional[Callable[["FfmpegJob", Dict[str, Any]], None]] = None,
+        io: Optional[Callable[[subprocess.Popen], None]] = None,
+    ) -> None:
+        """
+        :param cmd: (List[str]) The ffmpeg command, output path last.
+        :param name: (Optional[str]) Label for logs and traces; defaults to
+        the output file name.
+        :param priority: (int) Lower runs sooner.
+        :param timeout: (Optional[float]) Seconds the job may run; None for
+        no limit.
+        :param threads: (Optional[int]) Encoder thread budget.
+        :param duration_s: (Optional[float]) Input duration, for percentages.
+        :param on_progress: (Optional[Callable]) Called from the worker
+        thread with (job, progress record) for every progress block.
+        :param io: (Optional[Callable]) For commands that read "pipe:0" or
+        write "pipe:1": called in its own thread with the process, to feed
+        its stdin and drain its stdout. If it raises, ffmpeg is killed and
+        the job fails with that exception.
+        """
+        if not cmd or os.path.basename(cmd[0]) not in ("ffmpeg", "ffmpeg.exe"):
+            raise ValueError(f"Not an ffmpeg command: {cmd[:1]}")
+        self.cmd = list(cmd)
+        self.name = name or os.path.basename(cmd[-1])
+        self.priority = priority
+        self.timeout = timeout
+        self.threads = threads
+        self.duration_s = duration_s
+        self.on_progress = on_progress
+        self.io = io
+        self.status = QUEUED
+        self.progress: Dict[str, Any] = {}
+        self.returncode: Optional[int] = None
+        self.future: Future = Future()
+        self._lock = threading.Lock()
+        self._process: Optional[subprocess.Popen] = None
+        self._cancel_requested = False
+        self._timed_out = False
+        self._io_error: Optional[BaseException] = None
+        # spans of the job nest under the submitter's current span
+        self._context = contextvars.copy_context()
+
+    def __repr__(self) -> str:
+        return f"FfmpegJob({self.name!r}, priority={self.priority}, {self.status})"
+
+    def result(self, timeout: Optional[float] = None) -> "FfmpegJob":
+        """
+        Waits for the job to finish.
+        :param timeout: (Optional[float]) Seconds to wait.
+        :returns: (FfmpegJob) The job, if it succeeded.
+        """
+        return self.future.result(timeout)
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def cancel(self) -> bool:
+        """
+        Cancels the job: a queued job never starts, a running one is
+        terminated.
+        :returns: (bool) False if the job had already finished.
+        """
+        if self.future.cancel():
+            self.status = CANCELLED
+            return True
+        with self._lock:
+            if self.future.done():
+                return False
+            self._cancel_requested = True
+            process = self._process
+        if process is not None:
+            process.terminate()
+        return True
+
+    def _expire(self) -> None:
+        with self._lock:
+            self._timed_out = True
+            process = self._process
+        if process is not None:
+            process.kill()
+
+    def _run_io(self, process: subprocess.Popen) -> None:
+        assert self.io is not None
+        try:
+            self.io(process)
+        except BaseException as e:
+            self._io_error = e
+            process.kill()
+
+    def _execute(self) -> None:
+        """
+        Runs ffmpeg in the calling (worker) thread and settles the future.
+        """
+        self.status = RUNNING
+        timer = io_thread = None
+        # (read, write) ends of the progress pipe, if stdout carries data
+        pipe = None if self.io is None else os.pipe()
+        if pipe is None:
+            cmd = with_progress(self.cmd, self.threads)
+        else:
+            cmd = with_progress(self.cmd, self.threads, f"pipe:{pipe[1]}")
+        with span("ffmpeg.job", job=self.name, priority=self.priority) as s:
+            with tempfile.TemporaryFile() as stderr:
+                try:
+                    process = subprocess.Popen(
+                        cmd,
+                        stdin=(
+                            subprocess.DEVNULL if self.io is None else subprocess.PIPE
+                        ),
+                        stdout=subprocess.PIPE,
+                        stderr=stderr,
+                        pass_fds=() if pipe is None else (pipe[1],),
+                    )
+                except OSError as e:
+                    if pipe is not None:
+                        os.close(pipe[0])
+                        os.close(pipe[1])
+                    self.status = FAILED
+                    self.future.set_exception(e)
+                    return
+                progress_stream: IO[bytes]
+                if pipe is None:
+                    assert process.stdout is not None
+                    progress_stream = process.stdout
+                else:
+                    os.close(pipe[1])
+                    progress_stream = os.fdopen(pipe[0], "rb")
+                    io_thread = threading.Thread(
+                        target=self._run_io, args=(process,), daemon=True
+                    )
+                    io_thread.start()
+                with self._lock:
+                    self._process = process
+                    cancel = self._cancel_requested
+                if cancel:
+                    process.terminate()
+                if self.timeout:
+                    timer = threading.Timer(self.timeout, self._expire)
+                    timer.daemon = True
+                    timer.start()
+                try:
+                    for progress in parse_progress(progress_stream, self.duration_s):
+                        self.progress = progress
+                        if self.on_progress is not None:
+                            try:
+                                self.on_progress(self, progress)
+                            except Exception:
+                                logger.exception("Progress callback failed")
+                    self.returncode = process.wait()
+                    if io_thread is not None:
+                        io_thread.join()
+                finally:
+                    if timer is not None:
+                        timer.cancel()
+                    progress_stream.close()
+                    if process.stdout is not None:
+                        process.stdout.close()
+                stderr.seek(0, os.SEEK_END)
+                stderr.seek(max(0, stderr.tell() - STDERR_TAIL))
+                tail = stderr.read().decode("utf-8", errors="replace")
+            s.set(returncode=self.returncode)
+
+        if self._timed_out:
+            self.status = TIMED_OUT
+            logger.error("ffmpeg job %s timed out after %ss", self.name, self.timeout)
+            self.future.set_exception(
+                subprocess.TimeoutExpired(self.cmd, self.timeout or 0.0, stderr=tail)
+            )
+        elif self._cancel_requested:
+            self.status = CANCELLED
+            self.future.set_exception(CancelledError())
+        elif self._io_error is not None:
+            self.status = FAILED
+            logger.error("ffmpeg job %s i/o failed: %s", self.name, self._io_error)
+            self.future.set_exception(self._io_error)
+        elif self.returncode:
+            self.status = FAILED
+            logger.error(
+                "ffmpeg job %s failed (exit %d): %s", self.name, self.returncode, tail
+            )
+            self.future.set_exception(
+                subprocess.CalledProcessError(self.returncode, self.cmd, stderr=tail)
+            )
+        else:
+            self.status = SUCCEEDED
+            self.future.set_result(self)
+
+
+class JobScheduler:
+    """
+    Priority queue of ffmpeg jobs drained by a bounded pool of workers.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        threads_per_job: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """
+        :param max_concurrent: (Optional[int]) Jobs running at once; 0 fits
+        as many thread budgets as there are cores. Defaults to
+        FFMPEG_JOBS.max_concurrent.
+        :param threads_per_job: (Optional[int]) Default encoder thread budget;
+        defaults to FFMPEG_JOBS.threads_per_job.
+        :param timeout: (Optional[float]) Default per-job timeout in seconds;
+        defaults to FFMPEG_JOBS.timeout_s.
+        """
+        settings = cfg["FFMPEG_JOBS"] or {}
+        if threads_per_job is None:
+            threads_per_job = settings.get("threads_per_job", 4)
+        if max_concurrent is None:
+            max_concurrent = settings.get("max_concurrent", 2)
+        if not max_concurrent:
+            max_concurrent = (os.cpu_count() or 1) // max(1, threads_per_job or 1)
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.threads_per_job = threads_per_job
+        self.timeout = timeout if timeout is not None else settings.get("timeout_s")
+        self._queue: List[Any] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._workers: List[threading.Thread] = []
+        self._running: List[FfmpegJob] = []
+        self._closed = False
+
+    def submit(self, cmd: List[str], **kwargs: Any) -> FfmpegJob:
+        """
+        Queues an ffmpeg command.
+        :param cmd: (List[str]) The ffmpeg command, output path last.
+        :param kwargs: (Any) FfmpegJob options (name, priority, timeout,
+        threads, duration_s, on_progress); timeout and threads default to
+        the scheduler's.
+        :returns: (FfmpegJob) The queued job.
+        :raises RuntimeError: If the scheduler has been shut down.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        kwargs.setdefault("threads", self.threads_per_job)
+        job = FfmpegJob(cmd, **kwargs)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("ffmpeg job scheduler is shut down")
+            heapq.heappush(self._queue, (job.priority, next(self._seq), job))
+            if len(self._workers) < self.max_concurrent:
+                worker = threading.Thread(
+                    target=self._work, name=f"ffmpeg-{len(self._workers)}", daemon=True
+                )
+                self._workers.append(worker)
+                worker.start()
+            self._cond.notify()
+        logger.debug("Queued %r (%d queued)", job, len(self._queue))
+        return job
+
+    def run(self, cmd: List[str], **kwargs: Any) -> FfmpegJob:
+        """
+        Queues an ffmpeg command and waits for it, see submit.
+        :returns: (FfmpegJob) The finished job.
+        """
+        return self.submit(cmd, **kwargs).result()
+
+    def pending(self) -> List[FfmpegJob]:
+        with self._cond:
+            return [job for _, _, job in sorted(self._queue) if not job.done()]
+
+    def running(self) -> List[FfmpegJob]:
+        with self._cond:
+            return list(self._running)
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                _, _, job = heapq.heappop(self._queue)
+                # False if the job was cancelled while queued
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                self._running.append(job)
+            try:
+                job._context.run(job._execute)
+            except Exception as e:
+                logger.exception("ffmpeg job %s crashed", job.name)
+                if not job.future.done():
+                    job.status = FAILED
+                    job.future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._running.remove(job)
+
+    def shutdown(self, cancel: bool = False, wait: bool = True) -> None:
+        """
+        Stops accepting jobs; workers exit once the queue is drained.
+        :param cancel: (bool) Cancel queued and running jobs.
+        :param wait: (bool) Wait for the workers to exit.
+        """
+        with self._cond:
+            self._closed = True
+            jobs = [job for _, _, job in self._queue] + self._running
+            self._cond.notify_all()
+        if cancel:
+            for job in jobs:
+                job.cancel()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+
+_scheduler: Optional[JobScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> JobScheduler:
+    """
+    The process-wide scheduler, created on first use from FFMPEG_JOBS.
+    :returns: (JobScheduler) The scheduler.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler()
+            # don't leave orphaned encodes behind when the process exits
+            atexit.register(_scheduler.shutdown, cancel=True, wait=False)
+        return _scheduler
@@ -0,0 +1,281 @@
+# refvision/postprocess/frame_index.py
+"""
+Module for the per-video frame index: presentation times, packet offsets
+and keyframes of every frame, read once with ffprobe (no decoding) when a
+video is normalised and stored next to it as JSON. FrameReader uses it to
+decode an arbitrary frame or range by seeking to the keyframe before it and
+decoding forward, matching frames by timestamp rather than trusting
+OpenCV's frame-number seeks, which are slow and can land on the wrong frame
+in long-GOP H.264.
+"""
+import bisect
+import json
+import logging
+import os
+import subprocess
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = ".frames.json"
+INDEX_VERSION = 1
+
+
+def index_path(video: str) -> str:
+    """
+    Path of a video's frame index, next to the video.
+    :param video: (str) Path to the video.
+    :returns: (str) e.g. "out/attempt.frames.json" for "out/attempt.mp4".
+    """
+    return os.path.splitext(video)[0] + INDEX_SUFFIX
+
+
+def _number(value: Any) -> Optional[float]:
+    if value in (None, "", "N/A"):
+        return None
+    return float(value)
+
+
+def parse_packets(packets: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Builds the frame index from ffprobe's video packets. Packets come in
+    decode order; frames are indexed in presentation order, with times
+    relative to the first frame (as OpenCV reports them).
+    :param packets: (List[Dict[str, Any]]) ffprobe packet entries with
+    pts_time, dts_time, pos, size and flags.
+    :returns: (Dict[str, Any]) The index: "frames", and per frame "pts"
+    (seconds), "pos" (byte offset of the packet, -1 if unknown) and "size";
+    "keyframes" (frame numbers) and "start_time" (the first frame's pts).
+    """
+    rows = []
+    for packet in packets:
+        flags = packet.get("flags", "")
+        if "D" in flags:  # discarded, never displayed
+            continue
+        pts = _number(packet.get("pts_time"))
+        if pts is None:
+            pts = _number(packet.get("dts_time"))
+        if pts is None:
+            continue
+        pos = _number(packet.get("pos"))
+        rows.append(
+            (
+                pts,
+                -1 if pos is None else int(pos),
+                int(_number(packet.get("size")) or 0),
+                "K" in flags,
+            )
+        )
+    rows.sort(key=lambda row: row[0])
+    start = rows[0][0] if rows else 0.0
+    return {
+        "version": INDEX_VERSION,
+        "frames": len(rows),
+        "start_time": start,
+        "pts": [round(row[0] - start, 6) for row in rows],
+        "pos": [row[1] for row in rows],
+        "size": [row[2] for row in rows],
+        "keyframes": [i for i, row in enumerate(rows) if row[3]],
+    }
+
+
+def build_frame_index(video: str) -> Dict[str, Any]:
+    """
+    Reads a video's packets with ffprobe and builds its frame index.
+    :param video: (str) Path to the video.
+    :returns: (Dict[str, Any]) The index, see parse_packets.
+    :raises FileNotFoundError: If ffprobe is missing.
+    :raises subprocess.CalledProcessError: If ffprobe cannot read the file.
+    """
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "packet=pts_time,dts_time,pos,size,flags",
+        "-of",
+        "json",
+        video,
+    ]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return parse_packets(json.loads(out).get("packets", []))
+
+
+def write_frame_index(video: str, path: Optional[str] = None) -> str:
+    """
+    Builds a video's frame index and stores it as JSON.
+    :param video: (str) Path to the video.
+    :param path: (Optional[str]) Output path; defaults to index_path(video).
+    :returns: (str) Path of the written index.
+    """
+    path = path or index_path(video)
+    index = build_frame_index(video)
+    with open(path, "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    logger.info(
+        f"Frame index of {video}: {index['frames']} frames, "
+        f"{len(index['keyframes'])} keyframes => {path}"
+    )
+    return path
+
+
+def load_frame_index(video: str) -> Optional[Dict[str, Any]]:
+    """
+    Loads the frame index stored next to a video.
+    :param video: (str) Path to the video.
+    :returns: (Optional[Dict[str, Any]]) The index, None if there is none or
+    it was written by another version.
+    """
+    try:
+        with open(index_path(video)) as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        return None
+    return index if index.get("version") == INDEX_VERSION else None
+
+
+class FrameReader:
+    """
+    Random-access frame reader over an indexed video. Reads that move
+    forward within the current GOP decode on from where the last read
+    stopped; anything else seeks to the nearest keyframe first.
+    """
+
+    def __init__(self, video: str, index: Optional[Dict[str, Any]] = None) -> None:
+        """
+        :param video: (str) Path to the video.
+        :param index: (Optional[Dict[str, Any]]) Its frame index; loaded
+        from next to the video, or built, if not given.
+        """
+        self.video = video
+        self.index = index or load_frame_index(video) or build_frame_index(video)
+        self._pts = np.asarray(self.index["pts"], dtype=float)
+        self._keyframes = self.index["keyframes"] or [0]
+        steps = np.diff(self._pts)
+        # half a frame: how far a decoded timestamp may be from the index
+        self._tolerance = float(np.median(steps)) / 2 if steps.size else 0.5
+        self._cap: Optional[cv2.VideoCapture] = None
+        # frame number the next cap.read() returns, None if unknown
+        self._next: Optional[int] = None
+
+    def __len__(self) -> int:
+        return int(self.index["frames"])
+
+    def keyframe_before(self, frame: int) -> int:
+        """
+        :param frame: (int) Frame number.
+        :returns: (int) The last keyframe at or before it (0 if none).
+        """
+        i = bisect.bisect_right(self._keyframes, frame) - 1
+        return self._keyframes[i] if i >= 0 else 0
+
+    def frame_at(self, seconds: float) -> int:
+        """
+        :param seconds: (float) Time from the start of the video.
+        :returns: (int) The frame shown at that time.
+        """
+        i = int(np.searchsorted(self._pts, seconds + 1e-6, side="right")) - 1
+        return min(max(i, 0), len(self) - 1)
+
+    def _frame_of(self, msec: float) -> int:
+        """
+        Frame number of a decoded frame's timestamp, -1 if it matches none.
+        """
+        i = self.frame_at(msec / 1000.0)
+        candidates = [j for j in (i, i + 1) if j < len(self)]
+        best = min(candidates, key=lambda j: abs(self._pts[j] - msec / 1000.0))
+        return best if abs(self._pts[best] - msec / 1000.0) <= self._tolerance else -1
+
+    def _open(self) -> cv2.VideoCapture:
+        if self._cap is None:
+            cap = cv2.VideoCapture(self.video)
+            if not cap.isOpened():
+                raise OSError(f"Cannot open video: {self.video}")
+            self._cap, self._next = cap, 0
+        return self._cap
+
+    def _seek(self, keyframe: int) -> None:
+        """
+        Positions the capture at a keyframe; frame 0 reopens the video,
+        which is always exact.
+        """
+        if keyframe == 0:
+            self.close()
+            self._open()
+            return
+        self._open().set(cv2.CAP_PROP_POS_MSEC, float(self._pts[keyframe]) * 1000.0)
+        self._next = None
+
+    def _read(self) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        Decodes the next frame and identifies it by its timestamp.
+        """
+        cap = self._open()
+        ok, image = cap.read()
+        if not ok:
+            self._next = len(self)
+            return len(self), None
+        msec = cap.get(cv2.CAP_PROP_POS_MSEC)
+        frame = self._frame_of(msec)
+        if frame < 0:
+            frame = self._next if self._next is not None else self.frame_at(msec / 1e3)
+        self._next = frame + 1
+        return frame, image
+
+    def read_range(self, start: int, stop: int) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Decodes frames start to stop - 1.
+        :param start: (int) First frame number.
+        :param stop: (int) Frame number after the last one.
+        :returns: (Iterator[Tuple[int, np.ndarray]]) Frame numbers and BGR
+        images, in order; stops early at the end of the video.
+        """
+        start, stop = max(0, start), min(stop, len(self))
+        if start >= stop:
+            return
+        keyframe = self.keyframe_before(start)
+        seeked = not (self._next is not None and keyframe <= self._next <= start)
+        if seeked:
+            self._seek(keyframe)
+        while True:
+            frame, image = self._read()
+            if image is None:
+                return
+            if seeked and frame > start and keyframe > 0:
+                # the seek overshot; fall back to the previous keyframe
+                keyframe = self.keyframe_before(keyframe - 1)
+                self._seek(keyframe)
+                continue
+            seeked = False
+            if frame >= stop:
+                return
+            if frame >= start:
+                yield frame, image
+
+    def read(self, frame: int) -> np.ndarray:
+        """
+        Decodes one frame.
+        :param frame: (int) Frame number.
+        :returns: (np.ndarray) The BGR image.
+        :raises IndexError: If the frame is outside the video or cannot be
+        decoded.
+        """
+        for _, image in self.read_range(frame, frame + 1):
+            return image
+        raise IndexError(f"Frame {frame} not decodable in {self.video}")
+
+    def close(self) -> None:
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+            self._next = None
+
+    def __enter__(self) -> "FrameReader":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
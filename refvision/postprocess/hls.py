@@ -0,0 +1,251 @@
+# refvision/postprocess/hls.py
+"""
+Module for packaging the review video as adaptive HLS: one ffmpeg run encodes
+a small bitrate ladder (HLS.renditions in config.yaml) into segmented
+renditions plus a master playlist, which is uploaded next to the .mp4 in the
+processed bucket. Keyframes are forced at the same times in every rendition
+so players can switch quality at any segment boundary, and the opening
+segments are kept short so playback starts quickly.
+"""
+import os
+import posixpath
+import re
+import shutil
+import subprocess
+from typing import Any, Callable, Dict, List, Optional
+from refvision.common.config import get_config
+from refvision.io.s3_upload import upload_file_to_s3
+from refvision.postprocess.convert import run_command
+from refvision.postprocess.ffmpeg_jobs import PRIORITY_BACKGROUND
+from refvision.postprocess.probe import classify, probe_video
+from refvision.postprocess.profiles import scale_filter
+
+cfg = get_config()
+
+MASTER_PLAYLIST = "master.m3u8"
+RENDITION_PLAYLIST = "index.m3u8"
+CONTENT_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+}
+
+# URI="..." attributes inside tags, e.g. #EXT-X-MAP or #EXT-X-MEDIA
+_URI_ATTR = re.compile(r'URI="([^"]+)"')
+
+
+def _kbps(bitrate: Any) -> int:
+    """
+    Parses an ffmpeg bitrate such as "2500k", "4M" or 700000 into kbit/s.
+    :param bitrate: (Any) The bitrate.
+    :returns: (int) The bitrate in kbit/s.
+    """
+    value = str(bitrate).strip().lower()
+    if value.endswith("m"):
+        return int(float(value[:-1]) * 1000)
+    if value.endswith("k"):
+        return int(float(value[:-1]))
+    return int(float(value) / 1000)
+
+
+def ladder(source_short_side: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    The configured renditions, without the ones that would upscale the
+    source: renditions larger than the source collapse into one rendition at
+    the source resolution.
+    :param source_short_side: (Optional[int]) Shorter side of the source in
+    pixels; None keeps the whole ladder.
+    :returns: (List[Dict[str, Any]]) Renditions in configured order, each
+    with name, max_short_side, bitrate, maxrate and bufsize.
+    """
+    renditions = []
+    for rendition in (cfg["HLS"] or {}).get("renditions") or []:
+        kbps = _kbps(rendition["bitrate"])
+        renditions.append(
+            {
+                "name": rendition["name"],
+                "max_short_side": rendition.get("max_short_side"),
+                "bitrate": f"{kbps}k",
+                "maxrate": rendition.get("maxrate", f"{int(kbps * 1.1)}k"),
+                "bufsize": rendition.get("bufsize", f"{kbps * 2}k"),
+            }
+        )
+    if not source_short_side:
+        return renditions
+
+    def too_large(rendition: Dict[str, Any]) -> bool:
+        limit = rendition["max_short_side"]
+        return not limit or limit >= source_short_side
+
+    oversized = [r for r in renditions if too_large(r)]
+    if not oversized:
+        return renditions
+    # keep the cheapest of the oversized renditions, at source resolution
+    native = dict(min(oversized, key=lambda r: _kbps(r["bitrate"])))
+    native["max_short_side"] = None
+    kept = []
+    for rendition in renditions:
+        if rendition is oversized[0]:
+            kept.append(native)
+        elif not too_large(rendition):
+            kept.append(rendition)
+    return kept
+
+
+def hls_command(
+    input_video: str, output_dir: str, renditions: List[Dict[str, Any]]
+) -> List[str]:
+    """
+    ffmpeg command that encodes every rendition from one decode and writes
+    <output_dir>/<name>/index.m3u8 with its segments, plus the master
+    playlist. Only the video stream is packaged.
+    :param input_video: Path to the input video file.
+    :param output_dir: Directory for the playlists and segments.
+    :param renditions: Output of ladder().
+    :return: The command.
+    """
+    settings = cfg["HLS"] or {}
+    segment_seconds = settings.get("segment_seconds", 2)
+    first_seconds = settings.get("first_segment_seconds", segment_seconds)
+
+    labels = "".join(f"[s{i}]" for i in range(len(renditions)))
+    chains = [f"[0:v]split={len(renditions)}{labels}"]
+    for i, rendition in enumerate(renditions):
+        vf = scale_filter(rendition["max_short_side"]) or "null"
+        chains.append(f"[s{i}]{vf}[v{i}]")
+
+    cmd = ["ffmpeg", "-y", "-i", input_video, "-filter_complex", ";".join(chains)]
+    for i, rendition in enumerate(renditions):
+        cmd += [
+            "-map",
+            f"[v{i}]",
+            f"-b:v:{i}",
+            rendition["bitrate"],
+            f"-maxrate:v:{i}",
+            rendition["maxrate"],
+            f"-bufsize:v:{i}",
+            rendition["bufsize"],
+        ]
+    stream_map = " ".join(f"v:{i},name:{r['name']}" for i, r in enumerate(renditions))
+    return cmd + [
+        "-c:v",
+        "libx264",
+        "-preset",
+        str(settings.get("preset", "veryfast")),
+        "-profile:v",
+        "high",
+        "-pix_fmt",
+        "yuv420p",
+        # aligned keyframes in every rendition, at every segment boundary
+        "-sc_threshold",
+        "0",
+        "-force_key_frames",
+        f"expr:gte(t,n_forced*{first_seconds})",
+        "-f",
+        "hls",
+        "-hls_time",
+        str(segment_seconds),
+        "-hls_init_time",
+        str(first_seconds),
+        "-hls_playlist_type",
+        "vod",
+        "-hls_flags",
+        "independent_segments",
+        "-hls_segment_filename",
+        os.path.join(output_dir, "%v", "segment_%03d.ts"),
+        "-master_pl_name",
+        MASTER_PLAYLIST,
+        "-var_stream_map",
+        stream_map,
+        os.path.join(output_dir, "%v", RENDITION_PLAYLIST),
+    ]
+
+
+def package_hls(input_video: str, output_dir: str, logger=None) -> str:
+    """
+    Packages a video as HLS, replacing any earlier output in output_dir.
+    :param input_video: Path to the (review) .mp4.
+    :param output_dir: Directory for the playlists and segments.
+    :param logger: (Optional) Logger for logging progress
+    :return: Path to the master playlist.
+    """
+    if logger:
+        logger.info("=== Package HLS ===")
+    try:
+        info = classify(probe_video(input_video))
+        short_side = min(info["width"], info["height"]) or None
+    except (OSError, subprocess.CalledProcessError, ValueError, TypeError):
+        short_side = None
+    renditions = ladder(short_side)
+    if not renditions:
+        raise ValueError("No HLS renditions configured (HLS.renditions)")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    for rendition in renditions:
+        os.makedirs(os.path.join(output_dir, rendition["name"]), exist_ok=True)
+    # the player falls back to the .mp4 until the ladder is uploaded
+    run_command(
+        hls_command(input_video, output_dir, renditions),
+        logger=logger,
+        priority=PRIORITY_BACKGROUND,
+    )
+    return os.path.join(output_dir, MASTER_PLAYLIST)
+
+
+def upload_hls(local_dir: str, bucket: str, prefix: str, logger=None) -> List[str]:
+    """
+    Uploads packaged HLS output under an S3 prefix, keeping the layout.
+    Playlists go last, so a player never sees a playlist before its segments.
+    :param local_dir: Output directory of package_hls.
+    :param bucket: Name of the S3 bucket.
+    :param prefix: Key prefix, e.g. "processed/<video>/hls".
+    :param logger: (Optional) Logger for logging progress
+    :return: The uploaded keys.
+    """
+    paths = []
+    for root, _, files in os.walk(local_dir):
+        paths += [os.path.join(root, name) for name in files]
+    paths.sort(key=lambda p: (p.endswith(".m3u8"), p.endswith(MASTER_PLAYLIST), p))
+
+    keys = []
+    for path in paths:
+        rel = os.path.relpath(path, local_dir).replace(os.sep, "/")
+        key = f"{prefix.rstrip('/')}/{rel}"
+        content_type = CONTENT_TYPES.get(
+            os.path.splitext(path)[1], "application/octet-stream"
+        )
+        upload_file_to_s3(path, bucket, key, content_type=content_type, logger=logger)
+        keys.append(key)
+    return keys
+
+
+def playlist_key(prefix: str, name: str) -> str:
+    """
+    S3 key of a file inside an HLS prefix.
+    :param prefix: Key prefix of the packaged output.
+    :param name: Path relative to the prefix, e.g. "720p/index.m3u8".
+    :return: The key.
+    :raises ValueError: If name points outside the prefix.
+    """
+    rel = posixpath.normpath(name)
+    if rel.startswith(("/", "..")) or rel == ".":
+        raise ValueError(f"Invalid HLS path '{name}'")
+    return f"{prefix.rstrip('/')}/{rel}"
+
+
+def rewrite_playlist(text: str, resolve: Callable[[str], str]) -> str:
+    """
+    Replaces every URI in a playlist, e.g. to point segments at presigned
+    URLs, since relative URIs cannot be resolved against a presigned URL.
+    :param text: The playlist.
+    :param resolve: Maps a URI as written in the playlist to its new URI.
+    :return: The rewritten playlist.
+    """
+    lines = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("#"):
+            line = _URI_ATTR.sub(lambda m: f'URI="{resolve(m.group(1))}"', line)
+        elif stripped:
+            line = resolve(stripped)
+        lines.append(line)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,160 @@
+# refvision/postprocess/probe.py
+"""
+Module for probing videos with ffprobe and deciding whether they can be
+normalised with a stream-copy remux instead of a full re-encode.
+"""
+import functools
+import json
+import logging
+import os
+import subprocess
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# containers whose H.264 streams can be copied into an .mp4 as-is
+REMUX_CONTAINERS = ("mp4", "mov", "m4v")
+REMUX_PIX_FMTS = ("yuv420p", "yuvj420p")
+# audio codecs an .mp4 can carry without transcoding
+MP4_AUDIO_CODECS = ("aac", "mp3", "alac")
+
+
+def _ffprobe(target: str) -> str:
+    """
+    Runs ffprobe on a path or URL.
+    :returns: (str) ffprobe's JSON output.
+    """
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-print_format",
+        "json",
+        "-show_format",
+        "-show_streams",
+        target,
+    ]
+    return subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+
+
+@functools.lru_cache(maxsize=256)
+def _probe_cached(path: str, size: int, mtime_ns: int) -> str:
+    """
+    Runs ffprobe once per (path, size, mtime), so a file that changes is
+    probed again.
+    :returns: (str) ffprobe's JSON output.
+    """
+    return _ffprobe(path)
+
+
+def probe_video(path: str) -> Dict[str, Any]:
+    """
+    Probes a video with ffprobe; results are cached per file.
+    :param path: (str) Path to the video.
+    :returns: (Dict[str, Any]) ffprobe's "format" and "streams".
+    :raises FileNotFoundError: If the video (or ffprobe) is missing.
+    :raises subprocess.CalledProcessError: If ffprobe cannot read the file.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    return json.loads(_probe_cached(path, stat.st_size, stat.st_mtime_ns))
+
+
+def probe_url(url: str) -> Dict[str, Any]:
+    """
+    Probes a video over HTTP(S), e.g. a presigned S3 URL; ffprobe only
+    fetches the byte ranges it needs. Not cached.
+    :param url: (str) The video URL.
+    :returns: (Dict[str, Any]) ffprobe's "format" and "streams".
+    :raises FileNotFoundError: If ffprobe is missing.
+    :raises subprocess.CalledProcessError: If ffprobe cannot read the video.
+    """
+    return json.loads(_ffprobe(url))
+
+
+def keyframe_times(path: str) -> List[float]:
+    """
+    Presentation times of the video keyframes, read from the packet flags
+    without decoding.
+    :param path: (str) Path to the video.
+    :returns: (List[float]) Keyframe times in seconds, ascending.
+    :raises FileNotFoundError: If the video (or ffprobe) is missing.
+    :raises subprocess.CalledProcessError: If ffprobe cannot read the file.
+    """
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "packet=pts_time,flags",
+        "-of",
+        "csv=p=0",
+        path,
+    ]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    times = []
+    for line in out.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            times.append(float(pts_time))
+    return sorted(times)
+
+
+def _rotation(stream: Dict[str, Any]) -> int:
+    """
+    Display rotation of a video stream, from the display matrix side data
+    (newer ffmpeg) or the legacy "rotate" tag.
+    :param stream: (Dict[str, Any]) ffprobe stream.
+    :returns: (int) Rotation in degrees, normalised to [0, 360).
+    """
+    for side_data in stream.get("side_data_list") or []:
+        if "rotation" in side_data:
+            return int(round(float(side_data["rotation"]))) % 360
+    rotate = (stream.get("tags") or {}).get("rotate")
+    return int(rotate) % 360 if rotate else 0
+
+
+def classify(probe: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Classifies a probed video for normalisation. A video is remux-compatible
+    when it is H.264 yuv420p in an MP4/MOV container with no display
+    rotation; rotated footage is transcoded so the pixels are upright, since
+    the analysis reads image y as height.
+    :param probe: (Dict[str, Any]) Output of probe_video.
+    :returns: (Dict[str, Any]) Container, codec, pixel format, rotation,
+    size, audio codec, whether a remux is enough ("compatible") and the
+    reasons if not.
+    """
+    streams = probe.get("streams") or []
+    video: Dict[str, Any] = next(
+        (s for s in streams if s.get("codec_type") == "video"), {}
+    )
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    containers = (probe.get("format") or {}).get("format_name", "").split(",")
+
+    info: Dict[str, Any] = {
+        "container": containers[0] if containers[0] else None,
+        "video_codec": video.get("codec_name"),
+        "profile": video.get("profile"),
+        "pix_fmt": video.get("pix_fmt"),
+        "rotation": _rotation(video),
+        "width": video.get("width"),
+        "height": video.get("height"),
+        "audio_codec": audio.get("codec_name") if audio else None,
+    }
+    reasons: List[str] = []
+    if not video:
+        reasons.append("no video stream")
+    if not any(c in REMUX_CONTAINERS for c in containers):
+        reasons.append(f"container {info['container']}")
+    if info["video_codec"] != "h264":
+        reasons.append(f"codec {info['video_codec']}")
+    if info["pix_fmt"] not in REMUX_PIX_FMTS:
+        reasons.append(f"pixel format {info['pix_fmt']}")
+    if info["rotation"]:
+        reasons.append(f"rotation {info['rotation']}")
+    info["compatible"] = not reasons
+    info["reasons"] = reasons
+    return info
@@ -0,0 +1,90 @@
+# refvision/postprocess/profiles.py
+"""
+Named x264 encoding profiles (ENCODING.profiles in config.yaml) for the
+post-processing encodes. A profile sets the preset, quality (CRF or a
+bitrate), rate cap, thread count and an optional downscale; the source
+aspect ratio is always kept and videos are never upscaled.
+"""
+from typing import Any, Dict, List, Optional
+from refvision.common.config import get_config
+
+cfg = get_config()
+
+# used for any key a profile does not set
+PROFILE_DEFAULTS: Dict[str, Any] = {
+    "preset": "medium",
+    "crf": 23,
+    "bitrate": None,  # e.g. "5000k"; replaces crf when set
+    "maxrate": None,  # VBV cap for crf encodes, e.g. "5000k"
+    "bufsize": None,
+    "threads": 0,  # 0 lets x264 pick
+    "max_short_side": None,  # e.g. 1080 for "1080p" in either orientation
+    "tune": None,
+}
+
+
+def profile_names() -> List[str]:
+    return list(((cfg["ENCODING"] or {}).get("profiles") or {}).keys())
+
+
+def get_profile(name: Optional[str] = None, usage: str = "review") -> Dict[str, Any]:
+    """
+    Looks up an encoding profile.
+    :param name: (Optional[str]) Profile name; defaults to the one configured
+    for the usage.
+    :param usage: (str) "review" (annotated output) or "normalize" (input
+    transcodes), used when name is None.
+    :returns: (Dict[str, Any]) The profile, with defaults filled in.
+    :raises ValueError: If the profile is not configured.
+    """
+    settings = cfg["ENCODING"] or {}
+    profiles = settings.get("profiles") or {}
+    name = name or settings.get(f"{usage}_profile", usage)
+    if name not in profiles:
+        raise ValueError(
+            f"Unknown encoding profile '{name}'; expected one of {sorted(profiles)}"
+        )
+    return {"name": name, **PROFILE_DEFAULTS, **(profiles[name] or {})}
+
+
+def scale_filter(max_short_side: Optional[int]) -> Optional[str]:
+    """
+    ffmpeg scale filter that limits the shorter side of the frame, keeping
+    the aspect ratio (even dimensions for yuv420p) and never upscaling.
+    :param max_short_side: (Optional[int]) Limit in pixels, None for no limit.
+    :returns: (Optional[str]) The filter, None if no scaling is needed.
+    """
+    if not max_short_side:
+        return None
+    s = int(max_short_side)
+    return f"scale='if(gte(iw,ih),-2,min(iw,{s}))':'if(gte(iw,ih),min(ih,{s}),-2)'"
+
+
+def encode_args(profile: Dict[str, Any]) -> List[str]:
+    """
+    ffmpeg video encoding arguments for a profile (H.264 high, yuv420p).
+    :param profile: (Dict[str, Any]) Output of get_profile.
+    :returns: (List[str]) Arguments to place before the output path.
+    """
+    args = ["-c:v", "libx264", "-preset", str(profile["preset"])]
+    if profile["tune"]:
+        args += ["-tune", str(profile["tune"])]
+    if profile["bitrate"]:
+        args += ["-b:v", str(profile["bitrate"])]
+    else:
+        args += ["-crf", str(profile["crf"])]
+    if profile["maxrate"]:
+        bufsize = profile["bufsize"] or profile["maxrate"]
+        args += ["-maxrate", str(profile["maxrate"]), "-bufsize", str(bufsize)]
+    args += [
+        "-profile:v",
+        "high",
+        "-pix_fmt",
+        "yuv420p",
+        "-threads",
+        str(profile["threads"]),
+    ]
+    vf = scale_filter(profile["max_short_side"])
+    if vf:
+        args += ["-vf", vf]
+    return args
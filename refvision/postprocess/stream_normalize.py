@@ -0,0 +1,217 @@
+# refvision/postprocess/stream_normalize.py
+"""
+Module for normalising a raw video from S3 to S3 without local copies: the
+raw object's body is piped into ffmpeg's stdin while ffmpeg writes a
+fragmented MP4 to stdout, which is uploaded as a multipart upload as it is
+produced. Download, transcode and upload overlap, and nothing is written to
+disk unless a local copy is requested (e.g. for inference).
+
+An MP4/MOV whose moov box comes after the media data cannot be read from a
+pipe, so ffmpeg reads those from a presigned URL instead, seeking with range
+requests.
+"""
+import os
+import subprocess
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from refvision.common.config import get_config
+from refvision.io.s3_client import get_s3_client
+from refvision.io.s3_stream import S3MultipartWriter, iter_object, read_range
+from refvision.postprocess.convert import remux_command, transcode_command
+from refvision.postprocess.ffmpeg_jobs import PRIORITY_NORMAL, get_scheduler
+from refvision.postprocess.probe import classify, probe_url
+
+cfg = get_config()
+
+# fragments start at keyframes; the moov is written up front, empty
+FRAGMENTED_MOVFLAGS = "frag_keyframe+empty_moov+default_base_moof"
+
+
+def moov_before_mdat(read: Callable[[int, int], bytes]) -> Optional[bool]:
+    """
+    Walks the top-level boxes of an ISO-BMFF (MP4/MOV) file to find whether
+    the moov box precedes the media data, i.e. whether the file can be
+    demuxed front to back from a pipe. Reads one box header at a time.
+    :param read: Reads (offset, length) bytes of the file.
+    :return: True if moov comes first, False if mdat does, None if the file
+    is not ISO-BMFF or has neither box.
+    """
+    offset = 0
+    while True:
+        header = read(offset, 16)
+        if len(header) < 8:
+            return None
+        size = int.from_bytes(header[:4], "big")
+        box = header[4:8]
+        if offset == 0 and box not in (b"ftyp", b"wide", b"free", b"moov"):
+            return None
+        if box == b"moov":
+            return True
+        if box == b"mdat":
+            return False
+        if size == 1:  # 64-bit size follows the type
+            if len(header) < 16:
+                return None
+            size = int.from_bytes(header[8:16], "big")
+        if size < 8:  # 0 = box runs to the end of the file
+            return None
+        offset += size
+
+
+def streaming_command(cmd: List[str]) -> List[str]:
+    """
+    Turns a normalise command that writes an .mp4 file into one that writes
+    fragmented MP4 to stdout (faststart needs a seekable output).
+    :param cmd: Output of remux_command or transcode_command.
+    :return: The command, writing to pipe:1.
+    """
+    out = []
+    args = iter(cmd[:-1])
+    for arg in args:
+        if arg == "-movflags":
+            next(args)
+            continue
+        out.append(arg)
+    return out + ["-movflags", FRAGMENTED_MOVFLAGS, "-f", "mp4", "pipe:1"]
+
+
+def _feed(stdin: Any, chunks: Any, errors: List[BaseException]) -> None:
+    """
+    Writes chunks to ffmpeg's stdin. ffmpeg closing the pipe early is not an
+    error here; its exit status reports what went wrong.
+    """
+    try:
+        for chunk in chunks:
+            stdin.write(chunk)
+    except BrokenPipeError:
+        pass
+    except BaseException as e:
+        errors.append(e)
+    finally:
+        try:
+            stdin.close()
+        except BrokenPipeError:
+            pass
+
+
+def stream_normalize(
+    raw_bucket: str,
+    raw_key: str,
+    output_bucket: str,
+    output_key: str,
+    logger=None,
+    *,
+    local_copy: Optional[str] = None,
+    force_transcode: bool = False,
+    profile: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Normalises an S3 video to a fragmented .mp4 in S3, streaming through
+    ffmpeg. Compatible inputs are remuxed, others re-encoded, as in
+    convert.normalize_video. The upload is only completed if ffmpeg
+    succeeds; otherwise it is aborted and the error raised.
+    :param raw_bucket: Bucket of the raw video.
+    :param raw_key: Key of the raw video.
+    :param output_bucket: Bucket for the normalised .mp4.
+    :param output_key: Key for the normalised .mp4.
+    :param logger: (Optional) Logger for logging progress
+    :param local_copy: (Optional) Path to also write the output to.
+    :param force_transcode: Re-encode even if a remux would do.
+    :param profile: Encoding profile for re-encodes; defaults to
+    ENCODING.normalize_profile.
+    :return: Mode ("remux" or "transcode"), input ("pipe" or "url"), bytes
+    and parts uploaded.
+    """
+    settings = cfg["STREAM_NORMALIZE"] or {}
+    chunk_size = int(settings.get("chunk_kb", 1024)) * 1024
+    part_size = int(settings.get("part_size_mb", 8)) * 1024 * 1024
+    if logger:
+        logger.info(
+            f"=== Streaming normalise s3://{raw_bucket}/{raw_key} => "
+            f"s3://{output_bucket}/{output_key} ==="
+        )
+
+    s3 = get_s3_client()
+    url = s3.generate_presigned_url(
+        "get_object", Params={"Bucket": raw_bucket, "Key": raw_key}, ExpiresIn=3600
+    )
+    info = None
+    if not force_transcode:
+        try:
+            info = classify(probe_url(url))
+        except (OSError, subprocess.CalledProcessError, ValueError) as e:
+            if logger:
+                logger.warning(f"ffprobe failed for {raw_key} ({e}); transcoding")
+    streamable = moov_before_mdat(
+        lambda start, length: read_range(raw_bucket, raw_key, start, length, s3)
+    )
+    source = url if streamable is False else "pipe:0"
+
+    if info is not None and info["compatible"]:
+        mode = "remux"
+        cmd = remux_command(source, "out.mp4", info)
+    else:
+        mode = "transcode"
+        if logger and info is not None:
+            logger.info(f"Transcoding: {', '.join(info['reasons'])}")
+        cmd = transcode_command(source, "out.mp4", profile)
+    cmd = streaming_command(cmd)
+    if logger:
+        logger.info(
+            f"{mode} from {'a presigned URL' if source == url else 'a pipe'} "
+            f"(moov first: {streamable})"
+        )
+
+    result: Dict[str, Any] = {"mode": mode, "input": "url" if source == url else "pipe"}
+
+    def io(process: subprocess.Popen) -> None:
+        assert process.stdin is not None and process.stdout is not None
+        stdout = process.stdout
+        errors: List[BaseException] = []
+        feeder = None
+        if source == "pipe:0":
+            chunks = iter_object(raw_bucket, raw_key, chunk_size, s3)
+            feeder = threading.Thread(
+                target=_feed, args=(process.stdin, chunks, errors), daemon=True
+            )
+            feeder.start()
+        else:
+            process.stdin.close()
+
+        writer = S3MultipartWriter(
+            output_bucket, output_key, part_size=part_size, s3_client=s3, logger=logger
+        )
+        local = open(local_copy, "wb") if local_copy else None
+        try:
+            for chunk in iter(lambda: stdout.read(chunk_size), b""):
+                writer.write(chunk)
+                if local:
+                    local.write(chunk)
+            if feeder is not None:
+                feeder.join()
+            if errors:
+                raise errors[0]
+            # a truncated output must not become a complete object
+            if process.wait() != 0:
+                writer.abort()
+                return
+            writer.close()
+        except BaseException:
+            writer.abort()
+            raise
+        finally:
+            if local:
+                local.close()
+        result.update(bytes=writer.bytes_written, parts=writer.parts)
+
+    if local_copy:
+        os.makedirs(os.path.dirname(os.path.abspath(local_copy)), exist_ok=True)
+    try:
+        get_scheduler().run(
+            cmd, name=os.path.basename(output_key), priority=PRIORITY_NORMAL, io=io
+        )
+    except BaseException:
+        if local_copy and os.path.exists(local_copy):
+            os.remove(local_copy)
+        raise
+    return result
@@ -0,0 +1,306 @@
+# refvision/postprocess/trim.py
+"""
+Module for trimming an attempt video to the lift, so inference, conversion
+and storage skip the walk-out, loader activity and celebration. The lift
+window is found with a cheap motion analysis (frame differences on small
+grayscale samples) or, with TRIM.method "pose", a coarse pose pass over
+sampled frames. The cut is a stream copy from the keyframe before the
+window when that keyframe is close enough, else an exact re-encode. The
+offset of the cut in the source is recorded, so frame numbers and times in
+the trimmed clip can be mapped back.
+"""
+import logging
+import os
+import subprocess
+from typing import Any, Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+from refvision.analysis.context import AnalysisContext
+from refvision.analysis.keypoint_track import extract_keypoint_track
+from refvision.common.config import get_config
+from refvision.postprocess.convert import run_command
+from refvision.postprocess.probe import keyframe_times
+from refvision.postprocess.profiles import encode_args, get_profile
+from refvision.utils.tracing import traced
+
+cfg = get_config()
+
+
+def _settings() -> Dict[str, Any]:
+    return cfg["TRIM"] or {}
+
+
+def video_info(video: str) -> Tuple[float, int]:
+    """
+    Frame rate and frame count of a video, as reported by OpenCV.
+    :param video: (str) Path to the video.
+    :returns: (Tuple[float, int]) fps (30 if unknown) and frame count.
+    """
+    cap = cv2.VideoCapture(video)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return fps, count
+
+
+@traced()
+def motion_energy(
+    video: str, sample_fps: float = 5.0, width: int = 160
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean absolute difference between consecutive sampled frames, on small
+    blurred grayscale copies. Skipped frames are grabbed but not converted.
+    :param video: (str) Path to the video.
+    :param sample_fps: (float) Samples per second.
+    :param width: (int) Width of the grayscale copies.
+    :returns: (Tuple[np.ndarray, np.ndarray]) Sample times in seconds and the
+    motion energy (0-255) from the previous sample to each sample; the
+    first sample's energy is 0.
+    """
+    cap = cv2.VideoCapture(video)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    stride = max(1, int(round(fps / sample_fps)))
+    times, energy = [], []
+    prev = None
+    idx = 0
+    while cap.grab():
+        if idx % stride == 0:
+            ok, frame = cap.retrieve()
+            if not ok:
+                break
+            h, w = frame.shape[:2]
+            small = cv2.resize(
+                frame,
+                (width, max(1, round(h * width / w))),
+                interpolation=cv2.INTER_AREA,
+            )
+            gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+            energy.append(
+                0.0 if prev is None else float(cv2.absdiff(gray, prev).mean())
+            )
+            times.append(idx / fps)
+            prev = gray
+        idx += 1
+    cap.release()
+    return np.asarray(times), np.asarray(energy)
+
+
+def _segments(active: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Runs of True in a boolean array, as (first, last) index pairs.
+    """
+    edges = np.diff(np.concatenate([[0], active.astype(int), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def motion_window(
+    times: np.ndarray, energy: np.ndarray
+) -> Optional[Tuple[float, float]]:
+    """
+    The lift window from motion energy: samples above a noise-adaptive
+    threshold form segments, segments closer than TRIM.merge_gap_s are
+    merged, and the segment with the most motion is the lift.
+    :param times: (np.ndarray) Sample times in seconds.
+    :param energy: (np.ndarray) Motion energy per sample.
+    :returns: (Optional[Tuple[float, float]]) Start and end in seconds,
+    before padding; None if nothing moves.
+    """
+    settings = _settings()
+    if energy.size < 2:
+        return None
+    median = float(np.median(energy[1:]))
+    mad = float(np.median(np.abs(energy[1:] - median)))
+    threshold = max(
+        settings.get("min_energy", 1.0),
+        median + settings.get("threshold_mads", 3.0) * mad,
+    )
+    segments = _segments(energy > threshold)
+    if not segments:
+        return None
+
+    merge_gap = settings.get("merge_gap_s", 1.5)
+    merged = [segments[0]]
+    for first, last in segments[1:]:
+        # a segment's motion starts one sample before its first active sample
+        if times[first - 1] - times[merged[-1][1]] <= merge_gap:
+            merged[-1] = (merged[-1][0], last)
+        else:
+            merged.append((first, last))
+    first, last = max(merged, key=lambda seg: energy[seg[0] : seg[1] + 1].sum())
+    return float(times[max(0, first - 1)]), float(times[last])
+
+
+def pose_window(
+    times: np.ndarray, xy: np.ndarray, conf: np.ndarray
+) -> Optional[Tuple[float, float]]:
+    """
+    The lift window from a coarse keypoint track: from the last sample
+    before the deepest hip position where the hips are still near standing
+    height, to the first one after it.
+    :param times: (np.ndarray) Sample times in seconds.
+    :param xy: (np.ndarray) Keypoint track (samples, 17, 2).
+    :param conf: (np.ndarray) Keypoint confidence (samples, 17).
+    :returns: (Optional[Tuple[float, float]]) Start and end in seconds,
+    before padding; None if no lifter is seen.
+    """
+    context = AnalysisContext(xy, conf)
+    hip_y = context.joint_y("hip")
+    bottom = context.phases("hip")["bottom"]
+    if bottom is None:
+        return None
+    top = float(np.nanpercentile(hip_y, 10))
+    band = _settings().get("standing_band", 0.15) * (hip_y[bottom] - top)
+    standing = np.flatnonzero(hip_y <= top + band)
+    before = standing[standing < bottom]
+    after = standing[standing > bottom]
+    start = int(before[-1]) if before.size else 0
+    end = int(after[0]) if after.size else len(times) - 1
+    return float(times[start]), float(times[end])
+
+
+@traced()
+def coarse_pose_track(
+    model: Any, device: Any, video: str, sample_fps: float = 5.0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Runs pose estimation on every n-th frame only.
+    :param model: The loaded YOLO model.
+    :param device: The device the model runs on.
+    :param video: (str) Path to the video.
+    :param sample_fps: (float) Samples per second.
+    :returns: (Tuple[np.ndarray, np.ndarray, np.ndarray]) Sample times, and
+    the keypoint track and confidence as in extract_keypoint_track.
+    """
+    fps, _ = video_info(video)
+    stride = max(1, int(round(fps / sample_fps)))
+    results = list(
+        model.predict(
+            source=video, device=device, stream=True, vid_stride=stride, verbose=False
+        )
+    )
+    xy, conf = extract_keypoint_track(results)
+    return np.arange(len(results)) * stride / fps, xy, conf
+
+
+def cut_plan(start_s: float, end_s: float, keyframes: List[float]) -> Dict[str, Any]:
+    """
+    Decides how to cut [start_s, end_s]: a stream copy has to start on a
+    keyframe, so it is used when the keyframe before start_s is at most
+    TRIM.max_preroll_s earlier; otherwise the clip is re-encoded.
+    :param start_s: (float) Window start in seconds.
+    :param end_s: (float) Window end in seconds.
+    :param keyframes: (List[float]) Keyframe times of the source.
+    :returns: (Dict[str, Any]) "mode" ("copy" or "encode"), "offset_s" (the
+    source time of the trimmed clip's first frame) and "end_s".
+    """
+    before = [t for t in keyframes if t <= start_s + 1e-6]
+    preroll = _settings().get("max_preroll_s", 1.0)
+    if before and start_s - before[-1] <= preroll:
+        return {"mode": "copy", "offset_s": before[-1], "end_s": end_s}
+    return {"mode": "encode", "offset_s": start_s, "end_s": end_s}
+
+
+def cut_command(input_video: str, output_path: str, plan: Dict[str, Any]) -> List[str]:
+    """
+    ffmpeg command that cuts a clip; the output's timestamps start at 0.
+    :param input_video: Path to the input video.
+    :param output_path: Path to the output .mp4.
+    :param plan: Output of cut_plan.
+    :return: The command.
+    """
+    start = f"{plan['offset_s']:.3f}"
+    duration = f"{plan['end_s'] - plan['offset_s']:.3f}"
+    cmd = ["ffmpeg", "-y", "-ss", start, "-i", input_video, "-t", duration]
+    if plan["mode"] == "copy":
+        cmd += ["-map", "0", "-c", "copy", "-avoid_negative_ts", "make_zero"]
+    else:
+        cmd += [*encode_args(get_profile(None, usage="normalize")), "-c:a", "aac"]
+    return cmd + ["-movflags", "+faststart", output_path]
+
+
+@traced()
+def trim_video(
+    input_video: str, output_dir: str, logger=None, model: Any = None, device=None
+) -> Dict[str, Any]:
+    """
+    Trims a video to the lift window, padded by TRIM.pad_s. The video is
+    left as it is when no window is found or trimming would save less than
+    TRIM.min_saving_s.
+    :param input_video: Path to the (normalised) video.
+    :param output_dir: Directory for the trimmed .mp4, which keeps the
+    input's file name so downstream outputs are named as before.
+    :param logger: (Optional) Logger for logging progress
+    :param model: (Optional) Loaded YOLO model, for TRIM.method "pose".
+    :param device: (Optional) The model's device.
+    :return: The trim record: "path" of the video to use, "trimmed",
+    "method", "mode", "offset_s" and "end_s" in the source, "fps",
+    "offset_frames" and "source_duration_s".
+    """
+    log = logger or logging.getLogger(__name__)
+    settings = _settings()
+    fps, count = video_info(input_video)
+    duration = count / fps if count else 0.0
+    record = {
+        "path": input_video,
+        "trimmed": False,
+        "method": settings.get("method", "motion"),
+        "mode": None,
+        "offset_s": 0.0,
+        "end_s": duration,
+        "fps": fps,
+        "offset_frames": 0,
+        "source_duration_s": duration,
+    }
+
+    sample_fps = settings.get("sample_fps", 5.0)
+    if record["method"] == "pose" and model is not None:
+        times, xy, conf = coarse_pose_track(model, device, input_video, sample_fps)
+        window = pose_window(times, xy, conf) if times.size else None
+    else:
+        record["method"] = "motion"
+        times, energy = motion_energy(
+            input_video, sample_fps, settings.get("analysis_width", 160)
+        )
+        window = motion_window(times, energy)
+    if window is None:
+        log.info("No lift window found; not trimming.")
+        return record
+
+    pad = settings.get("pad_s", 1.0)
+    start_s = max(0.0, window[0] - pad)
+    end_s = min(duration, window[1] + pad)
+    if duration - (end_s - start_s) < settings.get("min_saving_s", 2.0):
+        log.info(
+            f"Lift window {start_s:.2f}-{end_s:.2f}s of {duration:.2f}s; not trimming."
+        )
+        return record
+
+    try:
+        keyframes = keyframe_times(input_video)
+    except (OSError, subprocess.CalledProcessError) as e:
+        log.warning(f"Could not list keyframes ({e}); re-encoding the cut.")
+        keyframes = []
+    plan = cut_plan(start_s, end_s, keyframes)
+
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(
+        output_dir, os.path.splitext(os.path.basename(input_video))[0] + ".mp4"
+    )
+    if os.path.abspath(output_path) == os.path.abspath(input_video):
+        raise ValueError("trim output_dir must differ from the input's directory")
+    log.info(
+        f"=== Trim to lift: {plan['offset_s']:.2f}-{end_s:.2f}s of {duration:.2f}s "
+        f"({plan['mode']}) ==="
+    )
+    run_command(cut_command(input_video, output_path, plan), logger=log)
+    record.update(
+        path=output_path,
+        trimmed=True,
+        mode=plan["mode"],
+        offset_s=plan["offset_s"],
+        end_s=end_s,
+        offset_frames=int(round(plan["offset_s"] * fps)),
+    )
+    return record
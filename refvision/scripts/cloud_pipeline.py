@@ -23,16 +23,17 @@ from refvision.dynamo_db.dynamodb_helpers import create_item, update_item, get_i
 from refvision.io.s3_download import download_file_from_s3
 from refvision.io.s3_upload import upload_file_to_s3
 from refvision.inference.local_inference import run_inference
+from refvision.postprocess.convert import probe_for_normalize
 
 
 def is_h264_mp4(path: str) -> bool:
     """
-    Quick check if a local file is already H.264 .mp4.
-    Could run ffprobe or a simpler check.
-    For demonstration only.
+    Quick check if a local file is already H.264 .mp4 (or .mov) that only
+    needs a stream-copy remux, using the cached ffprobe classification.
+    Returns False if the file cannot be probed, so it is normalised.
     """
-    # TODO implement
-    return False
+    info = probe_for_normalize(path)
+    return bool(info and info["compatible"])
 
 
 def call_normalize_lambda(s3_input, s3_output):
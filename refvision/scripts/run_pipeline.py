@@ -8,9 +8,10 @@ Steps:
  4) Download raw from S3 => local
  5) Normalize video => H.264 MP4
  6) Upload normalized .mp4 => S3
+    (with STREAM_NORMALIZE, 4-6 stream S3 => ffmpeg => S3 in one step)
  7) YOLO inference => ephemeral .avi
  8) Convert .avi => final .mp4
- 9) Upload final .mp4 => processed bucket
+ 9) Upload final .mp4 (and its HLS ladder, if enabled) => processed bucket
 10) Read the decision from DynamoDB
 11) Generate explanation via Bedrock
 12) Launch Gunicorn
@@ -18,9 +19,16 @@ Steps:
 """
 
 import argparse
+import contextvars
+import logging
 import os
+import shutil
+import subprocess
 import sys
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
 from refvision.common.config import get_config
 from refvision.io.s3_upload import upload_file_to_s3
 from refvision.io.s3_download import download_file_from_s3
@@ -29,12 +37,23 @@ from refvision.postprocess.convert import (
     convert_avi_to_mp4,
     run_command,
 )
-from refvision.dynamo_db.dynamodb_helpers import create_item, get_item
+from refvision.postprocess.frame_index import index_path, write_frame_index
+from refvision.postprocess.hls import package_hls, upload_hls
+from refvision.postprocess.stream_normalize import stream_normalize
+from refvision.postprocess.trim import trim_video
+from refvision.dynamo_db.dynamodb_helpers import (
+    create_item,
+    decimalize,
+    get_item,
+    update_item,
+)
 from refvision.web.launcher import launch_gunicorn
 from refvision.error_handler.handler import handle_error
 from refvision.utils.logging_setup import setup_logging
+from refvision.utils import tracing
+from refvision.utils.tracing import span, traced
 
-logger = setup_logging(os.path.join(os.path.dirname(__file__), "../logs/pipeline.log"))
+logger = logging.getLogger(__name__)
 cfg = get_config()
 
 # resolve absolute paths
@@ -54,7 +73,7 @@ def load_prompt_template(filepath: str = PROMPT_PATH) -> str:
 
 
 def run_yolo_inference(
-    video: str, model_path: str, meet_id: str, record_id: str
+    video: str, model_path: str, meet_id: str, record_id: str, lift: str = "squat"
 ) -> None:
     """
     Runs YOLO inference on the provided video using the specified model path
@@ -62,6 +81,7 @@ def run_yolo_inference(
     :param model_path: Path to the YOLO model.
     :param meet_id: Athlete ID for the inference.
     :param record_id: Record ID for the inference.
+    :param lift: Lift type, selects the analyser.
     :return: None
     """
     logger.info("=== YOLO Inference ===")
@@ -79,10 +99,278 @@ def run_yolo_inference(
         meet_id,
         "--record_id",
         record_id,
+        "--lift",
+        lift,
+    ]
+    run_command(cmd, logger=logger)
+
+
+def run_multi_view_yolo_inference(
+    videos: Dict[str, str],
+    model_path: str,
+    meet_id: str,
+    record_id: str,
+    lift: str = "squat",
+) -> None:
+    """
+    Runs YOLO inference on every camera view of one attempt and stores the
+    fused decision.
+    :param videos: Mapping of view name to normalised video path.
+    :param model_path: Path to the YOLO model.
+    :param meet_id: Athlete ID for the inference.
+    :param record_id: Record ID for the inference.
+    :param lift: Lift type, selects the analyser.
+    :return: None
+    """
+    logger.info(f"=== Multi-view YOLO Inference ({', '.join(videos)}) ===")
+    cmd = [
+        "poetry",
+        "run",
+        "python",
+        "-m",
+        "refvision.inference.multi_view",
+        "--model_path",
+        model_path,
+        "--meet_id",
+        meet_id,
+        "--record_id",
+        record_id,
+        "--lift",
+        lift,
     ]
+    for view, video in videos.items():
+        cmd += ["--view", f"{view}={video}"]
     run_command(cmd, logger=logger)
 
 
+def normalize_from_s3(
+    raw_bucket: str,
+    raw_key: str,
+    temp_dir: str,
+    normalized_dir: str,
+    normalized_key: str,
+) -> Tuple[List[str], str]:
+    """
+    Steps 4-6: normalises the raw video in S3 into the normalized bucket and
+    keeps a local copy of the normalised .mp4 for inference. With
+    STREAM_NORMALIZE enabled the raw video never touches the disk.
+    :param raw_bucket: S3 bucket of the raw video.
+    :param raw_key: Key of the raw video.
+    :param temp_dir: Directory for the downloaded raw video.
+    :param normalized_dir: Directory for the normalised .mp4.
+    :param normalized_key: Key for the normalised .mp4.
+    :return: Local files to clean up, and the normalised .mp4's path.
+    """
+    os.makedirs(normalized_dir, exist_ok=True)
+    if (cfg["STREAM_NORMALIZE"] or {}).get("enabled", False):
+        base_name = os.path.splitext(os.path.basename(raw_key))[0]
+        normalized_mp4 = os.path.join(normalized_dir, f"{base_name}.mp4")
+        with span("pipeline.stream_normalize"):
+            stream_normalize(
+                raw_bucket,
+                raw_key,
+                cfg["NORMALIZED_BUCKET"],
+                normalized_key,
+                logger=logger,
+                local_copy=normalized_mp4,
+            )
+        local_files = [normalized_mp4]
+        local_files += index_video(normalized_mp4, normalized_key)
+        return local_files, normalized_mp4
+
+    os.makedirs(temp_dir, exist_ok=True)
+    local_raw_path = os.path.join(temp_dir, os.path.basename(raw_key))
+    logger.info(f"Downloading from s3://{raw_bucket}/{raw_key} => {local_raw_path}")
+    with span("pipeline.download_raw"):
+        download_file_from_s3(raw_bucket, raw_key, local_raw_path, logger=logger)
+    with span("pipeline.normalize"):
+        normalized_mp4 = normalize_video(local_raw_path, normalized_dir, logger=logger)
+    with span("pipeline.upload_normalized"):
+        upload_file_to_s3(
+            normalized_mp4, cfg["NORMALIZED_BUCKET"], normalized_key, logger=logger
+        )
+    local_files = [local_raw_path, normalized_mp4]
+    local_files += index_video(normalized_mp4, normalized_key)
+    return local_files, normalized_mp4
+
+
+def index_video(video: str, key: str) -> List[str]:
+    """
+    Writes the frame index of a normalised video next to it, locally and in
+    the normalized bucket. A missing index only makes seeking slower, so
+    ffprobe failures are logged, not raised.
+    :param video: Path to the normalised .mp4.
+    :param key: Its key in the normalized bucket.
+    :return: The local index file, if one was written.
+    """
+    if not (cfg["FRAME_INDEX"] or {}).get("enabled", False):
+        return []
+    with span("pipeline.frame_index"):
+        try:
+            path = write_frame_index(video)
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.warning(f"Could not index {video}: {e}")
+            return []
+        upload_file_to_s3(
+            path, cfg["NORMALIZED_BUCKET"], index_path(key), logger=logger
+        )
+    return [path]
+
+
+def trim_attempt(video: str, model_path: str, meet_id: str, record_id: str) -> str:
+    """
+    Trims a normalised single-view video to the lift before inference and
+    stores the trim record (offset into the source) on the attempt.
+    :param video: Path to the normalised .mp4.
+    :param model_path: Path to the YOLO model, for TRIM.method "pose".
+    :param meet_id: PK in DynamoDB.
+    :param record_id: SK in DynamoDB.
+    :return: Path to the video to run inference on.
+    """
+    model = device = None
+    if (cfg["TRIM"] or {}).get("method") == "pose":
+        from refvision.inference.model_loader import load_model
+
+        model, device = load_model(model_path)
+    with span("pipeline.trim"):
+        trim = trim_video(
+            video,
+            os.path.join(cfg["OUTPUT_DIR"], "trimmed"),
+            logger=logger,
+            model=model,
+            device=device,
+        )
+    record = {k: v for k, v in trim.items() if k != "path"}
+    update_item(
+        meet_id=meet_id, record_id=record_id, updates={"Trim": decimalize(record)}
+    )
+    return trim["path"]
+
+
+@traced()
+def prepare_view(
+    view: str, local_raw_video: str, raw_bucket: str
+) -> Tuple[List[str], str]:
+    """
+    Uploads, downloads and normalises one camera view of a multi-view attempt
+    (steps 2-6 of the single-view pipeline).
+    :param view: View name, e.g. "side".
+    :param local_raw_video: Path to the view's local raw video.
+    :param raw_bucket: S3 bucket for raw videos.
+    :return: Local files to clean up, and the normalised .mp4's path.
+    """
+    if not os.path.isfile(local_raw_video):
+        raise FileNotFoundError(
+            f"Raw video for view '{view}' not found: {local_raw_video}"
+        )
+    file_name = os.path.basename(local_raw_video)
+    raw_key = f"incoming/{view}/{file_name}"
+    upload_file_to_s3(local_raw_video, raw_bucket, raw_key, logger=logger)
+
+    base_name = os.path.splitext(file_name)[0]
+    return normalize_from_s3(
+        raw_bucket,
+        raw_key,
+        os.path.join(cfg["TEMP_DIR"], view),
+        os.path.join(cfg["OUTPUT_DIR"], "normalized", view),
+        f"normalized/{view}/{base_name}.mp4",
+    )
+
+
+def process_single_view(
+    local_raw_video: str,
+    raw_bucket: str,
+    raw_key: str,
+    model_path: str,
+    meet_id: str,
+    record_id: str,
+    lift: str = "squat",
+    inference: Callable[..., None] = run_yolo_inference,
+) -> List[str]:
+    """
+    Steps 2-8 for a single-view attempt: uploads the raw video, normalises
+    and trims it, runs inference and converts the annotated .avi to
+    MP4_OUTPUT.
+    :param local_raw_video: Path to the local raw video.
+    :param raw_bucket: S3 bucket for raw videos.
+    :param raw_key: Key of the raw video.
+    :param model_path: Path to the YOLO model.
+    :param meet_id: PK in DynamoDB.
+    :param record_id: SK in DynamoDB.
+    :param lift: Lift type, selects the analyser.
+    :param inference: Runs inference with run_yolo_inference's arguments;
+    local_inference.run_inference runs it in this process instead.
+    :return: Local files to clean up.
+    """
+    logger.info(f"Uploading local raw video => s3://{raw_bucket}/{raw_key}")
+    with span("pipeline.upload_raw"):
+        upload_file_to_s3(local_raw_video, raw_bucket, raw_key, logger=logger)
+
+    # 4-6) raw video in S3 => normalised H.264 .mp4 in S3 (+ local copy)
+    local_files, normalized_mp4 = normalize_from_s3(
+        raw_bucket,
+        raw_key,
+        cfg["TEMP_DIR"],
+        cfg["OUTPUT_DIR"],
+        cfg["NORMALIZED_KEY"],
+    )
+    # multi-view attempts are not trimmed: the views must stay in sync
+    video = normalized_mp4
+    if (cfg["TRIM"] or {}).get("enabled", False):
+        video = trim_attempt(normalized_mp4, model_path, meet_id, record_id)
+        if video != normalized_mp4:
+            local_files.append(video)
+
+    # 7) YOLO inference => ephemeral .avi
+    with span("pipeline.inference"):
+        inference(video, model_path, meet_id=meet_id, record_id=record_id, lift=lift)
+
+    # 8) convert .avi => final .mp4
+    with span("pipeline.convert"):
+        convert_avi_to_mp4(cfg["AVI_OUTPUT"], cfg["MP4_OUTPUT"], logger=logger)
+    return local_files
+
+
+def publish_processed() -> None:
+    """
+    Step 9: uploads MP4_OUTPUT, and its HLS ladder if enabled, to the
+    processed bucket.
+    :return: None
+    """
+    with span("pipeline.upload_processed"):
+        upload_file_to_s3(
+            cfg["MP4_OUTPUT"],
+            cfg["PROCESSED_BUCKET"],
+            cfg["PROCESSED_KEY"],
+            logger=logger,
+        )
+    if (cfg["HLS"] or {}).get("enabled", False):
+        with span("pipeline.hls"):
+            package_hls(cfg["MP4_OUTPUT"], cfg["HLS_OUTPUT_DIR"], logger=logger)
+            upload_hls(
+                cfg["HLS_OUTPUT_DIR"],
+                cfg["PROCESSED_BUCKET"],
+                cfg["PROCESSED_HLS_PREFIX"],
+                logger=logger,
+            )
+
+
+def write_pipeline_trace(directory: str) -> str:
+    """
+    Merges the trace files of the pipeline and its inference subprocess into
+    one Chrome trace and logs the per-stage summary.
+    :param directory: The run's trace directory.
+    :return: Path of the merged trace.
+    """
+    tracing.write_trace(os.path.join(directory, f"trace-{os.getpid()}.json"))
+    path = os.path.join(directory, "pipeline_trace.json")
+    merged = tracing.merge_traces(directory, path)
+    summary = tracing.summarise(tracing.spans_from_trace(merged))
+    logger.info(f"Stage timings:\n{tracing.format_summary(summary)}")
+    logger.info(f"Trace written => {path} (open in Perfetto or chrome://tracing)")
+    return path
+
+
 def generate_explanation_via_bedrock(meet_name: str, record_id: str) -> None:
     """
     Generates an explanation using AWS Bedrock.
@@ -116,8 +404,18 @@ def local_pipeline():
     parser.add_argument("--raw-key", default=None)
     parser.add_argument("--model-path", default=None)
     parser.add_argument("--flask-port", default=None)
+    parser.add_argument(
+        "--trace", action="store_true", help="Record a Chrome trace of the run"
+    )
     args = parser.parse_args()
 
+    trace_run_dir = None
+    if args.trace:
+        trace_run_dir = os.path.join(
+            tracing.trace_dir(), time.strftime("%Y%m%d-%H%M%S")
+        )
+        tracing.enable(trace_run_dir)
+
     lifter_data = None
     try:
         # 1) load lifter_data JSON & store in DynamoDB
@@ -136,77 +434,94 @@ def local_pipeline():
         lift_number = int(lifter_data["attempt"])
         record_id = f"{lifter_data['lifter_name']}#{lifter_data['lift']}#{lifter_data['attempt']}"
 
-        create_item(
-            meet_id=meet_name,
-            record_id=record_id,
-            lifter_name=lifter_name,
-            lift=lift,
-            lift_number=lift_number,
-            metadata=lifter_data,
-        )
+        with span("pipeline.create_item"):
+            create_item(
+                meet_id=meet_name,
+                record_id=record_id,
+                lifter_name=lifter_name,
+                lift=lift,
+                lift_number=lift_number,
+                metadata=lifter_data,
+            )
 
         logger.info(
             f"Created DynamoDB item => athlete={lifter_name}, record={record_id}"
         )
 
-        # 2) local raw video => S3
-        local_raw_video = cfg.get("LOCAL_RAW_VIDEO")
-        if not local_raw_video or not os.path.isfile(local_raw_video):
-            raise FileNotFoundError(
-                f"Mandatory local raw video file not found: {local_raw_video}"
-            )
-
-        raw_bucket = args.raw_bucket or cfg["RAW_BUCKET"]
-        raw_key = args.raw_key or cfg["RAW_KEY"]
-        logger.info(f"Uploading local raw video => s3://{raw_bucket}/{raw_key}")
-        upload_file_to_s3(local_raw_video, raw_bucket, raw_key, logger=logger)
-
         # 3) model path & Flask port
+        raw_bucket = args.raw_bucket or cfg["RAW_BUCKET"]
         model_path = args.model_path or cfg["MODEL_PATH"]
         flask_port = str(args.flask_port or cfg["FLASK_PORT"])
+        views = lifter_data.get("views")
+        if views:
+            # multi-camera attempt: steps 2-6 run concurrently per view, then
+            # one inference job evaluates all views and fuses the decision
+            # (not trimmed or cached, see refvision.inference.multi_view)
+            with span("pipeline.prepare_views", views=len(views)):
+                with ThreadPoolExecutor(max_workers=len(views)) as pool:
+                    # each worker runs in a copy of this context, so its
+                    # spans nest under pipeline.prepare_views
+                    futures = {
+                        view: pool.submit(
+                            contextvars.copy_context().run,
+                            prepare_view,
+                            view,
+                            path,
+                            raw_bucket,
+                        )
+                        for view, path in views.items()
+                    }
+                    prepared = {
+                        view: future.result() for view, future in futures.items()
+                    }
+            videos = {view: mp4 for view, (_, mp4) in prepared.items()}
+            with span("pipeline.inference"):
+                run_multi_view_yolo_inference(
+                    videos,
+                    model_path,
+                    meet_id=meet_name,
+                    record_id=record_id,
+                    lift=lift,
+                )
+
+            # the reference view's annotated video is the one that is served
+            ref_view = (cfg["MULTI_VIEW"] or {}).get("reference_view")
+            ref_view = ref_view if ref_view in videos else next(iter(videos))
+            ref_stem = os.path.splitext(os.path.basename(videos[ref_view]))[0]
+            with span("pipeline.convert"):
+                convert_avi_to_mp4(
+                    os.path.join(cfg["OUTPUT_DIR"], ref_view, f"{ref_stem}.avi"),
+                    cfg["MP4_OUTPUT"],
+                    logger=logger,
+                )
+            local_files = [p for files, _ in prepared.values() for p in files]
+        else:
+            # 2) local raw video => S3
+            local_raw_video = cfg.get("LOCAL_RAW_VIDEO")
+            if not local_raw_video or not os.path.isfile(local_raw_video):
+                raise FileNotFoundError(
+                    f"Mandatory local raw video file not found: {local_raw_video}"
+                )
+            # 2-8) upload, normalise, trim, inference and conversion
+            local_files = process_single_view(
+                local_raw_video,
+                raw_bucket,
+                args.raw_key or cfg["RAW_KEY"],
+                model_path,
+                meet_id=meet_name,
+                record_id=record_id,
+                lift=lift,
+            )
 
-        # 4) download raw from S3 => local
-        local_raw_path = os.path.join(cfg["TEMP_DIR"], os.path.basename(raw_key))
-        logger.info(f"Downloading from s3://{raw_bucket}/{raw_key} => {local_raw_path}")
-        download_file_from_s3(raw_bucket, raw_key, local_raw_path, logger=logger)
-
-        # 5) normalise video => H.264 MP4
-        normalized_mp4 = normalize_video(
-            local_raw_path, cfg["OUTPUT_DIR"], logger=logger
-        )
-
-        # 6) upload the normalised .mp4 => S3
-        upload_file_to_s3(
-            normalized_mp4,
-            cfg["NORMALIZED_BUCKET"],
-            cfg["NORMALIZED_KEY"],
-            logger=logger,
-        )
-
-        # 7) YOLO inference => ephemeral .avi
-        run_yolo_inference(
-            normalized_mp4,
-            model_path,
-            meet_id=meet_name,
-            record_id=record_id,
-        )
-
-        # 8) convert .avi => final .mp4
-        convert_avi_to_mp4(cfg["AVI_OUTPUT"], cfg["MP4_OUTPUT"], logger=logger)
-
-        # 9) upload final .mp4 => processed bucket
-        upload_file_to_s3(
-            cfg["MP4_OUTPUT"],
-            cfg["PROCESSED_BUCKET"],
-            cfg["PROCESSED_KEY"],
-            logger=logger,
-        )
+        # 9) upload final .mp4 (and the HLS ladder) => processed bucket
+        publish_processed()
 
         # 10) read the decision from DynamoDB
-        item = get_item(
-            meet_name,
-            record_id,
-        )
+        with span("pipeline.read_decision"):
+            item = get_item(
+                meet_name,
+                record_id,
+            )
         if item and "InferenceResult" in item:
             logger.info(f"InferenceResult => {item['InferenceResult']}")
         else:
@@ -216,19 +531,25 @@ def local_pipeline():
         if item:
             meet_name = item["MeetID"]
             lifter_name = item["LifterName"]
-            generate_explanation_via_bedrock(meet_name, record_id)
+            with span("pipeline.explanation"):
+                generate_explanation_via_bedrock(meet_name, record_id)
         else:
             logger.warning("No item => skipping explanation generation step.")
 
+        # the web server runs until stopped, so the trace ends here
+        if trace_run_dir:
+            write_pipeline_trace(trace_run_dir)
+
         # 12) launch Gunicorn
         logger.info(f"Launching Gunicorn on port={flask_port}...")
         launch_gunicorn(flask_port, logger=logger)
 
         # 13) remove local files
         logger.info("Cleaning up local artifacts...")
-        os.remove(local_raw_path)
-        os.remove(normalized_mp4)
+        for path in local_files:
+            os.remove(path)
         os.remove(cfg["MP4_OUTPUT"])
+        shutil.rmtree(cfg["HLS_OUTPUT_DIR"], ignore_errors=True)
         if os.path.exists(cfg["TEMP_MP4_FILE"]):
             os.remove(cfg["TEMP_MP4_FILE"])
 
@@ -246,6 +567,7 @@ def main():
     """
     Main function to run the RefVision pipeline.
     """
+    setup_logging(os.path.join(os.path.dirname(__file__), "../logs/pipeline.log"))
     print("Starting pipeline")
     local_pipeline()
     print("Pipeline complete!")
@@ -1,35 +1,129 @@
 # refvision/utils/logging_setup.py
 """
 module for centralized logging setup.
+The root logger gets a single QueueHandler; the console and file handlers sit
+behind a QueueListener thread, so a log call on the inference thread only
+enqueues the record and never waits on file or terminal I/O. setup_logging
+is idempotent: calling it again only adds log files it has not seen yet.
 """
-import os
+import atexit
 import logging
-from typing import Optional
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+from refvision.common.config import get_config
+
+cfg = get_config()
+
+DEFAULT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+_lock = threading.Lock()
+_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+_queue_handler: Optional[QueueHandler] = None
+_listener: Optional[QueueListener] = None
+_handlers: Dict[str, logging.Handler] = {}
+
+
+def _parse_levels(spec: str) -> Dict[str, str]:
+    """
+    Parses "module=LEVEL,module=LEVEL" into a mapping.
+    :param spec: (str) The level spec, e.g. "refvision.analysis=DEBUG".
+    :returns: (Dict[str, str]) Logger name => level name.
+    """
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
 
 
-def setup_logging(log_file: Optional[str] = None):
+def apply_levels(
+    level: Optional[str] = None, module_levels: Optional[Dict[str, str]] = None
+) -> None:
+    """
+    Sets the root and per-module log levels. Later sources win: the LOGGING
+    config section, then REFVISION_LOG_LEVEL / REFVISION_LOG_LEVELS, then the
+    arguments.
+    :param level: (Optional[str]) Root level, e.g. "INFO".
+    :param module_levels: (Optional[Dict[str, str]]) Logger name => level.
+    """
+    settings = cfg["LOGGING"] or {}
+    root_level = level or os.getenv("REFVISION_LOG_LEVEL") or settings.get("level")
+    logging.getLogger().setLevel((root_level or "INFO").upper())
+
+    levels = dict(settings.get("module_levels") or {})
+    levels.update(_parse_levels(os.getenv("REFVISION_LOG_LEVELS", "")))
+    levels.update(module_levels or {})
+    for name, module_level in levels.items():
+        logging.getLogger(name).setLevel(str(module_level).upper())
+
+
+def setup_logging(
+    log_file: Optional[str] = None,
+    level: Optional[str] = None,
+    module_levels: Optional[Dict[str, str]] = None,
+) -> logging.Logger:
     """
     configures logging for the application.
     if a log_file is provided, ensures its directory exists before creating a
-    FileHandler.
+    FileHandler; each file is only attached once.
+    :param log_file: (Optional[str]) Log file to add.
+    :param level: (Optional[str]) Root log level.
+    :param module_levels: (Optional[Dict[str, str]]) Logger name => level.
+    :returns: (logging.Logger) The root logger.
     """
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
+    global _queue_handler, _listener
+    with _lock:
+        formatter = logging.Formatter(
+            (cfg["LOGGING"] or {}).get("format", DEFAULT_FORMAT)
+        )
+        handlers = dict(_handlers)
+        if "console" not in handlers:
+            handlers["console"] = logging.StreamHandler()
+        if log_file:
+            log_file = os.path.abspath(log_file)
+            if log_file not in handlers:
+                os.makedirs(os.path.dirname(log_file), exist_ok=True)
+                handlers[log_file] = logging.FileHandler(log_file, mode="w")
 
-    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+        if _listener is None or handlers.keys() != _handlers.keys():
+            for handler in handlers.values():
+                handler.setFormatter(formatter)
+            if _listener is not None:
+                _listener.stop()
+            _handlers.clear()
+            _handlers.update(handlers)
+            _listener = QueueListener(
+                _queue, *handlers.values(), respect_handler_level=True
+            )
+            _listener.start()
 
-    # create and add a console handler.
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+        root = logging.getLogger()
+        if _queue_handler is None:
+            _queue_handler = QueueHandler(_queue)
+        if _queue_handler not in root.handlers:
+            root.addHandler(_queue_handler)
+        apply_levels(level, module_levels)
+    return root
+
+
+def shutdown_logging() -> None:
+    """
+    Flushes queued records, stops the listener thread and detaches the
+    handlers. Runs at interpreter exit; setup_logging can be called again.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+        if _queue_handler is not None:
+            logging.getLogger().removeHandler(_queue_handler)
+        for handler in _handlers.values():
+            handler.close()
+        _handlers.clear()
 
-    # If a log_file is provided, create its directory if needed and add a file handler.
-    if log_file:
-        log_dir = os.path.dirname(log_file)
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-        file_handler = logging.FileHandler(log_file, mode="w")
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
 
-    return logger
+atexit.register(shutdown_logging)
@@ -3,6 +3,7 @@ Module for series utilities.
 """
 
 from typing import Sequence, Optional, List
+import numpy as np
 
 
 def smooth_series(
@@ -31,3 +32,60 @@ def smooth_series(
         ]
         smoothed[i] = sum(local_vals) / len(local_vals) if local_vals else None
     return smoothed
+
+
+def smooth_array(values: np.ndarray, window_size: int = 1) -> np.ndarray:
+    """
+    Vectorised, NaN-aware equivalent of smooth_series for numpy arrays.
+    Missing samples are NaN; they stay NaN in the output and are excluded
+    from the neighbouring averages.
+    :param values: 1-D float array (NaN for missing samples).
+    :param window_size: Size of the moving average window.
+    :return: The smoothed array.
+    """
+    values = np.asarray(values, dtype=float)
+    if window_size < 2 or values.size == 0:
+        return values.copy()
+
+    half_w = window_size // 2
+    valid = ~np.isnan(values)
+    padded_vals = np.pad(np.where(valid, values, 0.0), (half_w + 1, half_w))
+    padded_cnt = np.pad(valid.astype(float), (half_w + 1, half_w))
+    csum_vals = np.cumsum(padded_vals)
+    csum_cnt = np.cumsum(padded_cnt)
+    width = 2 * half_w + 1
+    sums = csum_vals[width:] - csum_vals[:-width]
+    counts = csum_cnt[width:] - csum_cnt[:-width]
+
+    smoothed = np.full(values.shape, np.nan)
+    np.divide(sums, counts, out=smoothed, where=valid & (counts > 0))
+    return smoothed
+
+
+def interpolate_gaps(values: np.ndarray, max_gap: Optional[int] = None) -> np.ndarray:
+    """
+    Fills interior runs of NaN by linear interpolation between the
+    neighbouring valid samples. Leading/trailing NaN are left untouched.
+    :param values: 1-D float array (NaN for missing samples).
+    :param max_gap: Longest run of NaN to fill; longer runs stay NaN.
+    :return: The interpolated array.
+    """
+    values = np.asarray(values, dtype=float)
+    missing = np.isnan(values)
+    valid_idx = np.flatnonzero(~missing)
+    if valid_idx.size < 2 or not missing.any():
+        return values.copy()
+
+    idx = np.arange(values.size)
+    filled = np.interp(idx, valid_idx, values[valid_idx])
+    fillable = missing & (idx > valid_idx[0]) & (idx < valid_idx[-1])
+
+    if max_gap is not None:
+        # length of the NaN run each sample belongs to
+        prev_valid = np.maximum.accumulate(np.where(~missing, idx, -1))
+        next_valid = np.minimum.accumulate(np.where(~missing, idx, values.size)[::-1])[
+            ::-1
+        ]
+        fillable &= (next_valid - prev_valid - 1) <= max_gap
+
+    return np.where(fillable, filled, values)
@@ -1,33 +1,14 @@
 # refvision/utils/timer.py
 """
-timer module
+timer module, kept for backwards compatibility: measure_time is now a span
+from refvision.utils.tracing.
 """
-import time
-import os
-from refvision.utils.logging_setup import setup_logging
-
-logger = setup_logging(
-    os.path.join(os.path.dirname(__file__), "../../logs/timer_logs.log")
-)
+from refvision.utils.tracing import traced
 
 
 def measure_time(func):
     """
     Decorator function to measure execution time.
-    Logs the time taken by the decorated function.
+    Records a tracing span per call; use refvision.utils.tracing.traced.
     """
-
-    def wrapper(*args, **kwargs):
-        """
-        Wrapper function to measure execution time of the decorated function.
-        :param args:
-        :param kwargs:
-        :return:
-        """
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        elapsed_time = time.time() - start_time
-        logger.info(f"Execution Time for {func.__name__}: {elapsed_time:.2f} seconds")
-        return result
-
-    return wrapper
+    return traced()(func)
@@ -0,0 +1,403 @@
+# refvision/utils/tracing.py
+"""
+Lightweight structured tracing. Spans are timed with perf_counter_ns and
+nest through a context variable, so nesting is tracked per thread and per
+asyncio task. When tracing is disabled, span() returns a shared no-op context
+manager and traced() functions call straight through.
+
+Tracing is enabled with enable() or the REFVISION_TRACE environment variable
+("1" for TRACING.output_dir, or a directory), which subprocesses inherit:
+each process writes its spans to <dir>/trace-<pid>.json on exit, and
+merge_traces() combines them into one Chrome trace / Perfetto file.
+"""
+import atexit
+import contextvars
+import functools
+import glob
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+import numpy as np
+from refvision.common.config import get_config
+
+cfg = get_config()
+
+TRACE_ENV = "REFVISION_TRACE"
+
+_enabled = False
+_spans: List[Dict[str, Any]] = []
+_lock = threading.Lock()
+_ids = itertools.count(1)
+_current: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar(
+    "refvision_span", default=None
+)
+_exit_hook_registered = False
+
+
+class _NoopSpan:
+    """
+    Context manager returned by span() while tracing is disabled.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def set(self, **attrs: Any) -> None:
+        return None
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    """
+    One timed, nested span. Attributes can be added while it is open with
+    set(); they are exported as the trace event's args.
+    """
+
+    __slots__ = ("name", "attrs", "span_id", "parent_id", "start_ns", "_token")
+
+    def __init__(self, name: str, attrs: Dict[str, Any]) -> None:
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> "Span":
+        self.span_id = next(_ids)
+        self.parent_id = _current.get()
+        self._token = _current.set(self.span_id)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        end_ns = time.perf_counter_ns()
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        record = {
+            "name": self.name,
+            "id": self.span_id,
+            "parent": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ns": end_ns - self.start_ns,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "thread": threading.current_thread().name,
+            "attrs": self.attrs,
+        }
+        with _lock:
+            _spans.append(record)
+
+
+def trace_dir() -> str:
+    """
+    Directory that per-process trace files are written to.
+    :returns: (str) REFVISION_TRACE if it names a directory, else
+    TRACING.output_dir relative to the project root.
+    """
+    value = os.getenv(TRACE_ENV, "")
+    if value and value not in ("1", "true", "yes"):
+        return value
+    path = (cfg["TRACING"] or {}).get("output_dir", "logs/traces")
+    if os.path.isabs(path):
+        return path
+    root = cfg.get("PROJECT_ROOT") or os.getcwd()
+    return os.path.join(root, path)
+
+
+def enable(output_dir: Optional[str] = None) -> None:
+    """
+    Turns tracing on for this process and any subprocess it starts.
+    :param output_dir: (Optional[str]) Directory for the trace files;
+    defaults to trace_dir().
+    """
+    global _enabled, _exit_hook_registered
+    _enabled = True
+    os.environ[TRACE_ENV] = output_dir or os.getenv(TRACE_ENV) or "1"
+    if not _exit_hook_registered:
+        atexit.register(_write_on_exit)
+        _exit_hook_registered = True
+
+
+def disable() -> None:
+    """
+    Turns tracing off; already collected spans are kept.
+    """
+    global _enabled
+    _enabled = False
+    os.environ.pop(TRACE_ENV, None)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def span(name: str, **attrs: Any) -> Any:
+    """
+    Opens a span, to be used as a context manager.
+    :param name: (str) Span name, e.g. "pipeline.normalize".
+    :param attrs: Attributes recorded with the span.
+    :returns: (Any) The span, or a no-op stand-in if tracing is disabled.
+    """
+    if not _enabled:
+        return _NOOP
+    return Span(name, attrs)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """
+    Decorator that wraps every call of a function (sync or async) in a span.
+    :param name: (Optional[str]) Span name; defaults to module.qualname.
+    :returns: (Callable) The decorator.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        label = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not _enabled:
+                    return await func(*args, **kwargs)
+                with Span(label, {}):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(label, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def traced_iter(iterable: Iterable[Any], name: str) -> Iterator[Any]:
+    """
+    Yields from an iterable with a span around producing each item, e.g. one
+    span per decoded and inferred video frame.
+    :param iterable: (Iterable[Any]) The items.
+    :param name: (str) Span name; the item index is recorded as "index".
+    :returns: (Iterator[Any]) The same items.
+    """
+    if not _enabled:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    for index in itertools.count():
+        with Span(name, {"index": index}):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def collected_spans() -> List[Dict[str, Any]]:
+    """
+    Finished spans of this process, in the order they closed.
+    :returns: (List[Dict[str, Any]]) Span records.
+    """
+    with _lock:
+        return list(_spans)
+
+
+def clear() -> None:
+    """
+    Drops the collected spans.
+    """
+    with _lock:
+        _spans.clear()
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def chrome_trace(spans: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Converts spans to the Chrome trace event format, which Perfetto and
+    chrome://tracing open directly. perf_counter_ns reads the monotonic
+    clock, so spans from several processes on one host line up.
+    :param spans: (Optional[List[Dict[str, Any]]]) Span records; defaults to
+    this process's spans.
+    :returns: (Dict[str, Any]) The trace document.
+    """
+    spans = collected_spans() if spans is None else spans
+    events: List[Dict[str, Any]] = []
+    threads = {}
+    for s in spans:
+        threads[(s["pid"], s["tid"])] = s["thread"]
+        args = {k: _jsonable(v) for k, v in s["attrs"].items()}
+        args.update(span_id=s["id"], parent_id=s["parent"])
+        events.append(
+            {
+                "name": s["name"],
+                "cat": s["name"].split(".", 1)[0],
+                "ph": "X",
+                "ts": s["start_ns"] / 1e3,
+                "dur": s["duration_ns"] / 1e3,
+                "pid": s["pid"],
+                "tid": s["tid"],
+                "args": args,
+            }
+        )
+    for (pid, tid), thread in threads.items():
+        events.append(
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": thread},
+            }
+        )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def spans_from_trace(trace: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Reads span records back from a Chrome trace written by chrome_trace.
+    :param trace: (Dict[str, Any]) The trace document.
+    :returns: (List[Dict[str, Any]]) Span records.
+    """
+    threads = {
+        (e["pid"], e["tid"]): e["args"]["name"]
+        for e in trace["traceEvents"]
+        if e.get("ph") == "M" and e.get("name") == "thread_name"
+    }
+    spans = []
+    for e in trace["traceEvents"]:
+        if e.get("ph") != "X":
+            continue
+        args = dict(e.get("args", {}))
+        spans.append(
+            {
+                "name": e["name"],
+                "id": args.pop("span_id", None),
+                "parent": args.pop("parent_id", None),
+                "start_ns": int(round(e["ts"] * 1e3)),
+                "duration_ns": int(round(e["dur"] * 1e3)),
+                "pid": e["pid"],
+                "tid": e["tid"],
+                "thread": threads.get((e["pid"], e["tid"]), ""),
+                "attrs": args,
+            }
+        )
+    return spans
+
+
+def write_trace(path: Optional[str] = None) -> str:
+    """
+    Writes this process's spans as a Chrome trace.
+    :param path: (Optional[str]) Output file; defaults to
+    <trace_dir>/trace-<pid>.json.
+    :returns: (str) The path written.
+    """
+    path = path or os.path.join(trace_dir(), f"trace-{os.getpid()}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(chrome_trace(), f)
+    return path
+
+
+def _write_on_exit() -> None:
+    if _enabled and _spans:
+        write_trace()
+
+
+def merge_traces(directory: str, output: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Merges the per-process trace files in a directory into one trace.
+    :param directory: (str) Directory holding trace-<pid>.json files.
+    :param output: (Optional[str]) File to write the merged trace to.
+    :returns: (Dict[str, Any]) The merged trace document.
+    """
+    events: List[Dict[str, Any]] = []
+    for path in sorted(glob.glob(os.path.join(directory, "trace-*.json"))):
+        with open(path) as f:
+            events.extend(json.load(f)["traceEvents"])
+    merged = {"traceEvents": events, "displayTimeUnit": "ms"}
+    if output:
+        with open(output, "w") as f:
+            json.dump(merged, f)
+    return merged
+
+
+def summarise(spans: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    Per-stage summary: call count, total, self (total minus child spans),
+    mean and max time per span name, sorted by total time.
+    :param spans: (Optional[List[Dict[str, Any]]]) Span records; defaults to
+    this process's spans.
+    :returns: (List[Dict[str, Any]]) One row per span name, times in ms.
+    """
+    spans = collected_spans() if spans is None else spans
+    child_ns: Dict[Any, int] = {}
+    for s in spans:
+        if s["parent"] is not None:
+            key = (s["pid"], s["parent"])
+            child_ns[key] = child_ns.get(key, 0) + s["duration_ns"]
+
+    rows: Dict[str, Dict[str, Any]] = {}
+    for s in spans:
+        row = rows.setdefault(
+            s["name"],
+            {
+                "name": s["name"],
+                "count": 0,
+                "total_ms": 0.0,
+                "self_ms": 0.0,
+                "max_ms": 0.0,
+            },
+        )
+        ms = s["duration_ns"] / 1e6
+        row["count"] += 1
+        row["total_ms"] += ms
+        row["self_ms"] += ms - child_ns.get((s["pid"], s["id"]), 0) / 1e6
+        row["max_ms"] = max(row["max_ms"], ms)
+    for row in rows.values():
+        row["mean_ms"] = row["total_ms"] / row["count"]
+    return sorted(rows.values(), key=lambda r: r["total_ms"], reverse=True)
+
+
+def format_summary(rows: List[Dict[str, Any]]) -> str:
+    """
+    Formats a span summary as a fixed-width table.
+    :param rows: (List[Dict[str, Any]]) Output of summarise.
+    :returns: (str) The table.
+    """
+    lines = [
+        f"{'span':<44}{'count':>7}{'total ms':>12}{'self ms':>12}"
+        f"{'mean ms':>11}{'max ms':>11}"
+    ]
+    for r in rows:
+        lines.append(
+            f"{r['name']:<44}{r['count']:>7}{r['total_ms']:>12.2f}"
+            f"{r['self_ms']:>12.2f}{r['mean_ms']:>11.3f}{r['max_ms']:>11.3f}"
+        )
+    return "\n".join(lines)
+
+
+if os.getenv(TRACE_ENV, "").lower() not in ("", "0", "false", "no"):
+    enable()
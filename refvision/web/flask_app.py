@@ -5,16 +5,21 @@ This Flask application serves as a simple interface to authenticate users and
 stream a pre-signed video file from AWS S3. It provides:
 1. Simple username/password authentication (for proof-of-concept only).
 2. A pre-signed URL generation to securely stream videos from S3.
-3. Routes for login, logout, and video display.
+3. Routes for login, logout, and video display, with adaptive HLS playback
+   when the processed bucket holds an HLS ladder for the video.
 This application serves as both the user-facing interface (login, video replay)
 and the inference API (for cloud deployments).
 It uses the FLASK_PORT from config/config.py.
 """
 import os
+import posixpath
 import sys
+from functools import lru_cache
 import boto3
 from flask import (
     Flask,
+    Response,
+    abort,
     render_template,
     request,
     redirect,
@@ -26,6 +31,12 @@ from flask import (
 from dotenv import load_dotenv
 from refvision.common.config import get_config
 from refvision.inference.model_loader import load_model
+from refvision.postprocess.hls import (
+    CONTENT_TYPES,
+    MASTER_PLAYLIST,
+    playlist_key,
+    rewrite_playlist,
+)
 from refvision.utils.logging_setup import setup_logging
 from refvision.dynamo_db.dynamodb_helpers import get_item
 
@@ -43,6 +54,21 @@ app = Flask(__name__, template_folder=TEMPLATE_DIR)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "my-super-secret-flask-key")
 
 
+@lru_cache(maxsize=1)
+def s3_client():
+    """
+    S3 client for the processed bucket, shared by requests (boto3 clients
+    are thread-safe) so signing every segment of a playlist stays cheap.
+    :return: boto3 S3 client
+    """
+    return boto3.client(
+        "s3",
+        aws_access_key_id=cfg["AWS_ACCESS_KEY_ID"],
+        aws_secret_access_key=cfg["AWS_SECRET_ACCESS_KEY"],
+        region_name=cfg["AWS_REGION"],
+    )
+
+
 def create_s3_presigned_url(
     bucket_name: str, object_name: str, expiration: int = 3600
 ) -> str:
@@ -53,14 +79,8 @@ def create_s3_presigned_url(
     :param expiration:
     :return:
     """
-    s3_client = boto3.client(
-        "s3",
-        aws_access_key_id=cfg["AWS_ACCESS_KEY_ID"],
-        aws_secret_access_key=cfg["AWS_SECRET_ACCESS_KEY"],
-        region_name=cfg["AWS_REGION"],
-    )
     try:
-        response = s3_client.generate_presigned_url(
+        response = s3_client().generate_presigned_url(
             "get_object",
             Params={"Bucket": bucket_name, "Key": object_name},
             ExpiresIn=expiration,
@@ -71,6 +91,46 @@ def create_s3_presigned_url(
         return ""
 
 
+def hls_url() -> str:
+    """
+    URL of the master playlist if the video has been packaged as HLS.
+    :return: The playlist URL, or "" to fall back to the .mp4
+    """
+    prefix = cfg.get("PROCESSED_HLS_PREFIX")
+    if not prefix or not (cfg["HLS"] or {}).get("enabled", False):
+        return ""
+    try:
+        s3_client().head_object(
+            Bucket=cfg["PROCESSED_BUCKET"], Key=playlist_key(prefix, MASTER_PLAYLIST)
+        )
+    except Exception as e:
+        logger.info(f"No HLS output for this video ({e}); serving the .mp4")
+        return ""
+    return url_for("hls_playlist", name=MASTER_PLAYLIST)
+
+
+def evidence_urls(item: dict) -> dict:
+    """
+    Presigned URLs of an item's decision evidence images.
+    :param item: DynamoDB item
+    :return: dict with turnaround_url, sprite_url and the sprite layout, or
+    {} if the item has no evidence
+    """
+    evidence = (item or {}).get("Evidence")
+    if not evidence:
+        return {}
+    return {
+        "turnaround_url": create_s3_presigned_url(
+            evidence["bucket"], evidence["turnaround_key"]
+        ),
+        "sprite_url": create_s3_presigned_url(
+            evidence["bucket"], evidence["sprite_key"]
+        ),
+        "frame": evidence.get("frame"),
+        "sprite_frames": evidence.get("sprite_frames", []),
+    }
+
+
 def is_authenticated() -> bool:
     """
     Simple check for authentication
@@ -163,11 +223,57 @@ def show_video():
     return render_template(
         "video.html",
         presigned_url=presigned_url,
+        hls_url=hls_url(),
+        evidence=evidence_urls(item),
         decision=short_decision,
         explanation_text=explanation_text,  # pass the explanation
     )
 
 
+@app.route("/hls/<path:name>")
+def hls_playlist(name: str):
+    """
+    Serve an HLS playlist from the processed bucket. Segment URIs are
+    rewritten to presigned URLs and rendition playlists back to this route,
+    since relative URIs cannot be resolved against a presigned URL.
+    :param name: (str) Playlist path relative to the HLS prefix.
+    :return: The rewritten playlist
+    """
+    if not is_authenticated():
+        abort(403)
+    prefix = cfg.get("PROCESSED_HLS_PREFIX")
+    if not prefix or not name.endswith(".m3u8"):
+        abort(404)
+    try:
+        key = playlist_key(prefix, name)
+    except ValueError:
+        abort(404)
+
+    bucket = cfg["PROCESSED_BUCKET"]
+    try:
+        obj = s3_client().get_object(Bucket=bucket, Key=key)
+    except Exception as e:
+        logger.info(f"HLS playlist s3://{bucket}/{key} unavailable: {e}")
+        abort(404)
+    text = obj["Body"].read().decode("utf-8")
+
+    base = posixpath.dirname(name)
+
+    def resolve(uri: str) -> str:
+        if "://" in uri:
+            return uri
+        rel = posixpath.join(base, uri)
+        if uri.endswith(".m3u8"):
+            return url_for("hls_playlist", name=posixpath.normpath(rel))
+        return create_s3_presigned_url(bucket, playlist_key(prefix, rel))
+
+    return Response(
+        rewrite_playlist(text, resolve),
+        mimetype=CONTENT_TYPES[".m3u8"],
+        headers={"Cache-Control": "private, no-store"},
+    )
+
+
 @app.route("/decision")
 def show_decision():
     """
@@ -191,7 +297,9 @@ def show_decision():
         decision_data = item.get("InferenceResult", {})
         logger.info(f"Decision data loaded from DynamoDB => {decision_data}")
 
-    return render_template("decision.html", decision_data=decision_data)
+    return render_template(
+        "decision.html", decision_data=decision_data, evidence=evidence_urls(item)
+    )
 
 
 # ----- Inference Endpoints (for Cloud Use) -----
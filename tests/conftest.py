@@ -6,6 +6,7 @@ import pytest
 import os
 from dotenv import load_dotenv
 import boto3
+from refvision.benchmarks.stand_ins import LocalS3
 
 # load environment variables from .env file
 load_dotenv()
@@ -65,3 +66,12 @@ def lambda_client():
     :return:
     """
     return boto3.client("lambda", region_name=os.getenv("AWS_DEFAULT_REGION"))
+
+
+@pytest.fixture(scope="function")
+def local_s3():
+    """
+    Returns an in-memory S3 stand-in, see LocalS3
+    :return:
+    """
+    return LocalS3()
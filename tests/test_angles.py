@@ -0,0 +1,52 @@
+# tests/test_angles.py
+"""
+Tests for the joint angle module and the analysis context cache.
+"""
+import numpy as np
+from refvision.analysis.angles import compute_joint_angles, joint_angle
+from refvision.analysis.context import AnalysisContext
+
+
+def test_joint_angle_right_angle() -> None:
+    """
+    Perpendicular segments give 90 degrees, collinear ones 180.
+    """
+    a = np.array([[0.0, 1.0], [0.0, 1.0]])
+    b = np.array([[0.0, 0.0], [0.0, 0.0]])
+    c = np.array([[1.0, 0.0], [0.0, -1.0]])
+    np.testing.assert_allclose(joint_angle(a, b, c), [90.0, 180.0])
+
+
+def test_compute_joint_angles_all_frames() -> None:
+    """
+    Angles are computed for every frame, and a straight leg is 180 degrees.
+    """
+    xy = np.zeros((3, 17, 2))
+    xy[:, 11] = [100.0, 100.0]  # hip
+    xy[:, 13] = [100.0, 200.0]  # knee
+    xy[:, 15] = [100.0, 300.0]  # ankle
+    angles = compute_joint_angles(xy)
+    assert angles["left_knee"].shape == (3,)
+    np.testing.assert_allclose(angles["left_knee"], 180.0)
+    np.testing.assert_allclose(angles["left_ankle"], 0.0)
+
+
+def test_low_confidence_keypoints_are_masked() -> None:
+    """
+    An angle that uses a low-confidence keypoint is NaN.
+    """
+    xy = np.random.default_rng(0).uniform(0, 100, (4, 17, 2))
+    conf = np.ones((4, 17))
+    conf[2, 13] = 0.1  # left knee occluded in frame 2
+    angles = compute_joint_angles(xy, conf, min_conf=0.5)
+    assert np.isnan(angles["left_knee"][2])
+    assert not np.isnan(angles["left_knee"][1])
+    assert not np.isnan(angles["right_knee"][2])
+
+
+def test_context_caches_angles() -> None:
+    """
+    The analysis context computes the angles once and reuses them.
+    """
+    context = AnalysisContext(np.ones((2, 17, 2)))
+    assert context.angles is context.angles
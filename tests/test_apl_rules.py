@@ -0,0 +1,104 @@
+# tests/test_apl_rules.py
+"""
+Tests for the APL rule classes, per-attempt and batch.
+"""
+import numpy as np
+import pytest
+from refvision.apl_rules import BenchPress, Deadlift, Squat
+
+GOOD_SQUAT = {
+    "bar_position": 2,
+    "knees_locked": True,
+    "descent_below_parallel": True,
+    "double_bounce": False,
+    "downward_movement_during_ascent": False,
+    "knees_locked_at_finish": True,
+    "waited_for_rack_command": True,
+    "spotter_contact": False,
+    "elbows_touch_legs": False,
+}
+
+
+def test_squat_good_lift() -> None:
+    """
+    A compliant squat state passes.
+    """
+    result = Squat().evaluate(GOOD_SQUAT)
+    assert result.is_successful
+    assert str(result) == "Lift Successful"
+
+
+def test_squat_failure_reasons_in_rule_order() -> None:
+    """
+    Failure reasons are reported in rule order.
+    """
+    state = dict(GOOD_SQUAT, descent_below_parallel=False, double_bounce=True)
+    result = Squat().evaluate(state)
+    assert not result.is_successful
+    assert result.reasons == [
+        "Top of legs at hip joint not below top of knees.",
+        "Double bounce during ascent.",
+    ]
+
+
+def test_missing_keys_use_defaults() -> None:
+    """
+    Missing features fall back to each rule's default, as dict.get did.
+    """
+    assert Deadlift().evaluate({}).is_successful
+    bench = BenchPress().evaluate({})
+    assert bench.reasons == ["Grip width exceeds 81cm."]
+
+
+@pytest.mark.parametrize("evaluator", [Squat(), BenchPress(), Deadlift()])
+def test_batch_matches_per_attempt(evaluator) -> None:
+    """
+    evaluate_batch returns the same decisions as evaluating each dict.
+    """
+    rng = np.random.default_rng(0)
+    n = 200
+    names = {
+        "bar_position",
+        "grip_width",
+        *GOOD_SQUAT,
+        "shoulders_on_bench",
+        "buttocks_on_bench",
+        "thumbs_not_wrapped",
+        "lockout_complete",
+        "shoulders_back",
+        "released_bar",
+    }
+    columns = {
+        name: (
+            rng.uniform(0, 100, n)
+            if name in ("bar_position", "grip_width")
+            else rng.random(n) < 0.5
+        )
+        for name in names
+    }
+    batch = evaluator.evaluate_batch(columns)
+    assert len(batch) == n
+    for i in range(n):
+        state = {name: col[i] for name, col in columns.items()}
+        single = evaluator.evaluate(state)
+        assert batch.reasons(i) == single.reasons
+        assert bool(batch.is_successful[i]) == single.is_successful
+
+
+def test_batch_failed_mask() -> None:
+    """
+    failed() exposes a per-rule mask over the batch.
+    """
+    columns = {name: [value, value] for name, value in GOOD_SQUAT.items()}
+    columns["spotter_contact"] = [False, True]
+    batch = Squat().evaluate_batch(columns)
+    assert list(batch.failed("no_spotter_contact")) == [False, True]
+    assert list(batch.is_successful) == [True, False]
+
+
+def test_batch_rejects_ragged_columns() -> None:
+    """
+    Columns of different lengths are rejected.
+    """
+    with pytest.raises(ValueError):
+        Squat().evaluate_batch({"knees_locked": [True], "double_bounce": []})
@@ -0,0 +1,114 @@
+# tests/test_benchmark_compare.py
+"""
+Tests for the benchmark results store and regression comparison.
+"""
+
+import numpy as np
+import pytest
+from refvision.benchmarks.compare import (
+    compare_runs,
+    format_comparison,
+    slowdown_p_value,
+)
+from refvision.benchmarks.results_store import (
+    host_fingerprint,
+    host_info,
+    list_results,
+    load_results,
+    save_results,
+)
+
+
+def run(records):
+    return {"commit": "x", "records": records}
+
+
+def record(name, samples):
+    return {"name": name, "unit": "ns/frame", "samples": list(samples)}
+
+
+def noisy(center, n=10, seed=0):
+    return center * (1 + 0.01 * np.random.default_rng(seed).standard_normal(n))
+
+
+def test_slowdown_p_value() -> None:
+    assert slowdown_p_value(noisy(100), noisy(120, seed=1)) < 0.01
+    assert slowdown_p_value(noisy(100), noisy(100, seed=1)) > 0.05
+    assert slowdown_p_value([100.0], [200.0]) == 1.0
+
+
+def test_slowdown_p_value_resolves_small_samples() -> None:
+    """
+    Five clean samples a side are enough: the exact test's smallest p-value
+    is 1 / C(10, 5).
+    """
+    p = slowdown_p_value(noisy(100, n=5), noisy(110, n=5, seed=1))
+    assert p == pytest.approx(1 / 252)
+    assert slowdown_p_value(noisy(110, n=5), noisy(100, n=5, seed=1)) == 1.0
+    # ties share their rank
+    assert slowdown_p_value([1.0] * 5, [1.0] * 5) == 1.0
+
+
+def test_compare_runs_statuses() -> None:
+    baseline = run(
+        [
+            record("slower", noisy(100)),
+            record("faster", noisy(100)),
+            record("same", noisy(100)),
+            record("noisy", [100, 140, 90, 200, 120]),
+            record("few", [100, 100]),
+            record("dropped", noisy(100)),
+        ]
+    )
+    current = run(
+        [
+            record("slower", noisy(130, seed=1)),
+            record("faster", noisy(70, seed=1)),
+            record("same", noisy(102, seed=1)),
+            record("noisy", [130, 95, 210, 100, 160]),
+            record("few", [200, 200]),
+            record("added", noisy(100)),
+        ]
+    )
+    rows = {r["name"]: r for r in compare_runs(baseline, current, 0.05, 0.05)}
+    assert rows["slower"]["status"] == "regression"
+    assert rows["slower"]["change"] == pytest.approx(0.3, abs=0.02)
+    assert rows["faster"]["status"] == "improvement"
+    assert rows["same"]["status"] == "ok"
+    assert rows["noisy"]["status"] == "slower (n.s.)"
+    assert rows["few"]["status"] == "too few samples"
+    assert rows["few"]["p_value"] is None and rows["few"]["samples"] == [2, 2]
+    assert rows["dropped"]["status"] == "missing"
+    assert rows["added"]["status"] == "new"
+
+    table = format_comparison(list(rows.values())).splitlines()
+    assert table[1].startswith("slower") and table[2].startswith("few")
+
+
+def test_tolerance_hides_small_slowdowns() -> None:
+    rows = compare_runs(
+        run([record("a", noisy(100))]), run([record("a", noisy(104, seed=1))]), 0.05
+    )
+    assert rows[0]["status"] == "ok"
+
+
+def test_store_round_trip(tmp_path) -> None:
+    records = [record("a", [1.0, 2.0])]
+    path = save_results(records, "analysis", commit="abc123", root=str(tmp_path))
+    assert host_fingerprint() in path
+    save_results(records, "analysis", commit="def456", root=str(tmp_path))
+
+    assert load_results("abc", "analysis", root=str(tmp_path))["records"] == records
+    assert load_results(path, "analysis")["commit"] == "abc123"
+    assert [r["commit"] for r in list_results("analysis", root=str(tmp_path))] == [
+        "abc123",
+        "def456",
+    ]
+    with pytest.raises(FileNotFoundError):
+        load_results("fff", "analysis", root=str(tmp_path))
+
+
+def test_fingerprint_ignores_library_versions() -> None:
+    info = host_info()
+    assert host_fingerprint(info) == host_fingerprint({**info, "numpy": "0.0"})
+    assert host_fingerprint(info) != host_fingerprint({**info, "cpu_count": 1024})
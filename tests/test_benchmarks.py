@@ -0,0 +1,134 @@
+# tests/test_benchmarks.py
+"""
+Smoke tests for the synthetic data and benchmark suites.
+"""
+
+import os
+import shutil
+import numpy as np
+import pytest
+from refvision.analysis.keypoint_track import extract_keypoint_track
+from refvision.analysis.lifter_selector import select_lifter_index
+from refvision.benchmarks.bench_analysis import format_table, run_suite
+from refvision.benchmarks.synthetic import synthetic_results, synthetic_track
+
+
+def test_synthetic_results_select_the_lifter() -> None:
+    """
+    The lifter selector picks the synthetic lifter over the bystanders, and
+    the extracted track matches the generated one.
+    """
+    xy, conf = synthetic_track("squat", 50)
+    results = synthetic_results(xy, conf, detections=4)
+    for frame in results:
+        assert select_lifter_index(frame.boxes, 640, 640) == 0
+    track_xy, track_conf = extract_keypoint_track(results)
+    np.testing.assert_allclose(track_xy[:, 11:17], xy[:, 11:17])
+
+
+def test_synthetic_results_missed_frames() -> None:
+    xy, conf = synthetic_track("squat", 200)
+    results = synthetic_results(xy, conf, missed=0.25)
+    missing = sum(not frame.boxes for frame in results)
+    assert 20 < missing < 80
+
+
+def test_run_suite_records() -> None:
+    records = run_suite([60], [1, 2], [0.0], repeats=1)
+    names = {r["benchmark"] for r in records}
+    assert "find_turnaround_frame" in names
+    assert "select_lifter_index" in names
+    assert len(records) == 2 * len(names)
+    assert all(r["ns_per_frame"] > 0 and r["peak_kib"] >= 0 for r in records)
+    assert "ns/frame" in format_table(records)
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+def test_pipeline_benchmark_with_stub_model(tmp_path) -> None:
+    """
+    The end-to-end benchmark runs the real pipeline offline, times it by
+    its spans and restores the real clients and config.
+    """
+    pytest.importorskip("torch")
+    pytest.importorskip("ultralytics")
+    from refvision.benchmarks.bench_pipeline import format_report, run_benchmark
+    from refvision.dynamo_db import dynamodb_helpers
+    from refvision.inference import local_inference
+    from refvision.scripts import run_pipeline
+
+    table, load_model = dynamodb_helpers.table, local_inference.load_model
+    output_dir = run_pipeline.cfg["OUTPUT_DIR"]
+    report = run_benchmark(60, work_dir=str(tmp_path))
+    assert dynamodb_helpers.table is table
+    assert local_inference.load_model is load_model
+    assert run_pipeline.cfg["OUTPUT_DIR"] == output_dir
+
+    stages = {s["stage"]: s for s in report["stages"]}
+    assert {"inference", "convert", "upload_processed"} <= set(stages)
+    assert stages["inference"]["fps"] > 0
+    spans = {row["name"] for row in report["spans"]}
+    assert {"inference.overlay", "inference.evidence"} <= spans
+    assert report["decision"] == "Good Lift!"
+    assert report["peak_rss_mib"]["self"] > 0
+    assert "inference" in format_report(report)
+
+
+def test_generated_squat_ground_truth() -> None:
+    """
+    The true depth margin follows the requested depth and, being a height,
+    does not depend on the camera angle.
+    """
+    from refvision.benchmarks.video_generator import generate_squat, make_spec
+
+    deep = generate_squat(make_spec(depth=0.2, width=320, height=180))
+    high = generate_squat(make_spec(depth=-0.2, width=320, height=180))
+    turned = generate_squat(make_spec(depth=0.2, camera_angle=60, distractors=2))
+    assert deep["ground_truth"]["expected_decision"] == "Good Lift!"
+    assert high["ground_truth"]["expected_decision"] == "No Lift"
+    assert turned["distractors"].shape == (2,) + turned["xy"].shape
+    assert turned["ground_truth"]["depth_margin"]["raw_px"] == pytest.approx(
+        deep["ground_truth"]["depth_margin"]["raw_px"] * 720 / 180
+    )
+    bottom = deep["ground_truth"]["turnaround_frame"]
+    assert np.argmax(deep["xy"][:, 11, 1]) == bottom
+
+
+def test_corpus_benchmark_scores_decisions(tmp_path) -> None:
+    """
+    A small generated corpus round-trips through the manifest, and the stub
+    model's decisions match the ground truth.
+    """
+    from refvision.benchmarks.bench_corpus import (
+        corpus_records,
+        run_corpus,
+        summarise,
+    )
+    from refvision.benchmarks.video_generator import (
+        generate_corpus,
+        load_manifest,
+        spec_grid,
+    )
+
+    specs = spec_grid(
+        depth=[-0.2, 0.2],
+        distractors=[1],
+        width=[320],
+        height=[180],
+        hold_s=[0.3],
+        descent_s=[0.6],
+        ascent_s=[0.6],
+    )
+    generate_corpus(str(tmp_path), specs)
+    entries = load_manifest(str(tmp_path))
+    assert all(os.path.exists(e["video"]) for e in entries)
+
+    reports = run_corpus(entries, noise_px=0.5)
+    summary = summarise(reports)
+    assert summary["accuracy"] == 1.0
+    assert summary["turnaround_mae_frames"] <= 2
+    assert reports[0]["frames"] == entries[0]["ground_truth"]["num_frames"]
+    assert {r["name"] for r in corpus_records(reports, "stub")} == {
+        "corpus.decode[model=stub]",
+        "corpus.infer[model=stub]",
+        "corpus.encode[model=stub]",
+    }
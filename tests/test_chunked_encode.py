@@ -0,0 +1,179 @@
+# tests/test_chunked_encode.py
+"""
+Tests for GOP-parallel chunked encoding. ffmpeg is not run: the split and
+concat commands and the chunk encodes are recorded instead.
+"""
+
+import os
+from concurrent.futures import Future
+from typing import Any, Dict, List
+import pytest
+from refvision.postprocess import chunked_encode, convert
+
+
+class _Job:
+    def __init__(self, error=None):
+        self.future: Future = Future()
+        self.cancelled = False
+        if error is None:
+            self.future.set_result(self)
+        else:
+            self.future.set_exception(error)
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+    def cancel(self):
+        self.cancelled = True
+        return False
+
+
+class _Scheduler:
+    """
+    Stands in for the process-wide ffmpeg scheduler; records the jobs.
+    """
+
+    def __init__(self, max_concurrent=8, fail=None):
+        self.max_concurrent = max_concurrent
+        self.fail = fail
+        self.jobs: List[_Job] = []
+        self.submitted: List[Dict[str, Any]] = []
+
+    def submit(self, cmd, **kwargs):
+        self.submitted.append({"cmd": cmd, **kwargs})
+        name = kwargs.get("name")
+        self.jobs.append(_Job(RuntimeError(name) if name == self.fail else None))
+        return self.jobs[-1]
+
+
+@pytest.fixture(autouse=True)
+def _chunk_settings(monkeypatch):
+    monkeypatch.setitem(
+        chunked_encode.cfg,
+        "CHUNKED_ENCODE",
+        {"enabled": True, "workers": 4, "threads_per_chunk": 2, "min_chunk_s": 2.0},
+    )
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    scheduler = _Scheduler()
+    monkeypatch.setattr(chunked_encode, "get_scheduler", lambda: scheduler)
+    return scheduler
+
+
+def _index(seconds=12.0, fps=25, gop=12):
+    n = int(seconds * fps)
+    return {
+        "frames": n,
+        "pts": [i / fps for i in range(n)],
+        "keyframes": list(range(0, n, gop)),
+    }
+
+
+def test_split_points() -> None:
+    keyframes = [i * 0.48 for i in range(25)]
+    splits = chunked_encode.split_points(keyframes, 12.0, 3, 2.0)
+    assert splits == pytest.approx([3.84, 8.16])
+    assert len(chunked_encode.split_points(keyframes, 12.0, 4, 2.0)) == 3
+    assert chunked_encode.split_points([], 12.0, 4, 2.0) == []
+    # short videos are not split
+    assert chunked_encode.split_points(keyframes[:6], 3.0, 4, 2.0) == []
+    assert chunked_encode.split_points([0.0, 1.0, 2.0, 3.0], 4.0, 2, 1.0) == [2.0]
+
+
+def test_worker_count(monkeypatch, scheduler) -> None:
+    monkeypatch.setattr(chunked_encode.os, "cpu_count", lambda: 8)
+    assert chunked_encode.worker_count(2, 0) == 4
+    assert chunked_encode.worker_count(16, 0) == 1
+    assert chunked_encode.worker_count(2, 3) == 3
+    assert chunked_encode.worker_count(2) == 4
+    # never more than the shared scheduler runs at once
+    scheduler.max_concurrent = 2
+    assert chunked_encode.worker_count(2, 0) == 2
+    assert chunked_encode.worker_count(2, 6) == 2
+
+
+def test_split_and_concat_commands() -> None:
+    cmd = chunked_encode.split_command("in.avi", [3.36, 6.72], "d/src_%03d.mkv")
+    assert cmd[cmd.index("-segment_times") + 1] == "3.359,6.719"
+    assert cmd[cmd.index("-c") + 1] == "copy"
+    assert cmd[-1] == "d/src_%03d.mkv"
+    cmd = chunked_encode.concat_command("list.txt", "out.mp4", True)
+    assert cmd[cmd.index("-f") + 1] == "concat"
+    assert cmd[-3:] == ["-movflags", "+faststart", "out.mp4"]
+
+
+def test_chunk_plan_without_ffprobe(monkeypatch, scheduler) -> None:
+    def missing(video):
+        raise FileNotFoundError("ffprobe")
+
+    monkeypatch.setattr(chunked_encode, "build_frame_index", missing)
+    assert chunked_encode.chunk_plan("in.avi")["splits"] == []
+
+
+def _fake_run(commands):
+    def fake_run(cmd, **kwargs):
+        commands.append(cmd)
+        if "segment" in cmd:
+            pattern = cmd[-1]
+            splits = cmd[cmd.index("-segment_times") + 1].split(",")
+            for i in range(len(splits) + 1):
+                open(pattern % i, "w").close()
+        elif "concat" in cmd:
+            with open(cmd[cmd.index("-i") + 1]) as f:
+                commands.append(f.read().splitlines())
+
+    return fake_run
+
+
+def test_chunked_encode(tmp_path, monkeypatch, scheduler) -> None:
+    monkeypatch.setattr(chunked_encode, "build_frame_index", lambda video: _index())
+    commands: List[Any] = []
+    monkeypatch.setattr(chunked_encode, "run_command", _fake_run(commands))
+    output = str(tmp_path / "out.mp4")
+    result = chunked_encode.chunked_encode("in.avi", output, profile="review")
+
+    assert result["chunks"] == 4 and result["workers"] == 4
+    # the chunks are jobs of the shared scheduler, with the chunk thread budget
+    assert len(scheduler.submitted) == 4
+    for job in scheduler.submitted:
+        assert job["threads"] == 2
+        cmd = job["cmd"]
+        assert cmd[cmd.index("-preset") + 1] == "veryfast"
+        assert "-an" in cmd and "+faststart" not in cmd
+    listed = commands[2]
+    assert [os.path.basename(line) for line in listed] == [
+        f"enc_{i:03d}.mp4'" for i in range(4)
+    ]
+    assert commands[1][-1] == output
+    # the chunk directory is removed
+    assert os.listdir(tmp_path) == []
+
+
+def test_chunked_encode_cancels_the_other_chunks(
+    tmp_path, monkeypatch, scheduler
+) -> None:
+    monkeypatch.setattr(chunked_encode, "build_frame_index", lambda video: _index())
+    monkeypatch.setattr(chunked_encode, "run_command", _fake_run([]))
+    scheduler.fail = "chunk-1"
+    with pytest.raises(RuntimeError, match="chunk-1"):
+        chunked_encode.chunked_encode("in.avi", str(tmp_path / "out.mp4"))
+    assert all(job.cancelled for job in scheduler.jobs)
+    assert os.listdir(tmp_path) == []
+
+
+def test_convert_avi_to_mp4_uses_chunks(tmp_path, monkeypatch, scheduler) -> None:
+    monkeypatch.setattr(chunked_encode, "build_frame_index", lambda video: _index())
+    monkeypatch.setitem(convert.cfg, "CHUNKED_ENCODE", {"enabled": True})
+    calls = []
+    monkeypatch.setattr(
+        chunked_encode,
+        "chunked_encode",
+        lambda *args, **kwargs: calls.append(kwargs["plan"]),
+    )
+    avi = tmp_path / "a.avi"
+    avi.write_bytes(b"0")
+    convert.convert_avi_to_mp4(str(avi), str(tmp_path / "a.mp4"))
+    assert calls and calls[0]["splits"]
+    assert not avi.exists()
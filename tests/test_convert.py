@@ -0,0 +1,133 @@
+# tests/test_convert.py
+"""
+Tests for the ffprobe classification and the remux/transcode choice in
+normalize_video. ffmpeg itself is not run: run_command is replaced.
+"""
+
+import json
+import subprocess
+import pytest
+from refvision.postprocess import convert, probe
+
+
+def _probe(
+    codec="h264", pix_fmt="yuv420p", container="mov,mp4,m4a,3gp,3g2,mj2", **extra
+):
+    video = {"codec_type": "video", "codec_name": codec, "pix_fmt": pix_fmt}
+    video.update(extra)
+    return {
+        "format": {"format_name": container},
+        "streams": [video, {"codec_type": "audio", "codec_name": "aac"}],
+    }
+
+
+def test_classify_h264_mp4_is_compatible() -> None:
+    info = probe.classify(_probe(width=1920, height=1080))
+    assert info["compatible"] and info["reasons"] == []
+    assert info["container"] == "mov"
+    assert info["audio_codec"] == "aac"
+
+
+def test_classify_incompatible_inputs() -> None:
+    hevc = probe.classify(_probe(codec="hevc"))
+    assert not hevc["compatible"] and hevc["reasons"] == ["codec hevc"]
+
+    ten_bit = probe.classify(_probe(pix_fmt="yuv420p10le"))
+    assert ten_bit["reasons"] == ["pixel format yuv420p10le"]
+
+    rotated = probe.classify(
+        _probe(side_data_list=[{"side_data_type": "Display Matrix", "rotation": -90}])
+    )
+    assert rotated["rotation"] == 270 and not rotated["compatible"]
+    assert probe.classify(_probe(tags={"rotate": "90"}))["rotation"] == 90
+
+    mkv = probe.classify(_probe(container="matroska,webm"))
+    assert mkv["reasons"] == ["container matroska"]
+
+
+def test_probe_is_cached_per_file(tmp_path, monkeypatch) -> None:
+    video = tmp_path / "a.mp4"
+    video.write_bytes(b"0")
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout=json.dumps(_probe()))
+
+    monkeypatch.setattr(probe.subprocess, "run", fake_run)
+    probe._probe_cached.cache_clear()
+    assert probe.probe_video(str(video)) == probe.probe_video(str(video))
+    assert len(calls) == 1
+
+    video.write_bytes(b"changed")
+    probe.probe_video(str(video))
+    assert len(calls) == 2
+
+
+def test_normalize_video_remuxes_or_transcodes(tmp_path, monkeypatch) -> None:
+    commands = []
+    monkeypatch.setattr(
+        convert, "run_command", lambda cmd, logger=None, **kwargs: commands.append(cmd)
+    )
+    src = str(tmp_path / "phone.mov")
+
+    monkeypatch.setattr(convert, "probe_video", lambda path: _probe())
+    out = convert.normalize_video(src, str(tmp_path))
+    assert out == str(tmp_path / "phone.mp4")
+    assert commands[-1][commands[-1].index("-c:v") + 1] == "copy"
+    assert "-map_metadata" in commands[-1]
+
+    monkeypatch.setattr(convert, "probe_video", lambda path: _probe(codec="hevc"))
+    convert.normalize_video(src, str(tmp_path))
+    assert commands[-1][commands[-1].index("-c:v") + 1] == "libx264"
+
+    convert.normalize_video(src, str(tmp_path), force_transcode=True)
+    assert commands[-1][commands[-1].index("-c:v") + 1] == "libx264"
+
+
+def test_normalize_video_falls_back_without_ffprobe(tmp_path, monkeypatch) -> None:
+    commands = []
+    monkeypatch.setattr(
+        convert, "run_command", lambda cmd, logger=None, **kwargs: commands.append(cmd)
+    )
+
+    def missing(path):
+        raise FileNotFoundError("ffprobe")
+
+    monkeypatch.setattr(convert, "probe_video", missing)
+    convert.normalize_video(str(tmp_path / "a.avi"), str(tmp_path))
+    assert "libx264" in commands[-1]
+
+
+def test_encoding_profiles(monkeypatch) -> None:
+    from refvision.postprocess import profiles
+
+    review = profiles.get_profile("review")
+    args = profiles.encode_args(review)
+    assert args[args.index("-preset") + 1] == "veryfast"
+    assert args[args.index("-maxrate") + 1] == "5000k"
+    assert "min(ih,1080)" in args[args.index("-vf") + 1]
+
+    archive = profiles.encode_args(profiles.get_profile("archive"))
+    assert "-vf" not in archive and archive[archive.index("-crf") + 1] == "18"
+    assert profiles.get_profile(usage="normalize")["name"] == "archive"
+    assert set(profiles.profile_names()) >= {"archive", "review", "fast-preview"}
+    with pytest.raises(ValueError):
+        profiles.get_profile("nope")
+
+
+def test_convert_avi_to_mp4_uses_profile(tmp_path, monkeypatch) -> None:
+    commands = []
+    monkeypatch.setattr(
+        convert, "run_command", lambda cmd, logger=None, **kwargs: commands.append(cmd)
+    )
+    avi = tmp_path / "a.avi"
+    avi.write_bytes(b"0")
+    convert.convert_avi_to_mp4(
+        str(avi), str(tmp_path / "a.mp4"), profile="fast-preview"
+    )
+    cmd = commands[-1]
+    assert cmd[cmd.index("-preset") + 1] == "ultrafast"
+    assert "min(ih,480)" in cmd[cmd.index("-vf") + 1]
+    assert cmd[-3:] == ["-movflags", "+faststart", str(tmp_path / "a.mp4")]
+    assert not avi.exists()
@@ -0,0 +1,152 @@
+# tests/test_decision_cache.py
+"""
+Tests for the content-hash decision cache.
+"""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from refvision.inference import decision_cache
+from refvision.inference.decision_cache import (
+    LocalDecisionCache,
+    cache_key,
+    config_digest,
+    weights_digest,
+)
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(decision_cache, "_local_dir", lambda: str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
+@pytest.fixture
+def files(tmp_path):
+    video = tmp_path / "upload_1.mp4"
+    video.write_bytes(b"frames" * 1000)
+    weights = tmp_path / "model.pt"
+    weights.write_bytes(b"weights")
+    return video, weights
+
+
+def test_key_depends_on_content_not_name(cache_dir, files, tmp_path) -> None:
+    """
+    The same file under another name hits; different content misses.
+    """
+    video, weights = files
+    copy = tmp_path / "upload_2.mp4"
+    copy.write_bytes(video.read_bytes())
+    other = tmp_path / "other.mp4"
+    other.write_bytes(b"different")
+
+    key = cache_key(str(video), str(weights), "squat")
+    assert cache_key(str(copy), str(weights), "squat") == key
+    assert cache_key(str(other), str(weights), "squat") != key
+    assert cache_key(str(video), str(weights), "deadlift") != key
+
+
+def test_key_depends_on_weights(cache_dir, files) -> None:
+    video, weights = files
+    key = cache_key(str(video), str(weights), "squat")
+    weights.write_bytes(b"fine-tuned weights")
+    assert cache_key(str(video), str(weights), "squat") != key
+
+
+def test_config_digest_tracks_lift_features(monkeypatch) -> None:
+    before = config_digest("squat")
+    monkeypatch.setitem(decision_cache.cfg, "LIFT_FEATURES", {"smoothing_window": 9})
+    assert config_digest("squat") != before
+
+
+@pytest.mark.parametrize(
+    "section, settings",
+    [
+        ("OVERLAY", {"enabled": False}),
+        ("OVERLAY", {"enabled": True, "fourcc": "XVID"}),
+        ("EVIDENCE", {"enabled": False}),
+        ("EVIDENCE", {"enabled": True, "thumbnail_width": 320}),
+    ],
+)
+def test_config_digest_tracks_artefact_settings(monkeypatch, section, settings):
+    """
+    A hit restores the annotated video and evidence, so the settings that
+    shape them are part of the key.
+    """
+    before = config_digest("squat")
+    monkeypatch.setitem(decision_cache.cfg, section, settings)
+    assert config_digest("squat") != before
+
+
+def test_weights_digest_is_memoised(files, tmp_path) -> None:
+    _, weights = files
+    memo = tmp_path / "weights.json"
+    digest = weights_digest(str(weights), str(memo))
+    entry = json.loads(memo.read_text())[str(weights)]
+    assert entry["digest"] == digest
+    # a stale memo entry is trusted while size and mtime are unchanged
+    entry["digest"] = "memoised"
+    memo.write_text(json.dumps({str(weights): entry}))
+    assert weights_digest(str(weights), str(memo)) == "memoised"
+
+
+def test_local_cache_round_trip(cache_dir, tmp_path) -> None:
+    """
+    A stored decision is returned with its artefacts restored.
+    """
+    avi = tmp_path / "track" / "clip.avi"
+    avi.parent.mkdir()
+    avi.write_bytes(b"annotated")
+    cache = LocalDecisionCache(str(cache_dir))
+    decision = {"decision": "Good Lift!", "turnaround_frame": 12}
+
+    assert cache.get("abc") is None
+    cache.put("abc", decision, {"annotated_avi": str(avi)})
+    avi.unlink()
+
+    assert cache.get("abc", {"annotated_avi": str(avi)}) == decision
+    assert avi.read_bytes() == b"annotated"
+
+
+def test_local_cache_missing_artefact_is_a_miss(cache_dir, tmp_path) -> None:
+    cache = LocalDecisionCache(str(cache_dir))
+    cache.put("abc", {"decision": "No Lift"})
+    assert cache.get("abc") == {"decision": "No Lift"}
+    assert cache.get("abc", {"annotated_avi": str(tmp_path / "x.avi")}) is None
+
+
+def test_local_cache_survives_corrupt_index(cache_dir) -> None:
+    cache_dir.mkdir()
+    (cache_dir / "index.json").write_text("{not json")
+    cache = LocalDecisionCache(str(cache_dir))
+    assert cache.get("abc") is None
+    cache.put("abc", {"decision": "No Lift"})
+    assert cache.get("abc") == {"decision": "No Lift"}
+
+
+def test_local_cache_concurrent_puts_keep_every_entry(cache_dir, monkeypatch) -> None:
+    """
+    Index updates are serialised by the lock file: with a slow read, writers
+    that interleave would otherwise drop each other's entries.
+    """
+    read_json = decision_cache._read_json
+
+    def slow_read(path):
+        data = read_json(path)
+        time.sleep(0.01)
+        return data
+
+    monkeypatch.setattr(decision_cache, "_read_json", slow_read)
+    keys = [f"key{i}" for i in range(16)]
+    with ThreadPoolExecutor(8) as pool:
+        list(
+            pool.map(
+                # one cache object per writer, like separate pipeline processes
+                lambda key: LocalDecisionCache(str(cache_dir)).put(key, {"k": key}),
+                keys,
+            )
+        )
+    index = json.loads((cache_dir / "index.json").read_text())
+    assert sorted(index) == sorted(keys)
+    assert not list(cache_dir.glob("*.tmp"))
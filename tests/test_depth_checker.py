@@ -9,6 +9,7 @@ from unittest.mock import patch
 
 import refvision.analysis.depth_checker as dc_mod
 import refvision.analysis.lifter_selector as ls_mod
+from refvision.analysis.context import AnalysisContext
 
 from refvision.analysis.depth_checker import (
     check_squat_depth_at_frame,
@@ -116,3 +117,24 @@ def test_check_squat_depth_by_turnaround(mock_cfg) -> None:
     result_dict = cast(dict, check_squat_depth_by_turnaround(frames))
     assert result_dict["decision"] == "Good Lift!"
     assert result_dict["turnaround_frame"] == 1  # second frame is deeper
+
+
+def test_normalised_margin_is_resolution_invariant() -> None:
+    """
+    The same squat at half resolution has half the pixel margin but the same
+    femur-normalised margin and decision.
+    """
+    xy = np.zeros((5, 17, 2))
+    xy[:, [11, 12]] = [[300.0, 0.0]]
+    xy[:, [11, 12], 1] = np.array([300.0, 380.0, 420.0, 380.0, 300.0])[:, None]
+    xy[:, [13, 14]] = [400.0, 400.0]
+    full = check_squat_depth_by_turnaround([], context=AnalysisContext(xy))
+    half = check_squat_depth_by_turnaround([], context=AnalysisContext(xy / 2))
+
+    assert full["decision"] == half["decision"] == "Good Lift!"
+    assert half["depth_margin"]["raw_px"] == pytest.approx(
+        full["depth_margin"]["raw_px"] / 2
+    )
+    assert half["depth_margin"]["normalised"] == pytest.approx(
+        full["depth_margin"]["normalised"]
+    )
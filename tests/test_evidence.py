@@ -0,0 +1,81 @@
+# tests/test_evidence.py
+"""
+Tests for the turnaround thumbnail and sprite strip evidence images.
+"""
+
+import cv2
+import numpy as np
+from refvision.postprocess import evidence
+
+
+class _Frame:
+    def __init__(self, image):
+        self.orig_img = image
+
+
+def _frames(n=30, h=360, w=640):
+    return [_Frame(np.full((h, w, 3), i * 8, dtype=np.uint8)) for i in range(n)]
+
+
+def _track(n=30):
+    xy = np.full((n, 17, 2), np.nan)
+    cfg = evidence.cfg
+    xy[:, [cfg["LEFT_HIP_IDX"], cfg["RIGHT_HIP_IDX"]]] = [[300, 200], [340, 200]]
+    xy[:, [cfg["LEFT_KNEE_IDX"], cfg["RIGHT_KNEE_IDX"]]] = [[280, 190], [360, 190]]
+    return xy
+
+
+def test_sprite_frames_stay_inside_video_and_on_turnaround() -> None:
+    assert evidence.sprite_frames(100, 50, 5, 3) == [44, 47, 50, 53, 56]
+    assert evidence.sprite_frames(100, 2, 5, 3) == [2, 5, 8, 11, 14]
+    assert evidence.sprite_frames(100, 98, 5, 3) == [86, 89, 92, 95, 98]
+    assert evidence.sprite_frames(5, 2, 9, 3) == [0, 3, 4]
+
+
+def test_write_evidence(tmp_path, monkeypatch) -> None:
+    monkeypatch.setitem(evidence.cfg, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setitem(
+        evidence.cfg,
+        "EVIDENCE",
+        {
+            "sprite_frames": 5,
+            "sprite_step": 2,
+            "tile_width": 80,
+            "thumbnail_width": 320,
+        },
+    )
+    meta = evidence.write_evidence(_frames(), _track(), 15, "clip")
+    assert meta == {
+        "frame": 15,
+        "sprite_frames": [11, 13, 15, 17, 19],
+        "tile_width": 80,
+        "tile_height": 45,
+    }
+    paths = evidence.evidence_paths("clip")
+    thumbnail = cv2.imread(paths["turnaround_jpg"])
+    sprite = cv2.imread(paths["sprite_jpg"])
+    assert thumbnail is not None and sprite is not None
+    assert thumbnail.shape == (180, 320, 3)
+    assert sprite.shape == (45, 400, 3)
+    # the hip marker is drawn at the scaled hip position, in red
+    b, g, r = thumbnail[100, 150].astype(int)
+    assert r > 200 and g < 80 and b < 80
+
+    assert evidence.write_evidence(_frames(), _track(), None, "clip") is None
+    no_images = [type("R", (), {})() for _ in range(3)]
+    assert evidence.write_evidence(no_images, _track(3), 1, "clip") is None
+
+
+def test_upload_evidence(tmp_path, monkeypatch, local_s3) -> None:
+    monkeypatch.setitem(evidence.cfg, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setitem(evidence.cfg, "EVIDENCE", {"bucket": "processed"})
+    monkeypatch.setattr(evidence, "get_s3_client", lambda: local_s3)
+    meta = evidence.write_evidence(_frames(), _track(), 10, "clip")
+    assert meta is not None
+
+    record = evidence.upload_evidence("clip", meta, "Meet 1", "Jane#squat#2")
+    assert record["turnaround_key"] == "evidence/Meet_1/Jane_squat_2/turnaround.jpg"
+    assert record["bucket"] == "processed" and record["frame"] == 10
+    stored = local_s3.objects[("processed", record["sprite_key"])]
+    assert stored["ContentType"] == "image/jpeg"
+    assert stored["Body"].startswith(b"\xff\xd8")
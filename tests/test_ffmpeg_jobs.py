@@ -0,0 +1,161 @@
+# tests/test_ffmpeg_jobs.py
+"""
+Tests for the ffmpeg job scheduler. Jobs run a small stand-in "ffmpeg"
+script that prints -progress blocks, so no real encoder is needed.
+"""
+
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import CancelledError
+import pytest
+from refvision.postprocess import ffmpeg_jobs
+from refvision.postprocess.ffmpeg_jobs import JobScheduler
+
+FAKE_FFMPEG = """#!{python}
+import sys, time
+mode = sys.argv[-1]
+with open({log!r}, "a") as log:
+    log.write(mode.split(":")[0] + "\\n")
+for frame in (10, 20):
+    print(f"frame={{frame}}\\nfps=25.0\\nout_time_us={{frame * 40000}}\\nspeed=2.0x")
+    print("progress=continue", flush=True)
+    if mode.endswith(":slow"):
+        time.sleep(0.5)
+print("frame=30\\nout_time_us=1200000\\nspeed=N/A\\nprogress=end", flush=True)
+if mode.endswith(":fail"):
+    sys.stderr.write("Invalid data found when processing input\\n")
+    sys.exit(1)
+"""
+
+
+@pytest.fixture
+def ffmpeg(tmp_path):
+    path = tmp_path / "ffmpeg"
+    log = tmp_path / "started.log"
+    path.write_text(FAKE_FFMPEG.format(python=sys.executable, log=str(log)))
+    os.chmod(path, 0o755)
+
+    def command(mode: str):
+        return [str(path), "-i", "in.mp4", mode]
+
+    command.started = lambda: log.read_text().split() if log.exists() else []
+    return command
+
+
+def test_parse_progress() -> None:
+    lines = [
+        b"frame=12\n",
+        b"fps=N/A\n",
+        b"out_time_ms=500000\n",
+        b"speed=1.5x\n",
+        b"progress=continue\n",
+        b"frame=25\n",
+        b"out_time_us=1000000\n",
+        b"progress=end\n",
+    ]
+    first, last = ffmpeg_jobs.parse_progress(lines, duration_s=2.0)
+    assert first == {
+        "frame": 12,
+        "fps": None,
+        "out_time_s": 0.5,
+        "speed": 1.5,
+        "percent": 25.0,
+        "done": False,
+    }
+    assert last["frame"] == 25 and last["done"] and last["percent"] == 100.0
+
+
+def test_with_progress_applies_thread_budget() -> None:
+    cmd = ["ffmpeg", "-i", "in.mp4", "-c:v", "libx264", "out.mp4"]
+    assert ffmpeg_jobs.with_progress(cmd, threads=4) == [
+        "ffmpeg",
+        "-nostats",
+        "-progress",
+        "pipe:1",
+        "-i",
+        "in.mp4",
+        "-c:v",
+        "libx264",
+        "-threads",
+        "4",
+        "out.mp4",
+    ]
+    auto = ffmpeg_jobs.with_progress(["ffmpeg", "-threads", "0", "o.mp4"], 2)
+    assert auto[-3:] == ["-threads", "2", "o.mp4"]
+    fixed = ffmpeg_jobs.with_progress(["ffmpeg", "-threads", "8", "o.mp4"], 2)
+    assert fixed[-3:] == ["-threads", "8", "o.mp4"]
+    with pytest.raises(ValueError):
+        ffmpeg_jobs.FfmpegJob(["python", "-V"])
+
+
+def test_job_reports_progress(ffmpeg) -> None:
+    scheduler = JobScheduler(max_concurrent=1, threads_per_job=2)
+    seen = []
+    job = scheduler.submit(
+        ffmpeg("a:ok"),
+        duration_s=1.2,
+        on_progress=lambda job, progress: seen.append(progress["frame"]),
+    )
+    assert job.result(timeout=10) is job
+    assert job.status == ffmpeg_jobs.SUCCEEDED and job.returncode == 0
+    assert seen == [10, 20, 30]
+    assert job.progress["percent"] == 100.0
+    scheduler.shutdown()
+
+
+def test_failed_job_raises_with_stderr(ffmpeg) -> None:
+    scheduler = JobScheduler(max_concurrent=1)
+    job = scheduler.submit(ffmpeg("a:fail"))
+    with pytest.raises(subprocess.CalledProcessError) as err:
+        job.result(timeout=10)
+    assert "Invalid data" in err.value.stderr
+    assert job.status == ffmpeg_jobs.FAILED
+    scheduler.shutdown()
+
+
+def test_job_times_out(ffmpeg) -> None:
+    scheduler = JobScheduler(max_concurrent=1, timeout=0.2)
+    job = scheduler.submit(ffmpeg("a:slow"))
+    with pytest.raises(subprocess.TimeoutExpired):
+        job.result(timeout=10)
+    assert job.status == ffmpeg_jobs.TIMED_OUT
+    scheduler.shutdown()
+
+
+def test_priority_order_and_concurrency_limit(ffmpeg) -> None:
+    scheduler = JobScheduler(max_concurrent=1)
+    blocker = scheduler.submit(ffmpeg("blocker:slow"))
+    while not scheduler.running():
+        time.sleep(0.01)
+    low = scheduler.submit(ffmpeg("low:ok"), priority=ffmpeg_jobs.PRIORITY_BACKGROUND)
+    high = scheduler.submit(
+        ffmpeg("high:ok"), priority=ffmpeg_jobs.PRIORITY_INTERACTIVE
+    )
+    assert scheduler.pending() == [high, low]
+    assert len(scheduler.running()) == 1
+    for job in (blocker, low, high):
+        job.result(timeout=10)
+    assert ffmpeg.started() == ["blocker", "high", "low"]
+    scheduler.shutdown()
+
+
+def test_cancel_queued_and_running_jobs(ffmpeg) -> None:
+    scheduler = JobScheduler(max_concurrent=1)
+    running = scheduler.submit(ffmpeg("running:slow"))
+    queued = scheduler.submit(ffmpeg("queued:ok"))
+    while not scheduler.running():
+        time.sleep(0.01)
+    assert queued.cancel() and queued.status == ffmpeg_jobs.CANCELLED
+    assert running.cancel()
+    with pytest.raises(CancelledError):
+        running.result(timeout=10)
+    with pytest.raises(CancelledError):
+        queued.result(timeout=10)
+    assert running.status == ffmpeg_jobs.CANCELLED
+    assert not running.cancel()
+    scheduler.shutdown()
+    assert "queued" not in ffmpeg.started()
+    with pytest.raises(RuntimeError):
+        scheduler.submit(ffmpeg("late:ok"))
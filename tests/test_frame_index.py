@@ -0,0 +1,169 @@
+# tests/test_frame_index.py
+"""
+Tests for the per-video frame index and the seeking frame reader.
+"""
+
+import json
+import subprocess
+import cv2
+import numpy as np
+import pytest
+from refvision.postprocess import frame_index
+from refvision.postprocess.frame_index import FrameReader, parse_packets
+
+FPS = 25
+GOP = 12
+
+
+def _write_video(path, n=40):
+    """
+    Frame i is a flat grey of value 6 * i, so frames can be told apart
+    after JPEG compression.
+    """
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), FPS, (64, 48))
+    for i in range(n):
+        writer.write(np.full((48, 64, 3), 6 * i, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+
+def _frame_number(image):
+    return int(round(float(image.mean()) / 6))
+
+
+def _write_long_gop(path, n=60):
+    """
+    MPEG-4 Part 2 in .mp4, a keyframe every GOP frames (the OpenCV writer's
+    default). Frame i shows i in binary as black and white blocks, which
+    survive inter-frame compression better than a flat grey.
+    """
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), FPS, (128, 16))
+    if not writer.isOpened():
+        pytest.skip("no MPEG-4 encoder in this OpenCV build")
+    for i in range(n):
+        image = np.zeros((16, 128, 3), dtype=np.uint8)
+        for bit in range(8):
+            if i >> bit & 1:
+                image[:, 16 * bit : 16 * (bit + 1)] = 255
+        writer.write(image)
+    writer.release()
+    return str(path)
+
+
+def _block_number(image):
+    return sum(
+        1 << bit
+        for bit in range(8)
+        if image[:, 16 * bit + 4 : 16 * (bit + 1) - 4].mean() > 127
+    )
+
+
+def _index(n=40, gop=10):
+    return parse_packets(
+        [
+            {
+                "pts_time": f"{i / FPS:.6f}",
+                "pos": str(100 * i),
+                "size": "100",
+                "flags": "K__" if i % gop == 0 else "___",
+            }
+            for i in range(n)
+        ]
+    )
+
+
+def test_parse_packets_orders_frames_by_pts() -> None:
+    # decode order I P B B, as with B-frames
+    packets = [
+        {"pts_time": "0.100000", "pos": "48", "size": "900", "flags": "K__"},
+        {"pts_time": "0.233333", "pos": "948", "size": "300", "flags": "___"},
+        {"pts_time": "0.166667", "pos": "1248", "size": "80", "flags": "___"},
+        {"pts_time": "N/A", "dts_time": "0.200000", "pos": "N/A", "flags": "___"},
+        {"pts_time": "0.300000", "pos": "1400", "size": "90", "flags": "__D"},
+    ]
+    index = parse_packets(packets)
+    assert index["frames"] == 4
+    assert index["start_time"] == pytest.approx(0.1)
+    assert index["pts"] == pytest.approx([0.0, 0.066667, 0.1, 0.133333])
+    assert index["pos"] == [48, 1248, -1, 948]
+    assert index["keyframes"] == [0]
+
+
+def test_write_and_load_frame_index(tmp_path, monkeypatch) -> None:
+    video = str(tmp_path / "attempt.mp4")
+    out = json.dumps({"packets": [{"pts_time": "0.0", "pos": "0", "flags": "K_"}]})
+
+    def fake_run(cmd, **kwargs):
+        assert cmd[-1] == video
+        return subprocess.CompletedProcess(cmd, 0, stdout=out)
+
+    monkeypatch.setattr(frame_index.subprocess, "run", fake_run)
+    path = frame_index.write_frame_index(video)
+    assert path == str(tmp_path / "attempt.frames.json")
+    index = frame_index.load_frame_index(video)
+    assert index is not None and index["keyframes"] == [0]
+    assert frame_index.load_frame_index(str(tmp_path / "other.mp4")) is None
+
+
+def test_frame_reader_random_access(tmp_path) -> None:
+    video = _write_video(tmp_path / "clip.avi")
+    with FrameReader(video, _index()) as reader:
+        assert len(reader) == 40
+        assert reader.keyframe_before(27) == 20
+        assert reader.frame_at(1.0) == 25
+        for frame in (37, 5, 39, 0, 38, 20, 12, 13):
+            assert _frame_number(reader.read(frame)) == frame
+        with pytest.raises(IndexError):
+            reader.read(40)
+
+
+def test_frame_reader_range(tmp_path) -> None:
+    video = _write_video(tmp_path / "clip.avi")
+    with FrameReader(video, _index()) as reader:
+        frames = [(i, _frame_number(image)) for i, image in reader.read_range(25, 30)]
+        assert frames == [(i, i) for i in range(25, 30)]
+        assert [i for i, _ in reader.read_range(37, 50)] == [37, 38, 39]
+        assert list(reader.read_range(10, 10)) == []
+
+
+def test_frame_reader_long_gop(tmp_path) -> None:
+    """
+    Frames inside a GOP are decoded forward from its keyframe.
+    """
+    video = _write_long_gop(tmp_path / "clip.mp4")
+    with FrameReader(video, _index(60, GOP)) as reader:
+        for frame in (59, 13, 11, 35, 24, 23, 47, 0, 1):
+            assert _block_number(reader.read(frame)) == frame
+        frames = [(i, _block_number(image)) for i, image in reader.read_range(20, 40)]
+        assert frames == [(i, i) for i in range(20, 40)]
+
+
+class _SnapForward:
+    """
+    Capture whose seeks land one GOP late, as on backends that snap forward
+    to the next keyframe.
+    """
+
+    def __init__(self, cap):
+        self.cap = cap
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value + GOP * 1000.0 / FPS)
+
+    def __getattr__(self, name):
+        return getattr(self.cap, name)
+
+
+def test_frame_reader_falls_back_when_a_seek_overshoots(tmp_path, monkeypatch) -> None:
+    video = _write_long_gop(tmp_path / "clip.mp4")
+    capture = cv2.VideoCapture
+    monkeypatch.setattr(
+        frame_index.cv2, "VideoCapture", lambda path: _SnapForward(capture(path))
+    )
+    with FrameReader(video, _index(60, GOP)) as reader:
+        # 30 => keyframe 24 lands on 36, so 12 is tried (landing on 24)
+        assert _block_number(reader.read(30)) == 30
+        # 15 => keyframe 12 lands on 24; frame 0 reopens the video
+        assert _block_number(reader.read(15)) == 15
+        frames = [i for i, _ in reader.read_range(26, 29)]
+        assert frames == [26, 27, 28]
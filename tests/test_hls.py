@@ -0,0 +1,108 @@
+# tests/test_hls.py
+"""
+Tests for the HLS ladder, the packaging command and playlist rewriting.
+ffmpeg and S3 are not used: run_command and the upload are replaced.
+"""
+
+import pytest
+from refvision.postprocess import hls
+
+
+def _ladder(monkeypatch, renditions) -> None:
+    monkeypatch.setitem(
+        hls.cfg,
+        "HLS",
+        {"segment_seconds": 2, "first_segment_seconds": 1, "renditions": renditions},
+    )
+
+
+RENDITIONS = [
+    {"name": "720p", "max_short_side": 720, "bitrate": "2500k"},
+    {"name": "360p", "max_short_side": 360, "bitrate": "0.7M"},
+    {"name": "1080p", "max_short_side": 1080, "bitrate": "4500k", "bufsize": "6000k"},
+]
+
+
+def test_ladder_fills_rate_caps(monkeypatch) -> None:
+    _ladder(monkeypatch, RENDITIONS)
+    renditions = hls.ladder()
+    assert [r["name"] for r in renditions] == ["720p", "360p", "1080p"]
+    assert renditions[0]["maxrate"] == "2750k" and renditions[0]["bufsize"] == "5000k"
+    assert renditions[1]["bitrate"] == "700k"
+    assert renditions[2]["bufsize"] == "6000k"
+
+
+def test_ladder_never_upscales(monkeypatch) -> None:
+    _ladder(monkeypatch, RENDITIONS)
+    # a 480p source keeps 360p plus one rendition at source resolution
+    renditions = hls.ladder(source_short_side=480)
+    assert [r["name"] for r in renditions] == ["720p", "360p"]
+    assert renditions[0]["max_short_side"] is None
+    assert renditions[0]["bitrate"] == "2500k"
+    assert len(hls.ladder(source_short_side=2160)) == 3
+
+
+def test_hls_command_aligns_keyframes(monkeypatch) -> None:
+    _ladder(monkeypatch, RENDITIONS)
+    cmd = hls.hls_command("in.mp4", "out", hls.ladder())
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert graph.startswith("[0:v]split=3[s0][s1][s2];")
+    assert cmd.count("-map") == 3
+    assert cmd[cmd.index("-b:v:1") + 1] == "700k"
+    assert cmd[cmd.index("-force_key_frames") + 1] == "expr:gte(t,n_forced*1)"
+    assert cmd[cmd.index("-hls_init_time") + 1] == "1"
+    assert cmd[cmd.index("-hls_time") + 1] == "2"
+    assert cmd[cmd.index("-var_stream_map") + 1] == (
+        "v:0,name:720p v:1,name:360p v:2,name:1080p"
+    )
+    assert cmd[-1].endswith("%v/index.m3u8")
+
+
+def test_upload_hls_puts_playlists_last(tmp_path, monkeypatch) -> None:
+    for rel in ("master.m3u8", "720p/index.m3u8", "720p/segment_000.ts"):
+        path = tmp_path / rel
+        path.parent.mkdir(exist_ok=True)
+        path.write_text("x")
+    uploads = []
+    monkeypatch.setattr(
+        hls,
+        "upload_file_to_s3",
+        lambda path, bucket, key, content_type, logger: uploads.append(
+            (key, content_type)
+        ),
+    )
+    keys = hls.upload_hls(str(tmp_path), "bucket", "processed/v/hls/")
+    assert keys == [
+        "processed/v/hls/720p/segment_000.ts",
+        "processed/v/hls/720p/index.m3u8",
+        "processed/v/hls/master.m3u8",
+    ]
+    assert uploads[0][1] == "video/mp2t"
+    assert uploads[2][1] == "application/vnd.apple.mpegurl"
+
+
+def test_playlist_key_stays_inside_prefix() -> None:
+    assert hls.playlist_key("p/hls", "720p/../master.m3u8") == "p/hls/master.m3u8"
+    for name in ("../secret.m3u8", "/etc/passwd", "."):
+        with pytest.raises(ValueError):
+            hls.playlist_key("p/hls", name)
+
+
+def test_rewrite_playlist() -> None:
+    playlist = (
+        "#EXTM3U\n"
+        '#EXT-X-MAP:URI="init.mp4"\n'
+        "#EXTINF:1.000000,\n"
+        "segment_000.ts\n"
+        "\n"
+        "#EXT-X-ENDLIST\n"
+    )
+    rewritten = hls.rewrite_playlist(playlist, lambda uri: f"https://s3/{uri}?sig")
+    assert rewritten.splitlines() == [
+        "#EXTM3U",
+        '#EXT-X-MAP:URI="https://s3/init.mp4?sig"',
+        "#EXTINF:1.000000,",
+        "https://s3/segment_000.ts?sig",
+        "",
+        "#EXT-X-ENDLIST",
+    ]
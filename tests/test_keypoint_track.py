@@ -0,0 +1,143 @@
+# tests/test_keypoint_track.py
+"""
+Tests for keypoint track extraction and confidence gating.
+"""
+import numpy as np
+import pytest
+from unittest.mock import patch
+import refvision.analysis.lifter_selector as ls_mod
+from refvision.analysis.context import AnalysisContext
+from refvision.analysis.depth_checker import check_squat_depth_by_turnaround
+from refvision.analysis.keypoint_track import (
+    extract_keypoint_track,
+    gate_keypoints,
+    keypoint_quality,
+)
+from refvision.utils.series_utils import interpolate_gaps
+
+
+class DummyKeypoints:
+    """Fake class to simulate key points with confidence."""
+
+    def __init__(self, xy: np.ndarray, conf: np.ndarray) -> None:
+        self.xy = xy[None]
+        self.conf = conf[None]
+
+
+class DummyBox:
+    """Fake class to simulate detection boxes."""
+
+    def __init__(self) -> None:
+        self.xyxy = [(300, 300, 340, 340)]
+        self.conf = 0.9
+
+
+class DummyFrameResult:
+    """Dummy class to simulate a YOLO result for one frame."""
+
+    def __init__(self, keypoints, boxes) -> None:
+        self.keypoints = keypoints
+        self.boxes = boxes
+        self.orig_shape = (640, 640)
+
+
+@pytest.fixture
+def mock_cfg():
+    """
+    Patch the lifter selector so every box is inside the ROI.
+    """
+    fake_cfg = {
+        "LIFTER_SELECTOR": {
+            "expected_center": [0.5, 0.5],
+            "roi": [0.0, 0.0, 1.0, 1.0],
+            "distance_weight": 1.0,
+            "confidence_weight": 1.0,
+            "lifter_id": None,
+        }
+    }
+    with patch.object(ls_mod, "cfg", fake_cfg):
+        yield
+
+
+def make_frame(hip_y: float, knee_y: float, knee_conf: float = 0.9):
+    """Create a frame with given hip/knee y and knee confidence."""
+    xy = np.zeros((17, 2))
+    xy[[11, 12], 1] = hip_y
+    xy[[13, 14], 1] = knee_y
+    conf = np.full(17, 0.9)
+    conf[[13, 14]] = knee_conf
+    return DummyFrameResult([DummyKeypoints(xy, conf)], [DummyBox()])
+
+
+def test_interpolate_gaps_respects_max_gap() -> None:
+    """
+    Short interior gaps are filled, long and leading gaps are not.
+    """
+    nan = np.nan
+    values = np.array([nan, 1.0, nan, 3.0, nan, nan, nan, 7.0])
+    np.testing.assert_allclose(
+        interpolate_gaps(values), [nan, 1, 2, 3, 4, 5, 6, 7], equal_nan=True
+    )
+    np.testing.assert_allclose(
+        interpolate_gaps(values, max_gap=2),
+        [nan, 1, 2, 3, nan, nan, nan, 7],
+        equal_nan=True,
+    )
+
+
+def test_extract_keypoint_track_reads_confidence(mock_cfg) -> None:
+    """
+    The track carries per-keypoint confidence and NaN for empty frames.
+    """
+    frames = [make_frame(400, 380, knee_conf=0.2), DummyFrameResult([], [])]
+    xy, conf = extract_keypoint_track(frames)
+    assert xy.shape == (2, 17, 2)
+    assert conf[0, 13] == pytest.approx(0.2)
+    assert np.isnan(xy[1]).all()
+    assert (conf[1] == 0).all()
+
+
+def test_gate_keypoints_interpolates_occluded_knee() -> None:
+    """
+    A low-confidence knee is replaced by the neighbouring frames' values.
+    """
+    xy = np.zeros((3, 17, 2))
+    xy[:, 13, 1] = [100.0, 999.0, 120.0]
+    conf = np.ones((3, 17))
+    conf[1, 13] = 0.05
+    gated = gate_keypoints(xy, conf, min_conf=0.3)
+    assert gated[1, 13, 1] == pytest.approx(110.0)
+    assert xy[1, 13, 1] == 999.0  # input untouched
+
+
+def test_keypoint_quality_flags_low_confidence() -> None:
+    """
+    Mostly occluded hips/knees give a low score and request escalation.
+    """
+    conf = np.full((10, 17), 0.9)
+    assert not keypoint_quality(conf)["escalate"]
+    conf[:, 13:15] = 0.1
+    quality = keypoint_quality(conf, frame_idx=3)
+    assert quality["score"] < 0.6
+    assert quality["escalate"]
+    assert quality["decision_frame_confidence"] == pytest.approx(0.1)
+
+
+def test_occluded_knee_does_not_flip_decision(mock_cfg) -> None:
+    """
+    A garbage knee y at the bottom frame would flip the decision; gating it
+    uses the neighbouring frames instead and reports the quality.
+    """
+    frames = [
+        make_frame(400, 420),
+        make_frame(450, 420),
+        make_frame(470, 420),
+        make_frame(480, 600, knee_conf=0.05),  # occluded knee at the bottom
+        make_frame(470, 420),
+        make_frame(450, 420),
+    ]
+    context = AnalysisContext.from_results(frames)
+    result = check_squat_depth_by_turnaround(frames, context=context)
+    assert result["turnaround_frame"] == 3
+    assert result["decision"] == "Good Lift!"
+    assert "quality" in result
@@ -0,0 +1,131 @@
+# tests/test_lift_dispatch.py
+"""
+Tests for the lift-type dispatcher and the bench press / deadlift analysers.
+"""
+
+import numpy as np
+import pytest
+from refvision.analysis.context import AnalysisContext
+from refvision.analysis.lift_dispatch import (
+    analyse_attempt,
+    evaluate_lift,
+    normalise_lift_type,
+)
+from refvision.benchmarks.synthetic import synthetic_track
+
+
+def make_context(lift: str, profile: np.ndarray) -> AnalysisContext:
+    return AnalysisContext(*synthetic_track(lift, profile=profile))
+
+
+def rep(*segments) -> np.ndarray:
+    """Concatenates linear segments given as (start, end, frames)."""
+    return np.concatenate([np.linspace(a, b, n) for a, b, n in segments])
+
+
+CLEAN = rep((0, 0, 15), (0, 1, 30), (1, 0, 30), (0, 0, 15))
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("Squat", "squat"),
+        ("Bench Press", "bench"),
+        ("bench", "bench"),
+        ("  DEADLIFT ", "deadlift"),
+    ],
+)
+def test_normalise_lift_type(name: str, expected: str) -> None:
+    assert normalise_lift_type(name) == expected
+
+
+def test_unknown_lift_type() -> None:
+    with pytest.raises(ValueError):
+        normalise_lift_type("clean and jerk")
+
+
+@pytest.mark.parametrize("lift", ["squat", "bench", "deadlift"])
+def test_clean_attempt_passes(lift: str) -> None:
+    """
+    A clean rep of every lift passes its pose-derived rules.
+    """
+    result, features = evaluate_lift(lift, make_context(lift, CLEAN))
+    assert result.is_successful, result.reasons
+    assert features["turnaround_frame"] is not None
+
+
+def test_bench_incomplete_lockout() -> None:
+    """
+    A press that stops short of straight elbows fails the lockout rule.
+    """
+    profile = rep((0, 0, 15), (0, 1, 30), (1, 0.5, 30), (0.5, 0.5, 15))
+    result, features = evaluate_lift("bench", make_context("bench", profile))
+    assert not features["lockout_complete"]
+    assert "Failed to achieve a complete lockout." in result.reasons
+
+
+def test_bench_downward_movement_during_press() -> None:
+    """
+    The bar sinking halfway through the press is a failure.
+    """
+    profile = rep(
+        (0, 0, 15), (0, 1, 30), (1, 0.5, 15), (0.5, 0.7, 6), (0.7, 0, 15), (0, 0, 15)
+    )
+    _, features = evaluate_lift("bench", make_context("bench", profile))
+    assert features["downward_movement_during_press"]
+
+
+def test_bench_hips_off_bench() -> None:
+    """
+    Hips rising during the press break contact with the bench.
+    """
+    xy, conf = synthetic_track("bench", profile=CLEAN)
+    touch = int(np.argmax(CLEAN))
+    xy[touch : touch + 10, [11, 12], 1] -= 40.0
+    _, features = evaluate_lift("bench", AnalysisContext(xy, conf))
+    assert not features["buttocks_on_bench"]
+
+
+def test_deadlift_soft_lockout() -> None:
+    """
+    Stopping short of the top pose leaves the knees and hips unlocked.
+    """
+    profile = rep((0, 0, 15), (0, 0.6, 30), (0.6, 0, 30), (0, 0, 15))
+    result, features = evaluate_lift("deadlift", make_context("deadlift", profile))
+    assert not features["knees_locked"]
+    assert not features["shoulders_back"]
+    assert not result.is_successful
+
+
+def test_deadlift_hitch() -> None:
+    """
+    The bar dropping during the pull is downward movement.
+    """
+    profile = rep(
+        (0, 0, 15), (0, 0.5, 15), (0.5, 0.3, 6), (0.3, 1, 20), (1, 0, 30), (0, 0, 15)
+    )
+    _, features = evaluate_lift("deadlift", make_context("deadlift", profile))
+    assert features["downward_movement"]
+
+
+def test_extra_state_overrides_defaults() -> None:
+    """
+    Non-observable rule inputs supplied by the caller are evaluated.
+    """
+    result, _ = evaluate_lift(
+        "deadlift",
+        make_context("deadlift", CLEAN),
+        extra_state={"waited_for_down_command": False},
+    )
+    assert result.reasons == ["Did not wait for 'DOWN' command."]
+
+
+def test_analyse_attempt_bench_decision() -> None:
+    """
+    Non-squat decisions come from the rule evaluation.
+    """
+    decision = analyse_attempt("Bench Press", [], context=make_context("bench", CLEAN))
+    assert decision["lift"] == "bench"
+    assert decision["decision"] == "Good Lift!"
+    assert decision["rule_evaluation"]["is_successful"]
+    assert not decision["quality"]["escalate"]
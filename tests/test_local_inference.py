@@ -145,3 +145,78 @@
 #             batch=128,
 #         )
 #         assert "Final decision => {'decision': 'Good Lift!'}" in caplog.text
+
+
+# --- decision cache hit vs miss ---
+
+import pytest  # noqa: E402
+from types import SimpleNamespace  # noqa: E402
+from refvision.inference.decision_cache import LocalDecisionCache  # noqa: E402
+from refvision.postprocess import evidence  # noqa: E402
+
+pytest.importorskip("torch")
+pytest.importorskip("ultralytics")
+
+from refvision.inference import local_inference  # noqa: E402
+
+
+def test_cache_hit_stores_the_same_result_as_a_miss(tmp_path, monkeypatch) -> None:
+    """
+    A hit writes the InferenceResult a miss wrote (apart from the cache
+    marker), without the cache-only evidence metadata.
+    """
+    video = tmp_path / "upload_1.mp4"
+    video.write_bytes(b"frames")
+    for module in (local_inference, evidence):
+        monkeypatch.setitem(module.cfg, "OUTPUT_DIR", str(tmp_path / "out"))
+    monkeypatch.setitem(local_inference.cfg, "EVIDENCE", {"enabled": True})
+    monkeypatch.setitem(local_inference.cfg, "OVERLAY", {"enabled": False})
+    cache = LocalDecisionCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(local_inference, "get_decision_cache", lambda: cache)
+    monkeypatch.setattr(local_inference, "cache_key", lambda *args: "key")
+    monkeypatch.setattr(local_inference, "load_model", lambda path: (None, "cpu"))
+
+    def fake_track(model, device, video_file, stats=None, save=True):
+        avi = tmp_path / "out" / "track" / "upload_1.avi"
+        avi.parent.mkdir(parents=True, exist_ok=True)
+        avi.write_bytes(b"avi")
+        return []
+
+    def fake_evidence(results, xy, frame_idx, stem):
+        for path in local_inference.evidence_paths(stem).values():
+            with open(path, "wb") as f:
+                f.write(b"jpg")
+        return {"frame": frame_idx, "sprite_frames": [frame_idx]}
+
+    (tmp_path / "out" / "evidence").mkdir(parents=True)
+    monkeypatch.setattr(local_inference, "track_video", fake_track)
+    monkeypatch.setattr(
+        local_inference,
+        "AnalysisContext",
+        SimpleNamespace(from_results=lambda frames: SimpleNamespace(gated_xy=None)),
+    )
+    monkeypatch.setattr(
+        local_inference,
+        "analyse_attempt",
+        lambda lift, frames, context: {"decision": "Good Lift!", "turnaround_frame": 3},
+    )
+    monkeypatch.setattr(local_inference, "write_evidence", fake_evidence)
+    monkeypatch.setattr(
+        local_inference,
+        "upload_evidence",
+        lambda stem, meta, meet_id, record_id: {"bucket": "b", **meta},
+    )
+    items = []
+    monkeypatch.setattr(
+        local_inference, "update_item", lambda **kwargs: items.append(kwargs["updates"])
+    )
+
+    for _ in range(2):
+        local_inference.run_inference(str(video), "model.pt", "meet", "record#1")
+
+    miss, hit = (item["InferenceResult"] for item in items)
+    assert miss.pop("cache")["hit"] is False
+    assert hit.pop("cache")["hit"] is True
+    assert "evidence" not in hit
+    assert hit == miss
+    assert items[1]["Evidence"] == items[0]["Evidence"]
@@ -0,0 +1,55 @@
+# tests/test_logging_setup.py
+"""
+Tests for the queue-based, idempotent logging setup.
+"""
+
+import logging
+from logging.handlers import QueueHandler
+import pytest
+from refvision.utils import logging_setup
+
+
+@pytest.fixture
+def clean_logging():
+    root = logging.getLogger()
+    level = root.level
+    logging_setup.shutdown_logging()
+    yield
+    logging_setup.shutdown_logging()
+    root.setLevel(level)
+
+
+def test_setup_is_idempotent(tmp_path, clean_logging) -> None:
+    log_file = tmp_path / "logs" / "app.log"
+    for _ in range(3):
+        root = logging_setup.setup_logging(str(log_file))
+    logging_setup.setup_logging()
+
+    queue_handlers = [h for h in root.handlers if isinstance(h, QueueHandler)]
+    assert len(queue_handlers) == 1
+    assert sorted(logging_setup._handlers) == sorted(["console", str(log_file)])
+
+    logging.getLogger("refvision.test").info("written once")
+    logging_setup.shutdown_logging()
+    assert log_file.read_text().count("written once") == 1
+
+
+def test_new_log_file_is_added(tmp_path, clean_logging) -> None:
+    first, second = tmp_path / "a.log", tmp_path / "b.log"
+    logging_setup.setup_logging(str(first))
+    logging_setup.setup_logging(str(second))
+    logging.getLogger("refvision.test").warning("to both")
+    logging_setup.shutdown_logging()
+    assert "to both" in first.read_text()
+    assert "to both" in second.read_text()
+
+
+def test_module_levels(monkeypatch, clean_logging) -> None:
+    monkeypatch.setenv("REFVISION_LOG_LEVELS", "refvision.test.env=ERROR")
+    logging_setup.setup_logging(
+        level="WARNING", module_levels={"refvision.test.arg": "DEBUG"}
+    )
+    assert logging.getLogger().level == logging.WARNING
+    assert logging.getLogger("refvision.test.env").level == logging.ERROR
+    assert logging.getLogger("refvision.test.arg").level == logging.DEBUG
+    assert logging.getLogger("botocore").level == logging.WARNING
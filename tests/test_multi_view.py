@@ -0,0 +1,228 @@
+# tests/test_multi_view.py
+"""
+Tests for multi-view time alignment and decision fusion.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+from refvision.inference import multi_view
+from refvision.inference.multi_view import estimate_offset, fuse_views
+
+
+def hip_series(n_frames: int, start: int) -> np.ndarray:
+    """Hip height that dips between start and start + 40."""
+    ys = np.zeros(n_frames)
+    ys[start : start + 20] = np.linspace(0, 1, 20)
+    ys[start + 20 : start + 40] = np.linspace(1, 0, 20)
+    return ys
+
+
+def make_view(name, decision, score, margin=None, frame=30, fps=30.0, hip_y=None):
+    return {
+        "view": name,
+        "fps": fps,
+        "hip_y": hip_series(120, 20) if hip_y is None else hip_y,
+        "decision": {
+            "decision": decision,
+            "turnaround_frame": frame,
+            "depth_margin": {"normalised": margin},
+            "quality": {"score": score, "escalate": score < 0.6},
+            "rule_evaluation": {
+                "is_successful": decision == "Good Lift!",
+                "reasons": [] if decision == "Good Lift!" else ["Too shallow."],
+            },
+            "lift": "squat",
+        },
+    }
+
+
+def test_estimate_offset_same_fps() -> None:
+    """
+    A view that starts recording later sees the dip earlier in its timeline.
+    """
+    offset = estimate_offset(hip_series(150, 40), 30.0, hip_series(150, 25), 30.0)
+    assert offset == pytest.approx(-0.5, abs=1 / 30)
+
+
+def test_estimate_offset_different_fps() -> None:
+    """
+    Views are compared in seconds, so frame rates can differ.
+    """
+    reference = hip_series(150, 40)  # dip at 40/30 s
+    other = np.interp(np.arange(300) / 60.0, np.arange(150) / 30.0, reference)
+    other = np.roll(other, 30)  # 0.5 s later at 60 fps
+    offset = estimate_offset(reference, 30.0, other, 60.0)
+    assert offset == pytest.approx(0.5, abs=1 / 30)
+
+
+def test_fuse_views_confidence_weighted_vote() -> None:
+    """
+    A confident side view outvotes a low-confidence front view.
+    """
+    fused = fuse_views(
+        [
+            make_view("side", "Good Lift!", 0.9, margin=0.1),
+            make_view("front", "No Lift", 0.3, margin=-0.05),
+        ],
+        reference_view="side",
+    )
+    assert fused["decision"] == "Good Lift!"
+    assert fused["fusion"]["vote"] == pytest.approx((0.9 - 0.3) / 1.2)
+    assert fused["depth_margin"]["normalised"] == pytest.approx(
+        (0.9 * 0.1 - 0.3 * 0.05) / 1.2
+    )
+    assert fused["rule_evaluation"]["is_successful"]
+    assert set(fused["views"]) == {"side", "front"}
+
+
+def test_fuse_views_view_weights() -> None:
+    """
+    Per-view trust weights can flip the vote.
+    """
+    fused = fuse_views(
+        [
+            make_view("side", "No Lift", 0.8, margin=-0.1),
+            make_view("front", "Good Lift!", 0.9, margin=0.1),
+        ],
+        view_weights={"front": 0.5},
+    )
+    assert fused["decision"] == "No Lift"
+    assert fused["rule_evaluation"]["reasons"] == ["Too shallow."]
+
+
+def test_fuse_views_aligns_turnaround() -> None:
+    """
+    The fused turnaround frame is on the reference view's timeline.
+    """
+    fused = fuse_views(
+        [
+            make_view("side", "Good Lift!", 1.0, frame=50, hip_y=hip_series(150, 40)),
+            make_view("front", "Good Lift!", 1.0, frame=35, hip_y=hip_series(150, 25)),
+        ]
+    )
+    assert fused["views"]["front"]["offset_seconds"] == pytest.approx(-0.5, abs=0.04)
+    assert abs(fused["turnaround_frame"] - 50) <= 1
+
+
+def test_fuse_views_fuses_margins_at_the_aligned_instant() -> None:
+    """
+    Each view's margin is read at the fused turnaround, shifted into its own
+    timeline, not at its own turnaround or the reference frame index.
+    """
+    side = make_view(
+        "side", "Good Lift!", 1.0, margin=0.05, frame=50, hip_y=hip_series(150, 40)
+    )
+    front = make_view(
+        "front", "No Lift", 1.0, margin=-0.3, frame=38, hip_y=hip_series(150, 25)
+    )
+    side["margin_y"] = np.full(150, np.nan)
+    side["margin_y"][45:60] = 0.1
+    front["margin_y"] = np.full(150, np.nan)
+    front["margin_y"][30:45] = 0.2
+    fused = fuse_views([side, front])
+
+    assert fused["views"]["side"]["aligned_margin"] == pytest.approx(0.1)
+    assert fused["views"]["front"]["aligned_margin"] == pytest.approx(0.2)
+    assert fused["depth_margin"]["normalised"] == pytest.approx(0.15)
+    assert fused["decision"] == "Good Lift!"
+    assert fused["fusion"]["method"] == "aligned_depth_margin"
+
+
+def test_fuse_views_decides_from_the_fused_margin() -> None:
+    """
+    The decision follows the fused margin against NORMALISED_THRESHOLD, even
+    when most views voted the other way.
+    """
+    fused = fuse_views(
+        [
+            make_view("side", "Good Lift!", 1.0, margin=0.3),
+            make_view("front", "No Lift", 1.0, margin=-0.05),
+            make_view("rear", "No Lift", 1.0, margin=-0.05),
+        ]
+    )
+    assert fused["fusion"]["vote"] < 0
+    assert fused["depth_margin"]["normalised"] == pytest.approx(0.2 / 3)
+    assert fused["decision"] == "Good Lift!"
+    assert fused["fusion"]["threshold"] == multi_view.cfg["NORMALISED_THRESHOLD"]
+
+
+def test_fuse_views_vote_without_margins_and_ties() -> None:
+    """
+    Without margins the weighted vote decides; a tie is a No Lift.
+    """
+    fused = fuse_views(
+        [
+            make_view("side", "Good Lift!", 0.8),
+            make_view("front", "No Lift", 0.4),
+        ]
+    )
+    assert fused["fusion"]["method"] == "confidence_weighted_vote"
+    assert fused["fusion"]["threshold"] is None
+    assert fused["decision"] == "Good Lift!"
+
+    tie = fuse_views(
+        [
+            make_view("side", "Good Lift!", 0.5),
+            make_view("front", "No Lift", 0.5),
+        ]
+    )
+    assert tie["fusion"]["vote"] == 0
+    assert tie["decision"] == "No Lift"
+
+
+def test_fuse_views_requires_a_view() -> None:
+    with pytest.raises(ValueError):
+        fuse_views([])
+
+
+class _Pool(ThreadPoolExecutor):
+    def __init__(self, max_workers=None, mp_context=None):
+        super().__init__(max_workers)
+
+
+def test_run_multi_view_inference_evidence_without_cache(tmp_path, monkeypatch):
+    """
+    The reference view writes the evidence, which is uploaded with the fused
+    decision; multi-view attempts never consult the decision cache.
+    """
+    from refvision.dynamo_db import dynamodb_helpers
+    from refvision.inference import decision_cache
+    from refvision.postprocess import evidence
+
+    videos = {}
+    for name in ("front", "side"):
+        videos[name] = str(tmp_path / f"{name}.mp4")
+        open(videos[name], "w").close()
+    calls = {}
+
+    def fake_infer_view(view, video_file, model_path, lift, evidence=False):
+        calls[view] = evidence
+        result = make_view(view, "Good Lift!", 1.0, margin=0.1)
+        result["evidence"] = {"frame": 30} if evidence else None
+        result["performance"] = {}
+        return result
+
+    def no_cache():
+        raise AssertionError("multi-view attempts are not cached")
+
+    monkeypatch.setattr(multi_view, "ProcessPoolExecutor", _Pool)
+    monkeypatch.setattr(multi_view, "infer_view", fake_infer_view)
+    monkeypatch.setitem(multi_view.cfg, "EVIDENCE", {"enabled": True})
+    monkeypatch.setitem(multi_view.cfg, "MULTI_VIEW", {"reference_view": "side"})
+    monkeypatch.setattr(decision_cache, "get_decision_cache", no_cache)
+    monkeypatch.setattr(
+        evidence,
+        "upload_evidence",
+        lambda stem, meta, meet_id, record_id: {"stem": stem, **meta},
+    )
+    monkeypatch.setattr(
+        dynamodb_helpers,
+        "update_item",
+        lambda meet_id, record_id, updates: calls.update(updates=updates),
+    )
+    decision = multi_view.run_multi_view_inference(videos, "w.pt", "M", "R")
+
+    assert calls["side"] and not calls["front"]
+    assert decision["reference_view"] == "side"
+    assert calls["updates"]["Evidence"] == {"stem": "side", "frame": 30}
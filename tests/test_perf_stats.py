@@ -0,0 +1,105 @@
+# tests/test_perf_stats.py
+"""
+Tests for the per-frame stage timing histograms.
+"""
+
+import time
+import numpy as np
+import pytest
+from refvision.dynamo_db.dynamodb_helpers import convert_decimal_to_float, decimalize
+from refvision.inference.perf_stats import (
+    InferenceStats,
+    LatencyHistogram,
+    format_summary,
+    summarise_records,
+)
+
+
+def test_histogram_percentiles_are_close() -> None:
+    values = np.random.default_rng(0).lognormal(mean=2.0, sigma=0.8, size=5000)
+    hist = LatencyHistogram()
+    hist.add(values)
+    for q in (50, 95, 99):
+        assert hist.percentile(q) == pytest.approx(np.percentile(values, q), rel=0.1)
+    assert hist.percentile(100) == pytest.approx(values.max())
+    assert LatencyHistogram().percentile(50) is None
+
+
+def test_histogram_merge_and_record_round_trip() -> None:
+    rng = np.random.default_rng(1)
+    a, b = rng.uniform(1, 50, 300), rng.uniform(20, 200, 700)
+    left, right, both = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    left.add(a)
+    right.add(b)
+    both.add(np.concatenate([a, b]))
+    left.merge(right)
+    assert left.counts == both.counts
+    assert left.percentile(95) == both.percentile(95)
+
+    # as stored in and read back from DynamoDB
+    record = convert_decimal_to_float(decimalize(both.to_record()))
+    restored = LatencyHistogram.from_record(record)
+    assert restored.counts == both.counts
+    assert restored.to_record()["p99_ms"] == pytest.approx(record["p99_ms"])
+
+
+class _Result:
+    def __init__(self) -> None:
+        self.speed = {"preprocess": 1.0, "inference": 4.0, "postprocess": 0.5}
+
+
+def _frames(n: int):
+    for _ in range(n):
+        time.sleep(0.01)
+        yield _Result()
+
+
+def _batched_frames(n: int, batch: int):
+    """
+    Like a batched predictor: one wait per batch, then the whole batch.
+    """
+    for first in range(0, n, batch):
+        size = min(batch, n - first)
+        time.sleep(0.01 * size)
+        for _ in range(size):
+            yield _Result()
+
+
+def test_inference_stats_splits_batches_across_frames() -> None:
+    stats = InferenceStats()
+    frames = list(stats.timed(_batched_frames(10, 4), batch=4))
+    stages = stats.to_record()["stages"]
+
+    assert len(frames) == stages["frame"]["count"] == 10
+    # 10 ms per frame in every batch, including the short last one
+    assert stages["frame"]["min_ms"] >= 10.0
+    assert stages["frame"]["max_ms"] < 20.0
+    assert stages["decode_wait"]["min_ms"] > 3.0
+
+
+def test_inference_stats_flushes_a_partial_batch() -> None:
+    stats = InferenceStats()
+    for i, _ in enumerate(stats.timed(_batched_frames(10, 4), batch=4)):
+        if i == 5:
+            break
+    assert stats.stages["frame"].count == 6
+
+
+def test_inference_stats_records_frame_stages() -> None:
+    stats = InferenceStats()
+    frames = list(stats.timed(_frames(5)))
+    stats.finish(analysis_ms=12.0)
+    record = stats.to_record()
+
+    assert len(frames) == record["frames"] == 5
+    stages = record["stages"]
+    assert stages["inference"]["p50_ms"] == pytest.approx(4.0, rel=0.1)
+    # 10 ms of sleep per frame, 5.5 ms of it attributed to the model
+    assert stages["decode_wait"]["p50_ms"] > 3.0
+    assert stages["frame"]["min_ms"] >= 10.0
+
+    summary = summarise_records([record, record])
+    assert summary["attempts"] == 2 and summary["frames"] == 10
+    assert summary["stages"]["inference"]["count"] == 10
+    assert summary["stages"]["analysis"]["count"] == 2
+    assert "decode_wait" in format_summary(summary)
@@ -0,0 +1,130 @@
+# tests/test_squat_features.py
+"""
+Tests for the squat feature extractor.
+"""
+
+import numpy as np
+import pytest
+from refvision.analysis.context import AnalysisContext
+from refvision.analysis.squat_features import extract_squat_features
+
+
+def make_squat_track(
+    profile: np.ndarray, bottom_hip_y: float = 420.0
+) -> AnalysisContext:
+    """
+    Builds an analysis context from a depth profile, where 0 is standing and
+    1 is the bottom of the squat.
+    """
+    xy = np.zeros((len(profile), 17, 2))
+    hip_y = 300.0 + profile * (bottom_hip_y - 300.0)
+    xy[:, 11] = np.stack([320.0 - 60.0 * profile, hip_y], axis=1)
+    xy[:, 12] = xy[:, 11]
+    xy[:, 13] = np.stack([320.0 + 60.0 * profile, np.full_like(profile, 400.0)], 1)
+    xy[:, 14] = xy[:, 13]
+    xy[:, 15] = [320.0, 500.0]
+    xy[:, 16] = [320.0, 500.0]
+    return AnalysisContext(xy)
+
+
+def clean_profile() -> np.ndarray:
+    """Stand, descend, ascend, stand."""
+    return np.concatenate(
+        [np.zeros(10), np.linspace(0, 1, 20), np.linspace(1, 0, 20), np.zeros(10)]
+    )
+
+
+def test_clean_deep_squat() -> None:
+    """
+    A clean squat below parallel passes every pose-derived rule.
+    """
+    features = extract_squat_features(make_squat_track(clean_profile()))
+    assert features["knees_locked"]
+    assert features["descent_below_parallel"]
+    assert not features["double_bounce"]
+    assert not features["downward_movement_during_ascent"]
+    assert features["knees_locked_at_finish"]
+    assert 28 <= features["turnaround_frame"] <= 31
+
+
+def test_shallow_squat() -> None:
+    """
+    Hips that never pass the knees fail the depth rule only.
+    """
+    features = extract_squat_features(
+        make_squat_track(clean_profile(), bottom_hip_y=380.0)
+    )
+    assert not features["descent_below_parallel"]
+    assert features["knees_locked_at_finish"]
+
+
+def test_double_bounce() -> None:
+    """
+    A second dip near the bottom is a double bounce.
+    """
+    profile = np.concatenate(
+        [
+            np.zeros(10),
+            np.linspace(0, 1, 20),
+            np.linspace(1, 0.9, 4),
+            np.linspace(0.9, 1, 4),
+            np.linspace(1, 0, 20),
+            np.zeros(10),
+        ]
+    )
+    features = extract_squat_features(make_squat_track(profile))
+    assert features["double_bounce"]
+    assert not features["downward_movement_during_ascent"]
+
+
+def test_downward_movement_during_ascent() -> None:
+    """
+    Sinking back down halfway up is downward movement during the ascent.
+    """
+    profile = np.concatenate(
+        [
+            np.zeros(10),
+            np.linspace(0, 1, 20),
+            np.linspace(1, 0.5, 10),
+            np.linspace(0.5, 0.65, 5),
+            np.linspace(0.65, 0, 15),
+            np.zeros(10),
+        ]
+    )
+    features = extract_squat_features(make_squat_track(profile))
+    assert features["downward_movement_during_ascent"]
+    assert not features["double_bounce"]
+
+
+def test_no_lockout_at_finish() -> None:
+    """
+    Finishing with bent knees fails the completion lockout rule.
+    """
+    profile = np.concatenate(
+        [np.zeros(10), np.linspace(0, 1, 20), np.linspace(1, 0.4, 20)]
+    )
+    features = extract_squat_features(make_squat_track(profile))
+    assert features["knees_locked"]
+    assert not features["knees_locked_at_finish"]
+
+
+def test_empty_track() -> None:
+    """
+    A track without any detections fails safe.
+    """
+    features = extract_squat_features(AnalysisContext(np.full((5, 17, 2), np.nan)))
+    assert features["turnaround_frame"] is None
+    assert not features["descent_below_parallel"]
+
+
+def test_features_are_resolution_invariant() -> None:
+    """
+    Downscaling the track does not change any derived feature.
+    """
+    profile = clean_profile()
+    full = extract_squat_features(make_squat_track(profile))
+    half = extract_squat_features(AnalysisContext(make_squat_track(profile).xy * 0.5))
+    for key in ("descent_below_parallel", "double_bounce", "knees_locked"):
+        assert full[key] == half[key]
+    assert half["depth_margin"] == pytest.approx(full["depth_margin"])
+    assert half["depth_margin_px"] == pytest.approx(full["depth_margin_px"] / 2)
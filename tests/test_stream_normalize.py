@@ -0,0 +1,147 @@
+# tests/test_stream_normalize.py
+"""
+Tests for the S3 => ffmpeg => S3 streaming normaliser, against the LocalS3
+stand-in and a stand-in "ffmpeg" on PATH that copies stdin to stdout.
+"""
+
+import os
+import subprocess
+import sys
+import pytest
+from refvision.io.s3_stream import S3MultipartWriter, read_range
+from refvision.postprocess import stream_normalize
+
+FAKE_FFMPEG = """#!{python}
+import os, sys
+args = sys.argv[1:]
+progress = os.fdopen(int(args[args.index("-progress") + 1].split(":")[1]), "w")
+source = args[args.index("-i") + 1]
+out = sys.stdout.buffer
+if source == "pipe:0":
+    while True:
+        chunk = sys.stdin.buffer.read(7)
+        if not chunk:
+            break
+        out.write(chunk)
+else:
+    out.write(b"URL:" + source.encode())
+out.flush()
+progress.write("frame=1\\nout_time_us=40000\\nprogress=end\\n")
+progress.close()
+sys.exit(int(os.environ.get("FAKE_FFMPEG_EXIT", "0")))
+"""
+
+
+def _box(kind: bytes, payload: bytes) -> bytes:
+    return (8 + len(payload)).to_bytes(4, "big") + kind + payload
+
+
+MOOV_FIRST = (
+    _box(b"ftyp", b"isom" * 2) + _box(b"moov", b"m" * 20) + _box(b"mdat", b"d" * 50)
+)
+MDAT_FIRST = (
+    _box(b"ftyp", b"isom" * 2) + _box(b"mdat", b"d" * 50) + _box(b"moov", b"m" * 20)
+)
+
+
+@pytest.fixture
+def streaming(tmp_path, monkeypatch, local_s3):
+    ffmpeg = tmp_path / "bin" / "ffmpeg"
+    ffmpeg.parent.mkdir()
+    ffmpeg.write_text(FAKE_FFMPEG.format(python=sys.executable))
+    os.chmod(ffmpeg, 0o755)
+    monkeypatch.setenv("PATH", f"{ffmpeg.parent}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setattr(stream_normalize, "get_s3_client", lambda: local_s3)
+    monkeypatch.setitem(
+        stream_normalize.cfg, "STREAM_NORMALIZE", {"part_size_mb": 1, "chunk_kb": 1}
+    )
+    return local_s3
+
+
+def _compatible_probe(url):
+    return {
+        "format": {"format_name": "mov,mp4,m4a,3gp,3g2,mj2"},
+        "streams": [
+            {"codec_type": "video", "codec_name": "h264", "pix_fmt": "yuv420p"}
+        ],
+    }
+
+
+def test_moov_before_mdat(local_s3) -> None:
+    local_s3.put_object(Bucket="b", Key="fast.mp4", Body=MOOV_FIRST)
+    local_s3.put_object(Bucket="b", Key="slow.mp4", Body=MDAT_FIRST)
+    local_s3.put_object(Bucket="b", Key="clip.avi", Body=b"RIFF\x00\x00\x00\x00AVI ")
+
+    def reader(key):
+        return lambda start, length: read_range("b", key, start, length, local_s3)
+
+    assert stream_normalize.moov_before_mdat(reader("fast.mp4")) is True
+    assert stream_normalize.moov_before_mdat(reader("slow.mp4")) is False
+    assert stream_normalize.moov_before_mdat(reader("clip.avi")) is None
+
+
+def test_streaming_command_writes_fragmented_mp4() -> None:
+    cmd = ["ffmpeg", "-i", "pipe:0", "-c:v", "copy", "-movflags", "+faststart", "o.mp4"]
+    assert stream_normalize.streaming_command(cmd) == [
+        "ffmpeg",
+        "-i",
+        "pipe:0",
+        "-c:v",
+        "copy",
+        "-movflags",
+        stream_normalize.FRAGMENTED_MOVFLAGS,
+        "-f",
+        "mp4",
+        "pipe:1",
+    ]
+
+
+def test_multipart_writer_uploads_parts(local_s3) -> None:
+    with S3MultipartWriter("b", "out.mp4", part_size=4, s3_client=local_s3) as w:
+        w.write(b"0123456789")
+    assert local_s3.objects[("b", "out.mp4")]["Body"] == b"0123456789"
+    assert w.parts == 3 and not local_s3.uploads
+
+    with pytest.raises(RuntimeError):
+        with S3MultipartWriter("b", "bad.mp4", part_size=4, s3_client=local_s3) as w:
+            w.write(b"0123456789")
+            raise RuntimeError("producer failed")
+    assert ("b", "bad.mp4") not in local_s3.objects and not local_s3.uploads
+
+
+def test_stream_normalize_pipes_s3_through_ffmpeg(
+    streaming, tmp_path, monkeypatch
+) -> None:
+    monkeypatch.setattr(stream_normalize, "probe_url", _compatible_probe)
+    body = MOOV_FIRST * 40000  # ~4 MB, several 1 MB parts
+    streaming.put_object(Bucket="raw", Key="incoming/a.mov", Body=body)
+    local_copy = tmp_path / "out" / "a.mp4"
+
+    result = stream_normalize.stream_normalize(
+        "raw", "incoming/a.mov", "norm", "normalized/a.mp4", local_copy=str(local_copy)
+    )
+    assert result["mode"] == "remux" and result["input"] == "pipe"
+    assert result["bytes"] == len(body) and result["parts"] == 4
+    assert streaming.objects[("norm", "normalized/a.mp4")]["Body"] == body
+    assert local_copy.read_bytes() == body
+
+
+def test_stream_normalize_reads_mdat_first_files_from_url(streaming) -> None:
+    streaming.put_object(Bucket="raw", Key="b.mp4", Body=MDAT_FIRST)
+    # no ffprobe here: the probe fails and the video is re-encoded
+    result = stream_normalize.stream_normalize("raw", "b.mp4", "norm", "b.mp4")
+    assert result["mode"] == "transcode" and result["input"] == "url"
+    body = streaming.objects[("norm", "b.mp4")]["Body"]
+    assert body == b"URL:https://local-s3/raw/b.mp4?sig"
+
+
+def test_failed_ffmpeg_aborts_upload(streaming, tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("FAKE_FFMPEG_EXIT", "1")
+    streaming.put_object(Bucket="raw", Key="c.mov", Body=MOOV_FIRST)
+    local_copy = tmp_path / "c.mp4"
+    with pytest.raises(subprocess.CalledProcessError):
+        stream_normalize.stream_normalize(
+            "raw", "c.mov", "norm", "c.mp4", local_copy=str(local_copy)
+        )
+    assert ("norm", "c.mp4") not in streaming.objects and not streaming.uploads
+    assert not local_copy.exists()
@@ -0,0 +1,116 @@
+# tests/test_tracing.py
+"""
+Tests for the structured tracing spans and their exports.
+"""
+
+import asyncio
+import json
+import threading
+import pytest
+from refvision.utils import tracing
+
+
+@pytest.fixture
+def enabled(tmp_path):
+    tracing.clear()
+    tracing.enable(str(tmp_path))
+    yield tmp_path
+    tracing.disable()
+    tracing.clear()
+
+
+def test_disabled_records_nothing() -> None:
+    tracing.disable()
+    tracing.clear()
+
+    @tracing.traced()
+    def work() -> int:
+        return 1
+
+    with tracing.span("outer") as s:
+        s.set(frames=3)
+        assert work() == 1
+    assert list(tracing.traced_iter([1, 2], "item")) == [1, 2]
+    assert tracing.collected_spans() == []
+
+
+def test_spans_nest_and_summarise(enabled) -> None:
+    @tracing.traced("inner")
+    def inner() -> None:
+        pass
+
+    with tracing.span("outer", lift="squat"):
+        inner()
+        inner()
+    assert list(tracing.traced_iter("ab", "frame")) == ["a", "b"]
+
+    spans = {s["name"]: s for s in tracing.collected_spans()}
+    assert spans["inner"]["parent"] == spans["outer"]["id"]
+    assert spans["outer"]["parent"] is None
+    assert spans["outer"]["attrs"] == {"lift": "squat"}
+
+    rows = {r["name"]: r for r in tracing.summarise()}
+    assert rows["inner"]["count"] == 2
+    assert rows["frame"]["count"] == 3  # two items and the exhausted call
+    outer = rows["outer"]
+    assert outer["self_ms"] == pytest.approx(
+        outer["total_ms"] - rows["inner"]["total_ms"]
+    )
+    assert "outer" in tracing.format_summary(list(rows.values()))
+
+
+def test_threads_and_tasks_keep_their_own_parents(enabled) -> None:
+    def worker() -> None:
+        with tracing.span("thread"):
+            with tracing.span("thread.child"):
+                pass
+
+    with tracing.span("main"):
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    @tracing.traced("task")
+    async def task() -> None:
+        with tracing.span("task.child"):
+            await asyncio.sleep(0)
+
+    async def run() -> None:
+        await asyncio.gather(task(), task())
+
+    asyncio.run(run())
+
+    spans = tracing.collected_spans()
+    by_id = {s["id"]: s for s in spans}
+    for s in spans:
+        if s["name"].endswith(".child"):
+            parent = by_id[s["parent"]]
+            assert parent["name"] == s["name"].split(".")[0]
+            assert parent["tid"] == s["tid"]
+    # a new thread starts with an empty context
+    assert all(by_id.get(s["parent"]) is None for s in spans if s["name"] == "thread")
+
+
+def test_chrome_trace_round_trip(enabled) -> None:
+    with tracing.span("pipeline.normalize", path="a.mp4"):
+        with tracing.span("pipeline.normalize.probe"):
+            pass
+    path = tracing.write_trace()
+    assert path.startswith(str(enabled))
+
+    trace = tracing.merge_traces(str(enabled), str(enabled / "merged.json"))
+    events = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    assert {e["name"] for e in events} == {
+        "pipeline.normalize",
+        "pipeline.normalize.probe",
+    }
+    assert all(e["dur"] >= 0 and e["cat"] == "pipeline" for e in events)
+    json.loads((enabled / "merged.json").read_text())
+
+    spans = tracing.spans_from_trace(trace)
+    assert sorted(s["name"] for s in spans) == sorted(
+        s["name"] for s in tracing.collected_spans()
+    )
+    assert {s["attrs"].get("path") for s in spans} == {"a.mp4", None}
@@ -0,0 +1,48 @@
+# tests/test_tracking.py
+"""
+Tests for pose tracking over a video with a loaded model.
+"""
+
+import time
+from refvision.inference import tracking
+from refvision.inference.perf_stats import InferenceStats
+
+
+class _StreamingModel:
+    """
+    Model with YOLO's track() API. With stream=True the frames come from a
+    generator that spends time on every batch; otherwise the whole clip is
+    inferred up front and returned as a finished list, like ultralytics.
+    """
+
+    def __init__(self, frames: int, batch_s: float = 0.01) -> None:
+        self.frames = frames
+        self.batch_s = batch_s
+        self.kwargs: dict = {}
+
+    def _generate(self, batch: int):
+        for f_idx in range(self.frames):
+            if f_idx % batch == 0:
+                time.sleep(self.batch_s)
+            yield f_idx
+
+    def track(self, stream: bool = False, batch: int = 1, **kwargs):
+        self.kwargs = {"stream": stream, "batch": batch, **kwargs}
+        frames = self._generate(batch)
+        return frames if stream else list(frames)
+
+
+def test_track_video_times_the_streamed_frames(monkeypatch) -> None:
+    monkeypatch.setitem(tracking.cfg, "OUTPUT_DIR", "runs")
+    model = _StreamingModel(frames=300)
+    stats = InferenceStats()
+    frames = tracking.track_video(model, "cpu", "in.mp4", stats=stats)
+
+    assert frames == list(range(300))
+    assert model.kwargs["stream"]
+    record = stats.to_record()
+    assert record["frames"] == 300
+    # three batches of 128 frames, each sleeping batch_s
+    frame = record["stages"]["frame"]
+    assert frame["p50_ms"] > 0.01
+    assert record["fps"] < 300 / (3 * model.batch_s) * 1.01
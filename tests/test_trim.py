@@ -0,0 +1,130 @@
+# tests/test_trim.py
+"""
+Tests for trimming attempt videos to the lift window.
+"""
+
+import subprocess
+import cv2
+import numpy as np
+import pytest
+from refvision.postprocess import probe, trim
+
+SETTINGS = {
+    "method": "motion",
+    "sample_fps": 5,
+    "analysis_width": 80,
+    "min_energy": 1.0,
+    "threshold_mads": 3.0,
+    "merge_gap_s": 1.5,
+    "pad_s": 0.5,
+    "min_saving_s": 2.0,
+    "max_preroll_s": 1.0,
+}
+
+
+@pytest.fixture(autouse=True)
+def _trim_settings(monkeypatch):
+    monkeypatch.setitem(trim.cfg, "TRIM", dict(SETTINGS))
+
+
+def _write_video(path, still_s=3, moving_s=2, fps=10, size=(160, 120)):
+    """
+    Still, moving and still again: a white block sweeps across the middle.
+    """
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+    total = (2 * still_s + moving_s) * fps
+    for i in range(total):
+        frame = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        moving = still_s * fps <= i < (still_s + moving_s) * fps
+        x = (i - still_s * fps) * 7 % (size[0] - 20) if moving else 10
+        frame[40:80, x : x + 20] = 255
+        writer.write(frame)
+    writer.release()
+    return str(path)
+
+
+def test_motion_window_picks_the_busiest_segment() -> None:
+    times = np.arange(50) * 0.2
+    energy = np.full(50, 0.3)
+    energy[10:13] = 5.0  # loaders
+    energy[25:35] = 12.0  # the lift
+    energy[37:39] = 8.0  # re-rack, within merge_gap_s
+    window = trim.motion_window(times, energy)
+    assert window is not None
+    start, end = window
+    assert start == pytest.approx(times[24])
+    assert end == pytest.approx(times[38])
+
+
+def test_motion_window_none_without_motion() -> None:
+    times = np.arange(20) * 0.2
+    assert trim.motion_window(times, np.full(20, 0.2)) is None
+    assert trim.motion_window(times[:1], np.zeros(1)) is None
+
+
+def test_motion_energy_on_a_video(tmp_path) -> None:
+    video = _write_video(tmp_path / "clip.avi")
+    times, energy = trim.motion_energy(video, sample_fps=5, width=80)
+    assert times[1] == pytest.approx(0.2)
+    window = trim.motion_window(times, energy)
+    assert window is not None
+    start, end = window
+    assert 2.5 <= start <= 3.2
+    assert 4.6 <= end <= 5.4
+
+
+def test_cut_plan_copies_from_a_close_keyframe() -> None:
+    plan = trim.cut_plan(4.3, 9.0, [0.0, 2.0, 4.0, 6.0])
+    assert plan == {"mode": "copy", "offset_s": 4.0, "end_s": 9.0}
+    plan = trim.cut_plan(3.5, 9.0, [0.0, 2.0, 4.0, 6.0])
+    assert plan == {"mode": "encode", "offset_s": 3.5, "end_s": 9.0}
+    assert trim.cut_plan(1.0, 2.0, [])["mode"] == "encode"
+
+
+def test_cut_command() -> None:
+    copy = trim.cut_command(
+        "in.mp4", "out.mp4", {"mode": "copy", "offset_s": 4.0, "end_s": 9.5}
+    )
+    assert copy[:8] == ["ffmpeg", "-y", "-ss", "4.000", "-i", "in.mp4", "-t", "5.500"]
+    assert copy[copy.index("-c") + 1] == "copy"
+    assert copy[-1] == "out.mp4"
+    encode = trim.cut_command(
+        "in.mp4", "out.mp4", {"mode": "encode", "offset_s": 3.5, "end_s": 9.0}
+    )
+    assert "copy" not in encode
+    assert "-c:v" in encode
+
+
+def test_trim_video(tmp_path, monkeypatch) -> None:
+    video = _write_video(tmp_path / "attempt.avi")
+    commands = []
+    monkeypatch.setattr(trim, "run_command", lambda cmd, **kwargs: commands.append(cmd))
+    monkeypatch.setattr(trim, "keyframe_times", lambda path: [0.0, 2.0, 5.0])
+
+    record = trim.trim_video(video, str(tmp_path / "trimmed"))
+    assert record["trimmed"] is True
+    assert record["mode"] == "copy"
+    assert record["offset_s"] == 2.0
+    assert record["offset_frames"] == 20
+    assert record["path"] == str(tmp_path / "trimmed" / "attempt.mp4")
+    assert record["source_duration_s"] == pytest.approx(8.0)
+    assert commands[0][-1] == record["path"]
+
+
+def test_trim_video_keeps_short_videos(tmp_path, monkeypatch) -> None:
+    video = _write_video(tmp_path / "attempt.avi", still_s=0, moving_s=3)
+    monkeypatch.setattr(trim, "run_command", pytest.fail)
+    record = trim.trim_video(video, str(tmp_path / "trimmed"))
+    assert record["trimmed"] is False
+    assert record["path"] == video
+
+
+def test_keyframe_times(monkeypatch) -> None:
+    out = "0.000000,K__\n0.033333,___\n2.000000,K__\nN/A,K__\n1.000000,K_\n"
+
+    def fake_run(cmd, **kwargs):
+        assert "packet=pts_time,flags" in cmd
+        return subprocess.CompletedProcess(cmd, 0, stdout=out)
+
+    monkeypatch.setattr(probe.subprocess, "run", fake_run)
+    assert probe.keyframe_times("in.mp4") == [0.0, 1.0, 2.0]
@@ -1,59 +1,121 @@
 # tests/test_video_processor.py
 """
-
+Tests for the skeleton overlay renderer.
 """
-# import os
-# import cv2
-# import numpy as np
-# from typing import Any, Dict
-# from pathlib import Path
-# from refvision.inference import video_processor
-#
-#
-# # Dummy classes to simulate inference results.
-# class DummyKeypoints:
-#     def __init__(self, xy):
-#         self.xy = xy
-#
-#
-# class DummyBox:
-#     def __init__(self, xyxy, conf, id=None):
-#         self.xyxy = [xyxy]
-#         self.conf = conf
-#         self.id = id
-#
-#
-# class DummyFrameResult:
-#     def __init__(self, keypoints, boxes):
-#         self.keypoints = keypoints
-#         self.boxes = boxes
-#
-#
-# def create_dummy_video(tmp_path: Path) -> str:
-#     """
-#     Creates a one-frame dummy video and returns its path.
-#     """
-#     video_path = str(tmp_path / "test_video.mp4")
-#     fourcc = cv2.VideoWriter_fourcc(*"mp4v")  # type: ignore[attr-defined]
-#     writer = cv2.VideoWriter(video_path, fourcc, 1.0, (100, 100))
-#     frame = np.zeros((100, 100, 3), dtype=np.uint8)
-#     writer.write(frame)
-#     writer.release()
-#     return video_path
-#
-#
-# def test_annotate_video(tmp_path: Path) -> None:
-#     """
-#     Test that annotate_video creates an output file.
-#     """
-#     video_file = create_dummy_video(tmp_path)
-#     # Create a dummy inference result with one frame, one detection.
-#     dummy_kpts = DummyKeypoints(xy=np.array([[50, 50]]))
-#     dummy_box = DummyBox(xyxy=(40, 40, 60, 60), conf=0.9)
-#     dummy_result = DummyFrameResult(keypoints=[dummy_kpts], boxes=[dummy_box])
-#     results = [dummy_result]
-#     config: Dict[str, Any] = {"lifter_selector": {"excluded_ids": []}}
-#     out_path = video_processor.annotate_video(video_file, results, config)
-#     assert os.path.exists(out_path)
-#     # Check that the file is not empty.
-#     assert os.path.getsize(out_path) > 0
+
+import cv2
+import numpy as np
+import pytest
+from refvision.analysis.context import AnalysisContext
+from refvision.inference import video_processor
+
+W, H = 160, 120
+
+
+@pytest.fixture(autouse=True)
+def _overlay_settings(monkeypatch):
+    monkeypatch.setitem(
+        video_processor.cfg,
+        "OVERLAY",
+        {"enabled": True, "fourcc": "MJPG", "workers": 3, "chunk_frames": 4},
+    )
+
+
+def _track(n=20, hip_y=70.0):
+    """
+    Standing lifter on the left half; the hips drop below the knees in the
+    second half of the attempt.
+    """
+    cfg = video_processor.cfg
+    xy = np.full((n, 17, 2), np.nan)
+    joints = {
+        "SHOULDER": 30.0,
+        "ELBOW": 45.0,
+        "WRIST": 60.0,
+        "HIP": hip_y,
+        "KNEE": 85.0,
+        "ANKLE": 110.0,
+    }
+    for name, y in joints.items():
+        xy[:, cfg[f"LEFT_{name}_IDX"]] = [30, y]
+        xy[:, cfg[f"RIGHT_{name}_IDX"]] = [50, y]
+    xy[n // 2 :, [cfg["LEFT_HIP_IDX"], cfg["RIGHT_HIP_IDX"]], 1] = 90.0
+    return xy
+
+
+def _write_video(path, n=20):
+    """
+    Frame i is a flat grey of value 10 * i on the right half, so frame order
+    can be checked after encoding.
+    """
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (W, H))
+    for i in range(n):
+        frame = np.zeros((H, W, 3), dtype=np.uint8)
+        frame[:, W // 2 :] = 10 * i
+        writer.write(frame)
+    writer.release()
+    return str(path)
+
+
+def test_overlay_track_is_precomputed_for_all_frames() -> None:
+    xy = _track()
+    xy[3, video_processor.cfg["LEFT_KNEE_IDX"]] = np.nan
+    xy[3:5, video_processor.cfg["RIGHT_KNEE_IDX"]] = np.nan
+    overlay = video_processor.overlay_track(AnalysisContext(xy))
+
+    assert overlay["points"].shape == (20, 17, 2)
+    assert overlay["points"].dtype == np.int32
+    assert overlay["limb_visible"].shape == (20, len(video_processor.limb_pairs()))
+    assert not overlay["visible"][0, 0]  # the face is never drawn
+    assert overlay["knee_top"][0] == 85 and overlay["hip"][0] == 70
+    assert not overlay["below"][0] and overlay["below"][-1]
+    assert overlay["angles"].shape == (20, len(video_processor.ANGLE_JOINTS))
+
+
+def test_draw_overlay_draws_limbs_and_depth_line() -> None:
+    overlay = video_processor.overlay_track(AnalysisContext(_track()))
+    frame = np.zeros((H, W, 3), dtype=np.uint8)
+    video_processor.draw_overlay(frame, overlay, 0)
+    # thigh between hip (30, 70) and knee (30, 85)
+    assert frame[78, 30].sum() > 0
+    # depth line at knee height, red while the hips are high
+    assert frame[85, W - 5].argmax() == 2
+
+    frame = np.zeros((H, W, 3), dtype=np.uint8)
+    video_processor.draw_overlay(frame, overlay, 15)
+    assert frame[85, W - 5].argmax() == 1  # green once below
+
+
+def test_annotate_video_keeps_frame_order(tmp_path) -> None:
+    video = _write_video(tmp_path / "in.avi")
+    out = str(tmp_path / "track" / "in.avi")
+    context = AnalysisContext(_track(n=18))  # two frames past the track
+
+    assert video_processor.annotate_video(video, context, out) == out
+    cap = cv2.VideoCapture(out)
+    values = []
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        values.append(int(round(float(frame[:, W - 10 :].mean()) / 10)))
+        assert frame[78, 30].sum() > 0 or len(values) > 18
+    cap.release()
+    assert values == list(range(20))
+
+
+def test_annotate_video_draws_on_given_frames(tmp_path) -> None:
+    video = _write_video(tmp_path / "in.avi", n=6)
+    frames = [np.zeros((H, W, 3), dtype=np.uint8) for _ in range(6)]
+    out = str(tmp_path / "out.avi")
+    video_processor.annotate_video(video, AnalysisContext(_track(n=6)), out, frames)
+    assert all(frame[78, 30].sum() > 0 for frame in frames)
+
+
+def test_annotate_video_missing_file(tmp_path) -> None:
+    with pytest.raises(RuntimeError):
+        video_processor.annotate_video(
+            str(tmp_path / "missing.avi"),
+            AnalysisContext(_track()),
+            str(tmp_path / "out.avi"),
+        )